@@ -3,12 +3,11 @@ import gc
 import json
 import logging
 import os
-import resource
 import sys
-from typing import Dict, Any
-
-import pandas as pd
+from typing import Dict, Any, Iterable, List, Mapping, Optional
 
+from analytics.stage_graph import Stage, peak_rss_mb, run_stages
+from db.analytics_dataset import AnalyticsDataset
 from db.database import get_database
 from db.db_analytics import AnalyticsQueries
 from utils.analytics_cache import AnalyticsStorage
@@ -21,8 +20,7 @@ EM_CANDIDATE_K_FRACTION = 0.10
 def log_memory(stage: str) -> None:
     """Log current RSS usage in MB for lightweight tracking."""
     try:
-        rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
-        logger.info("Memory usage after %s: %.1f MB RSS", stage, rss_kb / 1024.0)
+        logger.info("Memory usage after %s: %.1f MB RSS", stage, peak_rss_mb())
     except Exception:
         logger.debug("Memory usage unavailable at stage: %s", stage)
 
@@ -53,105 +51,84 @@ def enrich_tree_with_recipe_counts(
     return tree_node
 
 
-def regenerate_analytics() -> Dict[str, Any]:
-    """
-    Core analytics regeneration logic.
+def _storage() -> AnalyticsStorage:
+    return AnalyticsStorage(os.environ["ANALYTICS_PATH"])
 
-    Generates:
-    - Root-level ingredient usage statistics
-    - Recipe complexity distribution
-    - Cocktail space UMAP projections (Manhattan and EM-based)
-    - Ingredient tree with recipe counts
 
-    Stores results on local disk via AnalyticsStorage.
-    """
-    # Get environment configuration
-    storage_path = os.environ.get("ANALYTICS_PATH")
-    if not storage_path:
-        raise ValueError("ANALYTICS_PATH environment variable not set")
+def _queries(dataset: AnalyticsDataset, db: Optional[Any] = None) -> AnalyticsQueries:
+    """AnalyticsQueries reading from an already loaded snapshot."""
+    analytics_queries = AnalyticsQueries(db)
+    analytics_queries.dataset = dataset
+    return analytics_queries
 
-    logger.info("Starting analytics regeneration")
 
-    # Initialize components
-    db = get_database()
-    analytics_queries = AnalyticsQueries(db)
-    storage = AnalyticsStorage(storage_path)
+def load_dataset_stage() -> Dict[str, Any]:
+    """Read every input once: all stages consume the same consistent snapshot."""
+    logger.info("Loading analytics dataset snapshot")
+    dataset = AnalyticsQueries(get_database()).load_dataset()
+    log_memory("analytics dataset loaded")
+    return {"dataset": dataset}
 
-    # Query all ingredient data once (used for both stats and tree)
-    logger.info("Querying all ingredient usage statistics")
-    all_ingredient_stats = analytics_queries.get_ingredient_usage_stats(
-        all_ingredients=True
-    )
-    log_memory("ingredient stats query")
 
-    # Filter to root-level ingredients for the ingredient-usage endpoint
+def ingredient_usage_stage(dataset: AnalyticsDataset) -> Dict[str, Any]:
+    """Store usage statistics of the root-level ingredients."""
     ingredient_stats = [
-        ing for ing in all_ingredient_stats if ing["parent_id"] is None
+        ing for ing in dataset.ingredient_stats if ing["parent_id"] is None
     ]
     logger.info("Filtered to %s root-level ingredients", len(ingredient_stats))
-    storage.put_analytics("ingredient-usage", ingredient_stats)
-    ingredient_stats_count = len(ingredient_stats)
-    del ingredient_stats
-    gc.collect()
-
-    # Convert all ingredients to DataFrame for tree building
-    ingredients_df = pd.DataFrame(all_ingredient_stats)
-    del all_ingredient_stats
-    gc.collect()
-    if not ingredients_df.empty:
-        ingredients_df = ingredients_df.rename(
-            columns={
-                "path": "ingredient_path",
-                "direct_usage": "direct_recipe_count",
-                "hierarchical_usage": "hierarchical_recipe_count",
-            }
-        )
-        ingredients_df["substitution_level"] = 1.0
+    _storage().put_analytics("ingredient-usage", ingredient_stats)
+    return {"ingredient_stats_count": len(ingredient_stats)}
+
 
-    # Generate recipe complexity distribution
+def recipe_complexity_stage(dataset: AnalyticsDataset) -> Dict[str, Any]:
+    """Store the recipe complexity distribution."""
     logger.info("Generating recipe complexity distribution")
-    complexity_stats = analytics_queries.get_recipe_complexity_distribution()
-    storage.put_analytics("recipe-complexity", complexity_stats)
-    complexity_stats_count = len(complexity_stats)
-    del complexity_stats
-    gc.collect()
-    log_memory("recipe complexity stored")
-
-    # Generate both cocktail space variants for comparison
+    complexity_stats = dataset.recipe_complexity()
+    _storage().put_analytics("recipe-complexity", complexity_stats)
+    return {"complexity_stats_count": len(complexity_stats)}
+
+
+def cocktail_space_stage(dataset: AnalyticsDataset) -> Dict[str, Any]:
+    """Store the Manhattan-based cocktail space UMAP."""
     logger.info("Generating Manhattan-based cocktail space")
-    cocktail_space_manhattan = analytics_queries.compute_cocktail_space_umap()
-    storage.put_analytics("cocktail-space", cocktail_space_manhattan)
-    cocktail_space_count = len(cocktail_space_manhattan)
-    del cocktail_space_manhattan
-    gc.collect()
-    log_memory("cocktail space manhattan stored")
+    cocktail_space_manhattan = _queries(dataset).compute_cocktail_space_umap()
+    _storage().put_analytics("cocktail-space", cocktail_space_manhattan)
+    return {"cocktail_space_count": len(cocktail_space_manhattan)}
+
 
+def cocktail_space_em_stage(dataset: AnalyticsDataset) -> Dict[str, Any]:
+    """Store the EM-based cocktail space UMAP and the recipe similarity table."""
     logger.info("Generating EM-based cocktail space with rollup")
     # Compute candidate_k based on recipe count: k = 0.10 * n_recipes
     # This provides ~94% speedup with minimal accuracy loss
-    n_recipes = len(set(r["recipe_id"] for r in analytics_queries.db.execute_query(
-        "SELECT DISTINCT recipe_id FROM recipe_ingredients"
-    )))
+    n_recipes = dataset.n_recipes
     candidate_k = max(10, int(EM_CANDIDATE_K_FRACTION * n_recipes))  # Minimum k=10 for small datasets
     logger.info(f"Using candidate_k={candidate_k} for {n_recipes} recipes")
 
+    db = get_database()
+    analytics_queries = _queries(dataset, db)
+    # Warm-started refit from the previous run's EM state unless EM_INCREMENTAL=0
+    em_incremental = os.environ.get("EM_INCREMENTAL", "1") != "0"
     cocktail_space_em, recipe_similarity = analytics_queries.compute_cocktail_space_umap_em(
         return_similarity=True,
         candidate_k=candidate_k,
+        incremental=em_incremental,
     )
-    storage.put_analytics("cocktail-space-em", cocktail_space_em)
+    _storage().put_analytics("cocktail-space-em", cocktail_space_em)
     # Store recipe similarity in PostgreSQL for fast indexed lookups
     db.upsert_recipe_similarity_batch(recipe_similarity)
-    cocktail_space_em_count = len(cocktail_space_em)
-    del cocktail_space_em
-    del recipe_similarity
-    gc.collect()
-    log_memory("cocktail space em stored")
+    return {
+        "cocktail_space_em_count": len(cocktail_space_em),
+        "em_fit": analytics_queries.last_em_log,
+    }
 
-    # Generate ingredient tree
+
+def ingredient_tree_stage(dataset: AnalyticsDataset) -> Dict[str, Any]:
+    """Store the ingredient tree with recipe counts."""
     logger.info("Building ingredient tree with recipe counts")
     from barcart.distance import build_ingredient_tree
 
+    ingredients_df = _queries(dataset).get_ingredients_for_tree()
     if not ingredients_df.empty:
         # Build the tree structure
         tree_dict, parent_map = build_ingredient_tree(
@@ -178,7 +155,6 @@ def regenerate_analytics() -> Dict[str, Any]:
         enriched_tree = enrich_tree_with_recipe_counts(tree_dict, recipe_counts)
 
         logger.info("Built ingredient tree with %s ingredients", len(recipe_counts))
-        ingredient_tree_nodes = len(recipe_counts)
     else:
         logger.warning("No ingredient data available for tree building")
         enriched_tree = {
@@ -189,23 +165,192 @@ def regenerate_analytics() -> Dict[str, Any]:
             "children": [],
         }
         recipe_counts = {}
-        ingredient_tree_nodes = 0
 
-    storage.put_analytics("ingredient-tree", enriched_tree)
-    del enriched_tree
-    del recipe_counts
-    del ingredients_df
-    gc.collect()
-    log_memory("ingredient tree stored")
+    _storage().put_analytics("ingredient-tree", enriched_tree)
+    return {"ingredient_tree_nodes": len(recipe_counts)}
+
+
+# The refresh as a dependency graph: every artifact stage only needs the snapshot,
+# so the two CPU-heavy UMAP stages run side by side in worker processes while the
+# light stages run in the main process. memory_mb are rough per-stage estimates
+# checked against ANALYTICS_MEMORY_BUDGET_MB.
+ANALYTICS_STAGES = (
+    Stage("dataset", load_dataset_stage, outputs=("dataset",)),
+    Stage(
+        "cocktail_space_em",
+        cocktail_space_em_stage,
+        inputs=("dataset",),
+        outputs=("cocktail_space_em_count", "em_fit"),
+        worker=True,
+        memory_mb=2048,
+    ),
+    Stage(
+        "cocktail_space",
+        cocktail_space_stage,
+        inputs=("dataset",),
+        outputs=("cocktail_space_count",),
+        worker=True,
+        memory_mb=512,
+    ),
+    Stage(
+        "ingredient_usage",
+        ingredient_usage_stage,
+        inputs=("dataset",),
+        outputs=("ingredient_stats_count",),
+    ),
+    Stage(
+        "recipe_complexity",
+        recipe_complexity_stage,
+        inputs=("dataset",),
+        outputs=("complexity_stats_count",),
+    ),
+    Stage(
+        "ingredient_tree",
+        ingredient_tree_stage,
+        inputs=("dataset",),
+        outputs=("ingredient_tree_nodes",),
+    ),
+)
+ANALYTICS_WORKERS = 2
+ANALYTICS_MEMORY_BUDGET_MB = 4096
+
+# Per artifact stage: the tables whose changes make it stale (tracked in
+# analytics_table_versions) and the stored artifact it writes. Ratings and tags
+# feed no artifact, so they never trigger a rebuild.
+STAGE_INPUT_TABLES = {
+    "ingredient_usage": ("ingredients", "recipe_ingredients"),
+    "recipe_complexity": ("recipe_ingredients",),
+    "cocktail_space": ("recipes", "ingredients", "recipe_ingredients", "units"),
+    "cocktail_space_em": ("recipes", "ingredients", "recipe_ingredients", "units"),
+    "ingredient_tree": ("ingredients", "recipe_ingredients"),
+}
+STAGE_ARTIFACTS = {
+    "ingredient_usage": "ingredient-usage",
+    "recipe_complexity": "recipe-complexity",
+    "cocktail_space": "cocktail-space",
+    "cocktail_space_em": "cocktail-space-em",
+    "ingredient_tree": "ingredient-tree",
+}
+
+
+def plan_refresh(
+    table_versions: Mapping[str, int],
+    artifact_state: Mapping[str, Mapping[str, int]],
+    stored_artifacts: Iterable[str],
+    full: bool = False,
+) -> List[str]:
+    """Pick the artifact stages that need rebuilding.
+
+    A stage is stale when it has never been recorded as built, when any of its
+    STAGE_INPUT_TABLES has moved past the version it was built from, or when
+    its stored artifact is missing.
+
+    Args:
+        table_versions: Current table name -> version.
+        artifact_state: Stage name -> input table versions it was last built from.
+        stored_artifacts: Names of the artifacts present in storage.
+        full: Treat every stage as stale.
+
+    Returns:
+        Stale stage names, in ANALYTICS_STAGES order.
+    """
+    stored = set(stored_artifacts)
+    stale = []
+    for stage in ANALYTICS_STAGES:
+        if stage.name not in STAGE_INPUT_TABLES:
+            continue
+        built_from = artifact_state.get(stage.name)
+        if (
+            full
+            or built_from is None
+            or STAGE_ARTIFACTS[stage.name] not in stored
+            or any(
+                built_from.get(table) != table_versions.get(table, 0)
+                for table in STAGE_INPUT_TABLES[stage.name]
+            )
+        ):
+            stale.append(stage.name)
+    return stale
+
+
+def regenerate_analytics(full: bool = False) -> Dict[str, Any]:
+    """
+    Core analytics regeneration logic.
+
+    Generates:
+    - Root-level ingredient usage statistics
+    - Recipe complexity distribution
+    - Cocktail space UMAP projections (Manhattan and EM-based)
+    - Ingredient tree with recipe counts
+
+    Only stale artifacts are rebuilt (see plan_refresh): the database triggers
+    bump a version per input table on every relevant write, and each artifact
+    records the versions it was built from. If nothing is stale the snapshot is
+    not even loaded. Pass full=True, or set ANALYTICS_FULL_REFRESH=1, to
+    rebuild everything.
+
+    All inputs are read once, in a single REPEATABLE READ snapshot shared by
+    every stage, so the artifacts always describe the same catalog state. The
+    stages run as the dependency graph ANALYTICS_STAGES: independent CPU-heavy
+    stages run concurrently in up to ANALYTICS_WORKERS worker processes (0 runs
+    everything in this process) within ANALYTICS_MEMORY_BUDGET_MB, both
+    overridable through environment variables of the same name.
+
+    Stores results on local disk via AnalyticsStorage. The returned summary
+    includes the EM fit log (per-iteration timings and convergence metrics),
+    per-stage wall time and peak RSS under "stages", and the "rebuilt" and
+    "skipped" stage names. Counts and em_fit are None for skipped stages.
+    """
+    # Get environment configuration
+    storage_path = os.environ.get("ANALYTICS_PATH")
+    if not storage_path:
+        raise ValueError("ANALYTICS_PATH environment variable not set")
+    full = full or os.environ.get("ANALYTICS_FULL_REFRESH") == "1"
+
+    analytics_queries = AnalyticsQueries(get_database())
+    storage = AnalyticsStorage(storage_path)
+    stale = plan_refresh(
+        analytics_queries.get_table_versions(),
+        analytics_queries.get_artifact_state(),
+        [name for name in STAGE_ARTIFACTS.values() if storage.has_analytics(name)],
+        full=full,
+    )
+    skipped = [name for name in STAGE_INPUT_TABLES if name not in stale]
+    logger.info("Stale analytics stages: %s (skipping %s)", stale or "none", skipped or "none")
+
+    values: Dict[str, Any] = {}
+    stage_reports: Dict[str, Dict[str, Any]] = {}
+    if stale:
+        logger.info("Starting analytics regeneration")
+        values, stage_reports = run_stages(
+            [stage for stage in ANALYTICS_STAGES if stage.name == "dataset" or stage.name in stale],
+            max_workers=int(os.environ.get("ANALYTICS_WORKERS", ANALYTICS_WORKERS)),
+            memory_budget_mb=float(
+                os.environ.get("ANALYTICS_MEMORY_BUDGET_MB", ANALYTICS_MEMORY_BUDGET_MB)
+            ),
+        )
+        # Record the versions of the snapshot the artifacts were built from, so
+        # writes made while the refresh ran keep them stale
+        table_versions = values.pop("dataset").table_versions
+        for name in stale:
+            analytics_queries.record_artifact_build(
+                name, {table: table_versions.get(table, 0) for table in STAGE_INPUT_TABLES[name]}
+            )
+        gc.collect()
+        log_memory("analytics regeneration")
 
     logger.info("Analytics regeneration completed successfully")
 
     return {
-        "ingredient_stats_count": ingredient_stats_count,
-        "complexity_stats_count": complexity_stats_count,
-        "cocktail_space_count": cocktail_space_count,
-        "cocktail_space_em_count": cocktail_space_em_count,
-        "ingredient_tree_nodes": ingredient_tree_nodes,
+        "ingredient_stats_count": values.get("ingredient_stats_count"),
+        "complexity_stats_count": values.get("complexity_stats_count"),
+        "cocktail_space_count": values.get("cocktail_space_count"),
+        "cocktail_space_em_count": values.get("cocktail_space_em_count"),
+        "ingredient_tree_nodes": values.get("ingredient_tree_nodes"),
+        "em_fit": values.get("em_fit"),
+        "stages": stage_reports,
+        "rebuilt": stale,
+        "skipped": skipped,
     }
 
 
@@ -218,7 +363,7 @@ def main() -> None:
     )
 
     try:
-        result = regenerate_analytics()
+        result = regenerate_analytics(full="--full" in sys.argv[1:])
         print(
             json.dumps(
                 {
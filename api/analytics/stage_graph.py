@@ -0,0 +1,178 @@
+"""Dependency-graph scheduler for the analytics refresh stages."""
+import logging
+import multiprocessing
+import resource
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One step of the refresh.
+
+    Attributes:
+        name: Unique stage name, used as the key of its report.
+        func: Module-level function called with the stage inputs as keyword
+            arguments; returns a dict holding (at least) the declared outputs.
+        inputs: Names of outputs of other stages this stage consumes.
+        outputs: Names of the values this stage produces.
+        worker: Run in a separate worker process (for CPU-heavy stages) instead
+            of the scheduler's own process. Inputs and outputs are pickled.
+        memory_mb: Estimated peak memory of the stage, checked against the
+            memory budget before a worker stage is started.
+    """
+
+    name: str
+    func: Callable[..., Dict[str, Any]]
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    worker: bool = False
+    memory_mb: float = 0.0
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the current process in MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _run_stage(
+    func: Callable[..., Dict[str, Any]], inputs: Dict[str, Any]
+) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """Run a stage function and measure its wall time and peak RSS."""
+    start = time.perf_counter()
+    outputs = func(**inputs)
+    report = {
+        "wall_seconds": round(time.perf_counter() - start, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    return outputs, report
+
+
+def _init_worker() -> None:
+    """Give spawned workers the same log format as the CLI."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+
+def _validate(stages: Sequence[Stage]) -> None:
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate stage names: {names}")
+    producers: Dict[str, str] = {}
+    for stage in stages:
+        for output in stage.outputs:
+            if output in producers:
+                raise ValueError(
+                    f"Output '{output}' produced by both '{producers[output]}' and '{stage.name}'"
+                )
+            producers[output] = stage.name
+    for stage in stages:
+        missing = [name for name in stage.inputs if name not in producers]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' has no producer for inputs {missing}")
+
+
+def run_stages(
+    stages: Sequence[Stage],
+    max_workers: int = 2,
+    memory_budget_mb: Optional[float] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """Run stages in dependency order, overlapping independent worker stages.
+
+    A stage starts once all its inputs are available. Worker stages run in a
+    process pool (spawned, one fresh process per stage so its peak RSS is its
+    own) as long as at most `max_workers` run at once and the sum of their
+    `memory_mb` estimates stays within `memory_budget_mb`; one worker stage may
+    always run, even if its estimate alone exceeds the budget. Other stages run
+    in the calling process while the workers are busy.
+
+    Args:
+        stages: Stages to run; order only breaks ties between ready stages.
+        max_workers: Worker process limit. With 0, every stage runs in the
+            calling process, one after the other.
+        memory_budget_mb: Budget for concurrently running worker stages, or
+            None for no limit.
+
+    Returns:
+        Tuple of (outputs, reports): every stage output by name, and per stage
+        {"wall_seconds", "peak_rss_mb", "worker"}. For stages run in the calling
+        process, peak_rss_mb is that process's peak so far.
+
+    Raises:
+        ValueError: If stage names or outputs clash, an input has no producer,
+            a stage omits a declared output, or the stages form a cycle.
+    """
+    _validate(stages)
+    values: Dict[str, Any] = {}
+    reports: Dict[str, Dict[str, Any]] = {}
+    pending: List[Stage] = list(stages)
+    running: Dict[Future, Stage] = {}
+    budget = float("inf") if memory_budget_mb is None else memory_budget_mb
+
+    def finish(stage: Stage, outputs: Dict[str, Any], report: Dict[str, Any]) -> None:
+        missing = [name for name in stage.outputs if name not in outputs]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' did not produce outputs {missing}")
+        values.update({name: outputs[name] for name in stage.outputs})
+        reports[stage.name] = {**report, "worker": stage.worker and pool is not None}
+        logger.info(
+            "Stage %s finished in %.1fs, peak RSS %.1f MB",
+            stage.name,
+            report["wall_seconds"],
+            report["peak_rss_mb"],
+        )
+
+    pool = None
+    if max_workers > 0 and any(stage.worker for stage in stages):
+        pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            max_tasks_per_child=1,
+        )
+    try:
+        while pending or running:
+            ready = [s for s in pending if all(name in values for name in s.inputs)]
+
+            # Start every ready worker stage that fits the worker and memory limits
+            for stage in ready:
+                if not stage.worker or pool is None:
+                    continue
+                memory_in_use = sum(s.memory_mb for s in running.values())
+                if len(running) >= max_workers or (
+                    running and memory_in_use + stage.memory_mb > budget
+                ):
+                    continue
+                logger.info("Starting stage %s in a worker process", stage.name)
+                inputs = {name: values[name] for name in stage.inputs}
+                running[pool.submit(_run_stage, stage.func, inputs)] = stage
+                pending.remove(stage)
+
+            # Run one ready stage here while the workers are busy
+            local = [s for s in ready if s in pending and (not s.worker or pool is None)]
+            if local:
+                stage = local[0]
+                logger.info("Starting stage %s", stage.name)
+                pending.remove(stage)
+                finish(stage, *_run_stage(stage.func, {n: values[n] for n in stage.inputs}))
+                continue
+
+            if not running:
+                raise ValueError(
+                    "Stages form a cycle: " + ", ".join(stage.name for stage in pending)
+                )
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                finish(stage, *future.result())
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    return values, reports
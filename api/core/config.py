@@ -11,6 +11,29 @@ class Settings(BaseSettings):
     db_name: str = Field(default="cocktaildb", description="PostgreSQL database name")
     db_user: str = Field(default="cocktaildb", description="PostgreSQL user")
     db_password: str = Field(default="", description="PostgreSQL password")
+
+    # Connection pool settings (per API worker process)
+    db_pool_min_size: int = Field(default=1, description="Connections kept open when idle")
+    db_pool_max_size: int = Field(default=10, description="Maximum open connections")
+    db_pool_acquire_timeout: float = Field(
+        default=10.0, description="Seconds to wait for a free connection before failing"
+    )
+    db_pool_max_lifetime: float = Field(
+        default=3600.0, description="Seconds before a connection is recycled (0 disables)"
+    )
+    db_pool_max_idle: float = Field(
+        default=300.0, description="Seconds an idle connection above the minimum is kept (0 disables)"
+    )
+
+    # Ingredient/tag name resolution cache (per API worker process)
+    name_cache_ttl: float = Field(
+        default=60.0, description="Seconds a cached ingredient/tag name lookup stays valid (0 disables)"
+    )
+
+    # In-memory ingredient recommendation index (per API worker process)
+    recommendation_index_ttl: float = Field(
+        default=300.0, description="Seconds the recipe bitset index is reused before reloading (0 reloads every request)"
+    )
     
     # AWS settings
     user_pool_id: str = Field(default="", description="Cognito User Pool ID", env="USER_POOL_ID")
@@ -1,4 +1,5 @@
 from .db_core import Database
 from .database import get_database
+from .async_database import AsyncDatabase, get_async_database
 
-__all__ = ["Database", "get_database"]
+__all__ = ["Database", "get_database", "AsyncDatabase", "get_async_database"]
@@ -0,0 +1,135 @@
+"""In-memory snapshot of the data read by the analytics refresh"""
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Unit kinds with a fixed volume, see AnalyticsDataset.volume_ml
+UNIT_KIND_DEFAULT = 0
+UNIT_KIND_TO_TOP = 1
+UNIT_KIND_TO_RINSE = 2
+UNIT_KIND_EACH = 3
+
+UNIT_KINDS_BY_NAME = {
+    "to top": UNIT_KIND_TO_TOP,
+    "to rinse": UNIT_KIND_TO_RINSE,
+    "each": UNIT_KIND_EACH,
+    "Each": UNIT_KIND_EACH,
+}
+
+TO_TOP_ML = 90.0
+TO_RINSE_ML = 5.0
+
+
+@dataclass
+class AnalyticsDataset:
+    """Everything the analytics refresh needs, read in one consistent snapshot
+
+    Built by AnalyticsQueries.load_dataset inside a REPEATABLE READ transaction,
+    then shared by every refresh stage, so all artifacts describe the same data
+    and no stage queries the database again.
+
+    Recipe ingredients are kept as parallel arrays ordered by recipe then
+    ingredient: a missing amount or unit conversion is NaN, and unit_kinds
+    marks the special units ('to top', 'to rinse', 'each').
+
+    Attributes:
+        ingredient_stats: Rows of get_ingredient_usage_stats(all_ingredients=True)
+        recipe_names: Recipe ID -> name, for every recipe
+        recipe_ids: Recipe ID of each recipe ingredient (int64)
+        ingredient_ids: Ingredient ID of each recipe ingredient (int64)
+        amounts: Amount in the recipe's unit (float64)
+        conversions_to_ml: Unit conversion factor to ml (float64)
+        unit_kinds: One of the UNIT_KIND_* codes (int8)
+        table_versions: Change version of each input table when the snapshot
+            was taken, see AnalyticsQueries.get_table_versions
+    """
+
+    ingredient_stats: List[Dict[str, Any]]
+    recipe_names: Dict[int, str]
+    recipe_ids: "np.ndarray"
+    ingredient_ids: "np.ndarray"
+    amounts: "np.ndarray"
+    conversions_to_ml: "np.ndarray"
+    unit_kinds: "np.ndarray"
+    table_versions: Dict[str, int] = field(default_factory=dict)
+    _ingredient_names: Dict[int, str] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._ingredient_names = {
+            row["ingredient_id"]: row["ingredient_name"] for row in self.ingredient_stats
+        }
+
+    @property
+    def n_recipes(self) -> int:
+        """Number of recipes with at least one ingredient"""
+        import numpy as np
+
+        return int(len(np.unique(self.recipe_ids)))
+
+    def volume_ml(
+        self,
+        special_units: bool = True,
+        each_ml: float = 1.0,
+        missing_ml: float = 1.0,
+    ) -> "np.ndarray":
+        """Volume in ml of each recipe ingredient
+
+        The amount times the unit conversion when both are known, else the raw
+        amount, else missing_ml. With special_units, 'to top' counts as 90 ml,
+        'to rinse' as 5 ml and 'each' as each_ml regardless of the amount.
+        """
+        import numpy as np
+
+        volume = np.where(
+            np.isnan(self.amounts),
+            missing_ml,
+            np.where(
+                np.isnan(self.conversions_to_ml),
+                self.amounts,
+                self.amounts * self.conversions_to_ml,
+            ),
+        )
+        if special_units:
+            volume[self.unit_kinds == UNIT_KIND_TO_TOP] = TO_TOP_ML
+            volume[self.unit_kinds == UNIT_KIND_TO_RINSE] = TO_RINSE_ML
+            volume[self.unit_kinds == UNIT_KIND_EACH] = each_ml
+        return volume
+
+    def recipe_complexity(self) -> List[Dict[str, int]]:
+        """Recipe complexity distribution by ingredient count
+
+        Returns:
+            List of {ingredient_count, recipe_count} dictionaries ordered by
+            ingredient_count, as get_recipe_complexity_distribution
+        """
+        import numpy as np
+
+        if not len(self.recipe_ids):
+            return []
+        pairs = np.unique(np.column_stack([self.recipe_ids, self.ingredient_ids]), axis=0)
+        _, ingredient_counts = np.unique(pairs[:, 0], return_counts=True)
+        counts, recipe_counts = np.unique(ingredient_counts, return_counts=True)
+        return [
+            {"ingredient_count": int(count), "recipe_count": int(n)}
+            for count, n in zip(counts, recipe_counts)
+        ]
+
+    def ingredient_lists(self) -> Dict[int, List[str]]:
+        """Ingredient names of each recipe, largest volume first
+
+        'each' units sort after every measured ingredient and ingredients
+        without an amount count as 0 ml.
+        """
+        import numpy as np
+
+        volume = self.volume_ml(each_ml=-1.0, missing_ml=0.0)
+        order = np.lexsort((-volume, self.recipe_ids))
+        lists: Dict[int, List[str]] = {}
+        for recipe_id, ingredient_id in zip(
+            self.recipe_ids[order].tolist(), self.ingredient_ids[order].tolist()
+        ):
+            lists.setdefault(recipe_id, []).append(self._ingredient_names[ingredient_id])
+        return lists
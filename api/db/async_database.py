@@ -0,0 +1,101 @@
+"""Awaitable access to the synchronous Database for async FastAPI routes.
+
+psycopg2 is blocking, so calling ``Database`` methods directly from an
+``async def`` route stalls the event loop for every in-flight request. The
+``AsyncDatabase`` facade runs those methods on a dedicated thread pool sized
+to the connection pool, so at most one worker is waiting per connection and
+the event loop stays free to serve other requests.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from fastapi import Depends
+
+from .database import get_database
+from .db_core import Database
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Shared executor for all AsyncDatabase instances (one per process)
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """Return the process-wide database executor, creating it on first use"""
+    global _EXECUTOR
+
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                max_workers = settings.db_pool_max_size
+                logger.info(f"Creating database executor with {max_workers} workers")
+                _EXECUTOR = ThreadPoolExecutor(
+                    max_workers=max_workers, thread_name_prefix="db"
+                )
+    return _EXECUTOR
+
+
+def shutdown_db_executor(wait: bool = True) -> None:
+    """Shut down the database executor (called on application shutdown)"""
+    global _EXECUTOR
+
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is not None:
+            _EXECUTOR.shutdown(wait=wait)
+            _EXECUTOR = None
+
+
+class AsyncDatabase:
+    """Awaitable facade over Database.
+
+    Every callable attribute of the wrapped database is exposed as a coroutine
+    function that runs the original method on the database executor, e.g.
+    ``await db.get_recipe(recipe_id)``. Non-callable attributes such as
+    ``conn_params`` are passed through unchanged.
+    """
+
+    def __init__(self, db: Database, executor: Optional[ThreadPoolExecutor] = None):
+        self._db = db
+        self._executor = executor
+
+    @property
+    def sync(self) -> Database:
+        """The wrapped synchronous Database instance"""
+        return self._db
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run an arbitrary blocking callable on the database executor.
+
+        Use this for helpers that take the synchronous database, e.g.
+        ``await db.run(AnalyticsQueries(db.sync).get_ingredient_usage_stats)``.
+        """
+        executor = self._executor or get_db_executor()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, functools.partial(func, *args, **kwargs)
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._db, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def _offloaded(*args: Any, **kwargs: Any) -> Any:
+            return await self.run(attr, *args, **kwargs)
+
+        return _offloaded
+
+
+def get_async_database(db: Database = Depends(get_database)) -> AsyncDatabase:
+    """FastAPI dependency returning an awaitable facade over the shared Database"""
+    return AsyncDatabase(db)
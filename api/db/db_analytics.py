@@ -1,13 +1,135 @@
 """Analytics-specific database queries for CocktailDB"""
 
+import json
 import logging
 from typing import TYPE_CHECKING, Dict, List, Any, Optional, cast
 
+from .analytics_dataset import UNIT_KIND_DEFAULT, UNIT_KINDS_BY_NAME, AnalyticsDataset
+
 if TYPE_CHECKING:
+    import numpy as np
     import pandas as pd
+    from scipy import sparse as sp
 
 logger = logging.getLogger(__name__)
 
+# Incremental EM refits are only used for small catalog changes; after this many
+# refits in a row the next refresh runs a full fit from the prior again
+EM_INCREMENTAL_MAX_CHANGED_FRACTION = 0.05
+EM_INCREMENTAL_MAX_REFITS = 20
+
+# Full EM fits stop on whichever comes first: the iteration cap, a small relative
+# change of the cost matrix, or stable kNN neighborhoods between iterations.
+# Candidate pairs whose cost sub-matrix moved less than EM_REUSE_TOLERANCE (relative
+# to the largest cost) keep their transport plan instead of being re-solved.
+EM_MAX_ITERS = 10
+EM_TOLERANCE = 1e-3
+EM_KNN_STABILITY = 0.95
+EM_REUSE_TOLERANCE = 0.01
+
+# Neighbors kept per recipe in the Manhattan kNN graph fed to UMAP; UMAP only
+# uses n_neighbors (5) per recipe, the rest keeps ties from being cut arbitrarily
+UMAP_MANHATTAN_KNN_K = 15
+
+
+def _recipe_fingerprints(volume_matrix) -> "np.ndarray":
+    """64-bit hash of each recipe's (ingredient index, volume) row of a CSR matrix."""
+    import hashlib
+
+    import numpy as np
+
+    volume_matrix.sort_indices()
+    indptr, indices, data = volume_matrix.indptr, volume_matrix.indices, volume_matrix.data
+    fingerprints = np.empty(volume_matrix.shape[0], dtype=np.uint64)
+    for row in range(len(fingerprints)):
+        start, end = indptr[row], indptr[row + 1]
+        digest = hashlib.blake2b(
+            indices[start:end].tobytes() + data[start:end].tobytes(), digest_size=8
+        ).digest()
+        fingerprints[row] = int.from_bytes(digest, "little")
+    return fingerprints
+
+
+def _incremental_em_inputs(
+    state: Optional[Dict[str, Any]],
+    recipe_ids: "np.ndarray",
+    fingerprints: "np.ndarray",
+    ingredient_ids: "np.ndarray",
+    prior_fingerprint: str,
+) -> Optional[Dict[str, Any]]:
+    """Re-index a saved EM state to the current recipes for ``em_refit``.
+
+    Returns None when a full fit is needed: no usable state, a different
+    ingredient set or prior, too many refits in a row, or too many changed recipes.
+    """
+    import numpy as np
+    from barcart.distance_matrix import KnnDistanceGraph
+    from barcart.transport_plan import TransportPlans
+
+    if state is None:
+        logger.info("No EM state saved; running full EM fit")
+        return None
+    if (
+        not np.array_equal(state["ingredient_ids"], ingredient_ids)
+        or str(state["prior_fingerprint"]) != prior_fingerprint
+    ):
+        logger.info("Ingredients or prior changed since the last EM fit; running full EM fit")
+        return None
+    n_refits = int(state["incremental_refits"])
+    if n_refits >= EM_INCREMENTAL_MAX_REFITS:
+        logger.info("%s incremental EM refits in a row; running full EM fit", n_refits)
+        return None
+
+    # Map previous recipe indices to current ones (-1 for removed recipes)
+    n_recipes = len(recipe_ids)
+    old_ids = state["recipe_ids"]
+    order = np.argsort(recipe_ids)
+    positions = np.searchsorted(recipe_ids, old_ids, sorter=order)
+    positions = order[np.minimum(positions, n_recipes - 1)]
+    old_to_new = np.where(recipe_ids[positions] == old_ids, positions, -1)
+    kept = old_to_new >= 0
+
+    unchanged = np.zeros(n_recipes, dtype=bool)
+    unchanged[old_to_new[kept]] = (
+        state["recipe_fingerprints"][kept] == fingerprints[old_to_new[kept]]
+    )
+    changed = np.flatnonzero(~unchanged)
+    n_removed = int((~kept).sum())
+    if len(changed) + n_removed > EM_INCREMENTAL_MAX_CHANGED_FRACTION * n_recipes:
+        logger.info(
+            "%s recipes changed and %s removed since the last EM fit; running full EM fit",
+            len(changed),
+            n_removed,
+        )
+        return None
+
+    rows = old_to_new[state["pair_rows"]]
+    cols = old_to_new[state["pair_cols"]]
+    valid = (rows >= 0) & (cols >= 0)
+    distance_graph = KnnDistanceGraph.from_pairs(
+        n_recipes, rows[valid], cols[valid], state["pair_distances"][valid]
+    )
+    plans = TransportPlans(
+        state["plan_pairs"],
+        state["plan_offsets"],
+        state["plan_from"],
+        state["plan_to"],
+        state["plan_mass"],
+        state["plan_cost"],
+    )
+    plans = plans.take((old_to_new[plans.pairs] >= 0).all(axis=1))
+    plans = TransportPlans.from_flows(
+        old_to_new[plans.pairs],
+        (plans.offsets, plans.from_idx, plans.to_idx, plans.mass, plans.cost),
+    )
+    return {
+        "cost_matrix": state["cost_matrix"],
+        "distance_graph": distance_graph,
+        "plans": plans,
+        "changed": changed,
+        "n_refits": n_refits,
+    }
+
 
 class AnalyticsQueries:
     """Analytics database query methods - separate from core Database class"""
@@ -19,6 +141,10 @@ class AnalyticsQueries:
             db: Database instance from db_core.py
         """
         self.db = db
+        # Per-iteration log of the last EM fit, reported by the analytics refresh
+        self.last_em_log: Optional[Dict[str, Any]] = None
+        # Snapshot shared by the refresh loaders, see load_dataset
+        self.dataset: Optional[AnalyticsDataset] = None
 
     def get_ingredient_usage_stats(
         self, parent_id: Optional[int] = None, all_ingredients: bool = False
@@ -54,9 +180,9 @@ class AnalyticsQueries:
               COUNT(DISTINCT ri.recipe_id) as direct_usage,
               (
                 SELECT COUNT(DISTINCT ri2.recipe_id)
-                FROM recipe_ingredients ri2
-                INNER JOIN ingredients i2 ON ri2.ingredient_id = i2.id
-                WHERE STARTS_WITH(i2.path, i.path)
+                FROM ingredient_ancestors ia
+                INNER JOIN recipe_ingredients ri2 ON ri2.ingredient_id = ia.descendant_id
+                WHERE ia.ancestor_id = i.id
               ) as hierarchical_usage,
               EXISTS(SELECT 1 FROM ingredients WHERE parent_id = i.id) as has_children
             FROM ingredients i
@@ -100,89 +226,206 @@ class AnalyticsQueries:
             logger.error(f"Error getting recipe complexity distribution: {str(e)}")
             raise
 
-    def get_recipe_ingredient_matrix(
-        self,
-    ) -> tuple[Dict[int, int], "pd.DataFrame", List[str]]:
-        """Build normalized recipe-ingredient matrix for distance calculations
+    def load_dataset(self) -> AnalyticsDataset:
+        """Read everything the analytics refresh needs in one consistent snapshot
+
+        All queries run in a single REPEATABLE READ transaction, so every stage
+        consuming the dataset sees the same recipes and ingredients even if the
+        catalog changes while the refresh runs. Recipe ingredients are streamed
+        through a server-side cursor straight into typed NumPy arrays.
 
         Returns:
-            Tuple of (recipe_id_map, normalized_matrix, recipe_names)
-            - recipe_id_map: Dict mapping matrix row index to recipe ID
-            - normalized_matrix: pandas DataFrame with normalized ingredient proportions
-            - recipe_names: List of recipe names corresponding to matrix rows
+            The loaded AnalyticsDataset, also kept in self.dataset
         """
-        import pandas as pd
+        import numpy as np
 
         try:
-            # Load all recipes with ingredients and amounts
-            sql = """
-            SELECT
-                r.id as recipe_id,
-                r.name as recipe_name,
-                i.id as ingredient_id,
-                i.name as ingredient_name,
-                ri.amount,
-                ri.unit_id,
-                u.conversion_to_ml
-            FROM recipes r
-            JOIN recipe_ingredients ri ON r.id = ri.recipe_id
-            JOIN ingredients i ON ri.ingredient_id = i.id
-            LEFT JOIN units u ON ri.unit_id = u.id
-            ORDER BY r.id, i.id
-            """
-
-            rows = self.db.execute_query(sql)
-            if not rows:
-                logger.warning("No recipe data found for matrix building")
-                return {}, pd.DataFrame(), []
+            with self.db.read_snapshot() as snapshot:
+                snapshot_queries = AnalyticsQueries(snapshot)
+                table_versions = snapshot_queries.get_table_versions()
+                ingredient_stats = snapshot_queries.get_ingredient_usage_stats(
+                    all_ingredients=True
+                )
+                recipe_names = {
+                    row["id"]: row["name"]
+                    for row in snapshot.execute_query("SELECT id, name FROM recipes")
+                }
+                units = snapshot.execute_query(
+                    "SELECT id, name, conversion_to_ml::double precision AS conversion_to_ml FROM units"
+                )
 
-            df = pd.DataFrame(rows)
+                chunks = []
+                for rows in snapshot.stream_query(
+                    """
+                    SELECT
+                        ri.recipe_id,
+                        ri.ingredient_id,
+                        ri.amount::double precision,
+                        COALESCE(ri.unit_id, -1)
+                    FROM recipe_ingredients ri
+                    ORDER BY ri.recipe_id, ri.ingredient_id
+                    """
+                ):
+                    recipe_ids, ingredient_ids, amounts, unit_ids = zip(*rows)
+                    chunks.append(
+                        (
+                            np.fromiter(recipe_ids, dtype=np.int64, count=len(rows)),
+                            np.fromiter(ingredient_ids, dtype=np.int64, count=len(rows)),
+                            np.array(amounts, dtype=np.float64),  # None -> NaN
+                            np.fromiter(unit_ids, dtype=np.int64, count=len(rows)),
+                        )
+                    )
 
-            # Convert amounts to ml where possible
-            df["amount_ml"] = df.apply(
-                lambda row: row["amount"] * row["conversion_to_ml"]
-                if pd.notna(row["conversion_to_ml"]) and pd.notna(row["amount"])
-                else row["amount"]
-                if pd.notna(row["amount"])
-                else 1.0,  # Default to 1 if no amount
-                axis=1,
+            if chunks:
+                recipe_ids, ingredient_ids, amounts, unit_ids = (
+                    np.concatenate(column) for column in zip(*chunks)
+                )
+            else:
+                recipe_ids, ingredient_ids, unit_ids = (
+                    np.empty(0, dtype=np.int64) for _ in range(3)
+                )
+                amounts = np.empty(0, dtype=np.float64)
+
+            # Per-unit lookup tables, with the last slot for rows without a unit
+            n_slots = max([row["id"] for row in units], default=-1) + 2
+            unit_conversions = np.full(n_slots, np.nan)
+            unit_kind_table = np.full(n_slots, UNIT_KIND_DEFAULT, dtype=np.int8)
+            for row in units:
+                if row["conversion_to_ml"] is not None:
+                    unit_conversions[row["id"]] = row["conversion_to_ml"]
+                unit_kind_table[row["id"]] = UNIT_KINDS_BY_NAME.get(row["name"], UNIT_KIND_DEFAULT)
+
+            self.dataset = AnalyticsDataset(
+                ingredient_stats=ingredient_stats,
+                recipe_names=recipe_names,
+                recipe_ids=recipe_ids,
+                ingredient_ids=ingredient_ids,
+                amounts=amounts,
+                conversions_to_ml=unit_conversions[unit_ids],
+                unit_kinds=unit_kind_table[unit_ids],
+                table_versions=table_versions,
+            )
+            logger.info(
+                f"Loaded analytics snapshot: {len(ingredient_stats)} ingredients, "
+                f"{len(recipe_names)} recipes, {len(recipe_ids)} recipe ingredients"
             )
+            return self.dataset
 
-            # Create pivot table for amounts
-            amount_matrix = df.pivot_table(
-                index="recipe_name",
-                columns="ingredient_name",
-                values="amount_ml",
-                aggfunc="sum",
-                fill_value=0,
+        except Exception as e:
+            logger.error(f"Error loading analytics dataset: {str(e)}")
+            raise
+
+    def _get_dataset(self) -> AnalyticsDataset:
+        """Return the loaded snapshot, loading one on first use"""
+        if self.dataset is None:
+            self.load_dataset()
+        return self.dataset
+
+    def get_table_versions(self) -> Dict[str, int]:
+        """Get the change version of each analytics input table
+
+        The analytics triggers bump a table's version whenever a write changes
+        data the analytics read, see analytics_table_versions.
+
+        Returns:
+            Table name -> version
+        """
+        try:
+            rows = self.db.execute_query(
+                "SELECT table_name, version FROM analytics_table_versions"
             )
+            return {row["table_name"]: int(row["version"]) for row in rows}
+        except Exception as e:
+            logger.error(f"Error getting analytics table versions: {str(e)}")
+            raise
+
+    def get_artifact_state(self) -> Dict[str, Dict[str, int]]:
+        """Get the input table versions each analytics artifact was built from
 
-            # Normalize each recipe to sum to 1 (proportions)
-            normalized_matrix = amount_matrix.div(amount_matrix.sum(axis=1), axis=0)
-            normalized_matrix = normalized_matrix.fillna(0)
-
-            # Remove recipes/ingredients that are all zeros
-            normalized_matrix = normalized_matrix.loc[
-                (normalized_matrix != 0).any(axis=1), :
-            ]
-            normalized_matrix = normalized_matrix.loc[
-                :, (normalized_matrix != 0).any(axis=0)
-            ]
-
-            # Before pivot, create mapping from unique recipes
-            recipe_id_to_name = df[["recipe_id", "recipe_name"]].drop_duplicates(
-                "recipe_id"
+        Returns:
+            Artifact name -> {table name -> version}
+        """
+        try:
+            rows = self.db.execute_query(
+                "SELECT artifact, input_versions FROM analytics_artifact_state"
             )
-            recipe_id_to_name = dict(
-                zip(recipe_id_to_name["recipe_name"], recipe_id_to_name["recipe_id"])
+            return {
+                row["artifact"]: {
+                    table: int(version) for table, version in row["input_versions"].items()
+                }
+                for row in rows
+            }
+        except Exception as e:
+            logger.error(f"Error getting analytics artifact state: {str(e)}")
+            raise
+
+    def record_artifact_build(self, artifact: str, input_versions: Dict[str, int]) -> None:
+        """Record that an analytics artifact was rebuilt from the given versions
+
+        Args:
+            artifact: Artifact name
+            input_versions: Table name -> version of the snapshot it was built from
+        """
+        try:
+            self.db.execute_query(
+                """
+                INSERT INTO analytics_artifact_state (artifact, input_versions, built_at)
+                VALUES (%(artifact)s, %(input_versions)s::jsonb, CURRENT_TIMESTAMP)
+                ON CONFLICT (artifact) DO UPDATE SET
+                    input_versions = EXCLUDED.input_versions,
+                    built_at = CURRENT_TIMESTAMP
+                """,
+                {"artifact": artifact, "input_versions": json.dumps(input_versions)},
             )
+        except Exception as e:
+            logger.error(f"Error recording analytics artifact {artifact}: {str(e)}")
+            raise
+
+    def get_recipe_ingredient_matrix(
+        self,
+    ) -> tuple[Dict[int, int], "sp.csr_matrix", List[str]]:
+        """Build normalized recipe-ingredient matrix for distance calculations
 
-            # Create mapping from matrix row index to recipe ID
-            recipe_id_map = {}
-            recipe_names = []
-            for idx, recipe_name in enumerate(normalized_matrix.index):
-                recipe_id_map[idx] = int(recipe_id_to_name[recipe_name])
-                recipe_names.append(recipe_name)
+        Returns:
+            Tuple of (recipe_id_map, normalized_matrix, recipe_names)
+            - recipe_id_map: Dict mapping matrix row index to recipe ID
+            - normalized_matrix: scipy CSR matrix with normalized ingredient
+              proportions (recipes x used ingredients)
+            - recipe_names: List of recipe names corresponding to matrix rows
+        """
+        import numpy as np
+        from scipy import sparse as sp
+
+        try:
+            dataset = self._get_dataset()
+            recipe_ids, ingredient_ids = dataset.recipe_ids, dataset.ingredient_ids
+            # Amounts in ml where the unit converts, else the raw amount, else 1
+            amount_ml = dataset.volume_ml(special_units=False)
+            if not len(recipe_ids):
+                logger.warning("No recipe data found for matrix building")
+                return {}, sp.csr_matrix((0, 0)), []
+
+            unique_recipes, rows = np.unique(recipe_ids, return_inverse=True)
+            unique_ingredients, cols = np.unique(ingredient_ids, return_inverse=True)
+            amount_matrix = sp.csr_matrix(
+                (amount_ml, (rows, cols)),
+                shape=(len(unique_recipes), len(unique_ingredients)),
+            )
+            amount_matrix.sum_duplicates()
+
+            # Normalize each recipe to sum to 1 (proportions), dropping recipes
+            # without any volume and ingredients no remaining recipe uses
+            totals = np.asarray(amount_matrix.sum(axis=1)).ravel()
+            keep_rows = np.flatnonzero(totals != 0)
+            normalized_matrix = (
+                sp.diags(1.0 / totals[keep_rows]) @ amount_matrix[keep_rows]
+            ).tocsr()
+            normalized_matrix.eliminate_zeros()
+            normalized_matrix = normalized_matrix[:, np.unique(normalized_matrix.indices)]
+
+            kept_ids = unique_recipes[keep_rows].tolist()
+            recipe_id_map = dict(enumerate(kept_ids))
+            recipe_names = [dataset.recipe_names[recipe_id] for recipe_id in kept_ids]
 
             logger.info(
                 f"Built recipe matrix: {normalized_matrix.shape[0]} recipes x {normalized_matrix.shape[1]} ingredients"
@@ -199,10 +442,7 @@ class AnalyticsQueries:
         Returns dict with 'data' key containing list of:
             {recipe_id, recipe_name, x, y, ingredients: [sorted ingredient names]}
         """
-        import numpy as np
-        from scipy import sparse as sp
-        from sklearn.metrics import pairwise_distances
-        from barcart import compute_umap_embedding
+        from barcart import compute_umap_embedding, manhattan_knn_graph
 
         try:
             # Get normalized recipe-ingredient matrix
@@ -210,18 +450,21 @@ class AnalyticsQueries:
                 self.get_recipe_ingredient_matrix()
             )
 
-            if normalized_matrix.empty:
+            if normalized_matrix.shape[0] == 0:
                 logger.warning("Empty recipe matrix, returning empty UMAP")
                 return []
 
-            # Compute pairwise Manhattan distances
-            logger.info("Computing pairwise Manhattan distances")
-            distance_matrix = pairwise_distances(normalized_matrix, metric="manhattan")
+            # Sparse Manhattan kNN graph; UMAP only looks at each recipe's
+            # nearest neighbors, so the n x n distance matrix is never built
+            logger.info("Computing Manhattan kNN graph")
+            knn_graph = manhattan_knn_graph(
+                normalized_matrix, k=UMAP_MANHATTAN_KNN_K
+            )
 
             # Run UMAP dimensionality reduction
             logger.info("Running UMAP dimensionality reduction")
             embedding = compute_umap_embedding(
-                distance_matrix,
+                knn_graph,
                 n_neighbors=5,
                 min_dist=0.05,
                 random_state=42,
@@ -229,10 +472,8 @@ class AnalyticsQueries:
 
             # Build result list with UMAP coordinates
             result = []
-            recipe_ids = []
             for idx in range(len(embedding)):
                 recipe_id = recipe_id_map[idx]
-                recipe_ids.append(recipe_id)
                 result.append(
                     {
                         "recipe_id": recipe_id,
@@ -243,58 +484,10 @@ class AnalyticsQueries:
                     }
                 )
 
-            # Query ingredients for all recipes in one go
-            if recipe_ids:
-                placeholders = ",".join(["%s"] * len(recipe_ids))
-                ingredient_query = f"""
-                    SELECT
-                        ri.recipe_id,
-                        i.name as ingredient_name,
-                        CASE
-                            WHEN u.name = 'to top' THEN 90.0
-                            WHEN u.name = 'to rinse' THEN 5.0
-                            WHEN u.name = 'each' OR u.name = 'Each' THEN -1.0
-                            WHEN u.conversion_to_ml IS NOT NULL AND ri.amount IS NOT NULL
-                                THEN u.conversion_to_ml * ri.amount
-                            WHEN ri.amount IS NOT NULL THEN ri.amount
-                            ELSE 0.0
-                        END as volume_ml
-                    FROM recipe_ingredients ri
-                    JOIN ingredients i ON ri.ingredient_id = i.id
-                    LEFT JOIN units u ON ri.unit_id = u.id
-                    WHERE ri.recipe_id IN ({placeholders})
-                    ORDER BY ri.recipe_id
-                """
-
-                ingredient_rows = self.db.execute_query(
-                    ingredient_query, tuple(recipe_ids)
-                )
-
-                # Group ingredients by recipe and sort by volume
-                recipe_ingredients = {}
-                for row in ingredient_rows:
-                    recipe_id = row["recipe_id"]
-                    if recipe_id not in recipe_ingredients:
-                        recipe_ingredients[recipe_id] = []
-
-                    # Use pre-computed volume from SQL
-                    amount_ml = row["volume_ml"]
-
-                    recipe_ingredients[recipe_id].append(
-                        {"name": row["ingredient_name"], "amount_ml": amount_ml}
-                    )
-
-                # Sort ingredients by volume and add to results
-                for item in result:
-                    recipe_id = item["recipe_id"]
-                    if recipe_id in recipe_ingredients:
-                        # Sort by amount (DESC), with "each" units (-1) at end
-                        sorted_ings = sorted(
-                            recipe_ingredients[recipe_id],
-                            key=lambda x: x["amount_ml"],
-                            reverse=True,
-                        )
-                        item["ingredients"] = [ing["name"] for ing in sorted_ings]
+            # Ingredient names per recipe from the snapshot, largest volume first
+            ingredient_lists = self._get_dataset().ingredient_lists()
+            for item in result:
+                item["ingredients"] = ingredient_lists.get(item["recipe_id"], [])
 
             logger.info(
                 f"UMAP computation complete: {len(result)} recipes with ingredients"
@@ -317,8 +510,8 @@ class AnalyticsQueries:
         import pandas as pd
 
         try:
-            # Reuse the ingredient usage stats query with all_ingredients=True
-            rows = self.get_ingredient_usage_stats(all_ingredients=True)
+            # Usage stats of all ingredients, loaded with the snapshot
+            rows = self._get_dataset().ingredient_stats
 
             if not rows:
                 logger.warning("No ingredient data found for tree building")
@@ -351,53 +544,41 @@ class AnalyticsQueries:
             DataFrame with columns: recipe_id, recipe_name, ingredient_id,
             ingredient_name, volume_fraction (normalized per recipe), ingredient_path
         """
+        import numpy as np
         import pandas as pd
 
         try:
-            # Query recipe ingredients with volume calculations
-            sql = """
-            SELECT
-                r.id as recipe_id,
-                r.name as recipe_name,
-                i.id as ingredient_id,
-                i.name as ingredient_name,
-                i.path as ingredient_path,
-                ri.amount,
-                ri.unit_id,
-                u.conversion_to_ml,
-                CASE
-                    WHEN u.name = 'to top' THEN 90.0
-                    WHEN u.name = 'to rinse' THEN 5.0
-                    WHEN u.name = 'each' OR u.name = 'Each' THEN 1.0
-                    WHEN u.conversion_to_ml IS NOT NULL AND ri.amount IS NOT NULL
-                        THEN u.conversion_to_ml * ri.amount
-                    WHEN ri.amount IS NOT NULL THEN ri.amount
-                    ELSE 1.0
-                END as volume_ml
-            FROM recipes r
-            JOIN recipe_ingredients ri ON r.id = ri.recipe_id
-            JOIN ingredients i ON ri.ingredient_id = i.id
-            LEFT JOIN units u ON ri.unit_id = u.id
-            ORDER BY r.id, i.id
-            """
-
-            rows = self.db.execute_query(sql)
+            dataset = self._get_dataset()
+            recipe_ids, ingredient_ids = dataset.recipe_ids, dataset.ingredient_ids
+            volume_ml = dataset.volume_ml()
 
-            if not rows:
+            if not len(recipe_ids):
                 logger.warning("No recipe data found for distance calculations")
                 return pd.DataFrame()
 
-            df = pd.DataFrame(rows)
-
-            # Normalize volumes per recipe to sum to 1.0 (volume fractions)
-            df['volume_fraction'] = df.groupby('recipe_id')['volume_ml'].transform(
-                lambda x: x / x.sum()
+            # Normalize volumes per recipe to sum to 1.0 (volume fractions);
+            # rows are ordered by recipe, so each recipe is one contiguous run
+            starts = np.flatnonzero(np.r_[True, recipe_ids[1:] != recipe_ids[:-1]])
+            run_lengths = np.diff(np.r_[starts, len(recipe_ids)])
+            totals = np.add.reduceat(volume_ml, starts)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                volume_fraction = volume_ml / np.repeat(totals, run_lengths)
+
+            recipe_names = pd.Series(dataset.recipe_names)
+            ingredients = pd.DataFrame(dataset.ingredient_stats).set_index("ingredient_id")
+
+            df = pd.DataFrame(
+                {
+                    "recipe_id": recipe_ids,
+                    "recipe_name": recipe_names.reindex(recipe_ids).to_numpy(),
+                    "ingredient_id": ingredient_ids,
+                    "ingredient_name": ingredients["ingredient_name"].reindex(ingredient_ids).to_numpy(),
+                    "ingredient_path": ingredients["path"].reindex(ingredient_ids).to_numpy(),
+                    "volume_fraction": volume_fraction,
+                }
             )
 
-            # Drop the intermediate volume_ml and unit columns
-            df = df.drop(columns=['amount', 'unit_id', 'conversion_to_ml', 'volume_ml'])
-
-            logger.info(f"Retrieved {len(df)} recipe-ingredient pairs for {df['recipe_id'].nunique()} recipes")
+            logger.info(f"Retrieved {len(df)} recipe-ingredient pairs for {len(starts)} recipes")
             return df
 
         except Exception as e:
@@ -405,7 +586,10 @@ class AnalyticsQueries:
             raise
 
     def compute_cocktail_space_umap_em(
-        self, return_similarity: bool = False, candidate_k: int | None = 100
+        self,
+        return_similarity: bool = False,
+        candidate_k: int | None = 100,
+        incremental: bool = False,
     ) -> list | tuple[list, list]:
         """Compute UMAP using EM-learned distances with ingredient rollup.
 
@@ -414,10 +598,15 @@ class AnalyticsQueries:
             candidate_k: Number of candidate neighbors for constrained EM.
                 Use 0.0625 * n_recipes for optimal balance of speed/accuracy.
                 Set to None for full O(N²) computation.
+            incremental: If True (constrained EM with ANALYTICS_PATH set), warm-start
+                from the EM state saved by the previous run and only recompute
+                EMDs for new or changed recipes. Falls back to a full fit when
+                there is no compatible state or too much of the catalog changed.
 
         Returns:
             List of dicts with {recipe_id, recipe_name, x, y, ingredients: [...]}
         """
+        import hashlib
         import numpy as np
         import os
         from scipy import sparse as sp
@@ -426,13 +615,17 @@ class AnalyticsQueries:
             build_ingredient_distance_matrix,
             build_recipe_volume_matrix,
             em_fit,
+            em_refit,
             compute_umap_embedding,
         )
+        from barcart.distance_matrix import CondensedDistanceMatrix, KnnDistanceGraph
         from barcart.rollup import create_rollup_mapping, apply_rollup_to_recipes
         from barcart.reporting import build_recipe_similarity
         from utils.analytics_files import (
+            load_em_state,
             save_em_distance_matrix,
             save_em_ingredient_distance_matrix,
+            save_em_state,
         )
 
         try:
@@ -515,9 +708,8 @@ class AnalyticsQueries:
             }
 
             cost_matrix, ingredient_registry = build_ingredient_distance_matrix(
-                filtered_parent_map, id_to_name
+                filtered_parent_map, id_to_name, dtype=np.float32
             )
-            cost_matrix = cost_matrix.astype(np.float32, copy=False)
             logger.info(f"Cost matrix shape: {cost_matrix.shape}")
             logger.info("Cost matrix dtype: %s", cost_matrix.dtype)
             storage_path = os.environ.get("ANALYTICS_PATH")
@@ -544,32 +736,133 @@ class AnalyticsQueries:
                 sp.issparse(volume_matrix),
             )
 
-            # Step 6: Run EM fit
-            logger.info("Running EM fit (this may take several minutes)")
-            if return_similarity:
+            # Step 6: Run EM fit, incrementally from the saved state if possible
+            track_state = bool(incremental and storage_path and candidate_k is not None)
+            refit_inputs = None
+            if track_state:
+                recipe_ids = np.array(
+                    [int(recipe_registry.get_id(index=i)) for i in range(len(recipe_registry))],
+                    dtype=np.int64,
+                )
+                ingredient_ids = np.array(
+                    [
+                        str(ingredient_registry.get_id(index=i))
+                        for i in range(len(ingredient_registry))
+                    ]
+                )
+                fingerprints = _recipe_fingerprints(volume_matrix)
+                prior_fingerprint = hashlib.blake2b(
+                    np.ascontiguousarray(cost_matrix).tobytes(), digest_size=16
+                ).hexdigest()
+                refit_inputs = _incremental_em_inputs(
+                    load_em_state(storage_path),
+                    recipe_ids,
+                    fingerprints,
+                    ingredient_ids,
+                    prior_fingerprint,
+                )
+
+            if refit_inputs is not None:
+                logger.info(
+                    "Running incremental EM refit for %s changed recipes",
+                    len(refit_inputs["changed"]),
+                )
+                final_dist, final_cost, log, final_plans = em_refit(
+                    volume_matrix,
+                    refit_inputs["cost_matrix"],
+                    refit_inputs["distance_graph"],
+                    refit_inputs["plans"],
+                    refit_inputs["changed"],
+                    len(ingredient_registry),
+                    candidate_k=candidate_k,
+                )
+            elif return_similarity or track_state:
+                logger.info("Running EM fit (this may take several minutes)")
                 final_dist, final_cost, log, final_plans = em_fit(
                     volume_matrix,
                     cost_matrix,
                     len(ingredient_registry),
-                    iters=5,
+                    iters=EM_MAX_ITERS,
+                    tolerance=EM_TOLERANCE,
+                    knn_stability=EM_KNN_STABILITY,
+                    reuse_tolerance=EM_REUSE_TOLERANCE,
                     candidate_k=candidate_k,
                     return_plans=True,
+                    dense=False,
                 )
             else:
+                logger.info("Running EM fit (this may take several minutes)")
                 final_dist, final_cost, log = em_fit(
                     volume_matrix,
                     cost_matrix,
                     len(ingredient_registry),
-                    iters=5,
+                    iters=EM_MAX_ITERS,
+                    tolerance=EM_TOLERANCE,
+                    knn_stability=EM_KNN_STABILITY,
+                    reuse_tolerance=EM_REUSE_TOLERANCE,
                     candidate_k=candidate_k,
                     return_plans=False,
+                    dense=False,
                 )
-            max_distance = np.max(final_dist)
+            self.last_em_log = {
+                "mode": "full" if refit_inputs is None else "incremental",
+                **log,
+            }
+            logger.info(
+                "EM %s fit: %s iterations, final delta %.4e",
+                self.last_em_log["mode"],
+                len(log["delta"]),
+                log["delta"][-1] if log["delta"] else float("nan"),
+            )
+
+            # Distances come back compact: a sparse kNN graph in constrained mode,
+            # the condensed upper triangle in full mode
+            is_graph = isinstance(final_dist, KnnDistanceGraph)
+            if track_state and is_graph:
+                pair_rows, pair_cols, pair_distances = final_dist.to_pairs()
+                save_em_state(
+                    storage_path,
+                    {
+                        "recipe_ids": recipe_ids,
+                        "recipe_fingerprints": fingerprints,
+                        "ingredient_ids": ingredient_ids,
+                        "prior_fingerprint": np.array(prior_fingerprint),
+                        "incremental_refits": np.array(
+                            0 if refit_inputs is None else refit_inputs["n_refits"] + 1
+                        ),
+                        "cost_matrix": final_cost,
+                        "pair_rows": pair_rows,
+                        "pair_cols": pair_cols,
+                        "pair_distances": pair_distances,
+                        "plan_pairs": final_plans.pairs,
+                        "plan_offsets": final_plans.offsets,
+                        "plan_from": final_plans.from_idx,
+                        "plan_to": final_plans.to_idx,
+                        "plan_mass": final_plans.mass,
+                        "plan_cost": final_plans.cost,
+                    },
+                )
+                del pair_rows, pair_cols, pair_distances
+            dist_values = (
+                final_dist.data
+                if isinstance(final_dist, (CondensedDistanceMatrix, KnnDistanceGraph))
+                else final_dist
+            )
+            logger.info(
+                "EM distance matrix: %s (%.1f MB)",
+                type(final_dist).__name__,
+                final_dist.nbytes / (1024 * 1024),
+            )
+            max_distance = float(np.max(dist_values)) if dist_values.size else 0.0
             logger.info(f"EM fit complete. Max distance: {max_distance:.4f}")
-            finite_mask = np.isfinite(final_dist)
-            if not finite_mask.all():
+            finite_mask = np.isfinite(dist_values)
+            if is_graph:
+                # Pairs outside the graph were never computed; UMAP only sees the
+                # stored pairs, the dense download reports the rest as 2x max
+                final_dist.fill_value = float(max_distance * 2.0)
+            elif not finite_mask.all():
                 if finite_mask.any():
-                    max_finite = float(np.max(final_dist[finite_mask]))
+                    max_finite = float(np.max(dist_values[finite_mask]))
                 else:
                     max_finite = 0.0
                 replacement = float(max_finite * 2.0)
@@ -578,10 +871,8 @@ class AnalyticsQueries:
                     int((~finite_mask).sum()),
                     replacement,
                 )
-                final_dist = final_dist.copy()
-                final_dist[~finite_mask] = replacement
-                if final_dist.dtype != np.float32:
-                    final_dist = final_dist.astype(np.float32, copy=False)
+                dist_values[~finite_mask] = replacement
+            del finite_mask
             storage_path = os.environ.get("ANALYTICS_PATH")
             if storage_path:
                 save_em_distance_matrix(storage_path, final_dist)
@@ -601,12 +892,10 @@ class AnalyticsQueries:
             # Step 8: Build result list with UMAP coordinates
             logger.info("Formatting results with ingredient lists")
             result = []
-            recipe_ids = []
 
             for idx in range(len(embedding)):
                 recipe_id = recipe_registry.get_id(index=idx)
                 recipe_name = recipe_registry.get_name(index=idx)
-                recipe_ids.append(int(recipe_id))
 
                 result.append({
                     'recipe_id': int(recipe_id),
@@ -616,66 +905,22 @@ class AnalyticsQueries:
                     'ingredients': []  # Will populate below
                 })
 
-            # Step 9: Query ingredients for all recipes in one go
-            if recipe_ids:
-                placeholders = ','.join(['%s'] * len(recipe_ids))
-                ingredient_query = f"""
-                    SELECT
-                        ri.recipe_id,
-                        i.name as ingredient_name,
-                        CASE
-                            WHEN u.name = 'to top' THEN 90.0
-                            WHEN u.name = 'to rinse' THEN 5.0
-                            WHEN u.name = 'each' OR u.name = 'Each' THEN -1.0
-                            WHEN u.conversion_to_ml IS NOT NULL AND ri.amount IS NOT NULL
-                                THEN u.conversion_to_ml * ri.amount
-                            WHEN ri.amount IS NOT NULL THEN ri.amount
-                            ELSE 0.0
-                        END as volume_ml
-                    FROM recipe_ingredients ri
-                    JOIN ingredients i ON ri.ingredient_id = i.id
-                    LEFT JOIN units u ON ri.unit_id = u.id
-                    WHERE ri.recipe_id IN ({placeholders})
-                    ORDER BY ri.recipe_id
-                """
-
-                ingredient_rows = self.db.execute_query(ingredient_query, tuple(recipe_ids))
-
-                # Group ingredients by recipe and sort by volume
-                recipe_ingredients = {}
-                for row in ingredient_rows:
-                    recipe_id = row['recipe_id']
-                    if recipe_id not in recipe_ingredients:
-                        recipe_ingredients[recipe_id] = []
-
-                    recipe_ingredients[recipe_id].append({
-                        'name': row['ingredient_name'],
-                        'amount_ml': row['volume_ml']
-                    })
-
-                # Sort ingredients by volume and add to results
-                for item in result:
-                    recipe_id = item['recipe_id']
-                    if recipe_id in recipe_ingredients:
-                        sorted_ings = sorted(
-                            recipe_ingredients[recipe_id],
-                            key=lambda x: x['amount_ml'],
-                            reverse=True
-                        )
-                        item['ingredients'] = [ing['name'] for ing in sorted_ings]
+            # Step 9: Ingredient names per recipe from the snapshot, largest volume first
+            ingredient_lists = self._get_dataset().ingredient_lists()
+            for item in result:
+                item['ingredients'] = ingredient_lists.get(item['recipe_id'], [])
 
             logger.info(f"EM-based UMAP computation complete: {len(result)} recipes")
             if return_similarity:
                 logger.info("Computing recipe similarity artifacts from EM plans")
-                candidate_pairs = set(final_plans.keys()) if final_plans else set()
                 recipe_similarity = build_recipe_similarity(
                     final_dist,
-                    final_plans or {},
+                    final_plans,
                     recipe_registry,
                     ingredient_registry,
                     k=4 if candidate_k is None else candidate_k,
                     plan_topk=3,
-                    candidate_pairs=candidate_pairs if candidate_pairs else None,
+                    candidate_pairs=final_plans.pairs if len(final_plans) else None,
                 )
                 return result, recipe_similarity
 
@@ -2,22 +2,33 @@ import base64
 import json
 import logging
 import os
+import uuid
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Union, Tuple, cast
+from typing import Dict, Iterator, List, Optional, Any, Union, Tuple, cast
 
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from psycopg2 import pool
 
-from .db_utils import extract_all_ingredient_ids, assemble_ingredient_full_names
+from .db_utils import (
+    extract_all_ingredient_ids,
+    assemble_ingredient_full_names,
+    assemble_ingredient_full_names_from_ancestors,
+)
 from .sql_queries import (
     get_recipe_by_id_sql,
     get_all_recipes_sql,
     get_recipe_ingredients_by_recipe_id_sql_factory,
     get_recipes_count_sql,
     get_ingredients_count_sql,
+    build_refresh_makeable_recipes_sql,
     INGREDIENT_SELECT_FIELDS,
+    SUBTREE_SATISFIES_RECIPE_INGREDIENTS,
 )
+from .db_pool import ConnectionPool
+from .name_cache import NameCache
+from .recommendation_engine import RecommendationIndex, RecommendationIndexCache
+from core.config import settings
 from core.exceptions import ConflictException, ValidationException
 
 # Configure logging
@@ -25,9 +36,76 @@ logger = logging.getLogger()
 logger.setLevel(logging.DEBUG)
 
 
+
+def _fetch_chunks(
+    conn,
+    sql: str,
+    parameters: Optional[Union[Dict[str, Any], Tuple]],
+    chunk_size: int,
+) -> Iterator[List[Tuple]]:
+    """Yield the rows of a SELECT in chunks through a server-side (named) cursor
+
+    A cursor left open by an error or an abandoned generator is dropped when
+    the caller ends the transaction.
+    """
+    cursor = conn.cursor(name=f"stream_{uuid.uuid4().hex}")
+    cursor.itersize = chunk_size
+
+    if parameters:
+        cursor.execute(sql, parameters)
+    else:
+        cursor.execute(sql)
+
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield rows
+    cursor.close()
+
+
+class SnapshotReader:
+    """Read-only queries inside the transaction opened by Database.read_snapshot
+
+    Offers the SELECT side of the Database query interface (execute_query and
+    stream_query), so loaders can run unchanged against a snapshot.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def execute_query(
+        self, sql: str, parameters: Optional[Union[Dict[str, Any], Tuple]] = None
+    ) -> List[Dict[str, Any]]:
+        """Execute a SELECT and return its rows as dicts"""
+        cursor = self._conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            if parameters:
+                cursor.execute(sql, parameters)
+            else:
+                cursor.execute(sql)
+            return [dict(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    def stream_query(
+        self,
+        sql: str,
+        parameters: Optional[Union[Dict[str, Any], Tuple]] = None,
+        chunk_size: int = 50000,
+    ) -> Iterator[List[Tuple]]:
+        """Stream a SELECT in chunks of plain tuples (see Database.stream_query)"""
+        yield from _fetch_chunks(self._conn, sql, parameters, chunk_size)
+
+
 class Database:
     # Class-level connection pool (shared across instances)
-    _pool: pool.ThreadedConnectionPool = None
+    _pool: ConnectionPool = None
+    # Name -> row caches for search filters, reset whenever the pool is
+    _ingredient_name_cache: NameCache = None
+    _public_tag_name_cache: NameCache = None
+    # Recipe requirement bitsets for ingredient recommendations
+    _recommendation_index_cache: RecommendationIndexCache = None
 
     def __init__(self):
         """Initialize the database connection to PostgreSQL"""
@@ -59,11 +137,22 @@ class Database:
         """Initialize the connection pool if not already initialized"""
         if Database._pool is None:
             logger.info("Creating new PostgreSQL connection pool")
-            Database._pool = pool.ThreadedConnectionPool(
-                minconn=1,
-                maxconn=10,
+            Database._pool = ConnectionPool(
+                minconn=settings.db_pool_min_size,
+                maxconn=settings.db_pool_max_size,
+                acquire_timeout=settings.db_pool_acquire_timeout,
+                max_lifetime=settings.db_pool_max_lifetime,
+                max_idle=settings.db_pool_max_idle,
                 **self.conn_params
             )
+            # Ingredient names are CITEXT (case-insensitive), tag names are TEXT
+            Database._ingredient_name_cache = NameCache(
+                settings.name_cache_ttl, normalize=str.lower
+            )
+            Database._public_tag_name_cache = NameCache(settings.name_cache_ttl)
+            Database._recommendation_index_cache = RecommendationIndexCache(
+                settings.recommendation_index_ttl
+            )
 
     def _test_connection(self):
         """Test the database connection"""
@@ -83,7 +172,7 @@ class Database:
                 self._return_connection(conn)
 
     def _get_connection(self):
-        """Get a connection from the pool"""
+        """Get a connection from the pool, waiting up to the acquire timeout"""
         return Database._pool.getconn()
 
     def _return_connection(self, conn):
@@ -91,6 +180,45 @@ class Database:
         if Database._pool and conn:
             Database._pool.putconn(conn)
 
+    @classmethod
+    def pool_stats(cls) -> Optional[Dict[str, Any]]:
+        """Connection pool counters, or None if the pool is not initialized"""
+        if cls._pool is None:
+            return None
+        return cls._pool.stats()
+
+    @classmethod
+    def name_cache_stats(cls) -> Optional[Dict[str, Any]]:
+        """Ingredient and public tag name cache counters, or None if not initialized"""
+        if cls._ingredient_name_cache is None:
+            return None
+        return {
+            "ingredients": cls._ingredient_name_cache.stats(),
+            "public_tags": cls._public_tag_name_cache.stats(),
+        }
+
+    def _invalidate_ingredient_names(self):
+        """Drop cached ingredient name lookups after an ingredient write"""
+        if Database._ingredient_name_cache is not None:
+            Database._ingredient_name_cache.invalidate()
+
+    @classmethod
+    def recommendation_index_stats(cls) -> Optional[Dict[str, Any]]:
+        """Recommendation index counters, or None if not initialized"""
+        if cls._recommendation_index_cache is None:
+            return None
+        return cls._recommendation_index_cache.stats()
+
+    def _invalidate_recommendation_index(self):
+        """Drop the recommendation index after a recipe or ingredient write"""
+        if Database._recommendation_index_cache is not None:
+            Database._recommendation_index_cache.invalidate()
+
+    def _invalidate_public_tag_names(self):
+        """Drop cached public tag name lookups after a tag write"""
+        if Database._public_tag_name_cache is not None:
+            Database._public_tag_name_cache.invalidate()
+
     def execute_query(
         self, sql: str, parameters: Optional[Union[Dict[str, Any], Tuple]] = None
     ) -> Union[List[Dict[str, Any]], Dict[str, int]]:
@@ -126,6 +254,54 @@ class Database:
             if conn:
                 self._return_connection(conn)
 
+    def stream_query(
+        self,
+        sql: str,
+        parameters: Optional[Union[Dict[str, Any], Tuple]] = None,
+        chunk_size: int = 50000,
+    ) -> Iterator[List[Tuple]]:
+        """Stream a SELECT through a server-side cursor in chunks of plain tuples
+
+        Rows are fetched chunk_size at a time, so neither the client nor the
+        driver holds the full result set; callers convert each chunk into typed
+        arrays before asking for the next one.
+        """
+        conn = None
+        finished = False
+        try:
+            conn = self._get_connection()
+            yield from _fetch_chunks(conn, sql, parameters, chunk_size)
+            conn.commit()
+            finished = True
+        except Exception as e:
+            logger.error(f"Error streaming query: {str(e)}")
+            raise
+        finally:
+            if conn:
+                if not finished:
+                    # Error or abandoned generator: drop the named cursor's transaction
+                    conn.rollback()
+                self._return_connection(conn)
+
+    @contextmanager
+    def read_snapshot(self) -> Iterator["SnapshotReader"]:
+        """Run a group of reads against one consistent snapshot of the database
+
+        Yields a SnapshotReader whose queries share a single REPEATABLE READ,
+        READ ONLY transaction on one pooled connection, so every query sees the
+        data as of the first one even while other sessions keep writing.
+        """
+        conn = self._get_connection()
+        try:
+            conn.rollback()  # Start from a clean transaction on a reused connection
+            cursor = conn.cursor()
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+            cursor.close()
+            yield SnapshotReader(conn)
+        finally:
+            conn.rollback()
+            self._return_connection(conn)
+
     def create_ingredient(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new ingredient"""
         try:
@@ -213,16 +389,18 @@ class Database:
                 )
 
                 conn.commit()
+                self._invalidate_ingredient_names()
+                self._invalidate_recommendation_index()
 
-                # Fetch the created ingredient
-                ingredient = cast(
-                    List[Dict[str, Any]],
-                    self.execute_query(
-                        "SELECT id, name, description, parent_id, path, allow_substitution, percent_abv, sugar_g_per_l, titratable_acidity_g_per_l, url, created_by FROM ingredients WHERE id = %(id)s",
-                        {"id": new_id},
-                    ),
+                # Fetch the created ingredient on the connection already held
+                cursor = conn.cursor(cursor_factory=RealDictCursor)
+                cursor.execute(
+                    "SELECT id, name, description, parent_id, path, allow_substitution, percent_abv, sugar_g_per_l, titratable_acidity_g_per_l, url, created_by FROM ingredients WHERE id = %(id)s",
+                    {"id": new_id},
                 )
-                return ingredient[0]
+                ingredient = dict(cursor.fetchone())
+                conn.rollback()  # End the read-only transaction before returning the connection
+                return ingredient
             except psycopg2.IntegrityError as e:
                 if conn:
                     conn.rollback()
@@ -252,21 +430,53 @@ class Database:
     def update_ingredient(
         self, ingredient_id: int, data: Dict[str, Any]
     ) -> Optional[Dict[str, Any]]:
-        """Update an existing ingredient"""
+        """Update an existing ingredient.
+
+        Re-parenting rewrites the ingredient's path and every descendant path
+        with one set-based UPDATE, in the same transaction as the ingredient
+        update itself.
+        """
+        conn = None
         try:
+            conn = self._get_connection()
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor.execute("BEGIN")
+
+            # Build the update query dynamically to handle None values properly
+            set_clauses = [
+                "name = COALESCE(%(name)s, name)",
+                "description = COALESCE(%(description)s, description)",
+            ]
+            query_params: Dict[str, Any] = {
+                "id": ingredient_id,
+                "name": data.get("name"),
+                "description": data.get("description"),
+            }
+
+            # Handle allow_substitution explicitly
+            if "allow_substitution" in data:
+                set_clauses.append("allow_substitution = %(allow_substitution)s")
+                query_params["allow_substitution"] = data.get("allow_substitution")
+
+            # Substitution rules depend on the hierarchy and allow_substitution flags
+            changes_substitution = "parent_id" in data or "allow_substitution" in data
+            if changes_substitution:
+                cursor.execute(SUBTREE_SATISFIES_RECIPE_INGREDIENTS, {"id": ingredient_id})
+                affected_ingredients = {row["ingredient_id"] for row in cursor.fetchall()}
+
             # Check if changing parent_id, as this affects the path
+            old_path = new_path = None
             if "parent_id" in data:
-                old_ingredient = cast(
-                    List[Dict[str, Any]],
-                    self.execute_query(
-                        "SELECT parent_id, path FROM ingredients WHERE id = %(id)s",
-                        {"id": ingredient_id},
-                    ),
+                # Lock the row so concurrent re-parenting can't interleave
+                cursor.execute(
+                    "SELECT parent_id, path FROM ingredients WHERE id = %(id)s FOR UPDATE",
+                    {"id": ingredient_id},
                 )
-
+                old_ingredient = cursor.fetchone()
                 if not old_ingredient:
+                    conn.rollback()
                     return None
-                old_path = old_ingredient[0]["path"]
+                old_path = old_ingredient["path"]
                 new_parent_id = data.get("parent_id")
 
                 # Check for circular reference
@@ -276,115 +486,88 @@ class Database:
                         raise ValueError("Ingredient cannot be its own parent")
 
                     # Check if new parent exists
-                    parent = cast(
-                        List[Dict[str, Any]],
-                        self.execute_query(
-                            "SELECT path FROM ingredients WHERE id = %(id)s",
-                            {"id": new_parent_id},
-                        ),
+                    cursor.execute(
+                        "SELECT path FROM ingredients WHERE id = %(id)s",
+                        {"id": new_parent_id},
                     )
+                    parent = cursor.fetchone()
                     if not parent:
                         raise ValueError(
                             f"Parent ingredient with ID {new_parent_id} does not exist"
                         )
 
                     # Check if new parent is not a descendant
-                    descendants = self.get_ingredient_descendants(ingredient_id)
-                    if any(d["id"] == new_parent_id for d in descendants):
+                    if parent["path"].startswith(old_path):
                         raise ValueError(
                             "Cannot create circular reference in hierarchy"
                         )
 
                     # Calculate new path
-                    new_path = f"{parent[0]['path']}{ingredient_id}/"
+                    new_path = f"{parent['path']}{ingredient_id}/"
                 else:
                     # Root level ingredient
                     new_path = f"/{ingredient_id}/"
 
-                # Get descendants BEFORE updating the parent path
-                descendants = self.get_ingredient_descendants(ingredient_id)
-
-                # Build the update query dynamically to handle None values properly
-                set_clauses = [
-                    "name = COALESCE(%(name)s, name)",
-                    "description = COALESCE(%(description)s, description)",
-                    "parent_id = %(parent_id)s",
-                    "path = %(path)s",
-                ]
-                query_params = {
-                    "id": ingredient_id,
-                    "name": data.get("name"),
-                    "description": data.get("description"),
-                    "parent_id": new_parent_id,
-                    "path": new_path,
-                }
+                set_clauses.append("parent_id = %(parent_id)s")
+                set_clauses.append("path = %(path)s")
+                query_params["parent_id"] = new_parent_id
+                query_params["path"] = new_path
 
-                # Handle allow_substitution explicitly
-                if "allow_substitution" in data:
-                    set_clauses.append("allow_substitution = %(allow_substitution)s")
-                    query_params["allow_substitution"] = data.get("allow_substitution")
+            cursor.execute(
+                f"""
+                UPDATE ingredients
+                SET {", ".join(set_clauses)}
+                WHERE id = %(id)s
+                """,
+                query_params,
+            )
 
-                # Update ingredient with new path
-                self.execute_query(
-                    f"""
+            # Replace the old path prefix of every descendant in one statement
+            if old_path is not None and new_path != old_path:
+                cursor.execute(
+                    """
                     UPDATE ingredients
-                    SET {", ".join(set_clauses)}
-                    WHERE id = %(id)s
+                    SET path = %(new_path)s || SUBSTRING(path FROM %(old_length)s + 1)
+                    WHERE path LIKE %(path_pattern)s AND id != %(id)s
                     """,
-                    query_params,
+                    {
+                        "id": ingredient_id,
+                        "path_pattern": f"{old_path}%",
+                        "new_path": new_path,
+                        "old_length": len(old_path),
+                    },
                 )
 
-                # Update paths of descendants
-                for descendant in descendants:
-                    # Replace old path prefix with new path prefix
-                    descendant_path = descendant["path"]
-                    new_descendant_path = descendant_path.replace(old_path, new_path)
-
-                    self.execute_query(
-                        "UPDATE ingredients SET path = %(path)s WHERE id = %(id)s",
-                        {"path": new_descendant_path, "id": descendant["id"]},
-                    )
-            else:
-                # Simple update without changing the hierarchy
-                # Build the update query dynamically to handle None values properly
-                set_clauses = [
-                    "name = COALESCE(%(name)s, name)",
-                    "description = COALESCE(%(description)s, description)",
-                ]
-                query_params = {
-                    "id": ingredient_id,
-                    "name": data.get("name"),
-                    "description": data.get("description"),
-                }
-
-                # Handle allow_substitution explicitly
-                if "allow_substitution" in data:
-                    set_clauses.append("allow_substitution = %(allow_substitution)s")
-                    query_params["allow_substitution"] = data.get("allow_substitution")
-
-                self.execute_query(
-                    f"""
-                    UPDATE ingredients
-                    SET {", ".join(set_clauses)}
-                    WHERE id = %(id)s
-                    """,
-                    query_params,
+            # Only recipes using an ingredient that gained or lost a satisfier can change
+            if changes_substitution:
+                cursor.execute(SUBTREE_SATISFIES_RECIPE_INGREDIENTS, {"id": ingredient_id})
+                affected_ingredients.update(row["ingredient_id"] for row in cursor.fetchall())
+                cursor.execute(
+                    "SELECT DISTINCT recipe_id FROM recipe_ingredients WHERE ingredient_id = ANY(%s)",
+                    (list(affected_ingredients),),
                 )
+                recipe_ids = [row["recipe_id"] for row in cursor.fetchall()]
+                if recipe_ids:
+                    self._refresh_makeable_recipes(cursor, recipe_ids=recipe_ids)
 
-            # Fetch the updated ingredient
-            result = cast(
-                List[Dict[str, Any]],
-                self.execute_query(
-                    "SELECT id, name, description, parent_id, path, allow_substitution, percent_abv, sugar_g_per_l, titratable_acidity_g_per_l, url, created_by FROM ingredients WHERE id = %(id)s",
-                    {"id": ingredient_id},
-                ),
+            cursor.execute(
+                "SELECT id, name, description, parent_id, path, allow_substitution, percent_abv, sugar_g_per_l, titratable_acidity_g_per_l, url, created_by FROM ingredients WHERE id = %(id)s",
+                {"id": ingredient_id},
             )
-            if result:
-                return result[0]
-            return None
+            result = cursor.fetchone()
+            conn.commit()
+
+            self._invalidate_ingredient_names()
+            self._invalidate_recommendation_index()
+            return dict(result) if result else None
         except Exception as e:
+            if conn:
+                conn.rollback()
             logger.error(f"Error updating ingredient {ingredient_id}: {str(e)}")
             raise
+        finally:
+            if conn:
+                self._return_connection(conn)
 
     def delete_ingredient(self, ingredient_id: int) -> bool:
         """Delete an ingredient"""
@@ -421,10 +604,25 @@ class Database:
             if used_in_recipes:
                 raise ValueError("Cannot delete ingredient used in recipes")
 
+            # Inventories holding the ingredient lose it through ON DELETE CASCADE
+            holders = cast(
+                List[Dict[str, Any]],
+                self.execute_query(
+                    "SELECT DISTINCT cognito_user_id FROM user_ingredients WHERE ingredient_id = %(ingredient_id)s",
+                    {"ingredient_id": ingredient_id},
+                ),
+            )
+
             # Delete the ingredient
             self.execute_query(
                 "DELETE FROM ingredients WHERE id = %(id)s", {"id": ingredient_id}
             )
+            self._invalidate_ingredient_names()
+            self._invalidate_recommendation_index()
+            if holders:
+                self.refresh_makeable_recipes(
+                    user_ids=[row["cognito_user_id"] for row in holders]
+                )
             return True
         except Exception as e:
             logger.error(f"Error deleting ingredient {ingredient_id}: {str(e)}")
@@ -461,6 +659,30 @@ class Database:
             )
             return None
 
+    def resolve_ingredient_names(
+        self, ingredient_names: List[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Resolve ingredient names to {id, name, path}, keyed by lowercased name.
+
+        Served from the in-process name cache where possible; all misses are
+        looked up in one query. Names that don't exist are left out.
+        """
+        cache = Database._ingredient_name_cache
+        found, missing = cache.get_many(ingredient_names)
+        if missing:
+            generation = cache.generation
+            rows = cast(
+                List[Dict[str, Any]],
+                self.execute_query(
+                    "SELECT id, name, path FROM ingredients WHERE name = ANY(%s::citext[])",
+                    (missing,),
+                ),
+            )
+            resolved = {row["name"]: dict(row) for row in rows}
+            cache.put_many(resolved, generation)
+            found.update({name.lower(): row for name, row in resolved.items()})
+        return found
+
     def search_ingredients(self, search_term: str) -> List[Dict[str, Any]]:
         """Search ingredients by name - first exact match, then partial match (case-insensitive)"""
         try:
@@ -772,12 +994,14 @@ class Database:
                             ingredient.get("amount"),
                         ),
                     )
+            self._refresh_makeable_recipes(cursor, recipe_ids=[recipe_id])
 
             # Commit the transaction
             conn.commit()
             cursor.close()
             self._return_connection(conn)
             conn = None
+            self._invalidate_recommendation_index()
 
             # Return the created recipe
             recipe = self.get_recipe(recipe_id)
@@ -799,15 +1023,17 @@ class Database:
         created_recipes = []
 
         try:
+            # Validate every recipe's ingredients before taking a connection
+            # (validation queries on a connection of its own)
+            for data in recipes_data:
+                if "ingredients" in data and data["ingredients"]:
+                    self._validate_recipe_ingredients(data["ingredients"])
+
             conn = self._get_connection()
             cursor = conn.cursor()
             cursor.execute("BEGIN")
 
             for data in recipes_data:
-                # Validate ingredients before inserting
-                if "ingredients" in data and data["ingredients"]:
-                    self._validate_recipe_ingredients(data["ingredients"])
-
                 # Insert recipe
                 cursor.execute(
                     """
@@ -862,10 +1088,16 @@ class Database:
                     "source_url": data.get("source_url")
                 })
 
+            if created_recipes:
+                self._refresh_makeable_recipes(
+                    cursor, recipe_ids=[recipe["id"] for recipe in created_recipes]
+                )
+
             # Commit all recipes at once
             conn.commit()
             self._return_connection(conn)
             conn = None
+            self._invalidate_recommendation_index()
 
             return created_recipes
 
@@ -1167,13 +1399,9 @@ class Database:
             cursor.execute("BEGIN")
 
             # Check if recipe exists
-            recipe = cast(
-                List[Dict[str, Any]],
-                self.execute_query(
-                    "SELECT id FROM recipes WHERE id = %(id)s", {"id": recipe_id}
-                ),
-            )
-            if not recipe:
+            cursor.execute("SELECT id FROM recipes WHERE id = %s", (recipe_id,))
+            if cursor.fetchone() is None:
+                conn.rollback()
                 return False
 
             # Note: We don't need to explicitly delete recipe_ingredients, ratings, or tags
@@ -1181,6 +1409,7 @@ class Database:
             cursor.execute("DELETE FROM recipes WHERE id = %s", (recipe_id,))
 
             conn.commit()
+            self._invalidate_recommendation_index()
             return True
         except Exception as e:
             if conn:
@@ -1250,10 +1479,12 @@ class Database:
                             ingredient.get("amount"),
                         ),
                     )
+                self._refresh_makeable_recipes(cursor, recipe_ids=[recipe_id])
 
             conn.commit()
             self._return_connection(conn)
             conn = None  # Ensure it's not closed again in finally if commit succeeded
+            self._invalidate_recommendation_index()
 
             # Fetch and return the updated recipe
             return self.get_recipe(recipe_id)
@@ -1460,6 +1691,7 @@ class Database:
                 "INSERT INTO tags (name, created_by) VALUES (%(name)s, NULL)",
                 {"name": name},
             )
+            self._invalidate_public_tag_names()
             # Re-fetch the tag to get its ID
             tag = cast(
                 List[Dict[str, Any]],
@@ -1501,6 +1733,28 @@ class Database:
             logger.error(f"Error getting public tag by name '{name}': {str(e)}")
             raise
 
+    def resolve_public_tag_names(self, names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Resolve public tag names to {id, name}, keyed by name.
+
+        Served from the in-process name cache where possible; all misses are
+        looked up in one query. Names without a public tag are left out.
+        """
+        cache = Database._public_tag_name_cache
+        found, missing = cache.get_many(names)
+        if missing:
+            generation = cache.generation
+            rows = cast(
+                List[Dict[str, Any]],
+                self.execute_query(
+                    "SELECT id, name FROM tags WHERE name = ANY(%s) AND created_by IS NULL",
+                    (missing,),
+                ),
+            )
+            resolved = {row["name"]: dict(row) for row in rows}
+            cache.put_many(resolved, generation)
+            found.update(resolved)
+        return found
+
     def create_private_tag(self, name: str, cognito_user_id: str) -> Dict[str, Any]:
         """Creates a new private tag for a user. Returns the created tag."""
         # Validate inputs
@@ -1571,6 +1825,19 @@ class Database:
             )
             raise
 
+    def get_private_tags_by_names(
+        self, names: List[str], cognito_user_id: str
+    ) -> Dict[str, Dict[str, Any]]:
+        """Gets a user's private tags matching any of the given names, keyed by name."""
+        rows = cast(
+            List[Dict[str, Any]],
+            self.execute_query(
+                "SELECT id, name FROM tags WHERE name = ANY(%s) AND created_by = %s",
+                (names, cognito_user_id),
+            ),
+        )
+        return {row["name"]: row for row in rows}
+
     def get_public_tags(self) -> List[Dict[str, Any]]:
         """Get all public tags with usage count."""
         try:
@@ -1782,6 +2049,7 @@ class Database:
             )
             success = result.get("rowCount", 0) > 0
             if success:
+                self._invalidate_public_tag_names()
                 logger.info(f"Successfully deleted public tag {tag_id}")
             return success
         except Exception as e:
@@ -1831,12 +2099,20 @@ class Database:
         rating_type: str = "average",
         cursor: Optional[str] = None,
         return_pagination: bool = False,
+        assemble_in_db: bool = True,
     ) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
-        """Search recipes with pagination"""
+        """Search recipes with pagination
+
+        With ``assemble_in_db`` (the default) each recipe comes back as a single
+        row with its ingredients, ancestor names and tags aggregated as JSON by
+        PostgreSQL. The legacy row-per-ingredient query plus separate ancestor
+        name lookup is kept behind ``assemble_in_db=False`` for comparison.
+        """
         try:
             from .sql_queries import (
                 build_search_recipes_paginated_sql,
                 build_search_recipes_keyset_sql,
+                build_search_recipes_json_sql,
             )
 
             # Build query parameters
@@ -1871,8 +2147,9 @@ class Database:
             has_invalid_ingredients = False
 
             if search_params.get("ingredients"):
-                for i, ingredient_spec in enumerate(search_params["ingredients"]):
-                    # Parse ingredient specification: "name" or "name:MUST" or "name:MUST_NOT"
+                # Parse ingredient specifications: "name" or "name:MUST" or "name:MUST_NOT"
+                ingredient_specs = []
+                for ingredient_spec in search_params["ingredients"]:
                     ingredient_spec = ingredient_spec.strip()
 
                     if ":" in ingredient_spec:
@@ -1882,13 +2159,20 @@ class Database:
                     else:
                         ingredient_name = ingredient_spec
                         operator = "MUST"  # Default to MUST if no operator specified
+                    ingredient_specs.append((ingredient_name, operator))
 
-                    ingredient = self.get_ingredient_by_name(ingredient_name)
+                # Resolve all names at once (cached, one query for any misses)
+                resolved_ingredients = self.resolve_ingredient_names(
+                    [name for name, _ in ingredient_specs]
+                )
+
+                for i, (ingredient_name, operator) in enumerate(ingredient_specs):
+                    ingredient = resolved_ingredients.get(ingredient_name.lower())
                     if ingredient:
-                        # Use path-based matching to include child ingredients
-                        param_name = f"ingredient_path_{i}"
-                        query_params[param_name] = f"%/{ingredient['id']}/%"
-                        condition = f"i2.path LIKE %({param_name})s"
+                        # Match the ingredient and its descendants via the closure table
+                        param_name = f"ingredient_id_{i}"
+                        query_params[param_name] = ingredient["id"]
+                        condition = f"ia2.ancestor_id = %({param_name})s"
 
                         if operator == "MUST_NOT":
                             must_not_ingredient_conditions.append(condition)
@@ -1913,18 +2197,19 @@ class Database:
             # Handle tag filtering
             tag_conditions = []
             if search_params.get("tags"):
-                for i, tag_name in enumerate(search_params["tags"]):
-                    tag_name = tag_name.strip()
-                    if tag_name:
-                        # Check if tag exists (both public and private)
-                        public_tag = self.get_public_tag_by_name(tag_name)
-                        private_tag = (
-                            self.get_private_tag_by_name_and_user(tag_name, user_id)
-                            if user_id
-                            else None
+                tag_names = [tag_name.strip() for tag_name in search_params["tags"]]
+                wanted_tags = [tag_name for tag_name in tag_names if tag_name]
+                known_tags = set(self.resolve_public_tag_names(wanted_tags))
+                if user_id:
+                    unresolved = [name for name in wanted_tags if name not in known_tags]
+                    if unresolved:
+                        known_tags.update(
+                            self.get_private_tags_by_names(unresolved, user_id)
                         )
 
-                        if public_tag or private_tag:
+                for i, tag_name in enumerate(tag_names):
+                    if tag_name:
+                        if tag_name in known_tags:
                             # Recipe must have this tag (either public or private)
                             tag_param = f"tag_name_{i}"
                             query_params[tag_param] = tag_name
@@ -1955,7 +2240,18 @@ class Database:
             inventory_filter = search_params.get("inventory", False)
 
             # Build dynamic SQL query
-            if use_keyset:
+            if assemble_in_db:
+                paginated_sql = build_search_recipes_json_sql(
+                    must_ingredient_conditions,
+                    must_not_ingredient_conditions,
+                    tag_conditions,
+                    sort_by,
+                    sort_order,
+                    inventory_filter,
+                    rating_type,
+                    keyset=use_keyset,
+                )
+            elif use_keyset:
                 paginated_sql = build_search_recipes_keyset_sql(
                     must_ingredient_conditions,
                     must_not_ingredient_conditions,
@@ -1983,92 +2279,10 @@ class Database:
             # Debug: Log the number of rows returned from database
             logger.info(f"Database search returned {len(rows)} rows")
 
-            # Group results by recipe ID and assemble full recipe objects
-            recipes = {}
-            for row in rows:
-                recipe_id = row["id"]
-
-                if recipe_id not in recipes:
-                    # Create the base recipe object
-                    recipes[recipe_id] = {
-                        "id": recipe_id,
-                        "name": row["name"],
-                        "instructions": row["instructions"],
-                        "description": row["description"],
-                        "image_url": row.get("image_url"),
-                        "source": row.get("source"),
-                        "source_url": row.get("source_url"),
-                        "avg_rating": row.get("avg_rating"),
-                        "rating_count": row.get("rating_count"),
-                        "user_rating": row.get("user_rating"),
-                        "created_by": row.get("created_by"),
-                        "ingredients": [],
-                        "tags": [],
-                    }
-                    if use_keyset:
-                        recipes[recipe_id]["_sort_value"] = row.get("sort_value")
-
-                    # Parse tags from GROUP_CONCAT format
-                    if row.get("public_tags_data"):
-                        for tag_data in row["public_tags_data"].split(":::"):
-                            if tag_data and "|||" in tag_data:
-                                tag_id, tag_name = tag_data.split("|||", 1)
-                                recipes[recipe_id]["tags"].append(
-                                    {
-                                        "id": int(tag_id),
-                                        "name": tag_name,
-                                        "type": "public",
-                                    }
-                                )
-
-                    if row.get("private_tags_data"):
-                        for tag_data in row["private_tags_data"].split(":::"):
-                            if tag_data and "|||" in tag_data:
-                                tag_id, tag_name = tag_data.split("|||", 1)
-                                recipes[recipe_id]["tags"].append(
-                                    {
-                                        "id": int(tag_id),
-                                        "name": tag_name,
-                                        "type": "private",
-                                    }
-                                )
-
-                # Add ingredient if present
-                if row.get("recipe_ingredient_id"):
-                    ingredient = {
-                        "ingredient_id": row["ingredient_id"],
-                        "ingredient_name": row["ingredient_name"],
-                        "ingredient_path": row.get("ingredient_path"),
-                        "amount": row.get("amount"),
-                        "unit_id": row.get("unit_id"),
-                        "unit_name": row.get("unit_name"),
-                        "unit_abbreviation": row.get("unit_abbreviation"),
-                    }
-                    recipes[recipe_id]["ingredients"].append(ingredient)
-
-            # Assemble full names and hierarchy for all ingredients
-            all_ingredients = []
-            for recipe in recipes.values():
-                all_ingredients.extend(recipe["ingredients"])
-
-            # Extract all ingredient IDs for batch name lookup
-            all_needed_ingredient_ids = extract_all_ingredient_ids(all_ingredients)
-            ingredient_names_map = {}
-            if all_needed_ingredient_ids:
-                placeholders = ",".join("%s" for _ in all_needed_ingredient_ids)
-                names_result = cast(
-                    List[Dict[str, Any]],
-                    self.execute_query(
-                        f"SELECT id, name FROM ingredients WHERE id IN ({placeholders})",
-                        tuple(all_needed_ingredient_ids),
-                    ),
-                )
-                ingredient_names_map = {row["id"]: row["name"] for row in names_result}
-
-            # Assemble full_name and hierarchy for all ingredients
-            assemble_ingredient_full_names(all_ingredients, ingredient_names_map)
-
-            result = list(recipes.values())
+            if assemble_in_db:
+                result = self._recipes_from_json_rows(rows, use_keyset)
+            else:
+                result = self._recipes_from_joined_rows(rows, use_keyset)
             logger.info(f"Found {len(result)} recipes from search")
 
             if not return_pagination:
@@ -2105,6 +2319,125 @@ class Database:
             logger.error(f"Error searching recipes with pagination: {str(e)}")
             raise
 
+    def _recipes_from_json_rows(
+        self, rows: List[Dict[str, Any]], use_keyset: bool
+    ) -> List[Dict[str, Any]]:
+        """Build recipe dicts from search rows with JSON ingredients and tags"""
+        result = []
+        for row in rows:
+            ingredients = row.get("ingredients") or []
+            assemble_ingredient_full_names_from_ancestors(ingredients)
+            recipe = {
+                "id": row["id"],
+                "name": row["name"],
+                "instructions": row["instructions"],
+                "description": row["description"],
+                "image_url": row.get("image_url"),
+                "source": row.get("source"),
+                "source_url": row.get("source_url"),
+                "avg_rating": row.get("avg_rating"),
+                "rating_count": row.get("rating_count"),
+                "user_rating": row.get("user_rating"),
+                "created_by": row.get("created_by"),
+                "ingredients": ingredients,
+                "tags": row.get("tags") or [],
+            }
+            if use_keyset:
+                recipe["_sort_value"] = row.get("sort_value")
+            result.append(recipe)
+        return result
+
+    def _recipes_from_joined_rows(
+        self, rows: List[Dict[str, Any]], use_keyset: bool
+    ) -> List[Dict[str, Any]]:
+        """Build recipe dicts from row-per-ingredient search rows (legacy path)"""
+        # Group results by recipe ID and assemble full recipe objects
+        recipes = {}
+        for row in rows:
+            recipe_id = row["id"]
+
+            if recipe_id not in recipes:
+                # Create the base recipe object
+                recipes[recipe_id] = {
+                    "id": recipe_id,
+                    "name": row["name"],
+                    "instructions": row["instructions"],
+                    "description": row["description"],
+                    "image_url": row.get("image_url"),
+                    "source": row.get("source"),
+                    "source_url": row.get("source_url"),
+                    "avg_rating": row.get("avg_rating"),
+                    "rating_count": row.get("rating_count"),
+                    "user_rating": row.get("user_rating"),
+                    "created_by": row.get("created_by"),
+                    "ingredients": [],
+                    "tags": [],
+                }
+                if use_keyset:
+                    recipes[recipe_id]["_sort_value"] = row.get("sort_value")
+
+                # Parse tags from GROUP_CONCAT format
+                if row.get("public_tags_data"):
+                    for tag_data in row["public_tags_data"].split(":::"):
+                        if tag_data and "|||" in tag_data:
+                            tag_id, tag_name = tag_data.split("|||", 1)
+                            recipes[recipe_id]["tags"].append(
+                                {
+                                    "id": int(tag_id),
+                                    "name": tag_name,
+                                    "type": "public",
+                                }
+                            )
+
+                if row.get("private_tags_data"):
+                    for tag_data in row["private_tags_data"].split(":::"):
+                        if tag_data and "|||" in tag_data:
+                            tag_id, tag_name = tag_data.split("|||", 1)
+                            recipes[recipe_id]["tags"].append(
+                                {
+                                    "id": int(tag_id),
+                                    "name": tag_name,
+                                    "type": "private",
+                                }
+                            )
+
+            # Add ingredient if present
+            if row.get("recipe_ingredient_id"):
+                ingredient = {
+                    "ingredient_id": row["ingredient_id"],
+                    "ingredient_name": row["ingredient_name"],
+                    "ingredient_path": row.get("ingredient_path"),
+                    "amount": row.get("amount"),
+                    "unit_id": row.get("unit_id"),
+                    "unit_name": row.get("unit_name"),
+                    "unit_abbreviation": row.get("unit_abbreviation"),
+                }
+                recipes[recipe_id]["ingredients"].append(ingredient)
+
+        # Assemble full names and hierarchy for all ingredients
+        all_ingredients = []
+        for recipe in recipes.values():
+            all_ingredients.extend(recipe["ingredients"])
+
+        # Extract all ingredient IDs for batch name lookup
+        all_needed_ingredient_ids = extract_all_ingredient_ids(all_ingredients)
+        ingredient_names_map = {}
+        if all_needed_ingredient_ids:
+            placeholders = ",".join("%s" for _ in all_needed_ingredient_ids)
+            names_result = cast(
+                List[Dict[str, Any]],
+                self.execute_query(
+                    f"SELECT id, name FROM ingredients WHERE id IN ({placeholders})",
+                    tuple(all_needed_ingredient_ids),
+                ),
+            )
+            ingredient_names_map = {row["id"]: row["name"] for row in names_result}
+
+        # Assemble full_name and hierarchy for all ingredients
+        assemble_ingredient_full_names(all_ingredients, ingredient_names_map)
+
+        return list(recipes.values())
+
     def _encode_search_cursor(
         self, sort_by: str, sort_order: str, sort_value: Any, recipe_id: int
     ) -> str:
@@ -2219,6 +2552,7 @@ class Database:
                 "INSERT INTO user_ingredients (cognito_user_id, ingredient_id) VALUES (%s, %s)",
                 (user_id, ingredient_id),
             )
+            self._refresh_makeable_recipes(cursor, user_ids=[user_id])
 
             conn.commit()
             self._return_connection(conn)
@@ -2245,6 +2579,7 @@ class Database:
 
     def remove_user_ingredient(self, user_id: str, ingredient_id: int) -> bool:
         """Remove an ingredient from a user's inventory, but prevent removing parents if children exist"""
+        conn = None
         try:
             # Check if user has this ingredient
             existing = cast(
@@ -2295,18 +2630,70 @@ class Database:
                     )
 
             # Remove the ingredient from user's inventory
-            result = self.execute_query(
-                "DELETE FROM user_ingredients WHERE cognito_user_id = %(user_id)s AND ingredient_id = %(ingredient_id)s",
-                {"user_id": user_id, "ingredient_id": ingredient_id},
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            cursor.execute("BEGIN")
+            cursor.execute(
+                "DELETE FROM user_ingredients WHERE cognito_user_id = %s AND ingredient_id = %s",
+                (user_id, ingredient_id),
             )
+            removed = cursor.rowcount > 0
+            if removed:
+                self._refresh_makeable_recipes(cursor, user_ids=[user_id])
+            conn.commit()
 
-            return result.get("rowCount", 0) > 0
+            return removed
 
         except Exception as e:
+            if conn:
+                conn.rollback()
             logger.error(
                 f"Error removing ingredient {ingredient_id} from user {user_id}: {str(e)}"
             )
             raise
+        finally:
+            if conn:
+                self._return_connection(conn)
+
+    def _refresh_makeable_recipes(
+        self,
+        cursor,
+        user_ids: Optional[List[str]] = None,
+        recipe_ids: Optional[List[int]] = None,
+    ) -> None:
+        """Recompute user_makeable_recipes rows on the caller's transaction.
+
+        Only rows for the given users and/or recipes are rebuilt; with neither
+        the whole table is rebuilt.
+        """
+        statements = build_refresh_makeable_recipes_sql(
+            by_users=user_ids is not None, by_recipes=recipe_ids is not None
+        )
+        params = {"user_ids": user_ids, "recipe_ids": recipe_ids}
+        for sql in statements:
+            cursor.execute(sql, params)
+
+    def refresh_makeable_recipes(
+        self,
+        user_ids: Optional[List[str]] = None,
+        recipe_ids: Optional[List[int]] = None,
+    ) -> None:
+        """Recompute user_makeable_recipes in its own transaction (all rows by default)"""
+        conn = None
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            cursor.execute("BEGIN")
+            self._refresh_makeable_recipes(cursor, user_ids, recipe_ids)
+            conn.commit()
+        except Exception as e:
+            if conn:
+                conn.rollback()
+            logger.error(f"Error refreshing makeable recipes: {str(e)}")
+            raise
+        finally:
+            if conn:
+                self._return_connection(conn)
 
     def get_user_ingredients(self, user_id: str) -> List[Dict[str, Any]]:
         """Get all ingredients for a user with full ingredient details"""
@@ -2348,50 +2735,48 @@ class Database:
             cursor = conn.cursor()
             cursor.execute("BEGIN")
 
-            added_count = 0
+            # Existence checks for all requested ingredients at once, on this
+            # transaction's connection
+            cursor.execute(
+                "SELECT id FROM ingredients WHERE id = ANY(%s)", (list(ingredient_ids),)
+            )
+            known = {row[0] for row in cursor.fetchall()}
+            cursor.execute(
+                "SELECT ingredient_id FROM user_ingredients WHERE cognito_user_id = %s AND ingredient_id = ANY(%s)",
+                (user_id, list(ingredient_ids)),
+            )
+            held = {row[0] for row in cursor.fetchall()}
+
             already_exists_count = 0
             failed_count = 0
             errors = []
-
+            to_add: List[int] = []
             for ingredient_id in ingredient_ids:
-                try:
-                    # Check if ingredient exists
-                    ingredient_check = cast(
-                        List[Dict[str, Any]],
-                        self.execute_query(
-                            "SELECT id FROM ingredients WHERE id = %(ingredient_id)s",
-                            {"ingredient_id": ingredient_id},
-                        ),
-                    )
-                    if not ingredient_check:
-                        errors.append(
-                            f"Ingredient with ID {ingredient_id} does not exist"
-                        )
-                        failed_count += 1
-                        continue
-
-                    # Check if user already has this ingredient
-                    cursor.execute(
-                        "SELECT id FROM user_ingredients WHERE cognito_user_id = %s AND ingredient_id = %s",
-                        (user_id, ingredient_id),
-                    )
-                    existing = cursor.fetchone()
-
-                    if existing:
-                        already_exists_count += 1
-                        continue
-
-                    # Add the ingredient
-                    cursor.execute(
-                        "INSERT INTO user_ingredients (cognito_user_id, ingredient_id) VALUES (%s, %s)",
-                        (user_id, ingredient_id),
-                    )
-                    added_count += 1
-
-                except Exception as e:
-                    errors.append(f"Error adding ingredient {ingredient_id}: {str(e)}")
+                if ingredient_id not in known:
+                    errors.append(f"Ingredient with ID {ingredient_id} does not exist")
                     failed_count += 1
+                elif ingredient_id in held:
+                    already_exists_count += 1
+                else:
+                    to_add.append(ingredient_id)
+                    held.add(ingredient_id)
 
+            added_count = 0
+            if to_add:
+                # Rows added concurrently since the check count as already present
+                cursor.execute(
+                    """
+                    INSERT INTO user_ingredients (cognito_user_id, ingredient_id)
+                    SELECT %s, unnest(%s::int[])
+                    ON CONFLICT (cognito_user_id, ingredient_id) DO NOTHING
+                    """,
+                    (user_id, to_add),
+                )
+                added_count = cursor.rowcount
+                already_exists_count += len(to_add) - added_count
+
+            if added_count:
+                self._refresh_makeable_recipes(cursor, user_ids=[user_id])
             conn.commit()
 
             return {
@@ -2413,7 +2798,11 @@ class Database:
     def remove_user_ingredients_bulk(
         self, user_id: str, ingredient_ids: List[int]
     ) -> Dict[str, Any]:
-        """Remove multiple ingredients from a user's inventory with ordered deletion (children first, then parents)"""
+        """Remove multiple ingredients from a user's inventory.
+
+        Fails with ValueError, removing nothing, if an ingredient has a child
+        ingredient in the inventory that is not being removed too.
+        """
         conn = None
         try:
             if not ingredient_ids:
@@ -2430,129 +2819,47 @@ class Database:
             cursor = conn.cursor()
             cursor.execute("BEGIN")
 
-            removed_count = 0
-            not_found_count = 0
-            validation_errors = []
-
-            # First pass: validate all ingredients exist and collect their details
-            logger.info(
-                f"Validating {len(ingredient_ids)} ingredients for existence and collecting details"
+            # Existence check: which of the requested ingredients the user holds
+            cursor.execute(
+                """
+                SELECT i.id, i.name
+                FROM user_ingredients ui
+                JOIN ingredients i ON ui.ingredient_id = i.id
+                WHERE ui.cognito_user_id = %s AND ui.ingredient_id = ANY(%s)
+                """,
+                (user_id, list(ingredient_ids)),
             )
-            valid_ingredients = []
-            for ingredient_id in ingredient_ids:
-                try:
-                    # Check if user has this ingredient
-                    cursor.execute(
-                        "SELECT id FROM user_ingredients WHERE cognito_user_id = %s AND ingredient_id = %s",
-                        (user_id, ingredient_id),
-                    )
-                    existing = cursor.fetchone()
-
-                    if not existing:
-                        logger.debug(
-                            f"Ingredient {ingredient_id} not found in user {user_id} inventory"
-                        )
-                        not_found_count += 1
-                        continue
-
-                    # Get the ingredient details
-                    cursor.execute(
-                        "SELECT id, name, path FROM ingredients WHERE id = %s",
-                        (ingredient_id,),
-                    )
-                    ingredient = cursor.fetchone()
-
-                    if not ingredient:
-                        logger.warning(
-                            f"Ingredient {ingredient_id} not found in ingredients table"
-                        )
-                        not_found_count += 1
-                        continue
-
-                    valid_ingredients.append(
-                        {
-                            "id": ingredient[0],
-                            "name": ingredient[1],
-                            "path": ingredient[2] or "",
-                        }
-                    )
-                    logger.debug(
-                        f"Ingredient {ingredient_id} ({ingredient[1]}) found with path: {ingredient[2]}"
-                    )
-
-                except Exception as e:
-                    error_msg = f"Error validating ingredient {ingredient_id}: {str(e)}"
-                    logger.error(error_msg)
-                    validation_errors.append(error_msg)
-
-            if validation_errors:
-                conn.rollback()
-                error_summary = f"Validation failed for {len(validation_errors)} ingredients: {'; '.join(validation_errors)}"
-                logger.error(
-                    f"Bulk remove validation failed for user {user_id}: {error_summary}"
-                )
-                raise ValueError(error_summary)
-
-            # Create a set of ingredient IDs being removed for quick lookup
-            ingredient_ids_to_remove = set(ing["id"] for ing in valid_ingredients)
-
-            # Second pass: check for parent-child conflicts only for ingredients that won't be removed
+            held = dict(cursor.fetchall())
+            not_found_count = sum(1 for i in ingredient_ids if i not in held)
             logger.info(
-                f"Checking for parent-child conflicts for {len(valid_ingredients)} valid ingredients"
+                f"{len(held)} of {len(ingredient_ids)} ingredients found in user {user_id} inventory"
             )
-            for ingredient in valid_ingredients:
-                try:
-                    ingredient_id = ingredient["id"]
-                    ingredient_name = ingredient["name"]
-                    ingredient_path = ingredient["path"]
-
-                    # Check if this ingredient has any child ingredients in the user's inventory
-                    if ingredient_path:
-                        # Look for child ingredients in user's inventory
-                        cursor.execute(
-                            """
-                            SELECT ui.ingredient_id, i.name, i.path
-                            FROM user_ingredients ui
-                            JOIN ingredients i ON ui.ingredient_id = i.id
-                            WHERE ui.cognito_user_id = %s 
-                            AND i.path LIKE %s
-                            AND i.id != %s
-                            """,
-                            (user_id, f"{ingredient_path}%", ingredient_id),
-                        )
-                        child_ingredients = cursor.fetchall()
-
-                        if child_ingredients:
-                            # Check if any child ingredients are NOT being removed
-                            children_not_being_removed = []
-                            for child in child_ingredients:
-                                child_id = child[0]
-                                child_name = child[1]
-                                if child_id not in ingredient_ids_to_remove:
-                                    children_not_being_removed.append(child_name)
-
-                            if children_not_being_removed:
-                                error_msg = f"Cannot remove ingredient '{ingredient_name}' because it has child ingredients in your inventory that are not being removed: {', '.join(children_not_being_removed)}. Please include these child ingredients in the removal or remove them first."
-                                logger.warning(
-                                    f"Parent-child validation failed for ingredient {ingredient_id}: {error_msg}"
-                                )
-                                validation_errors.append(error_msg)
-                                continue
-                            else:
-                                logger.debug(
-                                    f"Ingredient {ingredient_id} ({ingredient_name}) has children but they are all being removed"
-                                )
-
-                    logger.debug(
-                        f"Ingredient {ingredient_id} ({ingredient_name}) passed validation"
-                    )
 
-                except Exception as e:
-                    error_msg = f"Error validating ingredient {ingredient_id}: {str(e)}"
-                    logger.error(error_msg)
-                    validation_errors.append(error_msg)
+            # Parent-child conflicts: descendants of a removed ingredient that
+            # stay in the inventory
+            cursor.execute(
+                """
+                SELECT ia.ancestor_id, i.name
+                FROM user_ingredients ui
+                JOIN ingredient_ancestors ia ON ia.descendant_id = ui.ingredient_id
+                JOIN ingredients i ON ui.ingredient_id = i.id
+                WHERE ui.cognito_user_id = %s
+                AND ia.ancestor_id = ANY(%s)
+                AND ia.depth > 0
+                AND NOT (ui.ingredient_id = ANY(%s))
+                ORDER BY ia.ancestor_id, i.name
+                """,
+                (user_id, list(held), list(held)),
+            )
+            children_not_being_removed: Dict[int, List[str]] = {}
+            for ancestor_id, child_name in cursor.fetchall():
+                children_not_being_removed.setdefault(ancestor_id, []).append(child_name)
 
-            # If there are validation errors, rollback and raise exception
+            validation_errors = [
+                f"Cannot remove ingredient '{held[ingredient_id]}' because it has child ingredients in your inventory that are not being removed: {', '.join(children_not_being_removed[ingredient_id])}. Please include these child ingredients in the removal or remove them first."
+                for ingredient_id in ingredient_ids
+                if ingredient_id in children_not_being_removed
+            ]
             if validation_errors:
                 conn.rollback()
                 error_summary = f"Validation failed for {len(validation_errors)} ingredients: {'; '.join(validation_errors)}"
@@ -2561,51 +2868,15 @@ class Database:
                 )
                 raise ValueError(error_summary)
 
-            # Third pass: sort ingredients by path depth (deepest first) to ensure children are deleted before parents
-            logger.info("Sorting ingredients by path depth for ordered deletion")
-            valid_ingredients.sort(
-                key=lambda x: len(x["path"].split("/")) if x["path"] else 0,
-                reverse=True,
-            )
-
-            # Fourth pass: remove ingredients in sorted order (children first, then parents)
-            logger.info(
-                f"Proceeding to remove {len(valid_ingredients)} ingredients in sorted order for user {user_id}"
+            # Children and parents go in one statement, so no deletion order is needed
+            cursor.execute(
+                "DELETE FROM user_ingredients WHERE cognito_user_id = %s AND ingredient_id = ANY(%s)",
+                (user_id, list(held)),
             )
-            for ingredient in valid_ingredients:
-                try:
-                    ingredient_id = ingredient["id"]
-                    ingredient_name = ingredient["name"]
-
-                    # Check if user still has this ingredient (re-check in case something changed)
-                    cursor.execute(
-                        "SELECT id FROM user_ingredients WHERE cognito_user_id = %s AND ingredient_id = %s",
-                        (user_id, ingredient_id),
-                    )
-                    existing = cursor.fetchone()
-
-                    if not existing:
-                        logger.debug(
-                            f"Ingredient {ingredient_id} no longer in user {user_id} inventory, skipping"
-                        )
-                        continue
-
-                    # Remove the ingredient
-                    cursor.execute(
-                        "DELETE FROM user_ingredients WHERE cognito_user_id = %s AND ingredient_id = %s",
-                        (user_id, ingredient_id),
-                    )
-                    removed_count += 1
-                    logger.debug(
-                        f"Successfully removed ingredient {ingredient_id} ({ingredient_name}) for user {user_id}"
-                    )
-
-                except Exception as e:
-                    logger.error(
-                        f"Error removing ingredient {ingredient_id} for user {user_id}: {str(e)}"
-                    )
-                    # Continue with other ingredients
+            removed_count = cursor.rowcount
 
+            if removed_count:
+                self._refresh_makeable_recipes(cursor, user_ids=[user_id])
             conn.commit()
             logger.info(
                 f"Bulk remove completed for user {user_id}: {removed_count} removed, {not_found_count} not found"
@@ -2625,7 +2896,7 @@ class Database:
                 self._return_connection(conn)
 
     def get_ingredient_recommendations(
-        self, user_id: str, limit: int = 20
+        self, user_id: str, limit: int = 20, use_index: bool = True
     ) -> List[Dict[str, Any]]:
         """
         Get ingredient recommendations that would unlock the most new recipes.
@@ -2633,8 +2904,16 @@ class Database:
         This finds ingredients the user doesn't have that would complete the most
         "almost makeable" recipes (recipes where user has all but one ingredient).
         Respects allow_substitution rules for ingredient matching.
+
+        By default the user's inventory is scored against the in-memory
+        recommendation index; ``use_index=False`` runs the equivalent SQL.
         """
         try:
+            if use_index:
+                return self.get_recommendation_index().recommend(
+                    self._get_user_ingredient_ids(user_id), limit
+                )
+
             from .sql_queries import get_ingredient_recommendations_sql
 
             query = get_ingredient_recommendations_sql()
@@ -2659,6 +2938,70 @@ class Database:
             )
             raise
 
+    def get_almost_makeable_recipes(
+        self, user_id: str, max_missing: int = 1
+    ) -> List[Dict[str, Any]]:
+        """Recipes the user is 1 to max_missing ingredients away from, with the missing ingredient IDs"""
+        try:
+            return self.get_recommendation_index().almost_makeable(
+                self._get_user_ingredient_ids(user_id), max_missing
+            )
+        except Exception as e:
+            logger.error(
+                f"Error getting almost makeable recipes for user {user_id}: {str(e)}"
+            )
+            raise
+
+    def get_shopping_list(self, user_id: str, size: int = 5) -> List[Dict[str, Any]]:
+        """Greedy list of up to ``size`` ingredients to buy, each with the recipes it unlocks"""
+        try:
+            return self.get_recommendation_index().shopping_list(
+                self._get_user_ingredient_ids(user_id), size
+            )
+        except Exception as e:
+            logger.error(f"Error building shopping list for user {user_id}: {str(e)}")
+            raise
+
+    def get_recommendation_index(self) -> RecommendationIndex:
+        """Return the process-wide recommendation index, loading it if needed"""
+        if Database._recommendation_index_cache is None:
+            return self._load_recommendation_index()
+        return Database._recommendation_index_cache.get(self._load_recommendation_index)
+
+    def _load_recommendation_index(self) -> RecommendationIndex:
+        """Read the recipe catalog and substitution graph into a RecommendationIndex
+
+        All four reads share one snapshot, so the cached index never mixes
+        catalog states.
+        """
+        try:
+            with self.read_snapshot() as snapshot:
+                ingredients = snapshot.execute_query(
+                    "SELECT id, name, description, parent_id, path, allow_substitution FROM ingredients"
+                )
+                recipes, requirements, satisfies = (
+                    [row for rows in snapshot.stream_query(sql) for row in rows]
+                    for sql in (
+                        "SELECT id, name FROM recipes ORDER BY id",
+                        "SELECT recipe_id, ingredient_id FROM recipe_ingredients",
+                        "SELECT user_ingredient_id, recipe_ingredient_id FROM ingredient_satisfies",
+                    )
+                )
+            return RecommendationIndex(ingredients, recipes, requirements, satisfies)
+        except Exception as e:
+            logger.error(f"Error loading recommendation index: {str(e)}")
+            raise
+
+    def _get_user_ingredient_ids(self, user_id: str) -> List[int]:
+        rows = cast(
+            List[Dict[str, Any]],
+            self.execute_query(
+                "SELECT ingredient_id FROM user_ingredients WHERE cognito_user_id = %(user_id)s",
+                {"user_id": user_id},
+            ),
+        )
+        return [row["ingredient_id"] for row in rows]
+
     # --- End User Ingredient Tracking Methods ---
 
     # --- Count Methods ---
@@ -0,0 +1,275 @@
+"""Blocking, instrumented PostgreSQL connection pool.
+
+psycopg2's ``ThreadedConnectionPool`` raises ``PoolError`` as soon as every
+connection is checked out, which surfaces as intermittent 500s under bursty
+traffic. ``ConnectionPool`` keeps the same ``getconn``/``putconn``/``closeall``
+interface but makes callers wait (up to a deadline) for a free connection,
+recycles connections that are too old or have been idle too long, and keeps
+counters that can be reported through ``stats()``.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import psycopg2
+from psycopg2 import extensions, pool
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (milliseconds) of the acquire-wait histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolTimeout(pool.PoolError):
+    """Raised when no connection became available before the acquire deadline"""
+
+
+class _WaitHistogram:
+    """Cumulative histogram of connection acquire wait times"""
+
+    def __init__(self, bounds_ms: Tuple[int, ...] = WAIT_BUCKETS_MS):
+        self.bounds_ms = bounds_ms
+        self.counts = [0] * (len(bounds_ms) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, wait_ms: float) -> None:
+        for index, bound in enumerate(self.bounds_ms):
+            if wait_ms <= bound:
+                break
+        else:
+            index = len(self.bounds_ms)
+        self.counts[index] += 1
+        self.total += 1
+        self.sum_ms += wait_ms
+        self.max_ms = max(self.max_ms, wait_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        buckets = {f"le_{bound}ms": count for bound, count in zip(self.bounds_ms, self.counts)}
+        buckets["gt_{}ms".format(self.bounds_ms[-1])] = self.counts[-1]
+        return {
+            "count": self.total,
+            "avg_ms": round(self.sum_ms / self.total, 3) if self.total else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "buckets": buckets,
+        }
+
+
+class ConnectionPool:
+    """Thread-safe connection pool that blocks with a deadline when exhausted.
+
+    Args:
+        minconn: Connections opened eagerly and kept even when idle
+        maxconn: Hard cap on open connections
+        acquire_timeout: Default seconds ``getconn`` waits before raising PoolTimeout
+        max_lifetime: Seconds after which a connection is closed instead of reused (0 disables)
+        max_idle: Seconds an idle connection above ``minconn`` is kept (0 disables)
+        **conn_params: Passed through to ``psycopg2.connect``
+    """
+
+    def __init__(
+        self,
+        minconn: int,
+        maxconn: int,
+        acquire_timeout: float = 10.0,
+        max_lifetime: float = 3600.0,
+        max_idle: float = 300.0,
+        **conn_params: Any,
+    ):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError(
+                f"Invalid pool bounds: minconn={minconn}, maxconn={maxconn}"
+            )
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.acquire_timeout = acquire_timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self._conn_params = conn_params
+
+        self._cond = threading.Condition()
+        # Idle connections as (conn, created_at, idle_since), most recently returned last
+        self._idle: Deque[Tuple[Any, float, float]] = deque()
+        # id(conn) -> created_at for connections currently checked out
+        self._in_use: Dict[int, float] = {}
+        self._opening = 0
+        self._waiters = 0
+        self._closed = False
+
+        self._wait_histogram = _WaitHistogram()
+        self._timeouts = 0
+        self._connections_opened = 0
+        self._connections_recycled = 0
+
+        for _ in range(minconn):
+            conn = self._connect()
+            now = time.monotonic()
+            self._idle.append((conn, now, now))
+            self._connections_opened += 1
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _connect(self):
+        return psycopg2.connect(**self._conn_params)
+
+    def _size(self) -> int:
+        return len(self._idle) + len(self._in_use) + self._opening
+
+    def _is_expired(self, created_at: float, idle_since: float, now: float) -> bool:
+        """Whether a connection just popped off the idle list should be closed"""
+        if self.max_lifetime and now - created_at >= self.max_lifetime:
+            return True
+        # The candidate is already off the idle list, so _size() excludes it
+        if (
+            self.max_idle
+            and now - idle_since >= self.max_idle
+            and self._size() >= self.minconn
+        ):
+            return True
+        return False
+
+    def _reap_idle(self, now: float) -> None:
+        """Close the oldest idle connections past max_idle, keeping minconn open"""
+        if not self.max_idle:
+            return
+        while self._idle and self._size() > self.minconn:
+            conn, _, idle_since = self._idle[0]
+            if now - idle_since < self.max_idle:
+                break
+            self._idle.popleft()
+            self._discard(conn)
+
+    def _discard(self, conn) -> None:
+        self._connections_recycled += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def getconn(self, timeout: Optional[float] = None):
+        """Check out a connection, waiting up to ``timeout`` seconds for one to free up"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        with self._cond:
+            waiting = False
+            try:
+                while True:
+                    if self._closed:
+                        raise pool.PoolError("connection pool is closed")
+
+                    now = time.monotonic()
+                    # Reuse the most recently returned connection so the
+                    # least recently used ones can age out under max_idle
+                    while self._idle:
+                        conn, created_at, idle_since = self._idle.pop()
+                        if conn.closed or self._is_expired(created_at, idle_since, now):
+                            self._discard(conn)
+                            continue
+                        self._in_use[id(conn)] = created_at
+                        self._wait_histogram.observe((now - start) * 1000)
+                        return conn
+
+                    if self._size() < self.maxconn:
+                        self._opening += 1
+                        break
+
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        logger.warning(
+                            f"Connection pool exhausted: waited {timeout:.1f}s "
+                            f"({self._waiters} callers waiting)"
+                        )
+                        raise PoolTimeout(
+                            f"Timed out after {timeout:.1f}s waiting for a database "
+                            f"connection ({self.maxconn} in use)"
+                        )
+                    if not waiting:
+                        waiting = True
+                        self._waiters += 1
+                    self._cond.wait(remaining)
+            finally:
+                if waiting:
+                    self._waiters -= 1
+
+        # Open a new connection outside the lock; the slot is already reserved
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._opening -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._opening -= 1
+            self._connections_opened += 1
+            self._in_use[id(conn)] = time.monotonic()
+            self._wait_histogram.observe((time.monotonic() - start) * 1000)
+        return conn
+
+    def putconn(self, conn, close: bool = False) -> None:
+        """Return a connection to the pool, rolling back any open transaction"""
+        with self._cond:
+            created_at = self._in_use.pop(id(conn), None)
+            if created_at is None:
+                raise pool.PoolError("trying to put unkeyed connection")
+
+            if not close and not conn.closed and not self._closed:
+                status = conn.info.transaction_status
+                if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    close = True
+                elif status != extensions.TRANSACTION_STATUS_IDLE:
+                    try:
+                        conn.rollback()
+                    except Exception:
+                        close = True
+
+            now = time.monotonic()
+            if (
+                close
+                or conn.closed
+                or self._closed
+                or (self.max_lifetime and now - created_at >= self.max_lifetime)
+            ):
+                self._discard(conn)
+            else:
+                self._idle.append((conn, created_at, now))
+            self._reap_idle(now)
+            self._cond.notify()
+
+    def closeall(self) -> None:
+        """Close every connection and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _, _ = self._idle.pop()
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Point-in-time pool counters for monitoring and capacity planning"""
+        with self._cond:
+            return {
+                "min_size": self.minconn,
+                "max_size": self.maxconn,
+                "size": self._size(),
+                "in_use": len(self._in_use),
+                "idle": len(self._idle),
+                "waiters": self._waiters,
+                "timeouts": self._timeouts,
+                "connections_opened": self._connections_opened,
+                "connections_recycled": self._connections_recycled,
+                "acquire_wait": self._wait_histogram.snapshot(),
+            }
@@ -88,17 +88,35 @@ def assemble_ingredient_full_names(
                     if ancestor_name:
                         ancestor_names.append(ancestor_name)
 
-        # Set hierarchy array (root to leaf order)
-        if ancestor_names:
-            ingredient["hierarchy"] = ancestor_names + [base_name]
-        else:
-            ingredient["hierarchy"] = [base_name]
-
-        # Construct full name (e.g., "Lime Juice [Lime;Citrus]")
-        if ancestor_names:
-            # Reverse the order to match original logic [parent; grandparent]
-            ingredient["full_name"] = (
-                f"{base_name} [{';'.join(reversed(ancestor_names))}]"
-            )
-        else:
-            ingredient["full_name"] = base_name
+        _set_full_name(ingredient, base_name, ancestor_names)
+
+
+def assemble_ingredient_full_names_from_ancestors(
+    ingredients_list: List[Dict[str, Any]]
+) -> None:
+    """Assemble 'full_name' and 'hierarchy' from names already resolved by the database.
+
+    Each ingredient must carry an 'ancestor_names' list (root to parent order),
+    as produced by the JSON search query; the key is removed once consumed.
+    """
+    for ingredient in ingredients_list:
+        ancestor_names = ingredient.pop("ancestor_names", None) or []
+        base_name = ingredient.get("ingredient_name", "Unknown")
+        _set_full_name(ingredient, base_name, ancestor_names)
+
+
+def _set_full_name(
+    ingredient: Dict[str, Any], base_name: str, ancestor_names: List[str]
+) -> None:
+    # Set hierarchy array (root to leaf order)
+    if ancestor_names:
+        ingredient["hierarchy"] = ancestor_names + [base_name]
+    else:
+        ingredient["hierarchy"] = [base_name]
+
+    # Construct full name (e.g., "Lime Juice [Lime;Citrus]")
+    if ancestor_names:
+        # Reverse the order to match original logic [parent; grandparent]
+        ingredient["full_name"] = f"{base_name} [{';'.join(reversed(ancestor_names))}]"
+    else:
+        ingredient["full_name"] = base_name
@@ -0,0 +1,84 @@
+"""In-process cache for resolving ingredient and tag names to rows.
+
+Recipe search turns every ``ingredients=`` and ``tags=`` filter term into an
+id (and, for ingredients, a hierarchy path) before the real query runs. The
+name -> row mapping changes only when ingredients or tags are written, so
+``NameCache`` keeps it in memory, lets callers resolve many names at once, and
+is cleared by the ``Database`` write methods. Entries also expire after a TTL
+so that writes made by other API worker processes are picked up.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class NameCache:
+    """Thread-safe name -> row mapping with TTL expiry and bulk invalidation.
+
+    Args:
+        ttl: Seconds an entry stays valid (0 disables caching)
+        normalize: Maps a name to its cache key, e.g. ``str.lower`` for CITEXT columns
+    """
+
+    def __init__(self, ttl: float = 60.0, normalize: Optional[Callable[[str], str]] = None):
+        self.ttl = ttl
+        self.normalize = normalize or (lambda name: name)
+        self._lock = threading.Lock()
+        # key -> (row, stored_at)
+        self._entries: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        # Bumped on every invalidation so in-flight lookups don't store stale rows
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get_many(self, names: Iterable[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """Split names into cached rows (keyed by normalized name) and missing names"""
+        found: Dict[str, Dict[str, Any]] = {}
+        missing: List[str] = []
+        now = time.monotonic()
+        with self._lock:
+            for name in names:
+                key = self.normalize(name)
+                if key in found:
+                    continue
+                entry = self._entries.get(key)
+                if entry is not None and self.ttl and now - entry[1] < self.ttl:
+                    found[key] = entry[0]
+                    self._hits += 1
+                else:
+                    if entry is not None:
+                        del self._entries[key]
+                    if name not in missing:
+                        missing.append(name)
+                    self._misses += 1
+        return found, missing
+
+    def put_many(self, rows: Dict[str, Dict[str, Any]], generation: int) -> None:
+        """Store rows looked up while the cache was at ``generation``.
+
+        Rows are dropped if the cache was invalidated since, because the
+        database read may predate the write that triggered the invalidation.
+        """
+        if not self.ttl:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if generation != self._generation:
+                return
+            for name, row in rows.items():
+                self._entries[self.normalize(name)] = (row, now)
+
+    def invalidate(self) -> None:
+        """Drop every entry (called after writes to the underlying table)"""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self._hits, "misses": self._misses}
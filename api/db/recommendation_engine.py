@@ -0,0 +1,257 @@
+"""In-memory ingredient recommendations over recipe requirement bitsets.
+
+Recommendations only depend on the recipe catalog and the substitution graph
+(``ingredient_satisfies``), which change rarely, and on the user's inventory,
+which changes on every request. ``RecommendationIndex`` loads the catalog once
+and stores it as packed bit rows:
+
+- one row per recipe with a bit for each required ingredient
+- one row per ingredient with a bit for each ingredient it satisfies
+
+Scoring an inventory ORs the satisfies rows of its ingredients into one mask,
+ANDs it out of every recipe row and popcounts the remainder, so the whole
+catalog is scored in a single vectorized pass. ``RecommendationIndexCache``
+holds the current index per process and is invalidated by ``Database`` writes
+to recipes and ingredients, with a TTL for writes made by other workers.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Number of set bits in each byte value
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def _popcount_rows(packed: np.ndarray) -> np.ndarray:
+    """Set bits per row of a packed uint8 bit matrix"""
+    return _POPCOUNT[packed].sum(axis=-1, dtype=np.int64)
+
+
+class RecommendationIndex:
+    """Packed recipe requirement and ingredient satisfaction bitsets.
+
+    Args:
+        ingredients: Ingredient rows (``id``, ``name``, ...) returned with recommendations
+        recipes: ``(recipe_id, recipe_name)`` pairs
+        requirements: ``(recipe_id, ingredient_id)`` pairs from recipe_ingredients
+        satisfies: ``(user_ingredient_id, recipe_ingredient_id)`` pairs from ingredient_satisfies
+    """
+
+    def __init__(
+        self,
+        ingredients: Sequence[Dict[str, Any]],
+        recipes: Sequence[Tuple[int, str]],
+        requirements: Iterable[Tuple[int, int]],
+        satisfies: Iterable[Tuple[int, int]],
+    ):
+        self.ingredients = {row["id"]: row for row in ingredients}
+        self.ingredient_ids = np.array(sorted(self.ingredients), dtype=np.int64)
+        self._column = {int(ingredient_id): j for j, ingredient_id in enumerate(self.ingredient_ids)}
+        self.recipe_ids = np.array([recipe_id for recipe_id, _ in recipes], dtype=np.int64)
+        self.recipe_names = [name for _, name in recipes]
+        row_of_recipe = {int(recipe_id): i for i, recipe_id in enumerate(self.recipe_ids)}
+
+        n_ingredients = len(self.ingredient_ids)
+        required = np.zeros((len(self.recipe_ids), n_ingredients), dtype=bool)
+        for recipe_id, ingredient_id in requirements:
+            row = row_of_recipe.get(recipe_id)
+            column = self._column.get(ingredient_id)
+            if row is not None and column is not None:
+                required[row, column] = True
+
+        satisfied_by = np.zeros((n_ingredients, n_ingredients), dtype=bool)
+        for user_ingredient_id, recipe_ingredient_id in satisfies:
+            user_column = self._column.get(user_ingredient_id)
+            recipe_column = self._column.get(recipe_ingredient_id)
+            if user_column is not None and recipe_column is not None:
+                satisfied_by[user_column, recipe_column] = True
+
+        self._requirements = np.packbits(required, axis=1)
+        self._satisfies = np.packbits(satisfied_by, axis=1)
+        # Recipes without ingredients are never "almost" makeable
+        self._has_requirements = required.any(axis=1)
+
+    @property
+    def n_recipes(self) -> int:
+        return len(self.recipe_ids)
+
+    def satisfied_mask(self, inventory_ids: Iterable[int]) -> np.ndarray:
+        """Packed bitset of every ingredient the inventory satisfies"""
+        columns = [self._column[i] for i in inventory_ids if i in self._column]
+        if not columns:
+            return np.zeros(self._satisfies.shape[1], dtype=np.uint8)
+        return np.bitwise_or.reduce(self._satisfies[columns], axis=0)
+
+    def _missing(self, satisfied: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Packed missing ingredients and missing counts for every recipe"""
+        missing = self._requirements & ~satisfied
+        return missing, _popcount_rows(missing)
+
+    def _ingredient_ids_in(self, packed_row: np.ndarray) -> List[int]:
+        bits = np.unpackbits(packed_row, count=len(self.ingredient_ids)).astype(bool)
+        return [int(i) for i in self.ingredient_ids[bits]]
+
+    def makeable_recipe_ids(self, inventory_ids: Iterable[int]) -> List[int]:
+        """Recipes whose every ingredient is satisfied (including ingredient-less ones)"""
+        _, counts = self._missing(self.satisfied_mask(inventory_ids))
+        return [int(i) for i in self.recipe_ids[counts == 0]]
+
+    def almost_makeable(
+        self, inventory_ids: Iterable[int], max_missing: int = 1
+    ) -> List[Dict[str, Any]]:
+        """Recipes missing between 1 and ``max_missing`` ingredients, fewest missing first"""
+        missing, counts = self._missing(self.satisfied_mask(inventory_ids))
+        rows = np.flatnonzero(self._has_requirements & (counts >= 1) & (counts <= max_missing))
+        rows = sorted(rows, key=lambda row: (counts[row], self.recipe_names[row]))
+        return [
+            {
+                "recipe_id": int(self.recipe_ids[row]),
+                "recipe_name": self.recipe_names[row],
+                "missing_ingredient_ids": self._ingredient_ids_in(missing[row]),
+            }
+            for row in rows
+        ]
+
+    def recommend(self, inventory_ids: Iterable[int], limit: int = 20) -> List[Dict[str, Any]]:
+        """Ingredients that would complete the most recipes missing exactly one ingredient.
+
+        Returns ingredient rows with ``recipes_unlocked`` and ``recipe_names``,
+        the same shape as the recommendations SQL, ordered by recipes unlocked.
+        """
+        missing, counts = self._missing(self.satisfied_mask(inventory_ids))
+        rows = np.flatnonzero(counts == 1)
+        if len(rows) == 0:
+            return []
+
+        # Exactly one bit is set in each row; its position is the missing ingredient
+        missing_columns = np.unpackbits(missing[rows], axis=1, count=len(self.ingredient_ids)).argmax(axis=1)
+        unlocked: Dict[int, List[str]] = {}
+        for row, column in zip(rows, missing_columns):
+            unlocked.setdefault(int(column), []).append(self.recipe_names[row])
+
+        ranked = sorted(
+            unlocked.items(),
+            key=lambda item: (-len(item[1]), self.ingredients[int(self.ingredient_ids[item[0]])]["name"]),
+        )
+        return [
+            dict(
+                self.ingredients[int(self.ingredient_ids[column])],
+                recipes_unlocked=len(names),
+                recipe_names=sorted(names),
+            )
+            for column, names in ranked[:limit]
+        ]
+
+    def shopping_list(self, inventory_ids: Iterable[int], size: int = 5) -> List[Dict[str, Any]]:
+        """Greedily pick up to ``size`` ingredients to buy, each unlocking the most recipes.
+
+        Each step adds the ingredient that completes the most recipes given the
+        inventory plus the ingredients picked so far; ties (including steps
+        where no single ingredient completes a recipe) go to the ingredient
+        covering the most missing requirements of recipes still within reach.
+        Every step reports the recipes it newly makes makeable.
+        """
+        inventory = [i for i in inventory_ids if i in self._column]
+        satisfied = self.satisfied_mask(inventory)
+        owned = {self._column[i] for i in inventory}
+        picks: List[Dict[str, Any]] = []
+
+        for step in range(size):
+            missing, counts = self._missing(satisfied)
+            remaining_picks = size - step
+            open_rows = np.flatnonzero(self._has_requirements & (counts >= 1) & (counts <= remaining_picks))
+            if len(open_rows) == 0:
+                break
+            open_missing = missing[open_rows]
+            open_counts = counts[open_rows]
+
+            # Only ingredients that satisfy some missing requirement can help
+            needed = np.bitwise_or.reduce(open_missing, axis=0)
+            candidates = np.flatnonzero(_popcount_rows(self._satisfies & needed) > 0)
+            candidates = np.array([c for c in candidates if c not in owned], dtype=np.int64)
+            if len(candidates) == 0:
+                break
+
+            # overlap[r, c] = missing requirements of recipe r that candidate c satisfies;
+            # c completes r when that is all of them
+            n_ingredients = len(self.ingredient_ids)
+            missing_bits = np.unpackbits(open_missing, axis=1, count=n_ingredients).astype(np.float32)
+            candidate_bits = np.unpackbits(self._satisfies[candidates], axis=1, count=n_ingredients).astype(np.float32)
+            overlap = missing_bits @ candidate_bits.T
+            completed = (overlap == open_counts[:, None]).sum(axis=0)
+            covered = overlap.sum(axis=0).astype(np.int64)
+
+            # Highest (completed, covered); lowest ingredient id breaks exact ties
+            best = int(np.lexsort((candidates, -covered, -completed))[0])
+            column = int(candidates[best])
+            if completed[best] == 0 and covered[best] == 0:
+                break
+
+            satisfied = satisfied | self._satisfies[column]
+            owned.add(column)
+            _, new_counts = self._missing(satisfied)
+            newly_makeable = np.flatnonzero(self._has_requirements & (counts > 0) & (new_counts == 0))
+            picks.append(
+                dict(
+                    self.ingredients[int(self.ingredient_ids[column])],
+                    recipes_unlocked=len(newly_makeable),
+                    recipe_names=sorted(self.recipe_names[row] for row in newly_makeable),
+                )
+            )
+
+        return picks
+
+
+class RecommendationIndexCache:
+    """Process-wide holder for the current RecommendationIndex.
+
+    Args:
+        ttl: Seconds a built index stays valid (0 rebuilds on every request)
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._index: Optional[RecommendationIndex] = None
+        self._built_at = 0.0
+        # Bumped on every invalidation so an in-flight build isn't kept
+        self._generation = 0
+        self._builds = 0
+        self._last_build_ms = 0.0
+
+    def get(self, build: Callable[[], RecommendationIndex]) -> RecommendationIndex:
+        """Return the cached index, building it with ``build`` if missing or expired"""
+        with self._lock:
+            index = self._index
+            if index is not None and self.ttl and time.monotonic() - self._built_at < self.ttl:
+                return index
+            generation = self._generation
+
+        start = time.monotonic()
+        index = build()
+        finished = time.monotonic()
+        with self._lock:
+            self._builds += 1
+            self._last_build_ms = (finished - start) * 1000
+            if generation == self._generation:
+                self._index = index
+                self._built_at = finished
+        return index
+
+    def invalidate(self) -> None:
+        """Drop the index (called after recipe or ingredient writes)"""
+        with self._lock:
+            self._index = None
+            self._generation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "loaded": self._index is not None,
+                "recipes": self._index.n_recipes if self._index is not None else 0,
+                "builds": self._builds,
+                "last_build_ms": round(self._last_build_ms, 1),
+            }
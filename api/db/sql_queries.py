@@ -12,9 +12,13 @@ INGREDIENT_SELECT_FIELDS = """
 # Shared substitution matching logic
 # This SQL fragment checks if a user's ingredient can satisfy a recipe's ingredient requirement
 # Variables that must be available in context:
-#   - i_user.id, i_user.path, i_user.allow_substitution (user's ingredient)
-#   - i_recipe.id, i_recipe.path, i_recipe.parent_id, i_recipe.allow_substitution (recipe's ingredient)
-# Uses STARTS_WITH() instead of LIKE with % wildcard to avoid psycopg2 parameter format conflicts
+#   - i_user.id, i_user.parent_id, i_user.allow_substitution (user's ingredient)
+#   - i_recipe.id, i_recipe.parent_id, i_recipe.allow_substitution (recipe's ingredient)
+# Hierarchy tests join the ingredient_ancestors closure table (which includes a
+# depth-0 row for each ingredient itself) instead of comparing path prefixes.
+# This is the definition of the substitution rules: refresh_ingredient_satisfies()
+# in schema.sql materializes it into ingredient_satisfies, which queries join
+# instead. Change both together (tests/test_ingredient_satisfies.py compares them).
 INGREDIENT_SUBSTITUTION_MATCH = """
     -- Direct match
     i_user.id = i_recipe.id
@@ -23,13 +27,21 @@ INGREDIENT_SUBSTITUTION_MATCH = """
     (i_recipe.allow_substitution = TRUE AND (
         -- User has ancestor of recipe ingredient (user has "Rum", recipe needs "Wray And Nephew")
         -- BUT: no blocking parents in between (e.g., "Pot Still Unaged Rum" with allow_sub=false)
-        (STARTS_WITH(i_recipe.path, i_user.path)
+        (EXISTS (
+             SELECT 1 FROM ingredient_ancestors user_anc
+             WHERE user_anc.ancestor_id = i_user.id
+             AND user_anc.descendant_id = i_recipe.id
+         )
          AND NOT EXISTS (
-             SELECT 1 FROM ingredients blocking
-             WHERE STARTS_WITH(i_recipe.path, blocking.path)  -- blocking is ancestor of recipe ingredient
-             AND STARTS_WITH(blocking.path, i_user.path)      -- blocking is descendant of user ingredient
-             AND blocking.id != i_user.id                     -- not the user ingredient itself
-             AND blocking.allow_substitution = FALSE          -- blocks substitution
+             SELECT 1
+             FROM ingredient_ancestors below_user
+             JOIN ingredient_ancestors above_recipe
+               ON above_recipe.ancestor_id = below_user.descendant_id
+             JOIN ingredients blocking ON blocking.id = below_user.descendant_id
+             WHERE below_user.ancestor_id = i_user.id          -- blocking is descendant of user ingredient
+             AND above_recipe.descendant_id = i_recipe.id      -- blocking is ancestor of recipe ingredient
+             AND blocking.id != i_user.id                      -- not the user ingredient itself
+             AND blocking.allow_substitution = FALSE           -- blocks substitution
          ))
         OR
         -- Sibling match: same parent, both allow substitution
@@ -42,16 +54,24 @@ INGREDIENT_SUBSTITUTION_MATCH = """
         OR
         -- Recursive: user has common ancestor with recipe ingredient
         EXISTS (
-            SELECT 1 FROM ingredients anc
-            WHERE STARTS_WITH(i_user.path, anc.path)
-            AND STARTS_WITH(i_recipe.path, anc.path)
+            SELECT 1
+            FROM ingredient_ancestors user_up
+            JOIN ingredient_ancestors recipe_up
+              ON recipe_up.ancestor_id = user_up.ancestor_id
+            JOIN ingredients anc ON anc.id = user_up.ancestor_id
+            WHERE user_up.descendant_id = i_user.id
+            AND recipe_up.descendant_id = i_recipe.id
             AND anc.allow_substitution = TRUE
             AND LENGTH(anc.path) - LENGTH(REPLACE(anc.path, '/', '')) <= 6
             -- Ensure no blocking parents between common ancestor and recipe ingredient
             AND NOT EXISTS (
-                SELECT 1 FROM ingredients blocking
-                WHERE STARTS_WITH(i_recipe.path, blocking.path)
-                AND STARTS_WITH(blocking.path, anc.path)
+                SELECT 1
+                FROM ingredient_ancestors below_anc
+                JOIN ingredient_ancestors above_recipe
+                  ON above_recipe.ancestor_id = below_anc.descendant_id
+                JOIN ingredients blocking ON blocking.id = below_anc.descendant_id
+                WHERE below_anc.ancestor_id = anc.id
+                AND above_recipe.descendant_id = i_recipe.id
                 AND blocking.id != anc.id
                 AND blocking.allow_substitution = FALSE
             )
@@ -124,9 +144,111 @@ get_ingredients_count_sql = """
     FROM ingredients i
 """
 
+# Recomputes user_makeable_recipes: a (user, recipe) row exists when every
+# ingredient of the recipe is satisfied by the user's inventory, i.e. the
+# recipe's ingredient count equals the count of its satisfied ingredients
+MAKEABLE_RECIPES_SELECT = """
+    WITH satisfied AS (
+        SELECT DISTINCT ui.cognito_user_id, sat.recipe_ingredient_id AS ingredient_id
+        FROM user_ingredients ui
+        JOIN ingredient_satisfies sat ON sat.user_ingredient_id = ui.ingredient_id
+        {user_filter}
+    )
+    SELECT s.cognito_user_id, ri.recipe_id
+    FROM recipe_ingredients ri
+    JOIN satisfied s ON s.ingredient_id = ri.ingredient_id
+    {recipe_filter}
+    GROUP BY s.cognito_user_id, ri.recipe_id
+    HAVING COUNT(*) = (
+        SELECT COUNT(*) FROM recipe_ingredients ri_all WHERE ri_all.recipe_id = ri.recipe_id
+    )
+"""
+
+
+def build_refresh_makeable_recipes_sql(by_users: bool = False, by_recipes: bool = False) -> List[str]:
+    """Build the statements that recompute user_makeable_recipes.
+
+    With ``by_users`` only rows for ``%(user_ids)s`` are rebuilt, with
+    ``by_recipes`` only rows for ``%(recipe_ids)s``; with neither the whole
+    table is rebuilt. Run the statements in order inside one transaction.
+    """
+    delete_conditions = []
+    user_filter = ""
+    recipe_filter = ""
+    if by_users:
+        delete_conditions.append("cognito_user_id = ANY(%(user_ids)s)")
+        user_filter = "WHERE ui.cognito_user_id = ANY(%(user_ids)s)"
+    if by_recipes:
+        delete_conditions.append("recipe_id = ANY(%(recipe_ids)s)")
+        recipe_filter = "WHERE ri.recipe_id = ANY(%(recipe_ids)s)"
+
+    delete_sql = "DELETE FROM user_makeable_recipes"
+    if delete_conditions:
+        delete_sql += " WHERE " + " AND ".join(delete_conditions)
+    insert_sql = (
+        "INSERT INTO user_makeable_recipes (cognito_user_id, recipe_id)"
+        + MAKEABLE_RECIPES_SELECT.format(user_filter=user_filter, recipe_filter=recipe_filter)
+    )
+    return [delete_sql, insert_sql]
+
+
+# Recipe ingredients whose ingredient_satisfies rows can change when the
+# subtree of %(id)s changes (the trigger only recomputes pairs with a side in
+# that subtree). Run before and after the change: the union is every recipe
+# ingredient that gained or lost a satisfier.
+SUBTREE_SATISFIES_RECIPE_INGREDIENTS = """
+    SELECT sat.recipe_ingredient_id AS ingredient_id
+    FROM ingredient_ancestors sub
+    JOIN ingredient_satisfies sat ON sat.user_ingredient_id = sub.descendant_id
+    WHERE sub.ancestor_id = %(id)s
+    UNION
+    SELECT descendant_id FROM ingredient_ancestors WHERE ancestor_id = %(id)s
+"""
+
+
 # Dynamic SQL generation function for ingredient filtering
 
 
+def _build_search_filter_sql(
+    must_conditions: List[str],
+    must_not_conditions: List[str],
+    tag_conditions: List[str] = None,
+    inventory_filter: bool = False,
+) -> str:
+    """Build the ingredient, tag and inventory filter clauses shared by all search queries"""
+    filter_sql = ""
+
+    # Ingredient conditions filter ia2.ancestor_id, so each one matches the
+    # ingredient and all of its descendants through the closure table
+
+    # Add MUST ingredient filtering - recipe must contain ALL of the specified ingredients
+    for condition in must_conditions:
+        filter_sql += f" AND r.id IN (SELECT DISTINCT ri2.recipe_id FROM recipe_ingredients ri2 JOIN ingredient_ancestors ia2 ON ri2.ingredient_id = ia2.descendant_id WHERE {condition})"
+
+    # Add MUST_NOT ingredient filtering - recipe must NOT contain ANY of the specified ingredients
+    for condition in must_not_conditions:
+        filter_sql += f" AND r.id NOT IN (SELECT DISTINCT ri2.recipe_id FROM recipe_ingredients ri2 JOIN ingredient_ancestors ia2 ON ri2.ingredient_id = ia2.descendant_id WHERE {condition})"
+
+    # Add tag filtering - recipe must have ALL of the specified tags
+    for condition in tag_conditions or []:
+        filter_sql += f" AND r.id IN (SELECT DISTINCT rt3.recipe_id FROM recipe_tags rt3 JOIN tags t3 ON rt3.tag_id = t3.id WHERE {condition})"
+
+    # Add inventory filtering - recipe can be made with user's inventory (substitution-aware).
+    # Makeability is materialized in user_makeable_recipes, so this is an indexed
+    # semi-join; recipes without ingredients are trivially makeable.
+    if inventory_filter:
+        filter_sql += """ AND (
+            EXISTS (
+                SELECT 1 FROM user_makeable_recipes umr
+                WHERE umr.cognito_user_id = %(cognito_user_id)s
+                AND umr.recipe_id = r.id
+            )
+            OR NOT EXISTS (SELECT 1 FROM recipe_ingredients ri_any WHERE ri_any.recipe_id = r.id)
+        )"""
+
+    return filter_sql
+
+
 def build_search_recipes_paginated_sql(
     must_conditions: List[str],
     must_not_conditions: List[str],
@@ -173,40 +295,9 @@ def build_search_recipes_paginated_sql(
         AND
             (%(max_rating)s IS NULL OR COALESCE({rating_field}, 0) <= %(max_rating)s)"""
 
-    # Add MUST ingredient filtering - recipe must contain ALL of the specified ingredients
-    for condition in must_conditions:
-        base_sql += f" AND r.id IN (SELECT DISTINCT ri2.recipe_id FROM recipe_ingredients ri2 JOIN ingredients i2 ON ri2.ingredient_id = i2.id WHERE {condition})"
-
-    # Add MUST_NOT ingredient filtering - recipe must NOT contain ANY of the specified ingredients
-    for condition in must_not_conditions:
-        base_sql += f" AND r.id NOT IN (SELECT DISTINCT ri2.recipe_id FROM recipe_ingredients ri2 JOIN ingredients i2 ON ri2.ingredient_id = i2.id WHERE {condition})"
-
-    # Add tag filtering - recipe must have ALL of the specified tags
-    if tag_conditions is None:
-        tag_conditions = []
-    for condition in tag_conditions:
-        base_sql += f" AND r.id IN (SELECT DISTINCT rt3.recipe_id FROM recipe_tags rt3 JOIN tags t3 ON rt3.tag_id = t3.id WHERE {condition})"
-
-    # Add inventory filtering - recipe can be made with user's inventory (substitution-aware)
-    if inventory_filter:
-        base_sql += """ AND r.id IN (
-            SELECT r_inv.id
-            FROM recipes r_inv
-            WHERE r_inv.id = r.id
-            AND NOT EXISTS (
-                SELECT 1 FROM recipe_ingredients ri_missing
-                LEFT JOIN ingredients i_recipe ON ri_missing.ingredient_id = i_recipe.id
-                WHERE ri_missing.recipe_id = r_inv.id
-                AND NOT EXISTS (
-                    SELECT 1 FROM user_ingredients ui_check
-                    LEFT JOIN ingredients i_user ON ui_check.ingredient_id = i_user.id
-                    WHERE ui_check.cognito_user_id = %(cognito_user_id)s
-                    AND (
-                        {substitution_match}
-                    )
-                )
-            )
-        )"""
+    base_sql += _build_search_filter_sql(
+        must_conditions, must_not_conditions, tag_conditions, inventory_filter
+    )
 
     base_sql += """
         GROUP BY
@@ -267,9 +358,7 @@ def build_search_recipes_paginated_sql(
     )
     SELECT * FROM paginated_with_ingredients
     """
-    # Substitute the shared substitution matching logic
     return base_sql.format(
-        substitution_match=INGREDIENT_SUBSTITUTION_MATCH,
         sort_expr=sort_expr,
         sort_direction=sort_direction,
         sort_expr_sr=sort_expr_sr,
@@ -328,36 +417,9 @@ def build_search_recipes_keyset_sql(
                 OR ({sort_expr} = %(cursor_sort)s AND r.id {cursor_operator} %(cursor_id)s)
             )"""
 
-    for condition in must_conditions:
-        base_sql += f" AND r.id IN (SELECT DISTINCT ri2.recipe_id FROM recipe_ingredients ri2 JOIN ingredients i2 ON ri2.ingredient_id = i2.id WHERE {condition})"
-
-    for condition in must_not_conditions:
-        base_sql += f" AND r.id NOT IN (SELECT DISTINCT ri2.recipe_id FROM recipe_ingredients ri2 JOIN ingredients i2 ON ri2.ingredient_id = i2.id WHERE {condition})"
-
-    if tag_conditions is None:
-        tag_conditions = []
-    for condition in tag_conditions:
-        base_sql += f" AND r.id IN (SELECT DISTINCT rt3.recipe_id FROM recipe_tags rt3 JOIN tags t3 ON rt3.tag_id = t3.id WHERE {condition})"
-
-    if inventory_filter:
-        base_sql += """ AND r.id IN (
-            SELECT r_inv.id
-            FROM recipes r_inv
-            WHERE r_inv.id = r.id
-            AND NOT EXISTS (
-                SELECT 1 FROM recipe_ingredients ri_missing
-                LEFT JOIN ingredients i_recipe ON ri_missing.ingredient_id = i_recipe.id
-                WHERE ri_missing.recipe_id = r_inv.id
-                AND NOT EXISTS (
-                    SELECT 1 FROM user_ingredients ui_check
-                    LEFT JOIN ingredients i_user ON ui_check.ingredient_id = i_user.id
-                    WHERE ui_check.cognito_user_id = %(cognito_user_id)s
-                    AND (
-                        {substitution_match}
-                    )
-                )
-            )
-        )"""
+    base_sql += _build_search_filter_sql(
+        must_conditions, must_not_conditions, tag_conditions, inventory_filter
+    )
 
     base_sql += f"""
         GROUP BY
@@ -396,7 +458,137 @@ def build_search_recipes_keyset_sql(
     SELECT * FROM paginated_with_ingredients
     """
 
-    return base_sql.format(substitution_match=INGREDIENT_SUBSTITUTION_MATCH)
+    return base_sql
+
+
+def build_search_recipes_json_sql(
+    must_conditions: List[str],
+    must_not_conditions: List[str],
+    tag_conditions: List[str] = None,
+    sort_by: str = "name",
+    sort_order: str = "asc",
+    inventory_filter: bool = False,
+    rating_type: str = "average",
+    keyset: bool = False,
+) -> str:
+    """Build the search SQL returning one row per recipe with ingredients and tags as JSON.
+
+    Unlike the row-per-ingredient queries above, recipes are filtered and paged
+    without joining tags or ingredients, and each page row then gets its
+    ingredient list (including ancestor names for full_name/hierarchy) and
+    visible tags aggregated server-side, so the whole page is one round trip.
+    """
+    rating_field = "r.avg_rating" if rating_type == "average" else "ur.rating"
+    sort_spec = build_recipe_sort_spec(sort_by, sort_order)
+    sort_expr = sort_spec.expression
+    sort_direction = sort_spec.direction
+    cursor_operator = "<" if sort_order == "desc" else ">"
+
+    base_sql = f"""
+    WITH search_results AS (
+        SELECT
+            r.id, r.name, r.instructions, r.description, r.image_url,
+            r.source, r.source_url, r.avg_rating, r.rating_count, r.created_by,
+            r.created_at,
+            ur.rating AS user_rating,
+            {sort_expr} AS sort_value
+        FROM
+            recipes r
+        LEFT JOIN
+            ratings ur ON r.id = ur.recipe_id AND ur.cognito_user_id = %(cognito_user_id)s
+        WHERE
+            (%(search_query)s IS NULL OR
+             unaccent(r.name) ILIKE unaccent(%(search_query_with_wildcards)s))
+        AND
+            (%(min_rating)s IS NULL OR COALESCE({rating_field}, 0) >= %(min_rating)s)
+        AND
+            (%(max_rating)s IS NULL OR COALESCE({rating_field}, 0) <= %(max_rating)s)"""
+
+    if keyset:
+        base_sql += f"""
+        AND
+            (
+                %(cursor_sort)s IS NULL
+                OR ({sort_expr} {cursor_operator} %(cursor_sort)s)
+                OR ({sort_expr} = %(cursor_sort)s AND r.id {cursor_operator} %(cursor_id)s)
+            )"""
+
+    base_sql += _build_search_filter_sql(
+        must_conditions, must_not_conditions, tag_conditions, inventory_filter
+    )
+
+    if sort_by == "random":
+        # Random pages keep the legacy behaviour of being returned in id order
+        base_sql += """
+        ORDER BY RANDOM()
+        LIMIT %(limit)s OFFSET %(offset)s
+    )"""
+        outer_order = "sr.id ASC"
+    else:
+        limit_clause = (
+            "LIMIT %(limit_plus_one)s" if keyset else "LIMIT %(limit)s OFFSET %(offset)s"
+        )
+        base_sql += f"""
+        ORDER BY
+            {sort_expr} {sort_direction},
+            r.id {sort_direction}
+        {limit_clause}
+    )"""
+        outer_order = f"sr.sort_value {sort_direction}, sr.id {sort_direction}"
+
+    base_sql += f"""
+    SELECT
+        sr.id, sr.name, sr.instructions, sr.description, sr.image_url,
+        sr.source, sr.source_url, sr.avg_rating, sr.rating_count, sr.created_by,
+        sr.user_rating, sr.sort_value,
+        COALESCE(ing.ingredients, '[]'::json) AS ingredients,
+        COALESCE(tg.tags, '[]'::json) AS tags
+    FROM
+        search_results sr
+    LEFT JOIN LATERAL (
+        SELECT json_agg(
+            json_build_object(
+                'ingredient_id', ri.ingredient_id,
+                'ingredient_name', i.name,
+                'ingredient_path', i.path,
+                'amount', ri.amount,
+                'unit_id', ri.unit_id,
+                'unit_name', u.name,
+                'unit_abbreviation', u.abbreviation,
+                'ancestor_names', (
+                    -- Ancestor names from root to parent, in path order
+                    SELECT json_agg(anc.name ORDER BY path_ids.ord)
+                    FROM unnest(string_to_array(trim(both '/' from i.path), '/')::int[])
+                        WITH ORDINALITY AS path_ids(id, ord)
+                    JOIN ingredients anc ON anc.id = path_ids.id
+                    WHERE path_ids.ord < cardinality(string_to_array(trim(both '/' from i.path), '/'))
+                )
+            )
+            ORDER BY COALESCE(ri.amount * u.conversion_to_ml, 0) DESC, ri.id ASC
+        ) AS ingredients
+        FROM recipe_ingredients ri
+        JOIN ingredients i ON ri.ingredient_id = i.id
+        LEFT JOIN units u ON ri.unit_id = u.id
+        WHERE ri.recipe_id = sr.id
+    ) ing ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT json_agg(
+            json_build_object(
+                'id', t.id,
+                'name', t.name,
+                'type', CASE WHEN t.created_by IS NULL THEN 'public' ELSE 'private' END
+            )
+            ORDER BY t.created_by IS NOT NULL, t.id
+        ) AS tags
+        FROM recipe_tags rt
+        JOIN tags t ON rt.tag_id = t.id
+        WHERE rt.recipe_id = sr.id
+        AND (t.created_by IS NULL OR t.created_by = %(cognito_user_id)s)
+    ) tg ON TRUE
+    ORDER BY {outer_order}
+    """
+
+    return base_sql
 
 
 # Ingredient Recommendations Query
@@ -405,92 +597,40 @@ def build_search_recipes_keyset_sql(
 def get_ingredient_recommendations_sql() -> str:
     """Build SQL query for ingredient recommendations with substitution logic"""
 
-    # Need to adapt variable names for the CTE context:
-    # In recipe search: i_user and i_recipe
-    # In recommendations CTE: ui (from user_inventory) and rr (from recipe_requirements)
-    # We'll create a modified version of the substitution match for this context
-    # IMPORTANT: Replace more specific patterns FIRST to avoid partial matches
-
-    substitution_match_adapted = INGREDIENT_SUBSTITUTION_MATCH.replace(
-        'i_user.allow_substitution', 'ui.user_allow_substitution'
-    ).replace(
-        'i_user.parent_id', 'ui.parent_id'
-    ).replace(
-        'i_user.path', 'ui.path'
-    ).replace(
-        'i_user.id', 'ui.ingredient_id'
-    ).replace(
-        'i_recipe.allow_substitution', 'rr.required_allow_substitution'
-    ).replace(
-        'i_recipe.parent_id', 'rr.required_parent_id'
-    ).replace(
-        'i_recipe.path', 'rr.required_ingredient_path'
-    ).replace(
-        'i_recipe.id', 'rr.required_ingredient_id'
-    )
-
-    query = f"""
+    query = """
     WITH
-    -- Get user's ingredient IDs and their hierarchy info
-    user_inventory AS (
-        SELECT
-            ui.ingredient_id,
-            i.path,
-            i.parent_id,
-            COALESCE(i.allow_substitution, FALSE) as user_allow_substitution
+    -- Ingredients the user's inventory satisfies, directly or by substitution
+    satisfied_ingredients AS (
+        SELECT DISTINCT sat.recipe_ingredient_id AS ingredient_id
         FROM user_ingredients ui
-        JOIN ingredients i ON ui.ingredient_id = i.id
+        JOIN ingredient_satisfies sat ON sat.user_ingredient_id = ui.ingredient_id
         WHERE ui.cognito_user_id = %(user_id)s
     ),
     -- For each recipe, find all required ingredients
     recipe_requirements AS (
         SELECT
             ri.recipe_id,
-            ri.ingredient_id as required_ingredient_id,
-            i.name as required_ingredient_name,
-            i.path as required_ingredient_path,
-            i.parent_id as required_parent_id,
-            COALESCE(i.allow_substitution, FALSE) as required_allow_substitution
+            ri.ingredient_id as required_ingredient_id
         FROM recipe_ingredients ri
-        JOIN ingredients i ON ri.ingredient_id = i.id
     ),
     -- Check each recipe requirement against user inventory
     requirement_satisfaction AS (
         SELECT
             rr.recipe_id,
             rr.required_ingredient_id,
-            rr.required_ingredient_name,
-            CASE
-                WHEN EXISTS (
-                    SELECT 1 FROM user_inventory ui
-                    WHERE
-                        {substitution_match_adapted}
-                ) THEN 1
-                ELSE 0
-            END as is_satisfied
+            CASE WHEN si.ingredient_id IS NULL THEN 0 ELSE 1 END as is_satisfied
         FROM recipe_requirements rr
+        LEFT JOIN satisfied_ingredients si ON si.ingredient_id = rr.required_ingredient_id
     ),
-    -- Find recipes where user has all but exactly 1 ingredient
-    almost_makeable_recipes AS (
+    -- Find recipes where user has all but exactly 1 ingredient, and that ingredient
+    missing_ingredients AS (
         SELECT
             recipe_id,
-            COUNT(*) as total_requirements,
-            SUM(is_satisfied) as satisfied_count,
-            COUNT(*) - SUM(is_satisfied) as missing_count
+            MIN(required_ingredient_id) FILTER (WHERE is_satisfied = 0) as missing_ingredient_id
         FROM requirement_satisfaction
         GROUP BY recipe_id
         HAVING COUNT(*) - SUM(is_satisfied) = 1
     ),
-    -- Find the missing ingredient for each almost-makeable recipe
-    missing_ingredients AS (
-        SELECT
-            rs.recipe_id,
-            rs.required_ingredient_id as missing_ingredient_id,
-            rs.required_ingredient_name as missing_ingredient_name
-        FROM requirement_satisfaction rs
-        JOIN almost_makeable_recipes amr ON rs.recipe_id = amr.recipe_id
-        WHERE rs.is_satisfied = 0
-    ),
     -- Aggregate: count recipes unlocked by each missing ingredient
     ingredient_impact AS (
         SELECT
@@ -19,6 +19,8 @@ from starlette.middleware.base import BaseHTTPMiddleware
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from core.config import settings
+from db.async_database import shutdown_db_executor
+from db.db_core import Database
 from core.exceptions import CocktailDBException
 from core.exception_handlers import (
     cocktail_db_exception_handler,
@@ -66,6 +68,7 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Shutting down CocktailDB API")
+    shutdown_db_executor()
 
 
 # Create FastAPI app
@@ -140,7 +143,13 @@ async def root():
 @app.get("/health", tags=["health"])
 async def health_check():
     """Health check endpoint for container orchestration."""
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
+    return {
+        "status": "healthy",
+        "timestamp": datetime.utcnow().isoformat(),
+        "db_pool": Database.pool_stats(),
+        "name_cache": Database.name_cache_stats(),
+        "recommendation_index": Database.recommendation_index_stats(),
+    }
 
 
 # For local development
@@ -2,12 +2,12 @@ import datetime
 import os
 import subprocess
 
-from db.database import get_database
-from db.db_core import Database
+from db.async_database import AsyncDatabase, get_async_database
 from dependencies.auth import require_authentication
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.background import BackgroundTasks
 from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -37,7 +37,7 @@ class CleanupFileResponse(FileResponse):
 async def download_database(
     background_tasks: BackgroundTasks,
     user_info=Depends(require_authentication),
-    db: Database = Depends(get_database),
+    db: AsyncDatabase = Depends(get_async_database),
 ):
     """
     Download a backup copy of the PostgreSQL database.
@@ -61,7 +61,8 @@ async def download_database(
             env['PGPASSWORD'] = conn_params.get('password', '')
 
             # Run pg_dump to create backup
-            result = subprocess.run(
+            result = await run_in_threadpool(
+                subprocess.run,
                 [
                     'pg_dump',
                     '-h', conn_params.get('host', 'localhost'),
@@ -7,8 +7,7 @@ from fastapi import APIRouter, Depends, Query
 from fastapi.responses import FileResponse
 
 from dependencies.auth import UserInfo, get_current_user_optional
-from db.database import get_database as get_db
-from db.db_core import Database
+from db.async_database import AsyncDatabase, get_async_database as get_db
 from db.db_analytics import AnalyticsQueries
 from core.exceptions import DatabaseException, NotFoundException
 from utils.analytics_cache import AnalyticsStorage
@@ -28,7 +27,7 @@ storage_manager = AnalyticsStorage(ANALYTICS_PATH) if ANALYTICS_PATH else None
 async def get_ingredient_usage_analytics(
     level: Optional[int] = None,
     parent_id: Optional[int] = None,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Optional[UserInfo] = Depends(get_current_user_optional),
 ):
     """Get ingredient usage statistics with hierarchical aggregation
@@ -52,9 +51,11 @@ async def get_ingredient_usage_analytics(
 
         # For hierarchical drill-down, compute on-the-fly
         else:
-            analytics_queries = AnalyticsQueries(db)
+            analytics_queries = AnalyticsQueries(db.sync)
             # Note: level filtering happens at API level, function only supports parent_id
-            result = analytics_queries.get_ingredient_usage_stats(parent_id=parent_id)
+            result = await db.run(
+                analytics_queries.get_ingredient_usage_stats, parent_id=parent_id
+            )
 
             # Return in same format as cached data
             return {
@@ -75,7 +76,7 @@ async def get_ingredient_usage_analytics(
 
 @router.get("/recipe-complexity")
 async def get_recipe_complexity_analytics(
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Optional[UserInfo] = Depends(get_current_user_optional),
 ):
     """Get recipe complexity distribution"""
@@ -103,7 +104,7 @@ async def get_recipe_complexity_analytics(
 
 @router.get("/cocktail-space")
 async def get_cocktail_space_analytics(
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Optional[UserInfo] = Depends(get_current_user_optional),
 ):
     """Get UMAP embedding of recipe space based on ingredient similarity"""
@@ -130,7 +131,7 @@ async def get_cocktail_space_analytics(
 
 @router.get("/cocktail-space-em")
 async def get_cocktail_space_em_analytics(
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Optional[UserInfo] = Depends(get_current_user_optional),
 ):
     """Get UMAP embedding of recipe space based on EM-learned distances with ingredient rollup"""
@@ -159,12 +160,12 @@ async def get_cocktail_space_em_analytics(
 async def get_recipe_similar(
     recipe_id: int = Query(..., description="Recipe ID to fetch similar cocktails for"),
     limit: int = Query(5, ge=1, description="Number of similar cocktails to return"),
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Optional[UserInfo] = Depends(get_current_user_optional),
 ):
     """Get similar cocktails for a recipe from PostgreSQL."""
     try:
-        result = db.get_recipe_similarity(recipe_id)
+        result = await db.get_recipe_similarity(recipe_id)
         if not result:
             raise NotFoundException(
                 "Similar recipe analytics missing for recipe",
@@ -192,7 +193,7 @@ async def get_recipe_similar(
 
 @router.get("/ingredient-tree")
 async def get_ingredient_tree_analytics(
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Optional[UserInfo] = Depends(get_current_user_optional),
 ):
     """Get hierarchical ingredient tree with recipe counts
@@ -10,8 +10,7 @@ from dependencies.auth import (
     require_authentication,
     require_editor_access,
 )
-from db.database import get_database as get_db
-from db.db_core import Database
+from db.async_database import AsyncDatabase, get_async_database as get_db
 from models.requests import IngredientCreate, IngredientUpdate, BulkIngredientUpload
 from models.responses import (
     IngredientResponse,
@@ -28,13 +27,13 @@ router = APIRouter(prefix="/ingredients", tags=["ingredients"])
 
 @router.get("", response_model=List[IngredientResponse])
 async def get_ingredients(
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Optional[UserInfo] = Depends(get_current_user_optional),
 ):
     """Get all ingredients"""
     try:
         logger.info("Getting all ingredients")
-        ingredients = db.get_ingredients()
+        ingredients = await db.get_ingredients()
         return [IngredientResponse(**ingredient) for ingredient in ingredients]
     except Exception as e:
         logger.error(f"Error getting ingredients: {str(e)}")
@@ -44,13 +43,13 @@ async def get_ingredients(
 @router.get("/search", response_model=List[IngredientResponse])
 async def search_ingredients(
     q: str,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Optional[UserInfo] = Depends(get_current_user_optional),
 ):
     """Search ingredients by name"""
     try:
         logger.info(f"Searching ingredients with query: {q}")
-        ingredients = db.search_ingredients(q)
+        ingredients = await db.search_ingredients(q)
         return [IngredientResponse(**ingredient) for ingredient in ingredients]
     except Exception as e:
         logger.error(f"Error searching ingredients: {str(e)}")
@@ -60,7 +59,7 @@ async def search_ingredients(
 @router.post("", response_model=IngredientResponse, status_code=status.HTTP_201_CREATED)
 async def create_ingredient(
     ingredient_data: IngredientCreate,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_editor_access),
 ):
     """Create a new ingredient (requires editor access)"""
@@ -71,7 +70,7 @@ async def create_ingredient(
         ingredient_dict = ingredient_data.model_dump()
         ingredient_dict["created_by"] = user.user_id
 
-        created_ingredient = db.create_ingredient(ingredient_dict)
+        created_ingredient = await db.create_ingredient(ingredient_dict)
 
         return IngredientResponse(**created_ingredient)
 
@@ -86,13 +85,13 @@ async def create_ingredient(
 @router.get("/{ingredient_id}", response_model=IngredientResponse)
 async def get_ingredient(
     ingredient_id: int,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Optional[UserInfo] = Depends(get_current_user_optional),
 ):
     """Get a specific ingredient by ID"""
     try:
         logger.info(f"Getting ingredient {ingredient_id}")
-        ingredient = db.get_ingredient(ingredient_id)
+        ingredient = await db.get_ingredient(ingredient_id)
 
         if not ingredient:
             raise NotFoundException(f"Ingredient with ID {ingredient_id} not found")
@@ -110,7 +109,7 @@ async def get_ingredient(
 async def update_ingredient(
     ingredient_id: int,
     ingredient_data: IngredientUpdate,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_editor_access),
 ):
     """Update an ingredient (requires editor access)"""
@@ -118,7 +117,7 @@ async def update_ingredient(
         logger.info(f"Updating ingredient {ingredient_id}")
 
         # Check if ingredient exists
-        existing_ingredient = db.get_ingredient(ingredient_id)
+        existing_ingredient = await db.get_ingredient(ingredient_id)
         if not existing_ingredient:
             raise NotFoundException(f"Ingredient with ID {ingredient_id} not found")
 
@@ -127,7 +126,7 @@ async def update_ingredient(
             k: v for k, v in ingredient_data.model_dump().items() if v is not None
         }
 
-        updated_ingredient = db.update_ingredient(ingredient_id, update_dict)
+        updated_ingredient = await db.update_ingredient(ingredient_id, update_dict)
 
         return IngredientResponse(**updated_ingredient)
 
@@ -141,7 +140,7 @@ async def update_ingredient(
 @router.delete("/{ingredient_id}", response_model=MessageResponse)
 async def delete_ingredient(
     ingredient_id: int,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_editor_access),
 ):
     """Delete an ingredient (requires editor access)"""
@@ -149,11 +148,11 @@ async def delete_ingredient(
         logger.info(f"Deleting ingredient {ingredient_id}")
 
         # Check if ingredient exists
-        existing_ingredient = db.get_ingredient(ingredient_id)
+        existing_ingredient = await db.get_ingredient(ingredient_id)
         if not existing_ingredient:
             raise NotFoundException(f"Ingredient with ID {ingredient_id} not found")
 
-        db.delete_ingredient(ingredient_id)
+        await db.delete_ingredient(ingredient_id)
 
         return MessageResponse(
             message=f"Ingredient {ingredient_id} deleted successfully"
@@ -173,7 +172,7 @@ async def delete_ingredient(
 )
 async def bulk_upload_ingredients(
     bulk_data: BulkIngredientUpload,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_editor_access),
 ):
     """Bulk upload ingredients (requires editor access)"""
@@ -206,9 +205,9 @@ async def bulk_upload_ingredients(
         logger.info(
             f"Batch validation: {len(all_ingredient_names)} ingredients, {len(all_parent_names)} unique parent names"
         )
-        duplicate_names = db.check_ingredient_names_batch(all_ingredient_names)
+        duplicate_names = await db.check_ingredient_names_batch(all_ingredient_names)
         valid_parents = (
-            db.search_ingredients_batch(all_parent_names) if all_parent_names else {}
+            await db.search_ingredients_batch(all_parent_names) if all_parent_names else {}
         )
         batch_validation_duration = time.time() - validation_start
         logger.info(f"Batch validation completed in {batch_validation_duration:.3f}s")
@@ -249,7 +248,7 @@ async def bulk_upload_ingredients(
                         continue
                 elif ingredient_data.parent_id is not None:
                     # Legacy parent ID validation (still needs individual query)
-                    parent_exists = db.execute_query(
+                    parent_exists = await db.execute_query(
                         "SELECT id FROM ingredients WHERE id = %s",
                         (ingredient_data.parent_id,),
                     )
@@ -337,7 +336,7 @@ async def bulk_upload_ingredients(
                 }
 
                 # Create the ingredient
-                created_ingredient = db.create_ingredient(ingredient_dict)
+                created_ingredient = await db.create_ingredient(ingredient_dict)
                 uploaded_ingredients.append(IngredientResponse(**created_ingredient))
 
                 ingredient_creation_duration = time.time() - ingredient_creation_start
@@ -10,8 +10,7 @@ from fastapi.responses import HTMLResponse, RedirectResponse, Response
 from fastapi.templating import Jinja2Templates
 
 from core.config import settings
-from db.database import get_database
-from db.db_core import Database
+from db.async_database import AsyncDatabase, get_async_database
 
 logger = logging.getLogger(__name__)
 
@@ -104,10 +103,10 @@ def _build_ingredient_json_ld(ingredient: dict, base_url: str) -> dict:
 async def recipe_by_name(
     request: Request,
     name: str = Query(..., description="Recipe name to look up"),
-    db: Database = Depends(get_database),
+    db: AsyncDatabase = Depends(get_async_database),
 ):
     """Look up a recipe by name and redirect to /recipe/{id}."""
-    results = db.search_recipes_paginated(
+    results = await db.search_recipes_paginated(
         search_params={"name": name}, limit=1, offset=0
     )
     recipes = results.get("recipes", [])
@@ -126,10 +125,10 @@ async def recipe_by_name(
 async def recipe_page(
     request: Request,
     recipe_id: int,
-    db: Database = Depends(get_database),
+    db: AsyncDatabase = Depends(get_async_database),
 ):
     """Server-rendered recipe page for crawlers and agents."""
-    recipe = db.get_recipe(recipe_id)
+    recipe = await db.get_recipe(recipe_id)
     if not recipe:
         return templates.TemplateResponse(
             "404.html",
@@ -143,7 +142,7 @@ async def recipe_page(
     public_tags = [t["name"] for t in tags if t.get("type") == "public"]
 
     # Get similar recipes if available
-    similar = db.get_recipe_similarity(recipe_id)
+    similar = await db.get_recipe_similarity(recipe_id)
     similar_recipes = similar.get("neighbors", []) if similar else []
 
     return templates.TemplateResponse(
@@ -164,10 +163,10 @@ async def recipe_page(
 async def ingredient_page(
     request: Request,
     ingredient_id: int,
-    db: Database = Depends(get_database),
+    db: AsyncDatabase = Depends(get_async_database),
 ):
     """Server-rendered ingredient page for crawlers and agents."""
-    ingredient = db.get_ingredient(ingredient_id)
+    ingredient = await db.get_ingredient(ingredient_id)
     if not ingredient:
         return templates.TemplateResponse(
             "404.html",
@@ -185,12 +184,12 @@ async def ingredient_page(
             int(p) for p in ingredient["path"].strip("/").split("/") if p
         ]
         for pid in path_ids:
-            parent = db.get_ingredient(pid)
+            parent = await db.get_ingredient(pid)
             if parent:
                 breadcrumb.append({"id": parent["id"], "name": parent["name"]})
 
     # Get child ingredients
-    all_ingredients = db.get_ingredients()
+    all_ingredients = await db.get_ingredients()
     children = [
         ing for ing in all_ingredients if ing.get("parent_id") == ingredient_id
     ]
@@ -209,7 +208,7 @@ async def ingredient_page(
 
 
 @router.get("/sitemap.xml")
-async def sitemap(db: Database = Depends(get_database)):
+async def sitemap(db: AsyncDatabase = Depends(get_async_database)):
     """Dynamic sitemap generated from database content."""
     base_url = settings.base_url
 
@@ -233,7 +232,7 @@ async def sitemap(db: Database = Depends(get_database)):
 
     # Recipe pages
     try:
-        result = db.execute_query("SELECT id FROM recipes ORDER BY id")
+        result = await db.execute_query("SELECT id FROM recipes ORDER BY id")
         for row in result:
             add_url(f"{base_url}/recipe/{row['id']}", "0.8")
     except Exception as e:
@@ -241,7 +240,7 @@ async def sitemap(db: Database = Depends(get_database)):
 
     # Ingredient pages
     try:
-        result = db.execute_query("SELECT id FROM ingredients ORDER BY id")
+        result = await db.execute_query("SELECT id FROM ingredients ORDER BY id")
         for row in result:
             add_url(f"{base_url}/ingredient/{row['id']}", "0.7")
     except Exception as e:
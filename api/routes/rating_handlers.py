@@ -4,7 +4,7 @@ import logging
 from typing import Optional
 
 from dependencies.auth import UserInfo
-from db.db_core import Database
+from db.async_database import AsyncDatabase
 from models.requests import RatingCreate
 from models.responses import RatingSummaryResponse, RatingResponse, MessageResponse
 from core.exceptions import NotFoundException, DatabaseException
@@ -14,7 +14,7 @@ logger = logging.getLogger(__name__)
 
 async def get_recipe_ratings_handler(
     recipe_id: int,
-    db: Database,
+    db: AsyncDatabase,
     user: Optional[UserInfo] = None
 ) -> RatingSummaryResponse:
     """Get ratings for a specific recipe"""
@@ -22,14 +22,14 @@ async def get_recipe_ratings_handler(
         logger.info(f"Getting ratings for recipe {recipe_id}")
         
         # Check if recipe exists and get recipe data with avg_rating and rating_count
-        recipe = db.get_recipe(recipe_id)
+        recipe = await db.get_recipe(recipe_id)
         if not recipe:
             raise NotFoundException(f"Recipe with ID {recipe_id} not found")
         
         # Get user's rating if authenticated
         user_rating = None
         if user:
-            user_rating_data = db.get_user_rating(recipe_id, user.user_id)
+            user_rating_data = await db.get_user_rating(recipe_id, user.user_id)
             if user_rating_data:
                 # Map cognito_user_id to user_id for the response model
                 user_rating_data["user_id"] = user_rating_data["cognito_user_id"]
@@ -52,7 +52,7 @@ async def get_recipe_ratings_handler(
 async def create_or_update_rating_handler(
     recipe_id: int,
     rating_data: RatingCreate,
-    db: Database,
+    db: AsyncDatabase,
     user: UserInfo
 ) -> RatingResponse:
     """Create or update a rating for a recipe (requires authentication)"""
@@ -60,7 +60,7 @@ async def create_or_update_rating_handler(
         logger.info(f"Setting rating for recipe {recipe_id} by user {user.user_id}")
         
         # Check if recipe exists
-        recipe = db.get_recipe(recipe_id)
+        recipe = await db.get_recipe(recipe_id)
         if not recipe:
             raise NotFoundException(f"Recipe with ID {recipe_id} not found")
         
@@ -71,7 +71,7 @@ async def create_or_update_rating_handler(
             "cognito_user_id": user.user_id,
         })
         
-        result = db.set_rating(rating_dict)
+        result = await db.set_rating(rating_dict)
         # Map cognito_user_id to user_id for the response model
         result["user_id"] = result["cognito_user_id"]
         return RatingResponse(**result)
@@ -85,7 +85,7 @@ async def create_or_update_rating_handler(
 
 async def delete_rating_handler(
     recipe_id: int,
-    db: Database,
+    db: AsyncDatabase,
     user: UserInfo
 ) -> MessageResponse:
     """Delete a user's rating for a recipe (requires authentication)"""
@@ -93,16 +93,16 @@ async def delete_rating_handler(
         logger.info(f"Deleting rating for recipe {recipe_id} by user {user.user_id}")
         
         # Check if recipe exists
-        recipe = db.get_recipe(recipe_id)
+        recipe = await db.get_recipe(recipe_id)
         if not recipe:
             raise NotFoundException(f"Recipe with ID {recipe_id} not found")
         
         # Check if user has a rating for this recipe
-        existing_rating = db.get_user_rating(recipe_id, user.user_id)
+        existing_rating = await db.get_user_rating(recipe_id, user.user_id)
         if not existing_rating:
             raise NotFoundException("No rating found for this recipe by the current user")
         
-        db.delete_rating(recipe_id, user.user_id)
+        await db.delete_rating(recipe_id, user.user_id)
         return MessageResponse(message="Rating deleted successfully")
         
     except NotFoundException:
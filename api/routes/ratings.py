@@ -8,8 +8,7 @@ from dependencies.auth import (
     get_current_user_optional,
     require_authentication,
 )
-from db.database import get_database as get_db
-from db.db_core import Database
+from db.async_database import AsyncDatabase, get_async_database as get_db
 from models.requests import RatingCreate
 from models.responses import RatingSummaryResponse, RatingResponse, MessageResponse
 from .rating_handlers import (
@@ -25,7 +24,7 @@ router = APIRouter(prefix="/ratings", tags=["ratings"])
 @router.get("/{recipe_id}", response_model=RatingSummaryResponse)
 async def get_recipe_ratings(
     recipe_id: int,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(get_current_user_optional),
 ):
     """Get ratings for a specific recipe"""
@@ -38,7 +37,7 @@ async def get_recipe_ratings(
 async def create_or_update_rating(
     recipe_id: int,
     rating_data: RatingCreate,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_authentication),
 ):
     """Create or update a rating for a recipe (requires authentication)"""
@@ -10,8 +10,7 @@ from dependencies.auth import (
     require_authentication,
     require_editor_access,
 )
-from db.database import get_database as get_db
-from db.db_core import Database
+from db.async_database import AsyncDatabase, get_async_database as get_db
 from models.requests import (
     RecipeCreate,
     RecipeUpdate,
@@ -81,7 +80,7 @@ async def search_recipes(
         None,
         description="Filter recipes that can be made with user's ingredient inventory",
     ),
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Optional[UserInfo] = Depends(get_current_user_optional),
 ):
     """Search recipes with pagination and filters"""
@@ -154,7 +153,7 @@ async def search_recipes(
             logger.info(f"Search query 'q' parameter: '{search_params['q']}'")
 
         # Get paginated search results
-        search_result = db.search_recipes_paginated(
+        search_result = await db.search_recipes_paginated(
             search_params=search_params,
             limit=limit,
             offset=offset,
@@ -221,7 +220,7 @@ async def search_recipes_authenticated(
         False,
         description="Filter recipes that can be made with user's ingredient inventory",
     ),
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_authentication),
 ):
     """Search recipes with authentication (required) - includes user ratings and optional inventory filtering"""
@@ -247,7 +246,7 @@ async def search_recipes_authenticated(
 @router.post("", response_model=RecipeResponse, status_code=status.HTTP_201_CREATED)
 async def create_recipe(
     recipe_data: RecipeCreate,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_editor_access),
 ):
     """Create a new recipe (requires editor access)"""
@@ -265,7 +264,7 @@ async def create_recipe(
                 # Get ingredient names for better error message
                 ingredient_names = []
                 for ing_id in duplicate_ids:
-                    ingredient = db.execute_query(
+                    ingredient = await db.execute_query(
                         "SELECT name FROM ingredients WHERE id = %s", (ing_id,)
                     )
                     if ingredient:
@@ -275,10 +274,10 @@ async def create_recipe(
                     f"Recipe cannot have duplicate ingredients: {', '.join(ingredient_names)}"
                 )
 
-        created_recipe = db.create_recipe(recipe_dict)
+        created_recipe = await db.create_recipe(recipe_dict)
 
         # Get the full recipe data with ingredients
-        full_recipe = db.get_recipe(created_recipe["id"], user.user_id)
+        full_recipe = await db.get_recipe(created_recipe["id"], user.user_id)
         return RecipeResponse(**full_recipe)
 
     except ValidationException:
@@ -291,13 +290,13 @@ async def create_recipe(
 @router.get("/{recipe_id}", response_model=RecipeResponse)
 async def get_recipe(
     recipe_id: int,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Optional[UserInfo] = Depends(get_current_user_optional),
 ):
     """Get a specific recipe by ID"""
     try:
         user_id = user.user_id if user else None
-        recipe = db.get_recipe(recipe_id, user_id)
+        recipe = await db.get_recipe(recipe_id, user_id)
 
         if not recipe:
             logger.warning(f"Recipe {recipe_id} not found")
@@ -317,7 +316,7 @@ async def get_recipe(
 async def update_recipe(
     recipe_id: int,
     recipe_data: RecipeUpdate,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_editor_access),
 ):
     """Update a recipe (requires editor access)"""
@@ -325,7 +324,7 @@ async def update_recipe(
         logger.info(f"Updating recipe {recipe_id}")
 
         # Check if recipe exists
-        existing_recipe = db.get_recipe(recipe_id, user.user_id)
+        existing_recipe = await db.get_recipe(recipe_id, user.user_id)
         if not existing_recipe:
             raise NotFoundException(f"Recipe with ID {recipe_id} not found")
 
@@ -334,10 +333,10 @@ async def update_recipe(
             k: v for k, v in recipe_data.model_dump().items() if v is not None
         }
 
-        db.update_recipe(recipe_id, update_dict)
+        await db.update_recipe(recipe_id, update_dict)
 
         # Get the full recipe data with ingredients
-        full_recipe = db.get_recipe(recipe_id, user.user_id)
+        full_recipe = await db.get_recipe(recipe_id, user.user_id)
         return RecipeResponse(**full_recipe)
 
     except NotFoundException:
@@ -350,7 +349,7 @@ async def update_recipe(
 @router.delete("/{recipe_id}", response_model=MessageResponse)
 async def delete_recipe(
     recipe_id: int,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_editor_access),
 ):
     """Delete a recipe (requires editor access)"""
@@ -358,11 +357,11 @@ async def delete_recipe(
         logger.info(f"Deleting recipe {recipe_id}")
 
         # Check if recipe exists
-        existing_recipe = db.get_recipe(recipe_id, user.user_id)
+        existing_recipe = await db.get_recipe(recipe_id, user.user_id)
         if not existing_recipe:
             raise NotFoundException(f"Recipe with ID {recipe_id} not found")
 
-        db.delete_recipe(recipe_id)
+        await db.delete_recipe(recipe_id)
 
         return MessageResponse(message=f"Recipe {recipe_id} deleted successfully")
 
@@ -378,7 +377,7 @@ async def delete_recipe(
 )
 async def bulk_upload_recipes(
     bulk_data: BulkRecipeUpload,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_editor_access),
 ):
     """Bulk upload recipes (requires editor access)"""
@@ -439,7 +438,7 @@ async def bulk_upload_recipes(
 
         # Batch validate recipe names
         batch_validation_start = time.time()
-        duplicate_names = db.check_recipe_names_batch(all_recipe_names)
+        duplicate_names = await db.check_recipe_names_batch(all_recipe_names)
 
         # Defensive check: ensure duplicate_names is a dict
         if not isinstance(duplicate_names, dict):
@@ -447,7 +446,7 @@ async def bulk_upload_recipes(
             raise DatabaseException(f"Internal error: batch recipe name validation returned invalid type {type(duplicate_names)}")
 
         # Batch validate ingredients
-        valid_ingredients = db.search_ingredients_batch(all_ingredient_names)
+        valid_ingredients = await db.search_ingredients_batch(all_ingredient_names)
 
         # Defensive check: ensure valid_ingredients is a dict
         if not isinstance(valid_ingredients, dict):
@@ -455,7 +454,7 @@ async def bulk_upload_recipes(
             raise DatabaseException(f"Internal error: batch ingredient validation returned invalid type {type(valid_ingredients)}")
 
         # Batch validate units
-        valid_units = db.validate_units_batch(all_unit_names)
+        valid_units = await db.validate_units_batch(all_unit_names)
 
         # Defensive check: ensure valid_units is a dict
         if not isinstance(valid_units, dict):
@@ -468,7 +467,7 @@ async def bulk_upload_recipes(
         valid_unit_ids = set()
         if all_unit_ids:
             unit_placeholders = ",".join("%s" for _ in all_unit_ids)
-            unit_id_rows = db.execute_query(
+            unit_id_rows = await db.execute_query(
                 f"SELECT id FROM units WHERE id IN ({unit_placeholders})",
                 tuple(all_unit_ids),
             )
@@ -672,7 +671,7 @@ async def bulk_upload_recipes(
 
         # Create all recipes in a single transaction
         try:
-            created_recipes = db.bulk_create_recipes(recipes_to_create, user.user_id)
+            created_recipes = await db.bulk_create_recipes(recipes_to_create, user.user_id)
 
             # Convert to response format (no extra queries needed!)
             for created_recipe in created_recipes:
@@ -4,8 +4,7 @@ import logging
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 
-from db.database import get_database as get_db
-from db.db_core import Database
+from db.async_database import AsyncDatabase, get_async_database as get_db
 
 logger = logging.getLogger(__name__)
 
@@ -20,12 +19,12 @@ class StatsResponse(BaseModel):
 
 @router.get("", response_model=StatsResponse)
 async def get_stats(
-    db: Database = Depends(get_db)
+    db: AsyncDatabase = Depends(get_db)
 ) -> StatsResponse:
     """Get database statistics including total counts of recipes and ingredients"""
     try:
-        recipes_count = db.get_recipes_count()
-        ingredients_count = db.get_ingredients_count()
+        recipes_count = await db.get_recipes_count()
+        ingredients_count = await db.get_ingredients_count()
         
         return StatsResponse(
             recipes_count=recipes_count,
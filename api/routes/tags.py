@@ -9,8 +9,7 @@ from dependencies.auth import (
     get_current_user_optional,
     require_authentication,
 )
-from db.database import get_database as get_db
-from db.db_core import Database
+from db.async_database import AsyncDatabase, get_async_database as get_db
 from models.requests import TagCreate, RecipeTagAssociation
 from models.responses import PublicTagResponse, PrivateTagResponse, MessageResponse
 from core.exceptions import NotFoundException, DatabaseException
@@ -21,11 +20,11 @@ router = APIRouter(prefix="/tags", tags=["tags"])
 
 
 @router.get("/public", response_model=List[PublicTagResponse])
-async def get_public_tags(db: Database = Depends(get_db)):
+async def get_public_tags(db: AsyncDatabase = Depends(get_db)):
     """Get all public tags"""
     try:
         logger.info("Getting public tags")
-        tags = db.get_public_tags()
+        tags = await db.get_public_tags()
         return [PublicTagResponse(**tag) for tag in tags]
     except Exception as e:
         logger.error(f"Error getting public tags: {str(e)}")
@@ -37,7 +36,7 @@ async def get_public_tags(db: Database = Depends(get_db)):
 )
 async def create_public_tag(
     tag_data: TagCreate,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_authentication),  # User needed for authentication only
 ):
     """Create a new public tag (requires authentication)"""
@@ -46,13 +45,13 @@ async def create_public_tag(
         _ = user  # Satisfy linter - user is needed for auth dependency
         
         # Check if tag already exists before creating
-        existing_tags = db.get_public_tags()
+        existing_tags = await db.get_public_tags()
         existing_tag = next((tag for tag in existing_tags if tag['name'].lower() == tag_data.name.lower()), None)
         if existing_tag:
             logger.warning(f"Public tag '{tag_data.name}' already exists with ID {existing_tag['id']}, returning existing tag")
             return PublicTagResponse(**existing_tag)
         
-        created_tag = db.create_public_tag(tag_data.name)
+        created_tag = await db.create_public_tag(tag_data.name)
         logger.info(f"Successfully created public tag: ID={created_tag['id']}, name='{created_tag['name']}'")
         return PublicTagResponse(**created_tag)
 
@@ -63,12 +62,12 @@ async def create_public_tag(
 
 @router.get("/private", response_model=List[PrivateTagResponse])
 async def get_private_tags(
-    db: Database = Depends(get_db), user: UserInfo = Depends(require_authentication)
+    db: AsyncDatabase = Depends(get_db), user: UserInfo = Depends(require_authentication)
 ):
     """Get private tags for the authenticated user"""
     try:
         logger.info(f"Getting private tags for user {user.user_id}")
-        tags = db.get_private_tags(user.user_id)
+        tags = await db.get_private_tags(user.user_id)
         return [PrivateTagResponse(**tag) for tag in tags]
     except Exception as e:
         logger.error(f"Error getting private tags: {str(e)}")
@@ -80,7 +79,7 @@ async def get_private_tags(
 )
 async def create_private_tag(
     tag_data: TagCreate,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_authentication),
 ):
     """Create a new private tag (requires authentication)"""
@@ -88,13 +87,13 @@ async def create_private_tag(
         logger.info(f"Creating private tag: '{tag_data.name}' for user {user.user_id}")
 
         # Check if tag already exists for this user before creating
-        existing_tags = db.get_private_tags(user.user_id)
+        existing_tags = await db.get_private_tags(user.user_id)
         existing_tag = next((tag for tag in existing_tags if tag['name'].lower() == tag_data.name.lower()), None)
         if existing_tag:
             logger.warning(f"Private tag '{tag_data.name}' already exists for user {user.user_id} with ID {existing_tag['id']}, returning existing tag")
             return PrivateTagResponse(**existing_tag)
 
-        created_tag = db.create_private_tag(tag_data.name, user.user_id)
+        created_tag = await db.create_private_tag(tag_data.name, user.user_id)
         logger.info(f"Successfully created private tag: ID={created_tag['id']}, name='{created_tag['name']}', user={user.user_id}")
         return PrivateTagResponse(**created_tag)
 
@@ -106,7 +105,7 @@ async def create_private_tag(
 @router.delete("/public/{tag_id}", response_model=MessageResponse)
 async def delete_public_tag(
     tag_id: int,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_authentication),  # User needed for authentication only
 ):
     """Delete a public tag completely (admin only - requires authentication)"""
@@ -114,7 +113,7 @@ async def delete_public_tag(
         logger.info(f"Deleting public tag {tag_id}")
         _ = user  # Satisfy linter - user is needed for auth dependency
         
-        success = db.delete_public_tag(tag_id)
+        success = await db.delete_public_tag(tag_id)
         if not success:
             raise NotFoundException(f"Public tag with ID {tag_id} not found")
             
@@ -130,14 +129,14 @@ async def delete_public_tag(
 @router.delete("/private/{tag_id}", response_model=MessageResponse)
 async def delete_private_tag(
     tag_id: int,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_authentication),
 ):
     """Delete a private tag completely (user can only delete their own tags)"""
     try:
         logger.info(f"Deleting private tag {tag_id} for user {user.user_id}")
         
-        success = db.delete_private_tag(tag_id, user.user_id)
+        success = await db.delete_private_tag(tag_id, user.user_id)
         if not success:
             raise NotFoundException(f"Private tag with ID {tag_id} not found or not owned by user")
             
@@ -163,7 +162,7 @@ recipe_tags_router = APIRouter(prefix="/recipes", tags=["recipe-tags"])
 async def add_public_tag_to_recipe(
     recipe_id: int,
     tag_association: RecipeTagAssociation,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_authentication),
 ):
     """Add a public tag to a recipe (requires authentication)"""
@@ -171,13 +170,13 @@ async def add_public_tag_to_recipe(
         logger.info(f"Adding public tag {tag_association.tag_id} to recipe {recipe_id} by user {user.user_id}")
 
         # Check if recipe exists
-        recipe = db.get_recipe(recipe_id)
+        recipe = await db.get_recipe(recipe_id)
         if not recipe:
             logger.warning(f"Recipe {recipe_id} not found when trying to add tag {tag_association.tag_id}")
             raise NotFoundException(f"Recipe with ID {recipe_id} not found")
 
         # Check if tag exists and is public
-        tag = db.get_tag(tag_association.tag_id)
+        tag = await db.get_tag(tag_association.tag_id)
         if not tag:
             logger.warning(f"Tag {tag_association.tag_id} not found when trying to add to recipe {recipe_id}")
             raise NotFoundException(f"Tag with ID {tag_association.tag_id} not found")
@@ -189,12 +188,12 @@ async def add_public_tag_to_recipe(
             raise DatabaseException("Cannot add private tag as public tag")
 
         # Check if association already exists
-        existing_recipe = db.get_recipe(recipe_id, user.user_id)
+        existing_recipe = await db.get_recipe(recipe_id, user.user_id)
         existing_tag_ids = [t['id'] for t in existing_recipe.get('tags', [])] if existing_recipe else []
         if tag_association.tag_id in existing_tag_ids:
             logger.warning(f"Tag {tag_association.tag_id} already associated with recipe {recipe_id}, skipping")
         else:
-            result = db.add_recipe_tag(
+            result = await db.add_recipe_tag(
                 recipe_id, tag_association.tag_id, is_private=False, user_id=user.user_id
             )
             logger.info(f"Recipe-tag association result: {result}")
@@ -214,7 +213,7 @@ async def add_public_tag_to_recipe(
 async def remove_public_tag_from_recipe(
     recipe_id: int,
     tag_id: int,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_authentication),
 ):
     """Remove a public tag from a recipe (requires authentication)"""
@@ -222,11 +221,11 @@ async def remove_public_tag_from_recipe(
         logger.info(f"Removing public tag {tag_id} from recipe {recipe_id}")
 
         # Check if recipe exists
-        recipe = db.get_recipe(recipe_id)
+        recipe = await db.get_recipe(recipe_id)
         if not recipe:
             raise NotFoundException(f"Recipe with ID {recipe_id} not found")
 
-        db.remove_recipe_tag(recipe_id, tag_id, is_private=False, user_id=user.user_id)
+        await db.remove_recipe_tag(recipe_id, tag_id, is_private=False, user_id=user.user_id)
         return MessageResponse(message="Public tag removed from recipe successfully")
 
     except NotFoundException:
@@ -246,7 +245,7 @@ async def remove_public_tag_from_recipe(
 async def add_private_tag_to_recipe(
     recipe_id: int,
     tag_association: RecipeTagAssociation,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_authentication),
 ):
     """Add a private tag to a recipe (requires authentication)"""
@@ -256,19 +255,19 @@ async def add_private_tag_to_recipe(
         )
 
         # Check if recipe exists
-        recipe = db.get_recipe(recipe_id)
+        recipe = await db.get_recipe(recipe_id)
         if not recipe:
             raise NotFoundException(f"Recipe with ID {recipe_id} not found")
 
         # Check if tag exists and belongs to user
-        tag = db.get_tag(tag_association.tag_id)
+        tag = await db.get_tag(tag_association.tag_id)
         if not tag:
             raise NotFoundException(f"Tag with ID {tag_association.tag_id} not found")
 
         if not tag.get("is_private", False) or tag.get("created_by") != user.user_id:
             raise DatabaseException("Can only add your own private tags")
 
-        db.add_recipe_tag(
+        await db.add_recipe_tag(
             recipe_id, tag_association.tag_id, is_private=True, user_id=user.user_id
         )
         return MessageResponse(message="Private tag added to recipe successfully")
@@ -286,7 +285,7 @@ async def add_private_tag_to_recipe(
 async def remove_private_tag_from_recipe(
     recipe_id: int,
     tag_id: int,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_authentication),
 ):
     """Remove a private tag from a recipe (requires authentication)"""
@@ -294,11 +293,11 @@ async def remove_private_tag_from_recipe(
         logger.info(f"Removing private tag {tag_id} from recipe {recipe_id}")
 
         # Check if recipe exists
-        recipe = db.get_recipe(recipe_id)
+        recipe = await db.get_recipe(recipe_id)
         if not recipe:
             raise NotFoundException(f"Recipe with ID {recipe_id} not found")
 
-        db.remove_recipe_tag(recipe_id, tag_id, is_private=True, user_id=user.user_id)
+        await db.remove_recipe_tag(recipe_id, tag_id, is_private=True, user_id=user.user_id)
         return MessageResponse(message="Private tag removed from recipe successfully")
 
     except NotFoundException:
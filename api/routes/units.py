@@ -8,8 +8,7 @@ from dependencies.auth import (
     UserInfo,
     get_current_user_optional,
 )
-from db.database import get_database as get_db
-from db.db_core import Database
+from db.async_database import AsyncDatabase, get_async_database as get_db
 from models.responses import UnitResponse
 from core.exceptions import DatabaseException
 
@@ -21,7 +20,7 @@ router = APIRouter(prefix="/units", tags=["units"])
 @router.get("", response_model=List[UnitResponse])
 async def get_units(
     unit_type: Optional[str] = Query(None, description="Filter by unit type"),
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: Optional[UserInfo] = Depends(get_current_user_optional),
 ):
     """Get all units, optionally filtered by type"""
@@ -29,9 +28,9 @@ async def get_units(
         logger.info(f"Getting units with type filter: {unit_type}")
 
         if unit_type:
-            units = db.get_units_by_type(unit_type)
+            units = await db.get_units_by_type(unit_type)
         else:
-            units = db.get_units()
+            units = await db.get_units()
 
         return [UnitResponse(**unit) for unit in units]
 
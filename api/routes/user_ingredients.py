@@ -4,8 +4,7 @@ import logging
 from fastapi import APIRouter, Depends, status, HTTPException
 
 from dependencies.auth import UserInfo, require_authentication
-from db.database import get_database as get_db
-from db.db_core import Database
+from db.async_database import AsyncDatabase, get_async_database as get_db
 from models.requests import UserIngredientAdd, UserIngredientBulkAdd, UserIngredientBulkRemove
 from models.responses import (
     UserIngredientResponse,
@@ -25,14 +24,14 @@ router = APIRouter(prefix="/user-ingredients", tags=["user-ingredients"])
 @router.post("", response_model=UserIngredientResponse, status_code=status.HTTP_201_CREATED)
 async def add_user_ingredient(
     ingredient_data: UserIngredientAdd,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_authentication),
 ):
     """Add an ingredient to user's inventory (requires authentication)"""
     try:
         logger.info(f"Adding ingredient {ingredient_data.ingredient_id} to user {user.user_id}")
 
-        result = db.add_user_ingredient(user.user_id, ingredient_data.ingredient_id)
+        result = await db.add_user_ingredient(user.user_id, ingredient_data.ingredient_id)
         
         return UserIngredientResponse(
             ingredient_id=result["ingredient_id"],
@@ -55,14 +54,14 @@ async def add_user_ingredient(
 @router.delete("/bulk", response_model=UserIngredientBulkResponse)
 async def remove_user_ingredients_bulk(
     bulk_data: UserIngredientBulkRemove,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_authentication),
 ):
     """Remove multiple ingredients from user's inventory (requires authentication)"""
     try:
         logger.info(f"Bulk removing {len(bulk_data.ingredient_ids)} ingredients from user {user.user_id}")
 
-        result = db.remove_user_ingredients_bulk(user.user_id, bulk_data.ingredient_ids)
+        result = await db.remove_user_ingredients_bulk(user.user_id, bulk_data.ingredient_ids)
         
         return UserIngredientBulkResponse(
             removed_count=result["removed_count"],
@@ -81,14 +80,14 @@ async def remove_user_ingredients_bulk(
 @router.delete("/{ingredient_id}", response_model=MessageResponse)
 async def remove_user_ingredient(
     ingredient_id: int,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_authentication),
 ):
     """Remove an ingredient from user's inventory (requires authentication)"""
     try:
         logger.info(f"Removing ingredient {ingredient_id} from user {user.user_id}")
 
-        success = db.remove_user_ingredient(user.user_id, ingredient_id)
+        success = await db.remove_user_ingredient(user.user_id, ingredient_id)
         
         if not success:
             raise NotFoundException(f"Ingredient {ingredient_id} not found in user's inventory")
@@ -106,14 +105,14 @@ async def remove_user_ingredient(
 
 @router.get("", response_model=UserIngredientListResponse)
 async def get_user_ingredients(
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_authentication),
 ):
     """Get all ingredients in user's inventory (requires authentication)"""
     try:
         logger.info(f"Getting ingredients for user {user.user_id}")
 
-        ingredients = db.get_user_ingredients(user.user_id)
+        ingredients = await db.get_user_ingredients(user.user_id)
         
         ingredient_responses = []
         for ingredient in ingredients:
@@ -141,14 +140,14 @@ async def get_user_ingredients(
 @router.post("/bulk", response_model=UserIngredientBulkResponse, status_code=status.HTTP_201_CREATED)
 async def add_user_ingredients_bulk(
     bulk_data: UserIngredientBulkAdd,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_authentication),
 ):
     """Add multiple ingredients to user's inventory (requires authentication)"""
     try:
         logger.info(f"Bulk adding {len(bulk_data.ingredient_ids)} ingredients to user {user.user_id}")
 
-        result = db.add_user_ingredients_bulk(user.user_id, bulk_data.ingredient_ids)
+        result = await db.add_user_ingredients_bulk(user.user_id, bulk_data.ingredient_ids)
 
         return UserIngredientBulkResponse(
             added_count=result["added_count"],
@@ -165,14 +164,14 @@ async def add_user_ingredients_bulk(
 @router.get("/recommendations", response_model=IngredientRecommendationListResponse)
 async def get_ingredient_recommendations(
     limit: int = 20,
-    db: Database = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     user: UserInfo = Depends(require_authentication),
 ):
     """Get ingredient recommendations that would unlock the most new recipes (requires authentication)"""
     try:
         logger.info(f"Getting ingredient recommendations for user {user.user_id} with limit {limit}")
 
-        recommendations = db.get_ingredient_recommendations(user.user_id, limit)
+        recommendations = await db.get_ingredient_recommendations(user.user_id, limit)
 
         recommendation_responses = []
         for rec in recommendations:
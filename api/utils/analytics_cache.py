@@ -22,6 +22,10 @@ class AnalyticsStorage:
         """Generate file path for analytics type"""
         return self.storage_path / self.storage_version / f"{analytics_type}.json"
 
+    def has_analytics(self, analytics_type: str) -> bool:
+        """Check whether analytics data has been stored for analytics type"""
+        return self._get_file_path(analytics_type).exists()
+
     def get_analytics(self, analytics_type: str) -> Optional[Dict[Any, Any]]:
         """Retrieve pre-generated analytics data from storage"""
         try:
@@ -7,6 +7,7 @@ from utils.analytics_cache import AnalyticsStorage
 
 EM_DISTANCE_MATRIX_FILENAME = "recipe-distances-em.npy"
 EM_INGREDIENT_DISTANCE_MATRIX_FILENAME = "ingredient-distances-em.npy"
+EM_STATE_FILENAME = "em-state.npz"
 
 
 def get_em_distance_matrix_path(storage_path: str) -> Path:
@@ -16,12 +17,28 @@ def get_em_distance_matrix_path(storage_path: str) -> Path:
 
 
 def save_em_distance_matrix(storage_path: str, distance_matrix: Any) -> Path:
-    """Persist the EM recipe distance matrix to analytics storage."""
+    """Persist the EM recipe distance matrix to analytics storage.
+
+    Condensed matrices (anything with a ``to_dense(out=...)`` method) are expanded
+    straight into a memory-mapped ``.npy`` file, so the dense n x n copy is never
+    held in memory. The file format is the same either way.
+    """
     import numpy as np
 
     file_path = get_em_distance_matrix_path(storage_path)
     file_path.parent.mkdir(parents=True, exist_ok=True)
-    np.save(file_path, distance_matrix)
+    if hasattr(distance_matrix, "to_dense"):
+        out = np.lib.format.open_memmap(
+            file_path,
+            mode="w+",
+            dtype=distance_matrix.dtype,
+            shape=distance_matrix.shape,
+        )
+        distance_matrix.to_dense(out=out)
+        out.flush()
+        del out
+    else:
+        np.save(file_path, distance_matrix)
     return file_path
 
 
@@ -43,3 +60,37 @@ def save_em_ingredient_distance_matrix(storage_path: str, distance_matrix: Any)
     file_path.parent.mkdir(parents=True, exist_ok=True)
     np.save(file_path, distance_matrix)
     return file_path
+
+
+def get_em_state_path(storage_path: str) -> Path:
+    """Return the file path for the EM state used by incremental refits."""
+    storage = AnalyticsStorage(storage_path)
+    return storage.storage_path / storage.storage_version / EM_STATE_FILENAME
+
+
+def save_em_state(storage_path: str, state: dict[str, Any]) -> Path:
+    """Persist the EM state (learned costs, kNN pairs, transport plans) as ``.npz``.
+
+    The archive is written next to the final path and renamed into place, so a
+    reader never sees a partially written state.
+    """
+    import numpy as np
+
+    file_path = get_em_state_path(storage_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = file_path.with_name(file_path.name + ".tmp")
+    with open(tmp_path, "wb") as file_handle:
+        np.savez(file_handle, **state)
+    tmp_path.replace(file_path)
+    return file_path
+
+
+def load_em_state(storage_path: str) -> dict[str, Any] | None:
+    """Load the EM state written by ``save_em_state``, or None if there is none."""
+    import numpy as np
+
+    file_path = get_em_state_path(storage_path)
+    if not file_path.exists():
+        return None
+    with np.load(file_path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
@@ -26,6 +26,27 @@ CREATE TABLE ingredients (
   FOREIGN KEY (parent_id) REFERENCES ingredients(id)
 );
 
+-- Ancestor/descendant closure of the ingredient hierarchy, derived from
+-- ingredients.path by the sync_ingredient_ancestors trigger. Every ingredient
+-- has a depth-0 row for itself, so "X or any descendant of X" is an equality
+-- join on ancestor_id.
+CREATE TABLE ingredient_ancestors (
+  ancestor_id INTEGER NOT NULL REFERENCES ingredients(id) ON DELETE CASCADE,
+  descendant_id INTEGER NOT NULL REFERENCES ingredients(id) ON DELETE CASCADE,
+  depth INTEGER NOT NULL,
+  PRIMARY KEY (ancestor_id, descendant_id)
+);
+
+-- Which ingredients satisfy which: a row means an inventory holding
+-- user_ingredient_id can stand in for recipe_ingredient_id under the
+-- substitution rules (INGREDIENT_SUBSTITUTION_MATCH in api/db/sql_queries.py).
+-- Maintained by the ingredient_satisfies triggers.
+CREATE TABLE ingredient_satisfies (
+  user_ingredient_id INTEGER NOT NULL REFERENCES ingredients(id) ON DELETE CASCADE,
+  recipe_ingredient_id INTEGER NOT NULL REFERENCES ingredients(id) ON DELETE CASCADE,
+  PRIMARY KEY (user_ingredient_id, recipe_ingredient_id)
+);
+
 CREATE TABLE units (
   id SERIAL PRIMARY KEY,
   name TEXT NOT NULL UNIQUE,
@@ -93,6 +114,14 @@ CREATE TABLE user_ingredients (
   UNIQUE(cognito_user_id, ingredient_id)
 );
 
+-- Recipes each user can make from their inventory (maintained by the API on
+-- inventory, recipe and substitution changes; see build_refresh_makeable_recipes_sql)
+CREATE TABLE user_makeable_recipes (
+  cognito_user_id TEXT NOT NULL,
+  recipe_id INTEGER NOT NULL REFERENCES recipes(id) ON DELETE CASCADE,
+  PRIMARY KEY (cognito_user_id, recipe_id)
+);
+
 CREATE TABLE analytics_refresh_state (
   id INTEGER PRIMARY KEY,
   dirty_at TIMESTAMP,
@@ -103,6 +132,28 @@ INSERT INTO analytics_refresh_state (id, dirty_at, last_run_at)
 VALUES (1, NULL, NULL)
 ON CONFLICT (id) DO NOTHING;
 
+-- Change counter per analytics input table (bumped by the analytics triggers)
+CREATE TABLE analytics_table_versions (
+  table_name TEXT PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 0,
+  changed_at TIMESTAMP
+);
+
+INSERT INTO analytics_table_versions (table_name, version, changed_at)
+VALUES
+  ('recipes', 1, CURRENT_TIMESTAMP),
+  ('ingredients', 1, CURRENT_TIMESTAMP),
+  ('recipe_ingredients', 1, CURRENT_TIMESTAMP),
+  ('units', 1, CURRENT_TIMESTAMP)
+ON CONFLICT (table_name) DO NOTHING;
+
+-- Input table versions each analytics artifact was last built from
+CREATE TABLE analytics_artifact_state (
+  artifact TEXT PRIMARY KEY,
+  input_versions JSONB NOT NULL,
+  built_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
 CREATE TABLE recipe_similarity (
   recipe_id INTEGER PRIMARY KEY REFERENCES recipes(id) ON DELETE CASCADE,
   recipe_name TEXT NOT NULL,
@@ -115,6 +166,8 @@ COMMENT ON TABLE recipe_similarity IS 'Pre-computed similar cocktails from EM di
 -- Create indexes for better performance
 CREATE INDEX idx_ingredients_parent_id ON ingredients(parent_id);
 CREATE INDEX idx_ingredients_path ON ingredients(path);
+CREATE INDEX idx_ingredient_ancestors_descendant ON ingredient_ancestors(descendant_id, ancestor_id);
+CREATE INDEX idx_ingredient_satisfies_recipe ON ingredient_satisfies(recipe_ingredient_id, user_ingredient_id);
 CREATE INDEX idx_recipe_ingredients_recipe_id ON recipe_ingredients(recipe_id);
 CREATE INDEX idx_recipe_ingredients_ingredient_id ON recipe_ingredients(ingredient_id);
 CREATE INDEX idx_recipe_tags_recipe_id ON recipe_tags(recipe_id);
@@ -123,6 +176,7 @@ CREATE INDEX idx_ratings_cognito_user_id ON ratings(cognito_user_id);
 CREATE INDEX idx_ratings_recipe_id ON ratings(recipe_id);
 CREATE INDEX idx_user_ingredients_cognito_user_id ON user_ingredients(cognito_user_id);
 CREATE INDEX idx_user_ingredients_ingredient_id ON user_ingredients(ingredient_id);
+CREATE INDEX idx_user_makeable_recipes_recipe_id ON user_makeable_recipes(recipe_id);
 CREATE INDEX idx_recipes_created_by ON recipes(created_by);
 CREATE INDEX idx_recipes_name_id ON recipes(name, id);
 CREATE INDEX idx_recipes_avg_rating_id ON recipes(avg_rating, id);
@@ -174,54 +228,282 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
--- Function to mark analytics refresh state as dirty
-CREATE OR REPLACE FUNCTION mark_analytics_dirty()
-RETURNS TRIGGER AS $$
+-- Function to bump an analytics input table's version and mark the
+-- analytics refresh state as dirty
+CREATE OR REPLACE FUNCTION bump_analytics_table_version(changed_table TEXT)
+RETURNS VOID AS $$
 BEGIN
+  UPDATE analytics_table_versions
+  SET version = version + 1, changed_at = CURRENT_TIMESTAMP
+  WHERE table_name = changed_table;
+
   UPDATE analytics_refresh_state
   SET dirty_at = CURRENT_TIMESTAMP
   WHERE id = 1;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION mark_analytics_dirty()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM bump_analytics_table_version(TG_TABLE_NAME);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Update variants: only count changes to columns the analytics read
+CREATE OR REPLACE FUNCTION mark_analytics_dirty_recipes_update()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF EXISTS (
+    SELECT 1
+    FROM new_rows
+    JOIN old_rows ON old_rows.id = new_rows.id
+    WHERE new_rows.name IS DISTINCT FROM old_rows.name
+  ) THEN
+    PERFORM bump_analytics_table_version(TG_TABLE_NAME);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION mark_analytics_dirty_ingredients_update()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF EXISTS (
+    SELECT 1
+    FROM new_rows
+    JOIN old_rows ON old_rows.id = new_rows.id
+    WHERE new_rows.name IS DISTINCT FROM old_rows.name
+    OR new_rows.parent_id IS DISTINCT FROM old_rows.parent_id
+    OR new_rows.path IS DISTINCT FROM old_rows.path
+    OR new_rows.allow_substitution IS DISTINCT FROM old_rows.allow_substitution
+  ) THEN
+    PERFORM bump_analytics_table_version(TG_TABLE_NAME);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION mark_analytics_dirty_units_update()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF EXISTS (
+    SELECT 1
+    FROM new_rows
+    JOIN old_rows ON old_rows.id = new_rows.id
+    WHERE new_rows.name IS DISTINCT FROM old_rows.name
+    OR new_rows.conversion_to_ml IS DISTINCT FROM old_rows.conversion_to_ml
+  ) THEN
+    PERFORM bump_analytics_table_version(TG_TABLE_NAME);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function to rebuild an ingredient's closure rows from its path
+CREATE OR REPLACE FUNCTION sync_ingredient_ancestors()
+RETURNS TRIGGER AS $$
+BEGIN
+  DELETE FROM ingredient_ancestors WHERE descendant_id = NEW.id;
+
+  INSERT INTO ingredient_ancestors (ancestor_id, descendant_id, depth)
+  SELECT path_ids.id, NEW.id, path_ids.total - path_ids.ord
+  FROM (
+    SELECT ids.id, ids.ord, COUNT(*) OVER () AS total
+    FROM unnest(string_to_array(trim(both '/' from NEW.path), '/')::int[])
+      WITH ORDINALITY AS ids(id, ord)
+  ) path_ids
+  JOIN ingredients a ON a.id = path_ids.id;
+
+  -- Ingredients without a path yet (set right after insert) still match themselves
+  INSERT INTO ingredient_ancestors (ancestor_id, descendant_id, depth)
+  VALUES (NEW.id, NEW.id, 0)
+  ON CONFLICT (ancestor_id, descendant_id) DO NOTHING;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function to recompute ingredient_satisfies rows involving the given
+-- ingredients or their descendants. Substitution depends on the flags and
+-- paths of every ancestor of the recipe ingredient, so a change to an
+-- ingredient can only affect pairs whose user or recipe side is in its subtree.
+CREATE OR REPLACE FUNCTION refresh_ingredient_satisfies(changed_ids INTEGER[])
+RETURNS VOID AS $$
+DECLARE
+  affected INTEGER[];
+BEGIN
+  SELECT ARRAY(
+    SELECT descendant_id FROM ingredient_ancestors WHERE ancestor_id = ANY(changed_ids)
+    UNION
+    SELECT unnest(changed_ids)
+  ) INTO affected;
+
+  DELETE FROM ingredient_satisfies
+  WHERE user_ingredient_id = ANY(affected) OR recipe_ingredient_id = ANY(affected);
+
+  INSERT INTO ingredient_satisfies (user_ingredient_id, recipe_ingredient_id)
+  SELECT i_user.id, i_recipe.id
+  FROM ingredients i_user
+  JOIN ingredients i_recipe ON (
+    -- Direct match
+    i_user.id = i_recipe.id
+    OR
+    -- Recipe allows substitution AND user ingredient can substitute
+    (i_recipe.allow_substitution = TRUE AND (
+        -- User has ancestor of recipe ingredient (user has "Rum", recipe needs "Wray And Nephew")
+        -- BUT: no blocking parents in between (e.g., "Pot Still Unaged Rum" with allow_sub=false)
+        (EXISTS (
+             SELECT 1 FROM ingredient_ancestors user_anc
+             WHERE user_anc.ancestor_id = i_user.id
+             AND user_anc.descendant_id = i_recipe.id
+         )
+         AND NOT EXISTS (
+             SELECT 1
+             FROM ingredient_ancestors below_user
+             JOIN ingredient_ancestors above_recipe
+               ON above_recipe.ancestor_id = below_user.descendant_id
+             JOIN ingredients blocking ON blocking.id = below_user.descendant_id
+             WHERE below_user.ancestor_id = i_user.id          -- blocking is descendant of user ingredient
+             AND above_recipe.descendant_id = i_recipe.id      -- blocking is ancestor of recipe ingredient
+             AND blocking.id != i_user.id                      -- not the user ingredient itself
+             AND blocking.allow_substitution = FALSE           -- blocks substitution
+         ))
+        OR
+        -- Sibling match: same parent, both allow substitution
+        (i_recipe.parent_id = i_user.parent_id
+         AND i_recipe.parent_id IS NOT NULL
+         AND i_user.allow_substitution = TRUE)
+        OR
+        -- User has parent of recipe ingredient
+        (i_user.id = i_recipe.parent_id)
+        OR
+        -- Recursive: user has common ancestor with recipe ingredient
+        EXISTS (
+            SELECT 1
+            FROM ingredient_ancestors user_up
+            JOIN ingredient_ancestors recipe_up
+              ON recipe_up.ancestor_id = user_up.ancestor_id
+            JOIN ingredients anc ON anc.id = user_up.ancestor_id
+            WHERE user_up.descendant_id = i_user.id
+            AND recipe_up.descendant_id = i_recipe.id
+            AND anc.allow_substitution = TRUE
+            AND LENGTH(anc.path) - LENGTH(REPLACE(anc.path, '/', '')) <= 6
+            -- Ensure no blocking parents between common ancestor and recipe ingredient
+            AND NOT EXISTS (
+                SELECT 1
+                FROM ingredient_ancestors below_anc
+                JOIN ingredient_ancestors above_recipe
+                  ON above_recipe.ancestor_id = below_anc.descendant_id
+                JOIN ingredients blocking ON blocking.id = below_anc.descendant_id
+                WHERE below_anc.ancestor_id = anc.id
+                AND above_recipe.descendant_id = i_recipe.id
+                AND blocking.id != anc.id
+                AND blocking.allow_substitution = FALSE
+            )
+        )
+    ))
+  )
+  WHERE i_user.id = ANY(affected) OR i_recipe.id = ANY(affected);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION sync_ingredient_satisfies_insert()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM refresh_ingredient_satisfies(ARRAY(SELECT id FROM new_rows));
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION sync_ingredient_satisfies_update()
+RETURNS TRIGGER AS $$
+DECLARE
+  changed_ids INTEGER[];
+BEGIN
+  SELECT ARRAY(
+    SELECT new_rows.id
+    FROM new_rows
+    JOIN old_rows ON old_rows.id = new_rows.id
+    WHERE new_rows.allow_substitution IS DISTINCT FROM old_rows.allow_substitution
+    OR new_rows.parent_id IS DISTINCT FROM old_rows.parent_id
+    OR new_rows.path IS DISTINCT FROM old_rows.path
+  ) INTO changed_ids;
+
+  IF cardinality(changed_ids) > 0 THEN
+    PERFORM refresh_ingredient_satisfies(changed_ids);
+  END IF;
   RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
 -- Create Triggers
 
--- Analytics refresh triggers
+-- Ingredient hierarchy closure maintenance
+CREATE TRIGGER ingredient_ancestors_insert
+AFTER INSERT ON ingredients
+FOR EACH ROW
+EXECUTE FUNCTION sync_ingredient_ancestors();
+
+CREATE TRIGGER ingredient_ancestors_update
+AFTER UPDATE OF path ON ingredients
+FOR EACH ROW
+WHEN (OLD.path IS DISTINCT FROM NEW.path)
+EXECUTE FUNCTION sync_ingredient_ancestors();
+
+-- Ingredient substitution graph maintenance (statement level, after the
+-- closure rows for the statement have been written)
+CREATE TRIGGER ingredient_satisfies_insert
+AFTER INSERT ON ingredients
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION sync_ingredient_satisfies_insert();
+
+CREATE TRIGGER ingredient_satisfies_update
+AFTER UPDATE ON ingredients
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION sync_ingredient_satisfies_update();
+
+-- Analytics refresh triggers (ratings and tags feed no analytics artifact)
 CREATE TRIGGER analytics_recipes_dirty
-AFTER INSERT OR UPDATE OR DELETE ON recipes
+AFTER INSERT OR DELETE ON recipes
 FOR EACH STATEMENT
 EXECUTE FUNCTION mark_analytics_dirty();
 
-CREATE TRIGGER analytics_ingredients_dirty
-AFTER INSERT OR UPDATE OR DELETE ON ingredients
+CREATE TRIGGER analytics_recipes_dirty_update
+AFTER UPDATE ON recipes
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
 FOR EACH STATEMENT
-EXECUTE FUNCTION mark_analytics_dirty();
+EXECUTE FUNCTION mark_analytics_dirty_recipes_update();
 
-CREATE TRIGGER analytics_recipe_ingredients_dirty
-AFTER INSERT OR UPDATE OR DELETE ON recipe_ingredients
+CREATE TRIGGER analytics_ingredients_dirty
+AFTER INSERT OR DELETE ON ingredients
 FOR EACH STATEMENT
 EXECUTE FUNCTION mark_analytics_dirty();
 
-CREATE TRIGGER analytics_units_dirty
-AFTER INSERT OR UPDATE OR DELETE ON units
+CREATE TRIGGER analytics_ingredients_dirty_update
+AFTER UPDATE ON ingredients
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
 FOR EACH STATEMENT
-EXECUTE FUNCTION mark_analytics_dirty();
+EXECUTE FUNCTION mark_analytics_dirty_ingredients_update();
 
-CREATE TRIGGER analytics_ratings_dirty
-AFTER INSERT OR UPDATE OR DELETE ON ratings
+CREATE TRIGGER analytics_recipe_ingredients_dirty
+AFTER INSERT OR UPDATE OR DELETE ON recipe_ingredients
 FOR EACH STATEMENT
 EXECUTE FUNCTION mark_analytics_dirty();
 
-CREATE TRIGGER analytics_tags_dirty
-AFTER INSERT OR UPDATE OR DELETE ON tags
+CREATE TRIGGER analytics_units_dirty
+AFTER INSERT OR DELETE ON units
 FOR EACH STATEMENT
 EXECUTE FUNCTION mark_analytics_dirty();
 
-CREATE TRIGGER analytics_recipe_tags_dirty
-AFTER INSERT OR UPDATE OR DELETE ON recipe_tags
+CREATE TRIGGER analytics_units_dirty_update
+AFTER UPDATE ON units
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
 FOR EACH STATEMENT
-EXECUTE FUNCTION mark_analytics_dirty();
+EXECUTE FUNCTION mark_analytics_dirty_units_update();
 
 -- Trigger to update average rating when a new rating is added
 CREATE TRIGGER update_avg_rating_insert
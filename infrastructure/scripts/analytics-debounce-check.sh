@@ -26,6 +26,8 @@ if [ "$lock_acquired" != "t" ]; then
   exit 0
 fi
 
+# dirty_at is set by any write to an analytics input; the refresh itself only
+# rebuilds the artifacts whose input tables changed (analytics_table_versions).
 read -r dirty_at last_run_at <<<"$(psql -h "$DB_HOST" -p "$DB_PORT" -U "$DB_USER" -d "$DB_NAME" -tAc "SELECT dirty_at, last_run_at FROM analytics_refresh_state WHERE id = 1;")"
 
 if [ -z "$dirty_at" ]; then
@@ -4,6 +4,7 @@
 #
 # Usage:
 #   ./trigger-analytics.sh           # Run in foreground
+#   ./trigger-analytics.sh --full    # Rebuild every artifact, stale or not
 #   ./trigger-analytics.sh --bg      # Run via systemd (background)
 #   ./trigger-analytics.sh --status  # Check last run status
 
@@ -13,10 +14,11 @@ SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 APP_HOME="${APP_HOME:-/opt/cocktaildb}"
 
 usage() {
-    echo "Usage: $0 [--bg|--status|--help]"
+    echo "Usage: $0 [--full|--bg|--status|--help]"
     echo ""
     echo "Options:"
-    echo "  (no args)   Run analytics refresh in foreground"
+    echo "  (no args)   Run analytics refresh in foreground (stale artifacts only)"
+    echo "  --full      Run in foreground, rebuilding every artifact"
     echo "  --bg        Run via systemd timer (background)"
     echo "  --progress  Run in foreground with EM progress output"
     echo "  --status    Show status of last analytics run"
@@ -30,7 +32,7 @@ run_foreground() {
 
     cd "$APP_HOME"
 
-    docker compose run --rm api python -m analytics.analytics_refresh
+    docker compose run --rm api python -m analytics.analytics_refresh "$@"
 
     echo ""
     echo "=== Analytics Refresh Complete ==="
@@ -57,6 +59,9 @@ show_status() {
 
 # Parse arguments
 case "${1:-}" in
+    --full)
+        run_foreground --full
+        ;;
     --progress)
         EM_PROGRESS=1 run_foreground
         ;;
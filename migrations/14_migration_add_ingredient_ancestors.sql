@@ -0,0 +1,70 @@
+-- Migration: Add ingredient_ancestors closure table for hierarchy lookups
+-- Replaces path LIKE / STARTS_WITH prefix scans in search filters, ingredient
+-- usage analytics and substitution matching with indexed equality joins.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS ingredient_ancestors (
+    ancestor_id INTEGER NOT NULL REFERENCES ingredients(id) ON DELETE CASCADE,
+    descendant_id INTEGER NOT NULL REFERENCES ingredients(id) ON DELETE CASCADE,
+    depth INTEGER NOT NULL,
+    PRIMARY KEY (ancestor_id, descendant_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingredient_ancestors_descendant
+    ON ingredient_ancestors(descendant_id, ancestor_id);
+
+CREATE OR REPLACE FUNCTION sync_ingredient_ancestors()
+RETURNS trigger AS $$
+BEGIN
+    DELETE FROM ingredient_ancestors WHERE descendant_id = NEW.id;
+
+    INSERT INTO ingredient_ancestors (ancestor_id, descendant_id, depth)
+    SELECT path_ids.id, NEW.id, path_ids.total - path_ids.ord
+    FROM (
+        SELECT ids.id, ids.ord, COUNT(*) OVER () AS total
+        FROM unnest(string_to_array(trim(both '/' from NEW.path), '/')::int[])
+            WITH ORDINALITY AS ids(id, ord)
+    ) path_ids
+    JOIN ingredients a ON a.id = path_ids.id;
+
+    INSERT INTO ingredient_ancestors (ancestor_id, descendant_id, depth)
+    VALUES (NEW.id, NEW.id, 0)
+    ON CONFLICT (ancestor_id, descendant_id) DO NOTHING;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS ingredient_ancestors_insert ON ingredients;
+CREATE TRIGGER ingredient_ancestors_insert
+AFTER INSERT ON ingredients
+FOR EACH ROW EXECUTE FUNCTION sync_ingredient_ancestors();
+
+DROP TRIGGER IF EXISTS ingredient_ancestors_update ON ingredients;
+CREATE TRIGGER ingredient_ancestors_update
+AFTER UPDATE OF path ON ingredients
+FOR EACH ROW
+WHEN (OLD.path IS DISTINCT FROM NEW.path)
+EXECUTE FUNCTION sync_ingredient_ancestors();
+
+-- Backfill from existing paths
+TRUNCATE ingredient_ancestors;
+
+INSERT INTO ingredient_ancestors (ancestor_id, descendant_id, depth)
+SELECT path_ids.id, i.id, path_ids.total - path_ids.ord
+FROM ingredients i
+CROSS JOIN LATERAL (
+    SELECT ids.id, ids.ord, COUNT(*) OVER () AS total
+    FROM unnest(string_to_array(trim(both '/' from i.path), '/')::int[])
+        WITH ORDINALITY AS ids(id, ord)
+) path_ids
+JOIN ingredients a ON a.id = path_ids.id;
+
+INSERT INTO ingredient_ancestors (ancestor_id, descendant_id, depth)
+SELECT id, id, 0 FROM ingredients
+ON CONFLICT (ancestor_id, descendant_id) DO NOTHING;
+
+ANALYZE ingredient_ancestors;
+
+COMMIT;
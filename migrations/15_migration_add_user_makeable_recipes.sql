@@ -0,0 +1,99 @@
+-- Migration: Add user_makeable_recipes materialized inventory matches
+-- Inventory-filtered recipe search used to evaluate the substitution rules for
+-- every recipe on every request. The API now keeps the (user, recipe) pairs a
+-- user can make in this table and refreshes them on inventory, recipe and
+-- ingredient hierarchy/substitution changes, so the search filter becomes an
+-- indexed semi-join.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS user_makeable_recipes (
+    cognito_user_id TEXT NOT NULL,
+    recipe_id INTEGER NOT NULL REFERENCES recipes(id) ON DELETE CASCADE,
+    PRIMARY KEY (cognito_user_id, recipe_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_user_makeable_recipes_recipe_id
+    ON user_makeable_recipes(recipe_id);
+
+-- Backfill for every user with an inventory (same rules as
+-- INGREDIENT_SUBSTITUTION_MATCH in api/db/sql_queries.py)
+TRUNCATE user_makeable_recipes;
+
+INSERT INTO user_makeable_recipes (cognito_user_id, recipe_id)
+WITH satisfied AS (
+    SELECT DISTINCT ui.cognito_user_id, i_recipe.id AS ingredient_id
+    FROM user_ingredients ui
+    JOIN ingredients i_user ON ui.ingredient_id = i_user.id
+    JOIN ingredients i_recipe ON (
+        -- Direct match
+        i_user.id = i_recipe.id
+        OR
+        -- Recipe allows substitution AND user ingredient can substitute
+        (i_recipe.allow_substitution = TRUE AND (
+            -- User has ancestor of recipe ingredient (user has "Rum", recipe needs "Wray And Nephew")
+            -- BUT: no blocking parents in between (e.g., "Pot Still Unaged Rum" with allow_sub=false)
+            (EXISTS (
+                 SELECT 1 FROM ingredient_ancestors user_anc
+                 WHERE user_anc.ancestor_id = i_user.id
+                 AND user_anc.descendant_id = i_recipe.id
+             )
+             AND NOT EXISTS (
+                 SELECT 1
+                 FROM ingredient_ancestors below_user
+                 JOIN ingredient_ancestors above_recipe
+                   ON above_recipe.ancestor_id = below_user.descendant_id
+                 JOIN ingredients blocking ON blocking.id = below_user.descendant_id
+                 WHERE below_user.ancestor_id = i_user.id          -- blocking is descendant of user ingredient
+                 AND above_recipe.descendant_id = i_recipe.id      -- blocking is ancestor of recipe ingredient
+                 AND blocking.id != i_user.id                      -- not the user ingredient itself
+                 AND blocking.allow_substitution = FALSE           -- blocks substitution
+             ))
+            OR
+            -- Sibling match: same parent, both allow substitution
+            (i_recipe.parent_id = i_user.parent_id
+             AND i_recipe.parent_id IS NOT NULL
+             AND i_user.allow_substitution = TRUE)
+            OR
+            -- User has parent of recipe ingredient
+            (i_user.id = i_recipe.parent_id)
+            OR
+            -- Recursive: user has common ancestor with recipe ingredient
+            EXISTS (
+                SELECT 1
+                FROM ingredient_ancestors user_up
+                JOIN ingredient_ancestors recipe_up
+                  ON recipe_up.ancestor_id = user_up.ancestor_id
+                JOIN ingredients anc ON anc.id = user_up.ancestor_id
+                WHERE user_up.descendant_id = i_user.id
+                AND recipe_up.descendant_id = i_recipe.id
+                AND anc.allow_substitution = TRUE
+                AND LENGTH(anc.path) - LENGTH(REPLACE(anc.path, '/', '')) <= 6
+                -- Ensure no blocking parents between common ancestor and recipe ingredient
+                AND NOT EXISTS (
+                    SELECT 1
+                    FROM ingredient_ancestors below_anc
+                    JOIN ingredient_ancestors above_recipe
+                      ON above_recipe.ancestor_id = below_anc.descendant_id
+                    JOIN ingredients blocking ON blocking.id = below_anc.descendant_id
+                    WHERE below_anc.ancestor_id = anc.id
+                    AND above_recipe.descendant_id = i_recipe.id
+                    AND blocking.id != anc.id
+                    AND blocking.allow_substitution = FALSE
+                )
+            )
+        ))
+    )
+    WHERE i_recipe.id IN (SELECT ingredient_id FROM recipe_ingredients)
+)
+SELECT s.cognito_user_id, ri.recipe_id
+FROM recipe_ingredients ri
+JOIN satisfied s ON s.ingredient_id = ri.ingredient_id
+GROUP BY s.cognito_user_id, ri.recipe_id
+HAVING COUNT(*) = (
+    SELECT COUNT(*) FROM recipe_ingredients ri_all WHERE ri_all.recipe_id = ri.recipe_id
+);
+
+ANALYZE user_makeable_recipes;
+
+COMMIT;
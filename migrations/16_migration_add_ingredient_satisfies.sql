@@ -0,0 +1,151 @@
+-- Migration: Add ingredient_satisfies substitution graph
+-- Materializes INGREDIENT_SUBSTITUTION_MATCH as (user_ingredient_id,
+-- recipe_ingredient_id) pairs so inventory matching and ingredient
+-- recommendations join a table instead of re-evaluating the rules. Triggers
+-- on ingredients recompute the affected subtree when allow_substitution,
+-- parent_id or path change.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS ingredient_satisfies (
+    user_ingredient_id INTEGER NOT NULL REFERENCES ingredients(id) ON DELETE CASCADE,
+    recipe_ingredient_id INTEGER NOT NULL REFERENCES ingredients(id) ON DELETE CASCADE,
+    PRIMARY KEY (user_ingredient_id, recipe_ingredient_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingredient_satisfies_recipe
+    ON ingredient_satisfies(recipe_ingredient_id, user_ingredient_id);
+
+-- Function to recompute ingredient_satisfies rows involving the given
+-- ingredients or their descendants. Substitution depends on the flags and
+-- paths of every ancestor of the recipe ingredient, so a change to an
+-- ingredient can only affect pairs whose user or recipe side is in its subtree.
+CREATE OR REPLACE FUNCTION refresh_ingredient_satisfies(changed_ids INTEGER[])
+RETURNS VOID AS $$
+DECLARE
+    affected INTEGER[];
+BEGIN
+    SELECT ARRAY(
+        SELECT descendant_id FROM ingredient_ancestors WHERE ancestor_id = ANY(changed_ids)
+        UNION
+        SELECT unnest(changed_ids)
+    ) INTO affected;
+
+    DELETE FROM ingredient_satisfies
+    WHERE user_ingredient_id = ANY(affected) OR recipe_ingredient_id = ANY(affected);
+
+    INSERT INTO ingredient_satisfies (user_ingredient_id, recipe_ingredient_id)
+    SELECT i_user.id, i_recipe.id
+    FROM ingredients i_user
+    JOIN ingredients i_recipe ON (
+        -- Direct match
+        i_user.id = i_recipe.id
+        OR
+        -- Recipe allows substitution AND user ingredient can substitute
+        (i_recipe.allow_substitution = TRUE AND (
+            -- User has ancestor of recipe ingredient (user has "Rum", recipe needs "Wray And Nephew")
+            -- BUT: no blocking parents in between (e.g., "Pot Still Unaged Rum" with allow_sub=false)
+            (EXISTS (
+                 SELECT 1 FROM ingredient_ancestors user_anc
+                 WHERE user_anc.ancestor_id = i_user.id
+                 AND user_anc.descendant_id = i_recipe.id
+             )
+             AND NOT EXISTS (
+                 SELECT 1
+                 FROM ingredient_ancestors below_user
+                 JOIN ingredient_ancestors above_recipe
+                   ON above_recipe.ancestor_id = below_user.descendant_id
+                 JOIN ingredients blocking ON blocking.id = below_user.descendant_id
+                 WHERE below_user.ancestor_id = i_user.id          -- blocking is descendant of user ingredient
+                 AND above_recipe.descendant_id = i_recipe.id      -- blocking is ancestor of recipe ingredient
+                 AND blocking.id != i_user.id                      -- not the user ingredient itself
+                 AND blocking.allow_substitution = FALSE           -- blocks substitution
+             ))
+            OR
+            -- Sibling match: same parent, both allow substitution
+            (i_recipe.parent_id = i_user.parent_id
+             AND i_recipe.parent_id IS NOT NULL
+             AND i_user.allow_substitution = TRUE)
+            OR
+            -- User has parent of recipe ingredient
+            (i_user.id = i_recipe.parent_id)
+            OR
+            -- Recursive: user has common ancestor with recipe ingredient
+            EXISTS (
+                SELECT 1
+                FROM ingredient_ancestors user_up
+                JOIN ingredient_ancestors recipe_up
+                  ON recipe_up.ancestor_id = user_up.ancestor_id
+                JOIN ingredients anc ON anc.id = user_up.ancestor_id
+                WHERE user_up.descendant_id = i_user.id
+                AND recipe_up.descendant_id = i_recipe.id
+                AND anc.allow_substitution = TRUE
+                AND LENGTH(anc.path) - LENGTH(REPLACE(anc.path, '/', '')) <= 6
+                -- Ensure no blocking parents between common ancestor and recipe ingredient
+                AND NOT EXISTS (
+                    SELECT 1
+                    FROM ingredient_ancestors below_anc
+                    JOIN ingredient_ancestors above_recipe
+                      ON above_recipe.ancestor_id = below_anc.descendant_id
+                    JOIN ingredients blocking ON blocking.id = below_anc.descendant_id
+                    WHERE below_anc.ancestor_id = anc.id
+                    AND above_recipe.descendant_id = i_recipe.id
+                    AND blocking.id != anc.id
+                    AND blocking.allow_substitution = FALSE
+                )
+            )
+        ))
+    )
+    WHERE i_user.id = ANY(affected) OR i_recipe.id = ANY(affected);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION sync_ingredient_satisfies_insert()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM refresh_ingredient_satisfies(ARRAY(SELECT id FROM new_rows));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION sync_ingredient_satisfies_update()
+RETURNS TRIGGER AS $$
+DECLARE
+    changed_ids INTEGER[];
+BEGIN
+    SELECT ARRAY(
+        SELECT new_rows.id
+        FROM new_rows
+        JOIN old_rows ON old_rows.id = new_rows.id
+        WHERE new_rows.allow_substitution IS DISTINCT FROM old_rows.allow_substitution
+        OR new_rows.parent_id IS DISTINCT FROM old_rows.parent_id
+        OR new_rows.path IS DISTINCT FROM old_rows.path
+    ) INTO changed_ids;
+
+    IF cardinality(changed_ids) > 0 THEN
+        PERFORM refresh_ingredient_satisfies(changed_ids);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS ingredient_satisfies_insert ON ingredients;
+CREATE TRIGGER ingredient_satisfies_insert
+AFTER INSERT ON ingredients
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION sync_ingredient_satisfies_insert();
+
+DROP TRIGGER IF EXISTS ingredient_satisfies_update ON ingredients;
+CREATE TRIGGER ingredient_satisfies_update
+AFTER UPDATE ON ingredients
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION sync_ingredient_satisfies_update();
+
+-- Backfill every pair
+SELECT refresh_ingredient_satisfies(ARRAY(SELECT id FROM ingredients));
+
+ANALYZE ingredient_satisfies;
+
+COMMIT;
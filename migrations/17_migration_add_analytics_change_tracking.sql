@@ -0,0 +1,148 @@
+-- Migration: Per-table change tracking for incremental analytics refresh
+-- Replaces the single "something changed" signal with a version counter per
+-- analytics input table, bumped in the writing transaction, and records the
+-- input versions each analytics artifact was last built from, so the refresh
+-- only rebuilds artifacts whose inputs moved. Updates only count when a
+-- column the analytics read changes: rating writes (which update
+-- recipes.avg_rating) and tag edits no longer mark anything dirty.
+-- analytics_refresh_state.dirty_at is still set for the debounce timer.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS analytics_table_versions (
+    table_name TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    changed_at TIMESTAMP
+);
+
+INSERT INTO analytics_table_versions (table_name, version, changed_at)
+VALUES
+    ('recipes', 1, CURRENT_TIMESTAMP),
+    ('ingredients', 1, CURRENT_TIMESTAMP),
+    ('recipe_ingredients', 1, CURRENT_TIMESTAMP),
+    ('units', 1, CURRENT_TIMESTAMP)
+ON CONFLICT (table_name) DO NOTHING;
+
+-- Input versions each artifact was built from, written by the refresh
+CREATE TABLE IF NOT EXISTS analytics_artifact_state (
+    artifact TEXT PRIMARY KEY,
+    input_versions JSONB NOT NULL,
+    built_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION bump_analytics_table_version(changed_table TEXT)
+RETURNS VOID AS $$
+BEGIN
+    UPDATE analytics_table_versions
+    SET version = version + 1, changed_at = CURRENT_TIMESTAMP
+    WHERE table_name = changed_table;
+
+    UPDATE analytics_refresh_state
+    SET dirty_at = CURRENT_TIMESTAMP
+    WHERE id = 1;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION mark_analytics_dirty()
+RETURNS trigger AS $$
+BEGIN
+    PERFORM bump_analytics_table_version(TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Update triggers only bump the version when a column the analytics read
+-- changed in at least one row
+CREATE OR REPLACE FUNCTION mark_analytics_dirty_recipes_update()
+RETURNS trigger AS $$
+BEGIN
+    IF EXISTS (
+        SELECT 1
+        FROM new_rows
+        JOIN old_rows ON old_rows.id = new_rows.id
+        WHERE new_rows.name IS DISTINCT FROM old_rows.name
+    ) THEN
+        PERFORM bump_analytics_table_version(TG_TABLE_NAME);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION mark_analytics_dirty_ingredients_update()
+RETURNS trigger AS $$
+BEGIN
+    IF EXISTS (
+        SELECT 1
+        FROM new_rows
+        JOIN old_rows ON old_rows.id = new_rows.id
+        WHERE new_rows.name IS DISTINCT FROM old_rows.name
+        OR new_rows.parent_id IS DISTINCT FROM old_rows.parent_id
+        OR new_rows.path IS DISTINCT FROM old_rows.path
+        OR new_rows.allow_substitution IS DISTINCT FROM old_rows.allow_substitution
+    ) THEN
+        PERFORM bump_analytics_table_version(TG_TABLE_NAME);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION mark_analytics_dirty_units_update()
+RETURNS trigger AS $$
+BEGIN
+    IF EXISTS (
+        SELECT 1
+        FROM new_rows
+        JOIN old_rows ON old_rows.id = new_rows.id
+        WHERE new_rows.name IS DISTINCT FROM old_rows.name
+        OR new_rows.conversion_to_ml IS DISTINCT FROM old_rows.conversion_to_ml
+    ) THEN
+        PERFORM bump_analytics_table_version(TG_TABLE_NAME);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS analytics_recipes_dirty ON recipes;
+CREATE TRIGGER analytics_recipes_dirty
+AFTER INSERT OR DELETE ON recipes
+FOR EACH STATEMENT EXECUTE FUNCTION mark_analytics_dirty();
+
+DROP TRIGGER IF EXISTS analytics_recipes_dirty_update ON recipes;
+CREATE TRIGGER analytics_recipes_dirty_update
+AFTER UPDATE ON recipes
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION mark_analytics_dirty_recipes_update();
+
+DROP TRIGGER IF EXISTS analytics_ingredients_dirty ON ingredients;
+CREATE TRIGGER analytics_ingredients_dirty
+AFTER INSERT OR DELETE ON ingredients
+FOR EACH STATEMENT EXECUTE FUNCTION mark_analytics_dirty();
+
+DROP TRIGGER IF EXISTS analytics_ingredients_dirty_update ON ingredients;
+CREATE TRIGGER analytics_ingredients_dirty_update
+AFTER UPDATE ON ingredients
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION mark_analytics_dirty_ingredients_update();
+
+DROP TRIGGER IF EXISTS analytics_recipe_ingredients_dirty ON recipe_ingredients;
+CREATE TRIGGER analytics_recipe_ingredients_dirty
+AFTER INSERT OR UPDATE OR DELETE ON recipe_ingredients
+FOR EACH STATEMENT EXECUTE FUNCTION mark_analytics_dirty();
+
+DROP TRIGGER IF EXISTS analytics_units_dirty ON units;
+CREATE TRIGGER analytics_units_dirty
+AFTER INSERT OR DELETE ON units
+FOR EACH STATEMENT EXECUTE FUNCTION mark_analytics_dirty();
+
+DROP TRIGGER IF EXISTS analytics_units_dirty_update ON units;
+CREATE TRIGGER analytics_units_dirty_update
+AFTER UPDATE ON units
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION mark_analytics_dirty_units_update();
+
+-- No analytics artifact reads ratings or tags
+DROP TRIGGER IF EXISTS analytics_ratings_dirty ON ratings;
+DROP TRIGGER IF EXISTS analytics_tags_dirty ON tags;
+DROP TRIGGER IF EXISTS analytics_recipe_tags_dirty ON recipe_tags;
+
+COMMIT;
@@ -0,0 +1,10 @@
+-- Rollback: Remove ingredient_ancestors closure table
+
+BEGIN;
+
+DROP TRIGGER IF EXISTS ingredient_ancestors_insert ON ingredients;
+DROP TRIGGER IF EXISTS ingredient_ancestors_update ON ingredients;
+DROP FUNCTION IF EXISTS sync_ingredient_ancestors();
+DROP TABLE IF EXISTS ingredient_ancestors;
+
+COMMIT;
@@ -0,0 +1,7 @@
+-- Rollback: Remove user_makeable_recipes
+
+BEGIN;
+
+DROP TABLE IF EXISTS user_makeable_recipes;
+
+COMMIT;
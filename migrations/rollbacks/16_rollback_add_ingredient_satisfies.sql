@@ -0,0 +1,12 @@
+-- Rollback: Remove ingredient_satisfies substitution graph
+
+BEGIN;
+
+DROP TRIGGER IF EXISTS ingredient_satisfies_insert ON ingredients;
+DROP TRIGGER IF EXISTS ingredient_satisfies_update ON ingredients;
+DROP FUNCTION IF EXISTS sync_ingredient_satisfies_insert();
+DROP FUNCTION IF EXISTS sync_ingredient_satisfies_update();
+DROP FUNCTION IF EXISTS refresh_ingredient_satisfies(INTEGER[]);
+DROP TABLE IF EXISTS ingredient_satisfies;
+
+COMMIT;
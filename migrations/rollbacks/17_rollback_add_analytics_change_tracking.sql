@@ -0,0 +1,58 @@
+-- Rollback: Remove per-table analytics change tracking
+-- Restores the migration 09 triggers, which mark analytics dirty on any write.
+
+BEGIN;
+
+DROP TRIGGER IF EXISTS analytics_recipes_dirty_update ON recipes;
+DROP TRIGGER IF EXISTS analytics_ingredients_dirty_update ON ingredients;
+DROP TRIGGER IF EXISTS analytics_units_dirty_update ON units;
+DROP FUNCTION IF EXISTS mark_analytics_dirty_recipes_update();
+DROP FUNCTION IF EXISTS mark_analytics_dirty_ingredients_update();
+DROP FUNCTION IF EXISTS mark_analytics_dirty_units_update();
+
+CREATE OR REPLACE FUNCTION mark_analytics_dirty()
+RETURNS trigger AS $$
+BEGIN
+    UPDATE analytics_refresh_state
+    SET dirty_at = CURRENT_TIMESTAMP
+    WHERE id = 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP FUNCTION IF EXISTS bump_analytics_table_version(TEXT);
+
+DROP TRIGGER IF EXISTS analytics_recipes_dirty ON recipes;
+CREATE TRIGGER analytics_recipes_dirty
+AFTER INSERT OR UPDATE OR DELETE ON recipes
+FOR EACH STATEMENT EXECUTE FUNCTION mark_analytics_dirty();
+
+DROP TRIGGER IF EXISTS analytics_ingredients_dirty ON ingredients;
+CREATE TRIGGER analytics_ingredients_dirty
+AFTER INSERT OR UPDATE OR DELETE ON ingredients
+FOR EACH STATEMENT EXECUTE FUNCTION mark_analytics_dirty();
+
+DROP TRIGGER IF EXISTS analytics_units_dirty ON units;
+CREATE TRIGGER analytics_units_dirty
+AFTER INSERT OR UPDATE OR DELETE ON units
+FOR EACH STATEMENT EXECUTE FUNCTION mark_analytics_dirty();
+
+DROP TRIGGER IF EXISTS analytics_ratings_dirty ON ratings;
+CREATE TRIGGER analytics_ratings_dirty
+AFTER INSERT OR UPDATE OR DELETE ON ratings
+FOR EACH STATEMENT EXECUTE FUNCTION mark_analytics_dirty();
+
+DROP TRIGGER IF EXISTS analytics_tags_dirty ON tags;
+CREATE TRIGGER analytics_tags_dirty
+AFTER INSERT OR UPDATE OR DELETE ON tags
+FOR EACH STATEMENT EXECUTE FUNCTION mark_analytics_dirty();
+
+DROP TRIGGER IF EXISTS analytics_recipe_tags_dirty ON recipe_tags;
+CREATE TRIGGER analytics_recipe_tags_dirty
+AFTER INSERT OR UPDATE OR DELETE ON recipe_tags
+FOR EACH STATEMENT EXECUTE FUNCTION mark_analytics_dirty();
+
+DROP TABLE IF EXISTS analytics_artifact_state;
+DROP TABLE IF EXISTS analytics_table_versions;
+
+COMMIT;
@@ -14,6 +14,8 @@ from barcart.distance import (
     build_recipe_volume_matrix,
     compute_emd,
     compute_umap_embedding,
+    cost_submatrix_change,
+    emd_batch,
     emd_candidates,
     emd_matrix,
     emd_matrix_constrained,
@@ -21,26 +23,35 @@ from barcart.distance import (
     knn_matrix,
     m_step_blosum,
     manhattan_candidates,
+    manhattan_knn_graph,
     neighbor_weight_matrix,
     weighted_distance,
 )
-from barcart.em_learner import em_fit
+from barcart.distance_matrix import CondensedDistanceMatrix, KnnDistanceGraph
+from barcart.em_learner import em_fit, em_refit
 from barcart.registry import Registry
 from barcart.reporting import report_neighbors
 from barcart.rollup import create_rollup_mapping, apply_rollup_to_recipes
+from barcart.transport_plan import TransportPlans
 
 __all__ = [
     # Core types
     "Registry",
+    "CondensedDistanceMatrix",
+    "KnnDistanceGraph",
+    "TransportPlans",
     # Tree building
     "build_ingredient_tree",
     # Distance computations
     "weighted_distance",
     "build_ingredient_distance_matrix",
     "compute_umap_embedding",
+    "manhattan_knn_graph",
     # Recipe analysis
     "build_recipe_volume_matrix",
     "compute_emd",
+    "cost_submatrix_change",
+    "emd_batch",
     "emd_matrix",
     "emd_matrix_constrained",
     # Candidate selection for constrained EM
@@ -54,6 +65,7 @@ __all__ = [
     "expected_ingredient_match_matrix",
     "m_step_blosum",
     "em_fit",
+    "em_refit",
     "build_index_to_id",
     # Rollup functionality
     "create_rollup_mapping",
@@ -1,4 +1,5 @@
 import math
+from collections.abc import Iterable
 from typing import Any
 
 import numpy as np
@@ -6,7 +7,14 @@ import ot
 import pandas as pd
 from tqdm.auto import tqdm
 
+from barcart.distance_matrix import (
+    CondensedDistanceMatrix,
+    KnnDistanceGraph,
+    _knn_by_row_blocks,
+    iter_distance_row_blocks,
+)
 from barcart.registry import Registry
+from barcart.transport_plan import TransportPlans
 
 
 def build_ingredient_tree(
@@ -198,10 +206,73 @@ def weighted_distance(
     )
 
 
+# Pairs compared per block when filling tree distance matrices (bounds temporaries)
+_TREE_DISTANCE_BLOCK_ELEMENTS = 1 << 22
+
+
+def _ancestor_table(
+    node_ids: list[str],
+    parent_map: dict[str, tuple[str | None, float]],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Index the root-to-node ancestor chain of every node for vectorized LCA queries.
+
+    Parameters
+    ----------
+    node_ids : list of str
+        Nodes to index, in output row order.
+    parent_map : dict of str to tuple (str or None, float)
+        Parent map as produced by `build_ingredient_tree`. A parent missing from
+        the map is treated as a root, as in `weighted_distance`.
+
+    Returns
+    -------
+    ancestors : np.ndarray
+        Integer array of shape (n, max_depth + 1); entry [i, d] identifies the
+        ancestor of node i at depth d (0 is its root, the last non-negative
+        entry is node i itself) and -1 pads shorter chains.
+    ancestor_dist : np.ndarray
+        Float64 array of the same shape: weighted distance from the root to
+        ``ancestors[i, d]``.
+    root_dist : np.ndarray
+        Float64 array of shape (n,): weighted distance from each node to its root.
+    """
+    chains: dict[str, list[str]] = {}
+    dists: dict[str, list[float]] = {}
+
+    for node in node_ids:
+        # Walk up to the first node whose chain is known (or to a root)
+        pending = []
+        cur: str | None = node
+        while cur is not None and cur not in chains:
+            pending.append(cur)
+            cur = parent_map.get(cur, (None, 0.0))[0]
+        # Unwind from the top, extending the parent's chain by one edge
+        for nid in reversed(pending):
+            parent, weight = parent_map.get(nid, (None, 0.0))
+            if parent is None:
+                chains[nid], dists[nid] = [nid], [0.0]
+            else:
+                chains[nid] = chains[parent] + [nid]
+                dists[nid] = dists[parent] + [dists[parent][-1] + weight]
+
+    codes = {nid: code for code, nid in enumerate(chains)}
+    max_len = max((len(chains[nid]) for nid in node_ids), default=1)
+    ancestors = np.full((len(node_ids), max_len), -1, dtype=np.int64)
+    ancestor_dist = np.zeros((len(node_ids), max_len), dtype=np.float64)
+    for i, nid in enumerate(node_ids):
+        chain = chains[nid]
+        ancestors[i, : len(chain)] = [codes[a] for a in chain]
+        ancestor_dist[i, : len(chain)] = dists[nid]
+    root_dist = np.array([dists[nid][-1] for nid in node_ids], dtype=np.float64)
+    return ancestors, ancestor_dist, root_dist
+
+
 def build_ingredient_distance_matrix(
     parent_map: dict[str, tuple[str | None, float]],
     id_to_name: dict[str | int, str],
     root_id: str = "root",
+    dtype: np.dtype | type = float,
 ) -> tuple[np.ndarray, "Registry"]:
     """
     Build a pairwise distance matrix and ingredient registry together.
@@ -222,6 +293,8 @@ def build_ingredient_distance_matrix(
     root_id : str, default "root"
         ID of the root node to exclude from the matrix. Should match the root_id
         used in build_ingredient_tree.
+    dtype : np.dtype or type, default float
+        Data type of the returned matrix (e.g. ``np.float32`` for EM cost matrices).
 
     Returns
     -------
@@ -231,9 +304,19 @@ def build_ingredient_distance_matrix(
     registry : Registry
         Metadata for the n ingredients (excluding root), guaranteed to match matrix dimensions.
 
+    Raises
+    ------
+    KeyError
+        If two ingredients do not share a common ancestor.
+
     Notes
     -----
-    The function relies on `weighted_distance` to compute tree distances.
+    Distances equal `weighted_distance` but are computed from root distances and
+    lowest common ancestors: d(i, j) = r(i) + r(j) - 2 r(lca(i, j)), where r is
+    the weighted distance to the root. Each node's root-to-node ancestor chain is
+    indexed once; the LCA of every pair is then found by comparing chains level
+    by level with NumPy broadcasting, in row blocks, in O(n^2 * depth) vectorized
+    work instead of a Python loop over pairs.
     The registry is built from the same ingredient ordering as the matrix.
     The root node is excluded as it's an implicit structural element, not an ingredient.
     """
@@ -253,14 +336,36 @@ def build_ingredient_distance_matrix(
     ]
     registry = Registry(ingredients)
 
-    # Build distance matrix
-    distance_matrix = np.zeros((len(ingredient_ids), len(ingredient_ids)))
-    for i in range(len(ingredient_ids)):
-        for j in range(i + 1, len(ingredient_ids)):
-            distance_matrix[i, j] = weighted_distance(
-                ingredient_ids[i], ingredient_ids[j], parent_map
+    n = len(ingredient_ids)
+    distance_matrix = np.zeros((n, n), dtype=dtype)
+    if n == 0:
+        return distance_matrix, registry
+
+    ancestors, ancestor_dist, root_dist = _ancestor_table(ingredient_ids, parent_map)
+    roots = np.unique(ancestors[:, 0])
+    if len(roots) > 1:
+        first = int(np.flatnonzero(ancestors[:, 0] == roots[0])[0])
+        other = int(np.flatnonzero(ancestors[:, 0] == roots[1])[0])
+        raise KeyError(
+            "Nodes do not share a common ancestor (is it a tree?). "
+            f"u={ingredient_ids[first]}, v={ingredient_ids[other]}"
+        )
+
+    block = max(1, _TREE_DISTANCE_BLOCK_ELEMENTS // n)
+    for start in range(0, n, block):
+        rows = slice(start, min(start + block, n))
+        # Root distance of the deepest shared ancestor; chains share a prefix,
+        # so later (deeper) matches overwrite earlier ones
+        lca_dist = np.zeros((rows.stop - rows.start, n), dtype=np.float64)
+        for level in range(1, ancestors.shape[1]):
+            row_anc = ancestors[rows, level]
+            shared = (row_anc[:, None] == ancestors[None, :, level]) & (row_anc[:, None] >= 0)
+            np.copyto(
+                lca_dist,
+                np.broadcast_to(ancestor_dist[rows, level, None], lca_dist.shape),
+                where=shared,
             )
-            distance_matrix[j, i] = distance_matrix[i, j]
+        distance_matrix[rows] = root_dist[rows, None] + root_dist[None, :] - 2.0 * lca_dist
     return distance_matrix, registry
 
 
@@ -332,11 +437,14 @@ def build_recipe_volume_matrix(
     recipe_id_to_index = {str(rid): i for i, rid in enumerate(recipe_ids)}
 
     # Extract recipe names (take first occurrence per recipe ID)
-    recipe_names = {}
-    for _, row in recipes_df[[recipe_id_col, recipe_name_col]].iterrows():
-        rid = str(row[recipe_id_col])
-        if rid not in recipe_names:
-            recipe_names[rid] = str(row[recipe_name_col])
+    first_rows = recipes_df.drop_duplicates(recipe_id_col)
+    recipe_names = dict(
+        zip(
+            first_rows[recipe_id_col].astype(str),
+            first_rows[recipe_name_col].astype(str),
+            strict=True,
+        )
+    )
 
     # Construct Registry
     recipes = [
@@ -345,19 +453,20 @@ def build_recipe_volume_matrix(
     ]
     recipe_registry = Registry(recipes)
 
+    # Matrix coordinates of every row, looked up column-wise
+    row_idx = recipes_df[recipe_id_col].astype(str).map(recipe_id_to_index).to_numpy()
+    ingredient_keys = recipes_df[ingredient_id_col].astype(str)
+    col_idx = ingredient_keys.map(ingredient_registry.to_id_to_index())
+    if col_idx.isna().any():
+        missing = ingredient_keys[col_idx.isna()].iloc[0]
+        raise KeyError(f"Entity ID '{missing}' not found in registry")
+    col_idx = col_idx.to_numpy(dtype=np.int64)
+    data = recipes_df[volume_col].to_numpy(dtype=np.float64)
+
     # Build volume matrix
     if sparse:
         from scipy import sparse as sp
 
-        row_idx = []
-        col_idx = []
-        data = []
-        for _, row in recipes_df.iterrows():
-            row_idx.append(recipe_id_to_index[str(row[recipe_id_col])])
-            col_idx.append(
-                ingredient_registry.get_index(id=str(row[ingredient_id_col]))
-            )
-            data.append(float(row[volume_col]))
         volume_matrix = sp.coo_matrix(
             (data, (row_idx, col_idx)),
             shape=(len(recipe_registry), len(ingredient_registry)),
@@ -368,12 +477,8 @@ def build_recipe_volume_matrix(
         volume_matrix = np.zeros(
             (len(recipe_registry), len(ingredient_registry)), dtype=dtype
         )
-        for _, row in recipes_df.iterrows():
-            recipe_index = recipe_id_to_index[str(row[recipe_id_col])]
-            ingredient_index = ingredient_registry.get_index(
-                id=str(row[ingredient_id_col])
-            )
-            volume_matrix[recipe_index, ingredient_index] = float(row[volume_col])
+        # Later rows win for duplicate entries, as with row-by-row assignment
+        volume_matrix[row_idx, col_idx] = data
 
     # Check that all rows of volume_matrix sum to 1 within numerical error
     row_sums = volume_matrix.sum(axis=1)
@@ -399,7 +504,7 @@ def compute_emd(
     return_plan: bool = False,
     support_idx: np.ndarray | None = None,
     num_threads: int | str = 1,
-) -> float | tuple[float, list[tuple[int, int, float, float]]]:
+) -> float | tuple[float, tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
     """
     Compute the Earth Mover's Distance (EMD) between two distributions a and b.
 
@@ -412,7 +517,7 @@ def compute_emd(
     cost_matrix : np.ndarray
         Cost matrix, shape (n, n)
     return_plan : bool, optional
-        If True, also return the transport plan as a list of flows, by default False.
+        If True, also return the transport plan as flow arrays, by default False.
     support_idx : np.ndarray | None, optional
         Indices of the support of the distributions, shape (n,), by default None.
     num_threads : int | str, optional
@@ -424,9 +529,10 @@ def compute_emd(
     -------
     distance : float
         The Earth Mover's Distance (total minimum cost) between the two distributions.
-    transport_plan : list[tuple[int, int, float, float]]
+    transport_plan : tuple of np.ndarray
         Only returned if return_plan is True.
-        Each tuple is (from_idx, to_idx, amount, cost):
+        Parallel arrays (from_idx, to_idx, amount, cost), one entry per flow,
+        in the same layout as `TransportPlans.get`:
             - from_idx: Index in source a
             - to_idx: Index in target b
             - amount: mass transported (typically between 0 and 1)
@@ -453,7 +559,35 @@ def compute_emd(
             support_idx = np.nonzero((a > 0) | (b > 0))[0]
 
     if support_idx.size == 0:
-        return 0.0 if not return_plan else (0.0, [])
+        empty_plan = (
+            np.empty(0, dtype=np.int64),
+            np.empty(0, dtype=np.int64),
+            np.empty(0, dtype=np.float64),
+            np.empty(0, dtype=np.float64),
+        )
+        return 0.0 if not return_plan else (0.0, empty_plan)
+
+    distance, flows = _solve_emd(
+        a, b, cost_matrix, support_idx, return_plan=return_plan, num_threads=num_threads
+    )
+    return (distance, flows) if return_plan else distance
+
+
+def _solve_emd(
+    a,
+    b,
+    cost_matrix: np.ndarray,
+    support_idx: np.ndarray,
+    return_plan: bool = False,
+    num_threads: int | str = 1,
+) -> tuple[float, tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray] | None]:
+    """
+    Solve one EMD problem restricted to a non-empty support.
+
+    Returns the distance and, if return_plan is True, the transport plan as
+    parallel arrays (from_idx, to_idx, amount, cost) in global ingredient indices.
+    """
+    from scipy import sparse as sp
 
     # Extract subsets and ensure float32 to reduce memory and match cost_matrix dtype
     target_dtype = cost_matrix.dtype
@@ -470,27 +604,16 @@ def compute_emd(
     if not return_plan:
         # Use ot.emd2 when only the objective value is needed (faster than full plan)
         distance = float(ot.emd2(a_sub, b_sub, cost_sub, numThreads=num_threads))
-        return distance
-    else:
-        transport_matrix = ot.emd(a_sub, b_sub, cost_sub, numThreads=num_threads)
-        distance = float(np.sum(transport_matrix * cost_sub))
-
-        # Vectorized extraction of sparse transport plan (much faster than Python loop)
-        rows, cols = np.nonzero(transport_matrix > 1e-10)
-        flows = transport_matrix[rows, cols]
-        flow_costs = flows * cost_sub[rows, cols]
-
-        # Map back to original indices and convert to list of tuples
-        transport_plan = list(
-            zip(
-                support_idx[rows].astype(int).tolist(),
-                support_idx[cols].astype(int).tolist(),
-                flows.astype(float).tolist(),
-                flow_costs.astype(float).tolist(),
-            )
-        )
+        return distance, None
+
+    transport_matrix = ot.emd(a_sub, b_sub, cost_sub, numThreads=num_threads)
+    distance = float(np.sum(transport_matrix * cost_sub))
 
-        return distance, transport_plan
+    # Vectorized extraction of sparse transport plan (much faster than Python loop)
+    rows, cols = np.nonzero(transport_matrix > 1e-10)
+    flows = transport_matrix[rows, cols]
+    flow_costs = flows * cost_sub[rows, cols]
+    return distance, (support_idx[rows], support_idx[cols], flows, flow_costs)
 
 
 def emd_matrix(
@@ -501,59 +624,60 @@ def emd_matrix(
     *,
     tqdm_cls: Any | None = None,
     tqdm_kwargs: dict[str, Any] | None = None,
-) -> np.ndarray:
+    condensed: bool = False,
+) -> (
+    np.ndarray
+    | CondensedDistanceMatrix
+    | tuple[np.ndarray | CondensedDistanceMatrix, TransportPlans]
+):
     """
     Compute the Earth Mover's Distance matrix between all recipes in the volume matrix.
 
-    If return_plans is True, also return a dict mapping (i, j) with i < j to the
-    sparse transport plan as a list of (from_idx, to_idx, amount, cost) in global
-    ingredient indices.
-    """
-    from scipy import sparse as sp
+    If return_plans is True, also return the sparse transport plans of all pairs
+    (i, j) with i < j as a TransportPlans store, in global ingredient indices.
 
+    If condensed is True, the distances are returned as a CondensedDistanceMatrix
+    (upper triangle only, half the memory of the dense n x n array).
+    """
     n_recipes = volume_matrix.shape[0]
     emd_dtype = cost_matrix.dtype
-    emd_matrix = np.zeros((n_recipes, n_recipes), dtype=emd_dtype)
+    if condensed:
+        emd_matrix = CondensedDistanceMatrix(n_recipes, dtype=emd_dtype)
+    else:
+        emd_matrix = np.zeros((n_recipes, n_recipes), dtype=emd_dtype)
 
-    is_sparse = sp.issparse(volume_matrix)
+    # Extract supports once; each row i is then solved as one emd_batch over (i, j > i)
+    supports = _padded_supports(volume_matrix)
+    plan_chunks: list[tuple[np.ndarray, tuple[np.ndarray, ...]]] = []
 
-    # Precompute supports for each recipe to avoid repeated nonzero scans
-    if is_sparse:
-        supports = [volume_matrix.getrow(i).indices for i in range(n_recipes)]
-    else:
-        supports = [np.nonzero(volume_matrix[i] > 0)[0] for i in range(n_recipes)]
+    def _row_distances(i: int):
+        row_pairs = np.column_stack(
+            [np.full(n_recipes - i - 1, i), np.arange(i + 1, n_recipes)]
+        )
+        distances, flows = _emd_batch_from_supports(
+            supports, cost_matrix, row_pairs, return_plans
+        )
+        return i, row_pairs, distances, flows
+
+    def _store_row(i: int, row_pairs: np.ndarray, distances: np.ndarray, flows) -> None:
+        distances = distances.astype(emd_dtype, copy=False)
+        if condensed:
+            start = emd_matrix._offset(i)
+            emd_matrix.data[start : start + len(distances)] = distances
+        else:
+            emd_matrix[i, i + 1 :] = distances
+            emd_matrix[i + 1 :, i] = distances
+        if return_plans:
+            plan_chunks.append((row_pairs, flows))
 
     if n_jobs == 1:
-        plans = {} if return_plans else None
         _tqdm = tqdm_cls if tqdm_cls is not None else tqdm
         _tk = {"desc": "Computing EMD matrix"}
         if tqdm_kwargs:
             _tk.update(tqdm_kwargs)
         for i in _tqdm(range(n_recipes), **_tk):
-            for j in range(i + 1, n_recipes):
-                union_idx = np.union1d(supports[i], supports[j])
-                row_i = volume_matrix.getrow(i) if is_sparse else volume_matrix[i]
-                row_j = volume_matrix.getrow(j) if is_sparse else volume_matrix[j]
-                if return_plans:
-                    distance, plan = compute_emd(
-                        row_i,
-                        row_j,
-                        cost_matrix,
-                        return_plan=True,
-                        support_idx=union_idx,
-                    )
-                    plans[(i, j)] = plan
-                else:
-                    distance = compute_emd(
-                        row_i,
-                        row_j,
-                        cost_matrix,
-                        return_plan=False,
-                        support_idx=union_idx,
-                    )
-                emd_matrix[i, j] = emd_dtype.type(distance)
-                emd_matrix[j, i] = emd_dtype.type(distance)
-        return (emd_matrix, plans) if return_plans else emd_matrix
+            _store_row(*_row_distances(i))
+        return (emd_matrix, _plans_from_chunks(plan_chunks)) if return_plans else emd_matrix
 
     # Parallel path (shared memory threads to avoid copying large matrices)
     from joblib import Parallel, delayed
@@ -567,100 +691,186 @@ def emd_matrix(
         f"Computing EMD matrix: {n_recipes} recipes ({n_pairs} pairs) with n_jobs={n_jobs}"
     )
 
-    pairs: list[tuple[int, int]] = [
-        (i, j) for i in range(n_recipes) for j in range(i + 1, n_recipes)
-    ]
-
-    def _pair_distance_or_plan(i: int, j: int):
-        union_idx = np.union1d(supports[i], supports[j])
-        row_i = volume_matrix.getrow(i) if is_sparse else volume_matrix[i]
-        row_j = volume_matrix.getrow(j) if is_sparse else volume_matrix[j]
-        if return_plans:
-            d, plan = compute_emd(
-                row_i,
-                row_j,
-                cost_matrix,
-                return_plan=True,
-                support_idx=union_idx,
-            )
-            return i, j, float(d), plan
-        else:
-            d = compute_emd(
-                row_i,
-                row_j,
-                cost_matrix,
-                return_plan=False,
-                support_idx=union_idx,
-            )
-            return i, j, float(d)
-
     results = Parallel(n_jobs=n_jobs, prefer="threads", require="sharedmem")(
-        delayed(_pair_distance_or_plan)(i, j) for (i, j) in pairs
+        delayed(_row_distances)(i) for i in range(n_recipes)
     )
-    plans = {} if return_plans else None
     for item in results:
-        if return_plans:
-            i, j, d, plan = item
-            plans[(i, j)] = plan
-        else:
-            i, j, d = item
-        emd_matrix[i, j] = emd_dtype.type(d)
-        emd_matrix[j, i] = emd_dtype.type(d)
-    return (emd_matrix, plans) if return_plans else emd_matrix
+        _store_row(*item)
+    return (emd_matrix, _plans_from_chunks(plan_chunks)) if return_plans else emd_matrix
 
 
 def manhattan_candidates(
     volume_matrix: np.ndarray,
     k: int,
+    rows: np.ndarray | None = None,
 ) -> dict[int, np.ndarray]:
     """
     Compute top-k nearest neighbors by Manhattan distance for each recipe.
 
-    This is a cheap O(N²) operation used to select candidate pairs before
-    computing the more expensive EMD. Manhattan distance on volume fractions
-    provides a reasonable approximation for filtering.
+    This is a cheap operation used to select candidate pairs before computing
+    the more expensive EMD. Manhattan distance on volume fractions provides a
+    reasonable approximation for filtering.
+
+    Volumes are non-negative, so |a - b| = a + b - 2 min(a, b) and the L1
+    distance of two recipes is the sum of their total volumes minus twice the
+    volume they share ingredient by ingredient. The shared volume is non-zero
+    only for recipes with a common ingredient; it is accumulated for a block of
+    query recipes by joining their entries with an inverted index (ingredient ->
+    recipes) on the sparse matrix, and the top k are taken per block. Neither a
+    dense copy of the volume matrix nor the n x n distance matrix is formed:
+    memory is O(n * k) for the result plus a fixed-size block buffer.
 
     Parameters
     ----------
     volume_matrix : np.ndarray or sparse matrix
-        Recipe-by-ingredient volume matrix of shape (n_recipes, n_ingredients).
+        Recipe-by-ingredient volume matrix of shape (n_recipes, n_ingredients),
+        non-negative.
     k : int
         Number of nearest neighbors to select per recipe.
+    rows : np.ndarray, optional
+        If given, only select candidates for these recipes (still searching
+        all recipes), e.g. the recipes that changed since the last EM fit.
 
     Returns
     -------
     candidates : dict[int, np.ndarray]
         Mapping from recipe index to array of k candidate neighbor indices.
     """
-    from scipy import sparse as sp
-    from scipy.spatial.distance import cdist
+    candidates = {}
+    for block, nearest_k, _nearest_dist in _manhattan_topk_blocks(volume_matrix, k, rows):
+        for i, neighbors in zip(block.tolist(), nearest_k, strict=True):
+            candidates[i] = neighbors
+    return candidates
 
-    # Convert sparse to dense for distance computation
-    if sp.issparse(volume_matrix):
-        dense_matrix = volume_matrix.toarray()
-    else:
-        dense_matrix = np.asarray(volume_matrix)
 
-    # Compute full Manhattan distance matrix (cheap - just L1 norm)
-    manhattan_dist = cdist(dense_matrix, dense_matrix, metric='cityblock')
+def manhattan_knn_graph(
+    volume_matrix: np.ndarray,
+    k: int,
+    dtype: np.dtype | type = np.float32,
+) -> KnnDistanceGraph:
+    """
+    Build a sparse k-nearest-neighbor graph of recipes under Manhattan distance.
+
+    Uses the same blocked sparse L1 search as `manhattan_candidates` but keeps
+    the distances, so a Manhattan recipe space can be embedded with UMAP from
+    O(n * k) stored pairs instead of a dense n x n distance matrix.
 
-    # For each recipe, find top-k nearest (excluding self)
+    Parameters
+    ----------
+    volume_matrix : np.ndarray or sparse matrix
+        Recipe-by-ingredient volume matrix of shape (n_recipes, n_ingredients),
+        non-negative.
+    k : int
+        Number of nearest neighbors kept per recipe. To embed the graph with
+        `compute_umap_embedding`, use at least ``n_neighbors - 1``.
+    dtype : np.dtype or type, default np.float32
+        Data type of the stored distances.
+
+    Returns
+    -------
+    KnnDistanceGraph
+        Symmetric graph holding each recipe's k nearest neighbors (a pair kept
+        by either endpoint is stored both ways) and a zero diagonal.
+
+    Examples
+    --------
+    >>> volume = np.array([[1.0, 0.0], [0.5, 0.5], [0.0, 1.0]])
+    >>> graph = manhattan_knn_graph(volume, k=1)
+    >>> float(graph[0, 1]), float(graph[0, 2])
+    (1.0, inf)
+    """
     n_recipes = volume_matrix.shape[0]
-    k = min(k, n_recipes - 1)  # Can't have more neighbors than recipes - 1
+    rows, cols, distances = [], [], []
+    for block, nearest_k, nearest_dist in _manhattan_topk_blocks(volume_matrix, k):
+        rows.append(np.repeat(block, nearest_k.shape[1]))
+        cols.append(nearest_k.ravel())
+        distances.append(nearest_dist.ravel())
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+    cols = np.concatenate(cols) if cols else np.empty(0, dtype=np.int64)
+    distances = np.concatenate(distances) if distances else np.empty(0)
+
+    # Mutual neighbors are found from both ends; keep each unordered pair once
+    lo, hi = np.minimum(rows, cols), np.maximum(rows, cols)
+    _, first = np.unique(lo * n_recipes + hi, return_index=True)
+    return KnnDistanceGraph.from_pairs(
+        n_recipes, lo[first], hi[first], distances[first], dtype=dtype
+    )
 
-    candidates = {}
-    np.fill_diagonal(manhattan_dist, np.inf)
 
-    for i in range(n_recipes):
-        # Get indices of k smallest distances
-        nearest_k = np.argpartition(manhattan_dist[i], k)[:k]
-        candidates[i] = nearest_k
+def _manhattan_topk_blocks(
+    volume_matrix: np.ndarray,
+    k: int,
+    rows: np.ndarray | None = None,
+):
+    """
+    Yield (block, nearest_k, nearest_dist) for blocks of query recipes.
+
+    `block` holds recipe indices, `nearest_k` the indices of their k nearest
+    recipes by Manhattan distance (in no particular order) and `nearest_dist`
+    the matching distances, both of shape (len(block), k).
+    """
+    from scipy import sparse as sp
+
+    volume = sp.csr_matrix(volume_matrix, dtype=np.float64)
+    postings = volume.tocsc()
+
+    n_recipes = volume.shape[0]
+    rows = np.arange(n_recipes) if rows is None else np.asarray(rows, dtype=np.int64)
+    k = min(k, n_recipes - 1)  # Can't have more neighbors than recipes - 1
+    totals = np.asarray(volume.sum(axis=1)).ravel()
+    doc_freq = np.diff(postings.indptr)
+    block_rows = max(1, _MANHATTAN_BLOCK_ELEMENTS // max(n_recipes, 1))
+    # Entries each query row contributes to the join, to bound it per block too
+    join_sizes = np.bincount(
+        np.repeat(np.arange(n_recipes), np.diff(volume.indptr)),
+        weights=doc_freq[volume.indices],
+        minlength=n_recipes,
+    )[rows]
+    cum_join = np.cumsum(join_sizes)
+
+    lo = 0
+    while lo < len(rows):
+        joined = cum_join[lo - 1] if lo else 0.0
+        hi = int(np.searchsorted(cum_join, joined + _MANHATTAN_BLOCK_ELEMENTS, side="right"))
+        hi = min(max(hi, lo + 1), lo + block_rows)
+        block = rows[lo:hi]
+        lo = hi
+
+        # Join the block's (recipe, ingredient, volume) entries with the posting
+        # lists of their ingredients and sum min(a, b) per recipe pair
+        sub = volume[block]
+        entry_rows = np.repeat(np.arange(len(block)), np.diff(sub.indptr))
+        lengths = doc_freq[sub.indices]
+        entries = np.repeat(np.arange(len(lengths)), lengths)
+        positions = np.arange(len(entries)) - (np.cumsum(lengths) - lengths)[entries]
+        positions += postings.indptr[sub.indices][entries]
+        shared = np.bincount(
+            entry_rows[entries] * n_recipes + postings.indices[positions],
+            weights=np.minimum(sub.data[entries], postings.data[positions]),
+            minlength=len(block) * n_recipes,
+        ).reshape(len(block), n_recipes)
+
+        manhattan_dist = totals[block, None] + totals[None, :] - 2.0 * shared
+        manhattan_dist[np.arange(len(block)), block] = np.inf
+        if k > 0:
+            # Copy, so the candidates do not keep the (block, n) buffer alive
+            nearest_k = np.argpartition(manhattan_dist, k - 1, axis=1)[:, :k].copy()
+        else:
+            nearest_k = np.empty((len(block), 0), dtype=np.int64)
+        # Cancellation in totals - 2 * shared can leave tiny negative values
+        nearest_dist = np.maximum(
+            np.take_along_axis(manhattan_dist, nearest_k, axis=1), 0.0
+        )
+        yield block, nearest_k, nearest_dist
 
-    return candidates
+
+# Per block of manhattan_candidates: maximum query rows x recipes distances and
+# joined posting-list entries (4 MB of float64 each)
+_MANHATTAN_BLOCK_ELEMENTS = 1 << 19
 
 
 def emd_candidates(
-    distance_matrix: np.ndarray,
+    distance_matrix: np.ndarray | CondensedDistanceMatrix | KnnDistanceGraph,
     k: int,
 ) -> dict[int, np.ndarray]:
     """
@@ -671,26 +881,29 @@ def emd_candidates(
 
     Parameters
     ----------
-    distance_matrix : np.ndarray
+    distance_matrix : np.ndarray, CondensedDistanceMatrix or KnnDistanceGraph
         Recipe-by-recipe distance matrix of shape (n_recipes, n_recipes).
+        For a KnnDistanceGraph only the stored pairs are considered.
     k : int
         Number of nearest neighbors to select per recipe.
 
     Returns
     -------
     candidates : dict[int, np.ndarray]
-        Mapping from recipe index to array of k candidate neighbor indices.
+        Mapping from recipe index to array of (up to) k candidate neighbor indices.
     """
     n_recipes = distance_matrix.shape[0]
     k = min(k, n_recipes - 1)
 
-    candidates = {}
-    dmat = distance_matrix.copy()
-    np.fill_diagonal(dmat, np.inf)
+    if isinstance(distance_matrix, KnnDistanceGraph):
+        nn_idx, _ = distance_matrix.knn(k)
+        return {i: row[row >= 0] for i, row in enumerate(nn_idx)}
 
-    for i in range(n_recipes):
-        nearest_k = np.argpartition(dmat[i], k)[:k]
-        candidates[i] = nearest_k
+    candidates = {}
+    for start, block in iter_distance_row_blocks(distance_matrix, fill_diagonal=np.inf):
+        nearest_k = np.argpartition(block, k, axis=1)[:, :k]
+        for offset, row in enumerate(nearest_k):
+            candidates[start + offset] = row
 
     return candidates
 
@@ -698,15 +911,20 @@ def emd_candidates(
 def emd_matrix_constrained(
     volume_matrix: np.ndarray,
     cost_matrix: np.ndarray,
-    candidates: dict[int, np.ndarray],
+    candidates: dict[int, np.ndarray] | np.ndarray,
     return_plans: bool = False,
-) -> tuple[np.ndarray, dict] | np.ndarray:
+    sparse: bool = False,
+    n_jobs: int = 1,
+) -> (
+    tuple[np.ndarray | KnnDistanceGraph, TransportPlans] | np.ndarray | KnnDistanceGraph
+):
     """
     Compute EMD only for candidate pairs, not the full O(N²) matrix.
 
     This provides significant speedup when only a subset of pairs need
     to be computed (e.g., top-k candidates from Manhattan pre-filtering).
-    Non-candidate pairs are left as infinity in the distance matrix.
+    Non-candidate pairs are left as infinity in the distance matrix, or
+    omitted entirely when a sparse kNN graph is requested.
 
     Parameters
     ----------
@@ -714,74 +932,344 @@ def emd_matrix_constrained(
         Recipe-by-ingredient volume matrix of shape (n_recipes, n_ingredients).
     cost_matrix : np.ndarray
         Ingredient-by-ingredient cost matrix of shape (n_ingredients, n_ingredients).
-    candidates : dict[int, np.ndarray]
-        Mapping from recipe index to array of candidate neighbor indices.
+    candidates : dict[int, np.ndarray] or np.ndarray
+        Mapping from recipe index to array of candidate neighbor indices, or
+        the recipe pairs themselves as an (m, 2) array.
     return_plans : bool, optional
         If True, also return transport plans for computed pairs (default: False).
+    sparse : bool, optional
+        If True, return the distances as a KnnDistanceGraph holding only the
+        computed pairs, using O(n * k) memory instead of O(n²) (default: False).
+    n_jobs : int, optional
+        Number of worker processes (default: 1, in-process). Unique pairs are
+        split into chunks solved with emd_batch; the volume and cost matrices
+        are shared with the workers through joblib's memory-mapped files, and
+        each chunk returns its distances and plan flows as flat arrays.
 
     Returns
     -------
-    emd_mat : np.ndarray
-        Recipe-by-recipe distance matrix. Non-candidate pairs have value inf.
-    plans : dict, optional
-        If return_plans is True, dict mapping (i, j) with i < j to transport plans.
+    emd_mat : np.ndarray or KnnDistanceGraph
+        Recipe-by-recipe distance matrix. Non-candidate pairs have value inf
+        (dense) or are absent from the graph (sparse).
+    plans : TransportPlans, optional
+        If return_plans is True, the transport plans of the computed pairs.
     """
-    from scipy import sparse as sp
-
     n_recipes = volume_matrix.shape[0]
-    is_sparse = sp.issparse(volume_matrix)
     emd_dtype = cost_matrix.dtype
+    pairs = _candidate_pairs(candidates)
 
-    # Initialize with inf (unknown distances), 0 on diagonal
-    emd_mat = np.full((n_recipes, n_recipes), np.inf, dtype=emd_dtype)
-    np.fill_diagonal(emd_mat, 0.0)
-
-    # Precompute supports
-    if is_sparse:
-        supports = [volume_matrix.getrow(i).indices for i in range(n_recipes)]
+    if n_jobs == 1 or len(pairs) < 2 * _MIN_PAIRS_PER_CHUNK:
+        pair_chunks = [pairs]
+        chunks = [emd_batch(volume_matrix, cost_matrix, pairs, return_plans)]
     else:
-        supports = [np.nonzero(volume_matrix[i] > 0)[0] for i in range(n_recipes)]
-
-    plans = {} if return_plans else None
-    pairs_computed = set()
+        # Worker processes; joblib memory-maps the large volume/cost arrays so
+        # every worker reads the same copy instead of unpickling its own
+        import logging
 
-    for i, neighbor_indices in candidates.items():
-        for j in neighbor_indices:
-            j = int(j)
-            # Canonical ordering to avoid duplicate computation
-            pair = (min(i, j), max(i, j))
-            if pair in pairs_computed or i == j:
-                continue
-            pairs_computed.add(pair)
+        from joblib import Parallel, delayed
 
-            union_idx = np.union1d(supports[i], supports[j])
-            row_i = volume_matrix.getrow(i) if is_sparse else volume_matrix[i]
-            row_j = volume_matrix.getrow(j) if is_sparse else volume_matrix[j]
+        logger = logging.getLogger(__name__)
+        n_chunks = min(n_jobs * _CHUNKS_PER_JOB, len(pairs) // _MIN_PAIRS_PER_CHUNK)
+        logger.info(
+            f"Computing constrained EMD: {len(pairs)} pairs in {n_chunks} chunks with n_jobs={n_jobs}"
+        )
+        pair_chunks = np.array_split(pairs, n_chunks)
+        chunks = Parallel(n_jobs=n_jobs, backend="loky", mmap_mode="r")(
+            delayed(emd_batch)(volume_matrix, cost_matrix, chunk, return_plans)
+            for chunk in pair_chunks
+        )
 
-            if return_plans:
-                distance, plan = compute_emd(
-                    row_i, row_j, cost_matrix,
-                    return_plan=True, support_idx=union_idx
-                )
-                plans[pair] = plan
-            else:
-                distance = compute_emd(
-                    row_i, row_j, cost_matrix,
-                    return_plan=False, support_idx=union_idx
-                )
+    distances = np.concatenate([chunk[0] for chunk in chunks]).astype(emd_dtype, copy=False)
 
-            emd_mat[i, j] = emd_dtype.type(distance)
-            emd_mat[j, i] = emd_dtype.type(distance)
+    if sparse:
+        emd_mat = KnnDistanceGraph.from_pairs(
+            n_recipes, pairs[:, 0], pairs[:, 1], distances, dtype=emd_dtype
+        )
+    else:
+        # Initialize with inf (unknown distances), 0 on diagonal
+        emd_mat = np.full((n_recipes, n_recipes), np.inf, dtype=emd_dtype)
+        np.fill_diagonal(emd_mat, 0.0)
+        emd_mat[pairs[:, 0], pairs[:, 1]] = distances
+        emd_mat[pairs[:, 1], pairs[:, 0]] = distances
 
     if return_plans:
+        plans = _plans_from_chunks(
+            (chunk_pairs, flows)
+            for chunk_pairs, (_distances, flows) in zip(pair_chunks, chunks, strict=True)
+        )
         return emd_mat, plans
     return emd_mat
 
 
+# Chunking of constrained EMD pairs across worker processes
+_CHUNKS_PER_JOB = 4
+_MIN_PAIRS_PER_CHUNK = 256
+
+
+def _candidate_pairs(candidates: dict[int, np.ndarray] | np.ndarray) -> np.ndarray:
+    """Unique (i, j) pairs with i < j from a candidate map or pair array, as an (m, 2) int array."""
+    if isinstance(candidates, np.ndarray):
+        pairs = np.asarray(candidates, dtype=np.int64).reshape(-1, 2)
+        src, dst = pairs[:, 0], pairs[:, 1]
+    else:
+        sources = [
+            np.full(len(neighbors), i, dtype=np.int64) for i, neighbors in candidates.items()
+        ]
+        targets = [np.asarray(neighbors, dtype=np.int64) for neighbors in candidates.values()]
+        if not sources:
+            return np.empty((0, 2), dtype=np.int64)
+        src = np.concatenate(sources)
+        dst = np.concatenate(targets)
+    keep = src != dst
+    lo, hi = np.minimum(src, dst)[keep], np.maximum(src, dst)[keep]
+    if not len(lo):
+        return np.empty((0, 2), dtype=np.int64)
+    # Unique on scalar keys i * base + j (same order as np.unique(axis=0), much faster)
+    base = int(hi.max()) + 1
+    keys = np.unique(lo * base + hi)
+    return np.stack([keys // base, keys % base], axis=1)
+
+
+def emd_batch(
+    volume_matrix,
+    cost_matrix: np.ndarray,
+    pairs: np.ndarray,
+    return_plans: bool = False,
+) -> tuple[np.ndarray, tuple[np.ndarray, ...] | None]:
+    """
+    Compute the EMD for many recipe pairs at once.
+
+    Recipes have only a handful of ingredients, so every pair is a tiny
+    transport problem and the per-call overhead of compute_emd (sparse row
+    slicing, support unions, cost sub-matrix extraction, input checks in
+    ot.emd) dominates the solve itself. This entry point extracts all recipe
+    supports once as padded arrays, gathers the cost sub-matrices of a whole
+    block of pairs with a single fancy-indexing operation, and then calls the
+    network simplex solver directly in a tight loop.
+
+    Each problem is restricted to the source support x target support rather
+    than the union of both, which gives the same distance and plan (ot.emd
+    drops zero-mass rows and columns internally as well).
+
+    Parameters
+    ----------
+    volume_matrix : np.ndarray or sparse matrix
+        Recipe-by-ingredient volume matrix of shape (n_recipes, n_ingredients).
+    cost_matrix : np.ndarray
+        Ingredient-by-ingredient cost matrix of shape (n_ingredients, n_ingredients).
+    pairs : np.ndarray
+        Recipe index pairs of shape (m, 2).
+    return_plans : bool, optional
+        If True, also return the transport plans (default: False).
+
+    Returns
+    -------
+    distances : np.ndarray
+        EMD of each pair, shape (m,), float64. Pairs where either recipe is
+        empty have distance 0.
+    flows : tuple of np.ndarray or None
+        If return_plans is True, the flows of all plans concatenated CSR-style
+        as (offsets, from_idx, to_idx, amount, cost), where the flows of pair n
+        are at positions offsets[n]:offsets[n + 1] and indices are global
+        ingredient indices (see `TransportPlans.from_flows`). None otherwise.
+    """
+    supports = _padded_supports(volume_matrix)
+    return _emd_batch_from_supports(supports, cost_matrix, pairs, return_plans)
+
+
+def cost_submatrix_change(
+    volume_matrix,
+    pairs: np.ndarray,
+    cost_matrix: np.ndarray,
+    reference_cost_matrix: np.ndarray,
+) -> np.ndarray:
+    """
+    Largest change of the cost entries each pair's EMD depends on.
+
+    The EMD of recipes i and j only reads the cost sub-matrix
+    support(i) x support(j), so a pair whose sub-matrix did not change
+    between two cost matrices keeps its distance and transport plan.
+
+    Parameters
+    ----------
+    volume_matrix : np.ndarray or sparse matrix
+        Recipe-by-ingredient volume matrix of shape (n_recipes, n_ingredients).
+    pairs : np.ndarray
+        Recipe index pairs of shape (m, 2).
+    cost_matrix, reference_cost_matrix : np.ndarray
+        Ingredient cost matrices of shape (n_ingredients, n_ingredients) to compare.
+
+    Returns
+    -------
+    np.ndarray
+        max |cost_matrix - reference_cost_matrix| over each pair's sub-matrix,
+        shape (m,). Pairs where either recipe is empty have change 0.
+    """
+    support_idx, _support_mass, support_len = _padded_supports(volume_matrix)
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    delta = np.abs(
+        np.asarray(cost_matrix, dtype=np.float64)
+        - np.asarray(reference_cost_matrix, dtype=np.float64)
+    )
+    width = support_idx.shape[1]
+    in_support = np.arange(width)[None, :] < support_len[:, None]
+    block_pairs = max(1, _EMD_BATCH_ELEMENTS // (width * width))
+
+    change = np.zeros(len(pairs), dtype=np.float64)
+    for lo in range(0, len(pairs), block_pairs):
+        block = pairs[lo : lo + block_pairs]
+        sub_delta = delta[
+            support_idx[block[:, 0]][:, :, None], support_idx[block[:, 1]][:, None, :]
+        ]
+        mask = in_support[block[:, 0]][:, :, None] & in_support[block[:, 1]][:, None, :]
+        change[lo : lo + len(block)] = np.where(mask, sub_delta, 0.0).max(axis=(1, 2), initial=0.0)
+    return change
+
+
+# Maximum number of padded cost sub-matrix elements gathered per block in emd_batch
+_EMD_BATCH_ELEMENTS = 1 << 20
+# Same iteration limit as ot.emd
+_EMD_MAX_ITER = 100000
+
+try:
+    # POT's compiled network simplex, called directly to skip the per-call
+    # argument checks of ot.emd (private API, hence the POT<0.10 pin)
+    from ot.lp.emd_wrap import check_result as _emd_check_result
+    from ot.lp.emd_wrap import emd_c as _emd_c
+except ImportError:  # pragma: no cover - depends on the installed POT
+    _emd_c = None
+
+
+def _emd_pair(a: np.ndarray, b: np.ndarray, cost: np.ndarray) -> tuple[np.ndarray, float]:
+    """Optimal transport plan and cost between histograms a and b."""
+    if _emd_c is None:  # pragma: no cover - depends on the installed POT
+        transport_matrix, log = ot.emd(a, b, cost, numItermax=_EMD_MAX_ITER, log=True)
+        return transport_matrix, float(log["cost"])
+    transport_matrix, distance, _u, _v, result_code = _emd_c(a, b, cost, _EMD_MAX_ITER, 1)
+    _emd_check_result(result_code)
+    return transport_matrix, distance
+
+
+def _padded_supports(volume_matrix) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Recipe supports as padded arrays.
+
+    Returns (support_idx, support_mass, support_len) where row r of the
+    (n_recipes, max_len) arrays holds the ingredient indices and float64
+    volumes of recipe r in its first support_len[r] slots, zero-padded.
+    """
+    from scipy import sparse as sp
+
+    n_recipes = volume_matrix.shape[0]
+    if sp.issparse(volume_matrix):
+        coo = volume_matrix.tocoo()
+        rows, cols, mass = coo.row, coo.col, coo.data
+    else:
+        dense = np.asarray(volume_matrix)
+        rows, cols = np.nonzero(dense > 0)
+        mass = dense[rows, cols]
+
+    keep = mass > 0
+    order = np.lexsort((cols[keep], rows[keep]))
+    rows = rows[keep][order].astype(np.int64, copy=False)
+    cols = cols[keep][order].astype(np.int64, copy=False)
+    mass = mass[keep][order].astype(np.float64, copy=False)
+
+    support_len = np.bincount(rows, minlength=n_recipes)
+    width = max(int(support_len.max()), 1) if n_recipes else 1
+    starts = np.cumsum(support_len) - support_len
+    slots = np.arange(len(rows)) - starts[rows]
+
+    support_idx = np.zeros((n_recipes, width), dtype=np.int64)
+    support_mass = np.zeros((n_recipes, width), dtype=np.float64)
+    support_idx[rows, slots] = cols
+    support_mass[rows, slots] = mass
+    return support_idx, support_mass, support_len
+
+
+def _emd_batch_from_supports(
+    supports: tuple[np.ndarray, np.ndarray, np.ndarray],
+    cost_matrix: np.ndarray,
+    pairs: np.ndarray,
+    return_plans: bool,
+) -> tuple[np.ndarray, tuple[np.ndarray, ...] | None]:
+    """emd_batch on supports precomputed by _padded_supports."""
+    support_idx, support_mass, support_len = supports
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    width = support_idx.shape[1]
+    block_pairs = max(1, _EMD_BATCH_ELEMENTS // (width * width))
+
+    distances = np.zeros(len(pairs), dtype=np.float64)
+    offsets = np.zeros(len(pairs) + 1, dtype=np.int64)
+    flow_parts: list[tuple[np.ndarray, ...]] = []
+
+    for lo in range(0, len(pairs), block_pairs):
+        block = pairs[lo : lo + block_pairs]
+        idx_i = support_idx[block[:, 0]]
+        idx_j = support_idx[block[:, 1]]
+        len_i = support_len[block[:, 0]].tolist()
+        len_j = support_len[block[:, 1]].tolist()
+        mass_i = support_mass[block[:, 0]]
+        mass_j = support_mass[block[:, 1]]
+        # Rescale targets to the source mass, as ot.emd does
+        total_j = mass_j.sum(axis=1)
+        scale = np.divide(
+            mass_i.sum(axis=1), total_j, out=np.zeros_like(total_j), where=total_j > 0
+        )
+        mass_j = mass_j * scale[:, None]
+        sub_costs = cost_matrix[idx_i[:, :, None], idx_j[:, None, :]].astype(
+            np.float64, copy=False
+        )
+
+        for p in range(len(block)):
+            n = lo + p
+            n_i, n_j = len_i[p], len_j[p]
+            if n_i == 0 or n_j == 0:
+                continue
+            cost_sub = np.ascontiguousarray(sub_costs[p, :n_i, :n_j])
+            transport_matrix, distance = _emd_pair(mass_i[p, :n_i], mass_j[p, :n_j], cost_sub)
+            distances[n] = distance
+            if return_plans:
+                rows, cols = np.nonzero(transport_matrix > 1e-10)
+                flows = transport_matrix[rows, cols]
+                flow_parts.append(
+                    (idx_i[p, rows], idx_j[p, cols], flows, flows * cost_sub[rows, cols])
+                )
+                offsets[n + 1] = len(rows)
+
+    if not return_plans:
+        return distances, None
+    np.cumsum(offsets, out=offsets)
+    if flow_parts:
+        from_idx, to_idx, amounts, flow_costs = (
+            np.concatenate(part) for part in zip(*flow_parts, strict=True)
+        )
+    else:
+        from_idx = to_idx = np.empty(0, dtype=np.int64)
+        amounts = flow_costs = np.empty(0, dtype=np.float64)
+    return distances, (offsets, from_idx, to_idx, amounts, flow_costs)
+
+
+def _plans_from_chunks(
+    chunks: Iterable[tuple[np.ndarray, tuple[np.ndarray, ...]]],
+) -> TransportPlans:
+    """Merge (pairs, flows) chunks from emd_batch into one TransportPlans store."""
+    chunks = list(chunks)
+    if not chunks:
+        return TransportPlans.empty()
+    pairs = np.concatenate([chunk_pairs for chunk_pairs, _ in chunks])
+    lengths = np.concatenate([np.diff(flows[0]) for _, flows in chunks])
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    flows = tuple(
+        np.concatenate([chunk_flows[f] for _, chunk_flows in chunks]) for f in range(1, 5)
+    )
+    return TransportPlans.from_flows(pairs, (offsets, *flows))
+
+
 def knn_matrix(
-    distance_matrix: np.ndarray,
+    distance_matrix: np.ndarray | CondensedDistanceMatrix | KnnDistanceGraph,
     k: int,
-) -> np.ndarray:
+) -> tuple[np.ndarray, np.ndarray]:
     """
     Compute the k-nearest neighbors (kNN) indices and distances from a distance matrix.
 
@@ -790,7 +1278,7 @@ def knn_matrix(
 
     Parameters
     ----------
-    distance_matrix : np.ndarray
+    distance_matrix : np.ndarray, CondensedDistanceMatrix or KnnDistanceGraph
         A 2D array of shape (n, n) representing pairwise distances, where n is the number of samples.
     k : int
         The number of nearest neighbors to select for each item.
@@ -807,16 +1295,11 @@ def knn_matrix(
     The diagonal (self-distances) and any non-finite values (NaN/-Inf) are replaced with +Inf
     so they are not selected as neighbors. The neighbor selection uses `np.argsort`;
     in the case of ties, the order is determined by the index order.
+    Rows are processed in blocks, so the input is never copied in full.
+    For a KnnDistanceGraph only stored pairs are candidates; rows with fewer than
+    k stored neighbors are padded with index -1 and distance +Inf.
     """
-    dmat = distance_matrix.copy()
-    # Replace diagonal, NaN/-Inf with +Inf so they sort to the end
-    np.fill_diagonal(dmat, np.inf)
-    non_finite_mask = ~np.isfinite(dmat)
-    if non_finite_mask.any():
-        dmat[non_finite_mask] = np.inf
-    nn_idx = np.argsort(dmat, axis=1)[:, :k]
-    nn_dist = np.take_along_axis(dmat, nn_idx, axis=1)
-    return nn_idx, nn_dist
+    return _knn_by_row_blocks(distance_matrix, k)
 
 
 def build_index_to_id(id_to_index: dict[str, int]) -> list[str]:
@@ -874,13 +1357,15 @@ def neighbor_weight_matrix(
     n = distance_matrix.shape[0]
     nn_idx, nn_dist = knn_matrix(distance_matrix, k)
 
-    W = np.zeros_like(distance_matrix, dtype=distance_matrix.dtype)
+    W = np.zeros(distance_matrix.shape, dtype=distance_matrix.dtype)
     for r in range(n):
         d = nn_dist[r]
         # Boltzmann weights per row, stabilized by subtracting min
         w = np.exp(-beta * (d - d.min()))
         w /= w.sum() + 1e-12
         for w_rs, s in zip(w, nn_idx[r], strict=False):
+            if s < 0:
+                continue
             W[r, int(s)] += float(w_rs)
 
     if symmetrize:
@@ -892,43 +1377,54 @@ def neighbor_weight_matrix(
 ### M-step code ###
 
 
-def _sparsify_transport_plan(
-    plan: list[tuple[int, int, float, float]],
+def _sparsify_transport_plans(
+    plans: TransportPlans,
     topk: int | None,
     min_fraction_of_max: float,
-) -> list[tuple[int, int, float, float]]:
+) -> np.ndarray:
     """
-    Keep only the largest transport flows by amount.
+    Keep only the largest transport flows by amount in every plan.
 
     Parameters
     ----------
-    plan : list of tuples (i, j, amount, cost)
-        Transport plan entries restricted to the support union.
+    plans : TransportPlans
+        Transport plans to sparsify.
     topk : int or None
-        If provided, keep at most this many largest flows by amount.
+        If provided, keep at most this many largest flows by amount per plan.
     min_fraction_of_max : float
-        Additionally keep any flow with amount >= min_fraction_of_max * max(amount).
+        Additionally keep any flow with amount >= min_fraction_of_max * max(amount)
+        of its plan.
 
     Returns
     -------
-    list
-        Filtered plan entries.
+    np.ndarray
+        Boolean mask over all flows of `plans`, True for kept flows. Ties in
+        amount are broken by plan order.
     """
-    if not plan:
-        return plan
-    # Sort by amount descending
-    sorted_plan = sorted(plan, key=lambda x: x[2], reverse=True)
-    max_amount = sorted_plan[0][2]
-    thresh = max_amount * float(min_fraction_of_max)
-    filtered = [p for p in sorted_plan if p[2] >= thresh]
+    keep = np.ones(plans.n_flows, dtype=bool)
+    if plans.n_flows == 0:
+        return keep
+    # Plans are tiny, so rank flows within each plan by sorting a padded
+    # (n_pairs, max_flows) array row-wise instead of sorting all flows globally
+    flow_pairs = plans.flow_pairs()
+    slots = np.arange(plans.n_flows) - plans.offsets[flow_pairs]
+    width = int(np.diff(plans.offsets).max())
+    padded = np.full((len(plans), width), -np.inf)
+    padded[flow_pairs, slots] = plans.mass
+    order = np.argsort(-padded, axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(width)[None, :], axis=1)
+
+    max_mass = padded.max(axis=1)
+    keep = plans.mass >= max_mass[flow_pairs] * float(min_fraction_of_max)
     if topk is not None and topk > 0:
-        filtered = filtered[:topk]
-    return filtered
+        keep &= ranks[flow_pairs, slots] < topk
+    return keep
 
 
 def expected_ingredient_match_matrix(
-    distance_matrix: np.ndarray,
-    plans: dict[tuple[int, int], list[tuple[int, int, float, float]]],
+    distance_matrix: np.ndarray | CondensedDistanceMatrix | KnnDistanceGraph,
+    plans: TransportPlans | dict[tuple[int, int], list[tuple[int, int, float, float]]],
     n_ingredients: int,
     k: int,
     beta: float,
@@ -944,12 +1440,17 @@ def expected_ingredient_match_matrix(
     extract transport plans for (r, s), and accumulate weighted flows into an
     ingredient-by-ingredient count matrix T_sum.
 
+    The aggregation is vectorized: the weights of (r, s) and (s, r) are summed
+    per stored plan, the kept flows of all weighted plans are gathered at once,
+    and T_sum is built with a single bincount over flattened (from, to) indices.
+
     Parameters
     ----------
-    distance_matrix : np.ndarray
+    distance_matrix : np.ndarray, CondensedDistanceMatrix or KnnDistanceGraph
         Array of shape (n_recipes, n_recipes) with pairwise distances between recipes.
-    plans : dict[tuple[int, int], list[tuple[int, int, float, float]]]
-        Transport plans between all recipe pairs.
+    plans : TransportPlans or dict
+        Transport plans between recipe pairs. A dict mapping (i, j) to a list of
+        (from_idx, to_idx, amount, cost) tuples is converted first.
     n_ingredients : int
         Number of ingredients.
     k : int
@@ -970,29 +1471,45 @@ def expected_ingredient_match_matrix(
     N_pairs : int
         Number of directed neighbor pairs accumulated (n_recipes * k).
     """
+    if not isinstance(plans, TransportPlans):
+        plans = TransportPlans.from_dict(plans)
+
     n_recipes = distance_matrix.shape[0]
-    nn_idx, nn_dist = knn_matrix(distance_matrix, max(1, min(k, n_recipes - 1)))
+    k = max(1, min(k, n_recipes - 1))
+    nn_idx, nn_dist = knn_matrix(distance_matrix, k)
 
-    T_sum = np.zeros((n_ingredients, n_ingredients), dtype=distance_matrix.dtype)
-    for r in range(n_recipes):
-        d = nn_dist[r]
-        # Boltzmann weights per row, stabilized by subtracting min
-        w = np.exp(-beta * (d - d.min()))
-        z = float(w.sum())
-        if z > 0:
-            w /= z
-        for w_rs, s in zip(w, nn_idx[r], strict=False):
-            i, j = (r, int(s)) if r < int(s) else (int(s), r)
-            plan = plans.get((i, j), [])
-            if plan_topk is not None or plan_minfrac > 0:
-                plan = _sparsify_transport_plan(plan, plan_topk, plan_minfrac)
-            for ii, jj, amount, _ in plan:
-                T_sum[int(ii), int(jj)] += float(w_rs) * float(amount)
+    # Boltzmann weights per row, stabilized by subtracting the row min
+    with np.errstate(invalid="ignore"):
+        w = np.exp(-beta * (nn_dist - nn_dist.min(axis=1, keepdims=True)))
+    z = w.sum(axis=1, keepdims=True)
+    w = np.divide(w, z, out=w, where=z > 0)
+
+    # Total weight of each stored plan over both directions (r, s) and (s, r)
+    valid = nn_idx >= 0
+    rows = np.broadcast_to(np.arange(n_recipes)[:, None], nn_idx.shape)[valid]
+    positions = plans.find(rows, nn_idx[valid])
+    found = positions >= 0
+    pair_weight = np.bincount(
+        positions[found], weights=w[valid][found], minlength=len(plans)
+    )
+
+    flow_weight = pair_weight[plans.flow_pairs()]
+    keep = flow_weight > 0
+    if plan_topk is not None or plan_minfrac > 0:
+        keep &= _sparsify_transport_plans(plans, plan_topk, plan_minfrac)
+
+    flat = plans.from_idx[keep].astype(np.int64) * n_ingredients + plans.to_idx[keep]
+    T_sum = np.bincount(
+        flat,
+        weights=flow_weight[keep] * plans.mass[keep],
+        minlength=n_ingredients * n_ingredients,
+    ).reshape(n_ingredients, n_ingredients)
+    T_sum = T_sum.astype(distance_matrix.dtype, copy=False)
 
     if symmetrize:
         T_sum = 0.5 * (T_sum + T_sum.T)
 
-    return T_sum, int(n_recipes * max(1, min(k, n_recipes - 1)))
+    return T_sum, int(n_recipes * k)
 
 
 def _median_rescale(cost_matrix: np.ndarray, target: float = 1.0) -> np.ndarray:
@@ -1052,7 +1569,7 @@ def m_step_blosum(
 
 
 def compute_umap_embedding(
-    distance_matrix: np.ndarray,
+    distance_matrix: np.ndarray | CondensedDistanceMatrix | KnnDistanceGraph,
     n_components: int = 2,
     n_neighbors: int = 15,
     min_dist: float = 0.01,
@@ -1067,9 +1584,11 @@ def compute_umap_embedding(
 
     Parameters
     ----------
-    distance_matrix : np.ndarray
+    distance_matrix : np.ndarray, CondensedDistanceMatrix or KnnDistanceGraph
         Precomputed pairwise distance matrix of shape (n_samples, n_samples).
-        Should be symmetric with zeros on the diagonal.
+        Should be symmetric with zeros on the diagonal. A condensed matrix is
+        expanded to dense form; a kNN graph is passed to UMAP as a sparse
+        precomputed matrix, so pairs outside the graph are never materialized.
     n_components : int, default 2
         Number of dimensions in the embedded space.
     n_neighbors : int, default 5
@@ -1090,9 +1609,16 @@ def compute_umap_embedding(
     -----
     The distance matrix is used with metric='precomputed' in UMAP, meaning the
     input is treated as pairwise distances rather than raw feature vectors.
+    With a sparse kNN graph, every row needs at least `n_neighbors` stored
+    entries (counting the diagonal).
     """
     import umap
 
+    if isinstance(distance_matrix, KnnDistanceGraph):
+        distance_matrix = distance_matrix.graph
+    elif isinstance(distance_matrix, CondensedDistanceMatrix):
+        distance_matrix = distance_matrix.to_dense()
+
     reducer = umap.UMAP(
         n_neighbors=n_neighbors,
         min_dist=min_dist,
@@ -0,0 +1,532 @@
+"""Memory-efficient storage for symmetric pairwise distance matrices."""
+
+from collections.abc import Iterator
+
+import numpy as np
+
+# Entries materialized per row block when expanding rows (bounds temporaries)
+_ROW_BLOCK_ELEMENTS = 1 << 20
+
+
+class CondensedDistanceMatrix:
+    """
+    Symmetric distance matrix stored as its condensed upper triangle.
+
+    Only the n(n-1)/2 entries above the diagonal are kept, in the layout used
+    by `scipy.spatial.distance.squareform`, so the matrix needs half the memory
+    of its dense form and symmetric writes touch a single slot. The diagonal is
+    implicit (0). Rows are expanded on demand, a block at a time, so kNN queries
+    never materialize the full n x n matrix.
+
+    Parameters
+    ----------
+    n : int
+        Number of items (rows/columns of the equivalent dense matrix).
+    data : np.ndarray, optional
+        Condensed entries of length n(n-1)/2. Used as-is, without copying.
+    dtype : np.dtype or type, default np.float32
+        Data type of the entries when `data` is not provided.
+    fill_value : float, default 0.0
+        Initial value of every off-diagonal entry when `data` is not provided
+        (e.g. ``np.inf`` for pairs that have not been computed).
+
+    Examples
+    --------
+    >>> dist = CondensedDistanceMatrix(3)
+    >>> dist[0, 2] = 1.5
+    >>> dist[2, 0]
+    1.5
+    >>> dist.to_dense()
+    array([[0. , 0. , 1.5],
+           [0. , 0. , 0. ],
+           [1.5, 0. , 0. ]], dtype=float32)
+    """
+
+    def __init__(
+        self,
+        n: int,
+        data: np.ndarray | None = None,
+        dtype: np.dtype | type = np.float32,
+        fill_value: float = 0.0,
+    ):
+        size = n * (n - 1) // 2
+        if data is None:
+            data = np.full(size, fill_value, dtype=dtype)
+        elif data.ndim != 1 or data.shape[0] != size:
+            raise ValueError(
+                f"Condensed data for {n} items must have shape ({size},), "
+                f"got {data.shape}"
+            )
+        self.n = int(n)
+        self.data = data
+
+    @classmethod
+    def from_dense(cls, matrix: np.ndarray) -> "CondensedDistanceMatrix":
+        """
+        Build a condensed matrix from the upper triangle of a dense square matrix.
+
+        Parameters
+        ----------
+        matrix : np.ndarray
+            Square matrix of shape (n, n). Entries below and on the diagonal are ignored.
+
+        Returns
+        -------
+        CondensedDistanceMatrix
+            Condensed copy with the dtype of `matrix`.
+        """
+        matrix = np.asarray(matrix)
+        if matrix.ndim != 2 or matrix.shape[0] != matrix.shape[1]:
+            raise ValueError(f"Matrix must be square, got shape {matrix.shape}")
+        n = matrix.shape[0]
+        condensed = cls(n, dtype=matrix.dtype)
+        for i in range(n - 1):
+            start = condensed._offset(i)
+            condensed.data[start : start + n - i - 1] = matrix[i, i + 1 :]
+        return condensed
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """Shape of the equivalent dense matrix."""
+        return (self.n, self.n)
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Data type of the stored entries."""
+        return self.data.dtype
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the stored entries."""
+        return int(self.data.nbytes)
+
+    def _offset(self, i):
+        """Condensed position of entry (i, i + 1); works on scalars and arrays."""
+        return self.n * i - i * (i + 1) // 2
+
+    def _position(self, i: int, j: int) -> int:
+        if not (0 <= i < self.n and 0 <= j < self.n):
+            raise IndexError(f"Index ({i}, {j}) out of range for shape {self.shape}")
+        if i > j:
+            i, j = j, i
+        return self._offset(i) + j - i - 1
+
+    def __getitem__(self, key: tuple[int, int]):
+        i, j = (int(x) for x in key)
+        if i == j:
+            if not 0 <= i < self.n:
+                raise IndexError(f"Index ({i}, {j}) out of range for shape {self.shape}")
+            return self.dtype.type(0)
+        return self.data[self._position(i, j)]
+
+    def __setitem__(self, key: tuple[int, int], value: float) -> None:
+        i, j = (int(x) for x in key)
+        if i == j:
+            raise ValueError("Diagonal entries of a condensed distance matrix are fixed at 0")
+        self.data[self._position(i, j)] = value
+
+    def rows(
+        self, start: int, stop: int, fill_diagonal: float = 0.0
+    ) -> np.ndarray:
+        """
+        Expand a contiguous block of rows into a dense array.
+
+        Parameters
+        ----------
+        start, stop : int
+            Row range [start, stop) to expand.
+        fill_diagonal : float, default 0.0
+            Value written to the diagonal entries (e.g. ``np.inf`` for kNN queries).
+
+        Returns
+        -------
+        np.ndarray
+            Freshly allocated array of shape (stop - start, n).
+        """
+        row_ids = np.arange(start, stop, dtype=np.int64)[:, None]
+        col_ids = np.arange(self.n, dtype=np.int64)[None, :]
+        lo = np.minimum(row_ids, col_ids)
+        hi = np.maximum(row_ids, col_ids)
+        # Diagonal positions are garbage (clipped into range) and overwritten below
+        positions = self._offset(lo) + hi - lo - 1
+        np.clip(positions, 0, max(0, self.data.shape[0] - 1), out=positions)
+        if self.data.shape[0]:
+            block = self.data[positions]
+        else:
+            block = np.empty(positions.shape, dtype=self.dtype)
+        block[np.arange(stop - start), np.arange(start, stop)] = fill_diagonal
+        return block
+
+    def iter_row_blocks(
+        self, fill_diagonal: float = 0.0, block_rows: int | None = None
+    ) -> Iterator[tuple[int, np.ndarray]]:
+        """
+        Yield (start, rows) pairs covering the matrix in row blocks.
+
+        Parameters
+        ----------
+        fill_diagonal : float, default 0.0
+            Value written to the diagonal entries of each block.
+        block_rows : int, optional
+            Rows per block. Defaults to a size that bounds each block to a few MB.
+        """
+        if block_rows is None:
+            block_rows = max(1, _ROW_BLOCK_ELEMENTS // max(1, self.n))
+        for start in range(0, self.n, block_rows):
+            stop = min(start + block_rows, self.n)
+            yield start, self.rows(start, stop, fill_diagonal=fill_diagonal)
+
+    def to_dense(self, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Expand into a dense symmetric (n, n) matrix with a zero diagonal.
+
+        Parameters
+        ----------
+        out : np.ndarray, optional
+            Destination of shape (n, n), e.g. a memory-mapped ``.npy`` file, so the
+            dense matrix can be written without holding it in memory.
+
+        Returns
+        -------
+        np.ndarray
+            The dense matrix (`out` if provided).
+        """
+        if out is None:
+            out = np.empty(self.shape, dtype=self.dtype)
+        elif out.shape != self.shape:
+            raise ValueError(f"Output shape {out.shape} does not match {self.shape}")
+        for start, block in self.iter_row_blocks():
+            out[start : start + block.shape[0]] = block
+        return out
+
+    def knn(self, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k nearest neighbors (excluding self) of every item.
+
+        Same semantics as `barcart.distance.knn_matrix`, computed one row block
+        at a time.
+        """
+        return _knn_by_row_blocks(self, k)
+
+    def __repr__(self) -> str:
+        return f"CondensedDistanceMatrix(n={self.n}, dtype={self.dtype})"
+
+
+class KnnDistanceGraph:
+    """
+    Symmetric sparse distance graph holding only the pairs that were computed.
+
+    Used by constrained EM, where only each recipe's candidate neighbors are
+    compared: the graph stores O(n * k) entries in a SciPy CSR matrix instead
+    of an inf-filled n x n array. The diagonal is stored explicitly as 0 and
+    zero distances between distinct items are kept as explicit entries, so the
+    CSR matrix can be handed to UMAP as a precomputed sparse distance matrix.
+
+    Parameters
+    ----------
+    graph : scipy.sparse.csr_matrix
+        Square CSR matrix with a symmetric sparsity pattern, sorted indices and
+        explicit zeros on the diagonal. Use `from_pairs` to build one.
+    fill_value : float, default np.inf
+        Distance reported for pairs that are not in the graph when indexing or
+        expanding to dense form.
+
+    Examples
+    --------
+    >>> graph = KnnDistanceGraph.from_pairs(3, [0], [2], [1.5])
+    >>> graph[2, 0]
+    1.5
+    >>> graph[0, 1]
+    inf
+    """
+
+    def __init__(self, graph, fill_value: float = np.inf):
+        if graph.shape[0] != graph.shape[1]:
+            raise ValueError(f"Graph must be square, got shape {graph.shape}")
+        self.graph = graph
+        self.fill_value = fill_value
+
+    @classmethod
+    def from_pairs(
+        cls,
+        n: int,
+        rows,
+        cols,
+        distances,
+        dtype: np.dtype | type = np.float32,
+    ) -> "KnnDistanceGraph":
+        """
+        Build a graph from unique, unordered pairs and their distances.
+
+        Parameters
+        ----------
+        n : int
+            Number of items.
+        rows, cols : array-like of int
+            Pair endpoints; each unordered pair must appear once (e.g. with
+            rows < cols).
+        distances : array-like of float
+            Distance of each pair.
+        dtype : np.dtype or type, default np.float32
+            Data type of the stored distances.
+
+        Returns
+        -------
+        KnnDistanceGraph
+            Graph with both (i, j) and (j, i) stored and a zero diagonal.
+        """
+        from scipy import sparse as sp
+
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        distances = np.asarray(distances, dtype=dtype)
+        diag = np.arange(n, dtype=np.int64)
+        graph = sp.coo_matrix(
+            (
+                np.concatenate([distances, distances, np.zeros(n, dtype=dtype)]),
+                (
+                    np.concatenate([rows, cols, diag]),
+                    np.concatenate([cols, rows, diag]),
+                ),
+            ),
+            shape=(n, n),
+            dtype=dtype,
+        ).tocsr()
+        graph.sort_indices()
+        return cls(graph)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """Shape of the equivalent dense matrix."""
+        return self.graph.shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Data type of the stored distances."""
+        return self.graph.dtype
+
+    @property
+    def data(self) -> np.ndarray:
+        """Stored distances (a view into the CSR data, including the diagonal)."""
+        return self.graph.data
+
+    @property
+    def nnz(self) -> int:
+        """Number of stored entries, including the diagonal."""
+        return int(self.graph.nnz)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the CSR arrays."""
+        g = self.graph
+        return int(g.data.nbytes + g.indices.nbytes + g.indptr.nbytes)
+
+    def neighbors(self, i: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return the stored neighbors of item i (excluding itself) and their distances.
+
+        Returns
+        -------
+        indices : np.ndarray
+            Neighbor indices in increasing order.
+        distances : np.ndarray
+            Matching distances.
+        """
+        g = self.graph
+        lo, hi = g.indptr[i], g.indptr[i + 1]
+        cols = g.indices[lo:hi]
+        keep = cols != i
+        return cols[keep], g.data[lo:hi][keep]
+
+    def to_pairs(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Return the stored pairs once each, as accepted by `from_pairs`.
+
+        Returns
+        -------
+        rows, cols : np.ndarray
+            Pair endpoints with rows < cols, in row-major order.
+        distances : np.ndarray
+            Matching distances.
+        """
+        coo = self.graph.tocoo()
+        upper = coo.row < coo.col
+        return (
+            coo.row[upper].astype(np.int64),
+            coo.col[upper].astype(np.int64),
+            coo.data[upper],
+        )
+
+    def __getitem__(self, key: tuple[int, int]):
+        i, j = (int(x) for x in key)
+        n = self.shape[0]
+        if not (0 <= i < n and 0 <= j < n):
+            raise IndexError(f"Index ({i}, {j}) out of range for shape {self.shape}")
+        if i == j:
+            return self.dtype.type(0)
+        g = self.graph
+        lo, hi = g.indptr[i], g.indptr[i + 1]
+        pos = lo + np.searchsorted(g.indices[lo:hi], j)
+        if pos < hi and g.indices[pos] == j:
+            return g.data[pos]
+        return self.dtype.type(self.fill_value)
+
+    def rows(self, start: int, stop: int, fill_diagonal: float = 0.0) -> np.ndarray:
+        """
+        Expand a contiguous block of rows into a dense array.
+
+        Pairs not in the graph are set to `fill_value`.
+
+        Parameters
+        ----------
+        start, stop : int
+            Row range [start, stop) to expand.
+        fill_diagonal : float, default 0.0
+            Value written to the diagonal entries (e.g. ``np.inf`` for kNN queries).
+
+        Returns
+        -------
+        np.ndarray
+            Freshly allocated array of shape (stop - start, n).
+        """
+        sub = self.graph[start:stop]
+        block = np.full((stop - start, self.shape[1]), self.fill_value, dtype=self.dtype)
+        row_ids = np.repeat(np.arange(stop - start), np.diff(sub.indptr))
+        block[row_ids, sub.indices] = sub.data
+        block[np.arange(stop - start), np.arange(start, stop)] = fill_diagonal
+        return block
+
+    def iter_row_blocks(
+        self, fill_diagonal: float = 0.0, block_rows: int | None = None
+    ) -> Iterator[tuple[int, np.ndarray]]:
+        """
+        Yield (start, rows) pairs covering the matrix in dense row blocks.
+
+        Parameters
+        ----------
+        fill_diagonal : float, default 0.0
+            Value written to the diagonal entries of each block.
+        block_rows : int, optional
+            Rows per block. Defaults to a size that bounds each block to a few MB.
+        """
+        n = self.shape[0]
+        if block_rows is None:
+            block_rows = max(1, _ROW_BLOCK_ELEMENTS // max(1, n))
+        for start in range(0, n, block_rows):
+            stop = min(start + block_rows, n)
+            yield start, self.rows(start, stop, fill_diagonal=fill_diagonal)
+
+    def to_dense(self, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Expand into a dense (n, n) matrix with `fill_value` for missing pairs.
+
+        Parameters
+        ----------
+        out : np.ndarray, optional
+            Destination of shape (n, n), e.g. a memory-mapped ``.npy`` file.
+
+        Returns
+        -------
+        np.ndarray
+            The dense matrix (`out` if provided).
+        """
+        if out is None:
+            out = np.empty(self.shape, dtype=self.dtype)
+        elif out.shape != self.shape:
+            raise ValueError(f"Output shape {out.shape} does not match {self.shape}")
+        for start, block in self.iter_row_blocks():
+            out[start : start + block.shape[0]] = block
+        return out
+
+    def knn(self, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find up to k nearest stored neighbors (excluding self) of every item.
+
+        Only pairs in the graph are considered. Rows with fewer than k stored
+        neighbors are padded with index -1 and distance +Inf. Non-finite stored
+        distances are treated as +Inf and ties are ordered by neighbor index.
+
+        Returns
+        -------
+        nn_idx : np.ndarray
+            Array of shape (n, k) with neighbor indices (-1 for padding).
+        nn_dist : np.ndarray
+            Array of shape (n, k) with the matching distances.
+        """
+        g = self.graph
+        n = self.shape[0]
+        nn_idx = np.full((n, k), -1, dtype=np.intp)
+        nn_dist = np.full((n, k), np.inf, dtype=self.dtype)
+
+        # Sort all stored entries at once by (row, distance, neighbor index)
+        rows = np.repeat(np.arange(n), np.diff(g.indptr))
+        keep = g.indices != rows
+        rows, cols, vals = rows[keep], g.indices[keep], g.data[keep]
+        vals = np.where(np.isfinite(vals), vals, np.inf)
+        order = np.lexsort((cols, vals, rows))
+        rows, cols, vals = rows[order], cols[order], vals[order]
+
+        # Rank of each entry within its row; keep the first k
+        counts = np.bincount(rows, minlength=n)
+        rank = np.arange(len(rows)) - (np.cumsum(counts) - counts)[rows]
+        take = rank < k
+        nn_idx[rows[take], rank[take]] = cols[take]
+        nn_dist[rows[take], rank[take]] = vals[take]
+        return nn_idx, nn_dist
+
+    def __repr__(self) -> str:
+        return f"KnnDistanceGraph(n={self.shape[0]}, nnz={self.nnz}, dtype={self.dtype})"
+
+
+def iter_distance_row_blocks(
+    distance_matrix: "np.ndarray | CondensedDistanceMatrix | KnnDistanceGraph",
+    fill_diagonal: float = 0.0,
+    block_rows: int | None = None,
+) -> Iterator[tuple[int, np.ndarray]]:
+    """
+    Yield (start, rows) blocks of a dense, condensed or graph distance matrix.
+
+    Each block is a fresh, writable array of shape (rows, n) with its diagonal
+    entries set to `fill_diagonal`, so callers can mask it in place without
+    copying the whole matrix.
+
+    Parameters
+    ----------
+    distance_matrix : np.ndarray, CondensedDistanceMatrix or KnnDistanceGraph
+        Square distance matrix of shape (n, n).
+    fill_diagonal : float, default 0.0
+        Value written to the diagonal entries of each block.
+    block_rows : int, optional
+        Rows per block. Defaults to a size that bounds each block to a few MB.
+    """
+    if isinstance(distance_matrix, (CondensedDistanceMatrix, KnnDistanceGraph)):
+        yield from distance_matrix.iter_row_blocks(fill_diagonal, block_rows)
+        return
+    n = distance_matrix.shape[0]
+    if block_rows is None:
+        block_rows = max(1, _ROW_BLOCK_ELEMENTS // max(1, n))
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        block = np.array(distance_matrix[start:stop])
+        block[np.arange(stop - start), np.arange(start, stop)] = fill_diagonal
+        yield start, block
+
+
+def _knn_by_row_blocks(
+    distance_matrix: "np.ndarray | CondensedDistanceMatrix | KnnDistanceGraph", k: int
+) -> tuple[np.ndarray, np.ndarray]:
+    if isinstance(distance_matrix, KnnDistanceGraph):
+        return distance_matrix.knn(k)
+    n = distance_matrix.shape[0]
+    k = min(k, n)
+    nn_idx = np.empty((n, k), dtype=np.intp)
+    nn_dist = np.empty((n, k), dtype=distance_matrix.dtype)
+    for start, block in iter_distance_row_blocks(distance_matrix, fill_diagonal=np.inf):
+        # Replace NaN/-Inf with +Inf so they sort to the end
+        block[~np.isfinite(block)] = np.inf
+        idx = np.argsort(block, axis=1)[:, :k]
+        stop = start + block.shape[0]
+        nn_idx[start:stop] = idx
+        nn_dist[start:stop] = np.take_along_axis(block, idx, axis=1)
+    return nn_idx, nn_dist
+
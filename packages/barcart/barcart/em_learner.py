@@ -1,15 +1,32 @@
 import os
+import time
+
 import numpy as np
 from tqdm.auto import tqdm
 
 from barcart.distance import (
+    _candidate_pairs,
+    cost_submatrix_change,
     emd_matrix,
     emd_matrix_constrained,
     emd_candidates,
     expected_ingredient_match_matrix,
+    knn_matrix,
     manhattan_candidates,
     m_step_blosum,
 )
+from barcart.distance_matrix import CondensedDistanceMatrix, KnnDistanceGraph
+from barcart.transport_plan import TransportPlans
+
+
+# Neighborhood and plan sparsification used to aggregate T_sum in the M-step
+_M_STEP_KWARGS = {
+    "k": 10,
+    "beta": 1.0,
+    "plan_topk": 3,
+    "plan_minfrac": 0.05,
+    "symmetrize": True,
+}
 
 
 def _rss_mb() -> float:
@@ -68,7 +85,12 @@ def em_fit(
     n_jobs: int | None = None,
     candidate_k: int | None = 100,
     return_plans: bool = False,
-) -> tuple[np.ndarray, np.ndarray, dict] | tuple[np.ndarray, np.ndarray, dict, dict]:
+    dense: bool = True,
+    reuse_tolerance: float = 0.0,
+    knn_stability: float | None = None,
+) -> tuple[
+    np.ndarray | CondensedDistanceMatrix | KnnDistanceGraph, np.ndarray, dict
+] | tuple[np.ndarray | CondensedDistanceMatrix | KnnDistanceGraph, np.ndarray, dict, dict]:
     """
     Run EM iterations to learn ingredient cost matrix from recipe data.
 
@@ -96,7 +118,8 @@ def em_fit(
     n_jobs : int | None, optional
         Number of parallel jobs for EMD matrix computation (default: None).
         If None, auto-detects based on available CPUs (cpu_count - 1).
-        Use 1 for sequential execution, >1 for parallel execution.
+        Use 1 for sequential execution, >1 for parallel execution (threads in
+        full mode, worker processes in constrained mode).
         Auto-detection adapts to Lambda memory allocation.
     candidate_k : int | None, optional
         Number of candidate neighbors per recipe for constrained EMD computation.
@@ -104,17 +127,40 @@ def em_fit(
         Default is 100, which provides ~94% speedup with minimal accuracy loss.
         - Iteration 1: Uses Manhattan distance to select top-k candidates
         - Iterations 2+: Uses previous EMD distances to select top-k candidates
+    return_plans : bool, optional
+        If True, also return the transport plans of the final E-step (default: False).
+    dense : bool, optional
+        If True (default), expand the final distances to a dense array. If False,
+        return them in the compact form used between iterations: a
+        CondensedDistanceMatrix in full mode, or a KnnDistanceGraph holding only
+        the computed candidate pairs when candidate_k is set.
+    reuse_tolerance : float, optional
+        Constrained mode only. A candidate pair whose plan was solved in an
+        earlier iteration keeps that plan when no entry of its cost sub-matrix
+        (its source support x target support) moved by more than
+        reuse_tolerance times the largest cost since then; its distance is
+        re-priced at the current costs instead of re-solving the EMD
+        (default: 0.0, always re-solve).
+    knn_stability : float | None, optional
+        If set, also stop once the mean Jaccard similarity of consecutive
+        iterations' kNN sets (the M-step neighborhoods) reaches this value
+        (default: None, only the cost matrix change is checked).
 
     Returns
     -------
-    distance_matrix : np.ndarray
+    distance_matrix : np.ndarray, CondensedDistanceMatrix or KnnDistanceGraph
         Final recipe-by-recipe EMD distance matrix of shape (n_recipes, n_recipes).
-        If candidate_k is set, non-candidate pairs will have value inf.
+        If candidate_k is set, non-candidate pairs will have value inf (dense) or
+        be absent from the graph.
     new_cost_matrix : np.ndarray
         Learned ingredient-by-ingredient cost matrix of shape (n_ingredients, n_ingredients).
     log : dict
-        Dictionary containing convergence history with key 'delta' (list of relative changes).
-    plans : dict
+        Per-iteration history: 'delta' (relative change of the cost matrix),
+        'knn_jaccard' (mean kNN Jaccard similarity to the previous iteration;
+        None for the first, and for every iteration unless knn_stability is
+        set), 'pairs_computed' and 'pairs_reused' (EMDs solved and reused),
+        'e_step_seconds' and 'm_step_seconds' (wall time).
+    plans : TransportPlans
         Transport plans from the final E-step, only returned if return_plans is True.
 
     Notes
@@ -123,7 +169,8 @@ def em_fit(
     1. E-step: Compute EMD distances and extract transport plans between recipes
     2. M-step: Aggregate expected ingredient matches and update cost matrix via BLOSUM
 
-    Convergence is determined by the relative Frobenius norm change in the cost matrix.
+    Convergence is determined by the relative Frobenius norm change in the cost matrix,
+    and optionally by the stability of the recipe kNN sets (`knn_stability`).
 
     When candidate_k is set, the algorithm uses constrained pair selection:
     - Iteration 1: Manhattan distance (cheap) selects top-k candidates per recipe
@@ -172,12 +219,23 @@ def em_fit(
         logger.info(f"EM fit: {n_recipes} recipes, full O(N²) mode ({full_pairs:,} pairs)")
     logger.info(f"EM fit parallelization: detected {cpu_count} CPUs, using n_jobs={n_jobs}")
 
-    log = {"delta": []}
+    log = {
+        "delta": [],
+        "knn_jaccard": [],
+        "pairs_computed": [],
+        "pairs_reused": [],
+        "e_step_seconds": [],
+        "m_step_seconds": [],
+    }
     outer_bar = tqdm(
         range(iters), disable=not verbose, desc="EM fit", position=0, leave=False
     )
     last_plans = None
+    plan_cache = None
+    previous_knn = None
+    knn_k = min(_M_STEP_KWARGS["k"], max(n_recipes - 1, 1))
     for t in outer_bar:
+        e_step_start = time.perf_counter()
         # Show only outer loop progress (convergence), not inner loop (recipe pairs)
         logger.info("EM iter %s RSS before E-step: %.1f MB", t + 1, _rss_mb())
 
@@ -193,11 +251,13 @@ def em_fit(
                 logger.info("EM iter %d: selecting candidates via previous EMD (k=%d)", t + 1, candidate_k)
                 candidates = emd_candidates(distance_matrix, candidate_k)
 
-            distance_matrix, plans = emd_matrix_constrained(
+            distance_matrix, plans, plan_cache, n_reused = _constrained_e_step(
                 volume_matrix,
                 previous_cost_matrix,
                 candidates,
-                return_plans=True,
+                plan_cache,
+                reuse_tolerance,
+                n_jobs,
             )
         else:
             # Full O(N²) mode
@@ -208,42 +268,34 @@ def em_fit(
                 return_plans=True,
                 tqdm_cls=tqdm if progress_enabled else _DisabledTqdm,
                 tqdm_kwargs=None,
+                condensed=True,
             )
+            n_reused = 0
+        log["pairs_computed"].append(len(plans) - n_reused)
+        log["pairs_reused"].append(n_reused)
+        log["e_step_seconds"].append(time.perf_counter() - e_step_start)
 
         logger.info(
-            "EM iter %s: plans=%s total_plan_entries=%s avg_entries=%.2f RSS after E-step: %.1f MB",
+            "EM iter %s: plans=%s total_plan_entries=%s avg_entries=%.2f plan_mb=%.1f RSS after E-step: %.1f MB",
             t + 1,
             len(plans),
-            sum(len(plan) for plan in plans.values()),
-            (sum(len(plan) for plan in plans.values()) / max(1, len(plans))),
+            plans.n_flows,
+            plans.n_flows / max(1, len(plans)),
+            plans.nbytes / 1e6,
             _rss_mb(),
         )
-        if distance_matrix.dtype != np.float32:
-            distance_matrix = distance_matrix.astype(np.float32, copy=False)
+        m_step_start = time.perf_counter()
         T_sum, n_pairs = expected_ingredient_match_matrix(
-            distance_matrix,
-            plans,
-            n_ingredients,
-            k=10,
-            beta=1.0,
-            plan_topk=3,
-            plan_minfrac=0.05,
-            symmetrize=True,
+            distance_matrix, plans, n_ingredients, **_M_STEP_KWARGS
         )
 
         new_cost_matrix = m_step_blosum(T_sum)
         new_cost_matrix = new_cost_matrix.astype(np.float32, copy=False)
+        log["m_step_seconds"].append(time.perf_counter() - m_step_start)
 
         if return_plans:
             last_plans = plans
-
-        # Free plans memory before next iteration
-        if not return_plans:
-            del plans
-        del T_sum
-        import gc
-        gc.collect()
-        logger.info("EM iter %s RSS after gc: %.1f MB", t + 1, _rss_mb())
+        del plans, T_sum
 
         # Convergence check
         num = np.linalg.norm(new_cost_matrix - previous_cost_matrix)
@@ -252,6 +304,25 @@ def em_fit(
         log["delta"].append(float(delta))
         previous_cost_matrix = new_cost_matrix.copy()
 
+        # Neighbor-set stability of the M-step neighborhoods, only when it is checked
+        jaccard = None
+        if knn_stability is not None:
+            knn_idx, _ = knn_matrix(distance_matrix, knn_k)
+            if previous_knn is not None:
+                jaccard = _knn_jaccard(previous_knn, knn_idx)
+            previous_knn = knn_idx
+        log["knn_jaccard"].append(jaccard)
+        logger.info(
+            "EM iter %s: delta=%.4e knn_jaccard=%s computed=%s reused=%s e_step=%.1fs m_step=%.1fs",
+            t + 1,
+            delta,
+            "n/a" if jaccard is None else f"{jaccard:.4f}",
+            log["pairs_computed"][-1],
+            n_reused,
+            log["e_step_seconds"][-1],
+            log["m_step_seconds"][-1],
+        )
+
         if verbose:
             print(f"[iter {t + 1:02d}] pairs={n_pairs} delta={delta:.4e}")
 
@@ -259,7 +330,248 @@ def em_fit(
             if verbose:
                 print("Converged.")
             break
+        if knn_stability is not None and jaccard is not None and jaccard >= knn_stability:
+            if verbose:
+                print("Neighbor sets stable.")
+            break
 
+    if dense:
+        distance_matrix = distance_matrix.to_dense()
     if return_plans:
-        return distance_matrix, new_cost_matrix, log, (last_plans or {})
+        return distance_matrix, new_cost_matrix, log, (last_plans or TransportPlans.empty())
     return distance_matrix, new_cost_matrix, log
+
+
+def _constrained_e_step(
+    volume_matrix,
+    cost_matrix: np.ndarray,
+    candidates: dict[int, np.ndarray],
+    plan_cache: dict | None,
+    reuse_tolerance: float,
+    n_jobs: int,
+) -> tuple[KnnDistanceGraph, TransportPlans, dict, int]:
+    """
+    Constrained E-step that reuses still-valid plans of earlier iterations.
+
+    `plan_cache` holds the previous E-step's 'plans', the cost matrices they were
+    solved with ('costs') and, per pair, the index of its matrix ('solved_with').
+    A cached pair is reused when its cost sub-matrix moved by at most
+    reuse_tolerance times the largest cost of that matrix; its flows are kept
+    and re-priced at `cost_matrix`. Returns the distance graph, the plans, the
+    updated cache and the number of reused pairs.
+    """
+    n_recipes = volume_matrix.shape[0]
+    pairs = _candidate_pairs(candidates)
+    reuse = np.zeros(len(pairs), dtype=bool)
+    solved_with = np.full(len(pairs), -1, dtype=np.int64)
+    costs = [] if plan_cache is None else plan_cache["costs"]
+
+    if plan_cache is not None and reuse_tolerance > 0 and len(pairs):
+        positions = plan_cache["plans"].find(pairs[:, 0], pairs[:, 1])
+        cached = positions >= 0
+        solved_with[cached] = plan_cache["solved_with"][positions[cached]]
+        for g in np.unique(solved_with[cached]):
+            selected = solved_with == g
+            reference = costs[g]
+            change = cost_submatrix_change(volume_matrix, pairs[selected], cost_matrix, reference)
+            reuse[selected] = change <= reuse_tolerance * float(np.abs(reference).max())
+
+    new_graph, new_plans = emd_matrix_constrained(
+        volume_matrix,
+        cost_matrix,
+        pairs[~reuse],
+        return_plans=True,
+        sparse=True,
+        n_jobs=n_jobs,
+    )
+    new_rows, new_cols, new_distances = new_graph.to_pairs()
+    if not reuse.any():
+        graph, plans = new_graph, new_plans
+    else:
+        reused = plan_cache["plans"].take(positions[reuse])
+        reused = TransportPlans(
+            reused.pairs,
+            reused.offsets,
+            reused.from_idx,
+            reused.to_idx,
+            reused.mass,
+            reused.mass * cost_matrix[reused.from_idx, reused.to_idx],
+        )
+        reused_distances = np.bincount(
+            reused.flow_pairs(), weights=reused.cost, minlength=len(reused)
+        )
+        graph = KnnDistanceGraph.from_pairs(
+            n_recipes,
+            np.concatenate([reused.pairs[:, 0], new_rows]),
+            np.concatenate([reused.pairs[:, 1], new_cols]),
+            np.concatenate([reused_distances, new_distances]),
+            dtype=cost_matrix.dtype,
+        )
+        plans = TransportPlans.concatenate([reused, new_plans])
+
+    # Cost matrix each plan was solved with (plans.pairs is the same sorted pair
+    # list as `pairs`); drop matrices no plan refers to anymore
+    solved_with[~reuse] = len(costs)
+    costs = costs + [cost_matrix]
+    used, solved_with = np.unique(solved_with, return_inverse=True)
+    plan_cache = {
+        "plans": plans,
+        "costs": [costs[g] for g in used],
+        "solved_with": solved_with.reshape(-1),
+    }
+    return graph, plans, plan_cache, int(reuse.sum())
+
+
+def _knn_jaccard(previous: np.ndarray, current: np.ndarray) -> float:
+    """Mean Jaccard similarity of the rows of two (n, k) kNN index arrays (-1 = padding)."""
+    n = len(current)
+    if n == 0:
+        return 1.0
+
+    def keys(nn_idx):
+        rows = np.repeat(np.arange(n, dtype=np.int64), nn_idx.shape[1])
+        cols = nn_idx.reshape(-1).astype(np.int64)
+        valid = cols >= 0
+        return rows[valid] * n + cols[valid], rows[valid]
+
+    previous_keys, previous_rows = keys(previous)
+    current_keys, current_rows = keys(current)
+    common = np.isin(current_keys, previous_keys)
+    intersection = np.bincount(current_rows[common], minlength=n)
+    union = (
+        np.bincount(previous_rows, minlength=n)
+        + np.bincount(current_rows, minlength=n)
+        - intersection
+    )
+    jaccard = np.divide(
+        intersection, union, out=np.ones(n, dtype=np.float64), where=union > 0
+    )
+    return float(jaccard.mean())
+
+
+def em_refit(
+    volume_matrix: np.ndarray,
+    cost_matrix: np.ndarray,
+    distance_graph: KnnDistanceGraph,
+    plans: TransportPlans,
+    changed: np.ndarray,
+    n_ingredients: int,
+    candidate_k: int = 100,
+    n_jobs: int | None = None,
+) -> tuple[KnnDistanceGraph, np.ndarray, dict, TransportPlans]:
+    """
+    Warm-started, incremental EM refit after a small catalog change.
+
+    Instead of re-running `em_fit` from the prior, this starts from the state
+    of a previous constrained fit: its learned cost matrix, its distance graph
+    and its transport plans, re-indexed to the current recipes. Only the pairs
+    involving new or changed recipes are recomputed, then one M-step is run
+    over the merged plans.
+
+    Parameters
+    ----------
+    volume_matrix : np.ndarray or sparse matrix
+        Current recipe-by-ingredient volume matrix of shape (n_recipes, n_ingredients).
+    cost_matrix : np.ndarray
+        Learned ingredient cost matrix of the previous fit, shape
+        (n_ingredients, n_ingredients). Used for the new EMDs (warm start).
+    distance_graph : KnnDistanceGraph
+        Distances of the previous fit in current recipe indices, shape
+        (n_recipes, n_recipes). Pairs involving `changed` recipes are dropped.
+    plans : TransportPlans
+        Transport plans of the previous fit in current recipe indices. Pairs
+        involving `changed` recipes are dropped.
+    changed : np.ndarray
+        Indices of recipes that are new or whose ingredients changed.
+    n_ingredients : int
+        Number of ingredients.
+    candidate_k : int, optional
+        Number of Manhattan candidates per changed recipe (default: 100).
+    n_jobs : int | None, optional
+        Number of worker processes for the new EMDs (default: None, auto-detect).
+
+    Returns
+    -------
+    distance_graph : KnnDistanceGraph
+        Previous distances merged with the recomputed pairs.
+    new_cost_matrix : np.ndarray
+        Cost matrix after the warm-started M-step.
+    log : dict
+        'changed' (number of changed recipes) and one-element lists with the
+        same per-iteration keys as `em_fit`: 'delta', 'pairs_computed' (new
+        EMDs), 'pairs_reused' (pairs kept from the previous fit),
+        'e_step_seconds' and 'm_step_seconds'.
+    plans : TransportPlans
+        Previous plans merged with the plans of the recomputed pairs.
+    """
+    import logging
+
+    logger = logging.getLogger(__name__)
+    if n_jobs is None:
+        n_jobs = _get_optimal_n_jobs()
+
+    from scipy import sparse as sp
+
+    if sp.issparse(volume_matrix):
+        if volume_matrix.dtype != np.float32:
+            volume_matrix = volume_matrix.astype(np.float32)
+    else:
+        volume_matrix = np.asarray(volume_matrix, dtype=np.float32)
+    cost_matrix = np.asarray(cost_matrix, dtype=np.float32)
+    n_recipes = volume_matrix.shape[0]
+    changed = np.unique(np.asarray(changed, dtype=np.int64))
+    is_changed = np.zeros(n_recipes, dtype=bool)
+    is_changed[changed] = True
+
+    # Keep the previous pairs that do not involve a changed recipe
+    rows, cols, distances = distance_graph.to_pairs()
+    kept = ~(is_changed[rows] | is_changed[cols])
+    plans = plans.take(~(is_changed[plans.pairs[:, 0]] | is_changed[plans.pairs[:, 1]]))
+
+    # E-step for the changed recipes only
+    e_step_start = time.perf_counter()
+    candidates = manhattan_candidates(volume_matrix, candidate_k, rows=changed)
+    new_graph, new_plans = emd_matrix_constrained(
+        volume_matrix,
+        cost_matrix,
+        candidates,
+        return_plans=True,
+        sparse=True,
+        n_jobs=n_jobs,
+    )
+    new_rows, new_cols, new_distances = new_graph.to_pairs()
+    logger.info(
+        "EM refit: %d changed recipes, %d new pairs, %d kept pairs",
+        len(changed),
+        len(new_rows),
+        int(kept.sum()),
+    )
+    plans = TransportPlans.concatenate([plans, new_plans])
+    distance_graph = KnnDistanceGraph.from_pairs(
+        n_recipes,
+        np.concatenate([rows[kept], new_rows]),
+        np.concatenate([cols[kept], new_cols]),
+        np.concatenate([distances[kept], new_distances]),
+        dtype=cost_matrix.dtype,
+    )
+
+    e_step_seconds = time.perf_counter() - e_step_start
+
+    # Warm-started M-step over the merged plans
+    m_step_start = time.perf_counter()
+    T_sum, _ = expected_ingredient_match_matrix(
+        distance_graph, plans, n_ingredients, **_M_STEP_KWARGS
+    )
+    new_cost_matrix = m_step_blosum(T_sum).astype(np.float32, copy=False)
+    delta = np.linalg.norm(new_cost_matrix - cost_matrix) / (np.linalg.norm(cost_matrix) + 1e-12)
+    logger.info("EM refit: delta=%.4e", delta)
+
+    log = {
+        "delta": [float(delta)],
+        "changed": int(len(changed)),
+        "pairs_computed": [int(len(new_rows))],
+        "pairs_reused": [int(kept.sum())],
+        "e_step_seconds": [e_step_seconds],
+        "m_step_seconds": [time.perf_counter() - m_step_start],
+    }
+    return distance_graph, new_cost_matrix, log, plans
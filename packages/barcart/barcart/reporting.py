@@ -2,11 +2,13 @@ import numpy as np
 import pandas as pd
 
 from barcart.distance import knn_matrix
+from barcart.distance_matrix import CondensedDistanceMatrix, KnnDistanceGraph
 from barcart.registry import Registry
+from barcart.transport_plan import TransportPlans
 
 
 def report_neighbors(
-    distance_matrix: np.ndarray,
+    distance_matrix: np.ndarray | CondensedDistanceMatrix | KnnDistanceGraph,
     registry: "Registry",
     k: int,
 ) -> pd.DataFrame:
@@ -18,7 +20,7 @@ def report_neighbors(
 
     Parameters
     ----------
-    distance_matrix : np.ndarray
+    distance_matrix : np.ndarray, CondensedDistanceMatrix or KnnDistanceGraph
         Pairwise distance matrix (n, n) where n = len(registry).
         For ingredients: typically tree-based cost matrix.
         For recipes: typically EMD-based distance matrix.
@@ -59,6 +61,8 @@ def report_neighbors(
         entity_name = registry.get_name(index=idx)
 
         for neighbor_idx, dist in zip(nn_idx[idx], nn_dist[idx], strict=False):
+            if neighbor_idx < 0:
+                continue
             n_idx = int(neighbor_idx)
             neighbor_id = registry.get_id(index=n_idx)
             neighbor_name = registry.get_name(index=n_idx)
@@ -77,16 +81,18 @@ def report_neighbors(
 
 
 def build_recipe_similarity(
-    distance_matrix: np.ndarray,
-    plans: dict[tuple[int, int], list[tuple[int, int, float, float]]],
+    distance_matrix: np.ndarray | CondensedDistanceMatrix | KnnDistanceGraph,
+    plans: TransportPlans | dict[tuple[int, int], list[tuple[int, int, float, float]]],
     recipe_registry: "Registry",
     ingredient_registry: "Registry",
     k: int = 4,
     plan_topk: int = 3,
-    candidate_pairs: set[tuple[int, int]] | None = None,
+    candidate_pairs: np.ndarray | set[tuple[int, int]] | None = None,
 ) -> list[dict[str, object]]:
     """Build recipe similarity entries with transport plan summaries."""
     recipe_registry.validate_matrix(distance_matrix)
+    if not isinstance(plans, TransportPlans):
+        plans = TransportPlans.from_dict(plans)
 
     n_recipes = distance_matrix.shape[0]
     k = min(k, max(0, n_recipes - 1))
@@ -94,17 +100,16 @@ def build_recipe_similarity(
     nn_dist = None
 
     if k > 0 and candidate_pairs is None:
-        dmat = distance_matrix.copy()
-        np.fill_diagonal(dmat, np.inf)
-        nn_idx = np.argsort(dmat, axis=1)[:, :k]
-        nn_dist = np.take_along_axis(dmat, nn_idx, axis=1)
+        nn_idx, nn_dist = knn_matrix(distance_matrix, k)
 
     candidate_neighbors = None
     if candidate_pairs is not None:
         candidate_neighbors = {idx: [] for idx in range(n_recipes)}
-        for i, j in candidate_pairs:
-            candidate_neighbors[int(i)].append(int(j))
-            candidate_neighbors[int(j)].append(int(i))
+        if isinstance(candidate_pairs, set):
+            candidate_pairs = list(candidate_pairs)
+        for i, j in np.asarray(candidate_pairs, dtype=np.int64).reshape(-1, 2).tolist():
+            candidate_neighbors[i].append(j)
+            candidate_neighbors[j].append(i)
 
     results: list[dict[str, object]] = []
     for idx in range(n_recipes):
@@ -124,38 +129,9 @@ def build_recipe_similarity(
                 for neighbor_idx, dist in selected:
                     neighbor_id = int(recipe_registry.get_id(index=neighbor_idx))
                     neighbor_name = recipe_registry.get_name(index=neighbor_idx)
-                    # Plans are stored for (i, j) where i < j
-                    # If idx > neighbor_idx, from/to are reversed relative to current recipe
-                    swap_direction = idx > neighbor_idx
-                    i, j = (
-                        (idx, neighbor_idx)
-                        if idx < neighbor_idx
-                        else (neighbor_idx, idx)
+                    transport_plan = _transport_plan_summary(
+                        plans, idx, neighbor_idx, ingredient_registry, plan_topk
                     )
-                    plan = plans.get((i, j), [])
-                    # Filter out self-transport (same ingredient to same ingredient)
-                    plan_filtered = [p for p in plan if p[0] != p[1]]
-                    plan_sorted = sorted(
-                        plan_filtered, key=lambda item: item[2], reverse=True
-                    )[:plan_topk]
-                    transport_plan = [
-                        {
-                            "from_ingredient_id": int(
-                                ingredient_registry.get_id(index=int(to_idx if swap_direction else from_idx))
-                            ),
-                            "from_ingredient_name": ingredient_registry.get_name(
-                                index=int(to_idx if swap_direction else from_idx)
-                            ),
-                            "to_ingredient_id": int(
-                                ingredient_registry.get_id(index=int(from_idx if swap_direction else to_idx))
-                            ),
-                            "to_ingredient_name": ingredient_registry.get_name(
-                                index=int(from_idx if swap_direction else to_idx)
-                            ),
-                            "mass": float(amount),
-                        }
-                        for from_idx, to_idx, amount, _ in plan_sorted
-                    ]
 
                     neighbors.append(
                         {
@@ -167,39 +143,14 @@ def build_recipe_similarity(
                     )
         elif k > 0 and nn_idx is not None and nn_dist is not None:
             for neighbor_idx, dist in zip(nn_idx[idx], nn_dist[idx], strict=False):
+                if neighbor_idx < 0:
+                    continue
                 neighbor_idx = int(neighbor_idx)
                 neighbor_id = int(recipe_registry.get_id(index=neighbor_idx))
                 neighbor_name = recipe_registry.get_name(index=neighbor_idx)
-                # Plans are stored for (i, j) where i < j
-                # If idx > neighbor_idx, from/to are reversed relative to current recipe
-                swap_direction = idx > neighbor_idx
-                i, j = (
-                    (idx, neighbor_idx) if idx < neighbor_idx else (neighbor_idx, idx)
+                transport_plan = _transport_plan_summary(
+                    plans, idx, neighbor_idx, ingredient_registry, plan_topk
                 )
-                plan = plans.get((i, j), [])
-                # Filter out self-transport (same ingredient to same ingredient)
-                plan_filtered = [p for p in plan if p[0] != p[1]]
-                plan_sorted = sorted(
-                    plan_filtered, key=lambda item: item[2], reverse=True
-                )[:plan_topk]
-                transport_plan = [
-                    {
-                        "from_ingredient_id": int(
-                            ingredient_registry.get_id(index=int(to_idx if swap_direction else from_idx))
-                        ),
-                        "from_ingredient_name": ingredient_registry.get_name(
-                            index=int(to_idx if swap_direction else from_idx)
-                        ),
-                        "to_ingredient_id": int(
-                            ingredient_registry.get_id(index=int(from_idx if swap_direction else to_idx))
-                        ),
-                        "to_ingredient_name": ingredient_registry.get_name(
-                            index=int(from_idx if swap_direction else to_idx)
-                        ),
-                        "mass": float(amount),
-                    }
-                    for from_idx, to_idx, amount, _ in plan_sorted
-                ]
 
                 neighbors.append(
                     {
@@ -219,3 +170,31 @@ def build_recipe_similarity(
         )
 
     return results
+
+
+def _transport_plan_summary(
+    plans: TransportPlans,
+    idx: int,
+    neighbor_idx: int,
+    ingredient_registry: "Registry",
+    plan_topk: int,
+) -> list[dict[str, object]]:
+    """Largest flows of the plan between two recipes, oriented from `idx`."""
+    from_idx, to_idx, amounts, _ = plans.get(idx, neighbor_idx)
+    # Plans are stored for (i, j) where i < j
+    # If idx > neighbor_idx, from/to are reversed relative to current recipe
+    if idx > neighbor_idx:
+        from_idx, to_idx = to_idx, from_idx
+    # Filter out self-transport (same ingredient to same ingredient)
+    moved = np.flatnonzero(from_idx != to_idx)
+    top = moved[np.argsort(-amounts[moved], kind="stable")][:plan_topk]
+    return [
+        {
+            "from_ingredient_id": int(ingredient_registry.get_id(index=int(from_idx[n]))),
+            "from_ingredient_name": ingredient_registry.get_name(index=int(from_idx[n])),
+            "to_ingredient_id": int(ingredient_registry.get_id(index=int(to_idx[n]))),
+            "to_ingredient_name": ingredient_registry.get_name(index=int(to_idx[n])),
+            "mass": float(amounts[n]),
+        }
+        for n in top
+    ]
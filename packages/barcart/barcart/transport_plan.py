@@ -0,0 +1,309 @@
+"""Compact storage for the transport plans of many recipe pairs."""
+
+from collections.abc import Iterable, Mapping
+
+import numpy as np
+
+
+class TransportPlans:
+    """
+    Transport plans of many recipe pairs stored as flat CSR-style arrays.
+
+    Plans are keyed by recipe pair (i, j) with i < j; pairs are unique and kept
+    in lexicographic order. The flows of the n-th pair live at positions
+    ``offsets[n]:offsets[n + 1]`` of the flow arrays, each flow moving `mass`
+    from ingredient `from_idx` of recipe i to ingredient `to_idx` of recipe j
+    at total cost `cost` (mass * per-unit cost). Compared with a dict of
+    per-pair lists of tuples this needs no Python object per flow, and
+    consumers can process all flows with vectorized NumPy operations.
+
+    Parameters
+    ----------
+    pairs : np.ndarray
+        Recipe pairs of shape (m, 2), unique, i < j, lexicographically sorted.
+    offsets : np.ndarray
+        Flow offsets of shape (m + 1,), starting at 0.
+    from_idx, to_idx : np.ndarray
+        Ingredient indices of each flow, shape (n_flows,).
+    mass, cost : np.ndarray
+        Transported mass and its cost for each flow, shape (n_flows,).
+
+    Examples
+    --------
+    >>> plans = TransportPlans.from_dict({(0, 1): [(0, 1, 0.5, 0.1)]})
+    >>> len(plans), plans.n_flows
+    (1, 1)
+    >>> plans.get(1, 0)
+    (array([0], dtype=int32), array([1], dtype=int32), array([0.5]), array([0.1]))
+    """
+
+    def __init__(
+        self,
+        pairs: np.ndarray,
+        offsets: np.ndarray,
+        from_idx: np.ndarray,
+        to_idx: np.ndarray,
+        mass: np.ndarray,
+        cost: np.ndarray,
+    ):
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        if offsets.shape != (len(pairs) + 1,):
+            raise ValueError(
+                f"offsets must have shape ({len(pairs) + 1},), got {offsets.shape}"
+            )
+        n_flows = int(offsets[-1])
+        for name, values in (
+            ("from_idx", from_idx),
+            ("to_idx", to_idx),
+            ("mass", mass),
+            ("cost", cost),
+        ):
+            if len(values) != n_flows:
+                raise ValueError(f"{name} must have {n_flows} flows, got {len(values)}")
+        self.pairs = pairs
+        self.offsets = offsets
+        self.from_idx = np.asarray(from_idx, dtype=np.int32)
+        self.to_idx = np.asarray(to_idx, dtype=np.int32)
+        self.mass = np.asarray(mass, dtype=np.float64)
+        self.cost = np.asarray(cost, dtype=np.float64)
+
+    @classmethod
+    def empty(cls) -> "TransportPlans":
+        """Store without any pairs."""
+        return cls(
+            np.empty((0, 2), dtype=np.int64),
+            np.zeros(1, dtype=np.int64),
+            np.empty(0, dtype=np.int32),
+            np.empty(0, dtype=np.int32),
+            np.empty(0, dtype=np.float64),
+            np.empty(0, dtype=np.float64),
+        )
+
+    @classmethod
+    def from_flows(
+        cls, pairs: np.ndarray, flows: tuple[np.ndarray, ...]
+    ) -> "TransportPlans":
+        """
+        Build a store from the CSR-style flows returned by `emd_batch`.
+
+        Parameters
+        ----------
+        pairs : np.ndarray
+            Recipe pairs of shape (m, 2) in the order the flows were computed.
+            Pairs with i > j are flipped to (j, i) and their flows reversed.
+        flows : tuple of np.ndarray
+            (offsets, from_idx, to_idx, mass, cost) as returned by `emd_batch`.
+
+        Returns
+        -------
+        TransportPlans
+            Store with pairs sorted and oriented i < j.
+
+        Raises
+        ------
+        ValueError
+            If a pair appears more than once.
+        """
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        offsets, from_idx, to_idx, mass, cost = flows
+        lengths = np.diff(offsets)
+
+        flipped = pairs[:, 0] > pairs[:, 1]
+        if flipped.any():
+            flow_flipped = np.repeat(flipped, lengths)
+            from_idx, to_idx = (
+                np.where(flow_flipped, to_idx, from_idx),
+                np.where(flow_flipped, from_idx, to_idx),
+            )
+            pairs = np.sort(pairs, axis=1)
+
+        order = np.lexsort((pairs[:, 1], pairs[:, 0]))
+        pairs = pairs[order]
+        if len(pairs) > 1 and (np.diff(pairs, axis=0) == 0).all(axis=1).any():
+            raise ValueError("Transport plans contain duplicate recipe pairs")
+
+        if not np.array_equal(order, np.arange(len(order))):
+            # Gather the flow segments in the new pair order
+            lengths = lengths[order]
+            new_offsets = np.concatenate([[0], np.cumsum(lengths)])
+            positions = np.repeat(offsets[:-1][order] - new_offsets[:-1], lengths)
+            positions += np.arange(len(positions))
+            offsets = new_offsets
+            from_idx, to_idx = from_idx[positions], to_idx[positions]
+            mass, cost = mass[positions], cost[positions]
+
+        return cls(pairs, offsets, from_idx, to_idx, mass, cost)
+
+    @classmethod
+    def concatenate(cls, parts: Iterable["TransportPlans"]) -> "TransportPlans":
+        """Merge stores holding disjoint sets of pairs."""
+        parts = list(parts)
+        if not parts:
+            return cls.empty()
+        pairs = np.concatenate([part.pairs for part in parts])
+        lengths = np.concatenate([np.diff(part.offsets) for part in parts])
+        flows = (
+            np.concatenate([[0], np.cumsum(lengths)]),
+            np.concatenate([part.from_idx for part in parts]),
+            np.concatenate([part.to_idx for part in parts]),
+            np.concatenate([part.mass for part in parts]),
+            np.concatenate([part.cost for part in parts]),
+        )
+        return cls.from_flows(pairs, flows)
+
+    @classmethod
+    def from_dict(
+        cls, plans: Mapping[tuple[int, int], list[tuple[int, int, float, float]]]
+    ) -> "TransportPlans":
+        """
+        Build a store from a dict of per-pair plans.
+
+        Parameters
+        ----------
+        plans : Mapping[tuple[int, int], list[tuple[int, int, float, float]]]
+            Mapping from recipe pair (i, j) with i < j to its flows, either as a
+            list of (from_idx, to_idx, mass, cost) tuples or as the tuple of four
+            arrays returned by `compute_emd`.
+
+        Returns
+        -------
+        TransportPlans
+        """
+        pairs = np.array(list(plans.keys()), dtype=np.int64).reshape(-1, 2)
+        columns = []
+        for plan in plans.values():
+            if isinstance(plan, tuple):
+                columns.append(np.column_stack(plan) if len(plan[0]) else np.empty((0, 4)))
+            else:
+                columns.append(np.asarray(plan, dtype=np.float64).reshape(-1, 4))
+        lengths = np.array([len(c) for c in columns], dtype=np.int64)
+        flows = np.concatenate(columns) if columns else np.empty((0, 4))
+        return cls.from_flows(
+            pairs,
+            (
+                np.concatenate([[0], np.cumsum(lengths)]),
+                flows[:, 0].astype(np.int64),
+                flows[:, 1].astype(np.int64),
+                flows[:, 2],
+                flows[:, 3],
+            ),
+        )
+
+    def take(self, positions) -> "TransportPlans":
+        """
+        Store holding only the pairs at the given positions.
+
+        Parameters
+        ----------
+        positions : array-like of int or bool
+            Indices into `pairs`, or a boolean mask over them.
+
+        Returns
+        -------
+        TransportPlans
+        """
+        positions = np.arange(len(self))[np.asarray(positions)]
+        lengths = np.diff(self.offsets)[positions]
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        flow_positions = np.repeat(self.offsets[positions] - offsets[:-1], lengths)
+        flow_positions += np.arange(len(flow_positions))
+        return TransportPlans.from_flows(
+            self.pairs[positions],
+            (
+                offsets,
+                self.from_idx[flow_positions],
+                self.to_idx[flow_positions],
+                self.mass[flow_positions],
+                self.cost[flow_positions],
+            ),
+        )
+
+    def to_dict(self) -> dict[tuple[int, int], list[tuple[int, int, float, float]]]:
+        """Expand into a dict of per-pair lists of tuples (for inspection and tests)."""
+        from_idx, to_idx = self.from_idx.tolist(), self.to_idx.tolist()
+        mass, cost = self.mass.tolist(), self.cost.tolist()
+        offsets = self.offsets.tolist()
+        return {
+            (i, j): list(
+                zip(
+                    from_idx[offsets[n] : offsets[n + 1]],
+                    to_idx[offsets[n] : offsets[n + 1]],
+                    mass[offsets[n] : offsets[n + 1]],
+                    cost[offsets[n] : offsets[n + 1]],
+                    strict=True,
+                )
+            )
+            for n, (i, j) in enumerate(self.pairs.tolist())
+        }
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    @property
+    def n_flows(self) -> int:
+        """Total number of stored flows."""
+        return int(self.offsets[-1])
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the stored arrays."""
+        return sum(
+            a.nbytes
+            for a in (self.pairs, self.offsets, self.from_idx, self.to_idx, self.mass, self.cost)
+        )
+
+    def find(self, rows, cols) -> np.ndarray:
+        """
+        Positions of the unordered pairs (rows[n], cols[n]) in `pairs`.
+
+        Parameters
+        ----------
+        rows, cols : array-like of int
+            Pair endpoints, in either order.
+
+        Returns
+        -------
+        np.ndarray
+            Index of each pair in `pairs`, or -1 where the pair has no plan.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        lo, hi = np.minimum(rows, cols), np.maximum(rows, cols)
+        if len(self.pairs) == 0 or lo.size == 0:
+            return np.full(lo.shape, -1, dtype=np.int64)
+        # Encode pairs as i * base + j; both key arrays are sorted the same way
+        base = max(int(self.pairs.max()), int(hi.max())) + 1
+        keys = self.pairs[:, 0] * base + self.pairs[:, 1]
+        query = lo * base + hi
+        positions = np.searchsorted(keys, query)
+        positions = np.minimum(positions, len(keys) - 1)
+        return np.where(keys[positions] == query, positions, -1)
+
+    def __contains__(self, pair: tuple[int, int]) -> bool:
+        return bool(self.find([pair[0]], [pair[1]])[0] >= 0)
+
+    def get(self, i: int, j: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Flows of the plan for the unordered pair (i, j).
+
+        Returns
+        -------
+        tuple of np.ndarray
+            (from_idx, to_idx, mass, cost) views as stored for (min(i, j), max(i, j)),
+            i.e. from the lower-indexed recipe to the higher one. Empty arrays if
+            the pair has no plan.
+        """
+        n = int(self.find([i], [j])[0])
+        if n < 0:
+            lo = hi = 0
+        else:
+            lo, hi = self.offsets[n], self.offsets[n + 1]
+        return self.from_idx[lo:hi], self.to_idx[lo:hi], self.mass[lo:hi], self.cost[lo:hi]
+
+    def flow_pairs(self) -> np.ndarray:
+        """Index into `pairs` of every flow, shape (n_flows,)."""
+        return np.repeat(np.arange(len(self.pairs)), np.diff(self.offsets))
+
+    def __repr__(self) -> str:
+        return f"TransportPlans(pairs={len(self)}, flows={self.n_flows})"
@@ -1,8 +1,24 @@
 """Tests for distance computation functions."""
 
-import numpy as np
+import random
 
-from barcart.distance import expected_ingredient_match_matrix, m_step_blosum
+import numpy as np
+import pytest
+
+from barcart.distance import (
+    build_ingredient_distance_matrix,
+    compute_emd,
+    cost_submatrix_change,
+    emd_batch,
+    emd_matrix_constrained,
+    expected_ingredient_match_matrix,
+    m_step_blosum,
+    manhattan_candidates,
+    manhattan_knn_graph,
+    weighted_distance,
+)
+from barcart.distance_matrix import KnnDistanceGraph
+from barcart.transport_plan import TransportPlans
 
 
 class TestExpectedIngredientMatchMatrix:
@@ -130,6 +146,47 @@ class TestExpectedIngredientMatchMatrix:
         assert T_sum_minfrac.shape == (3, 3)
 
 
+class TestExpectedIngredientMatchAggregation:
+    """Test the vectorized aggregation against a per-pair reference loop."""
+
+    @staticmethod
+    def _reference(distance_matrix, plans, n_ingredients, k, beta, topk, minfrac):
+        from barcart.distance import knn_matrix
+
+        nn_idx, nn_dist = knn_matrix(distance_matrix, k)
+        T_sum = np.zeros((n_ingredients, n_ingredients))
+        for r in range(distance_matrix.shape[0]):
+            w = np.exp(-beta * (nn_dist[r] - nn_dist[r].min()))
+            w /= w.sum()
+            for w_rs, s in zip(w, nn_idx[r], strict=True):
+                plan = plans.get((min(r, s), max(r, s)), [])
+                plan = sorted(plan, key=lambda x: x[2], reverse=True)
+                if plan:
+                    plan = [p for p in plan if p[2] >= plan[0][2] * minfrac][:topk]
+                for ii, jj, amount, _ in plan:
+                    T_sum[ii, jj] += w_rs * amount
+        return 0.5 * (T_sum + T_sum.T)
+
+    @pytest.mark.parametrize("topk,minfrac", [(None, 0.0), (2, 0.0), (3, 0.3)])
+    def test_matches_reference_loop(self, topk, minfrac):
+        volume, cost = _random_recipes(30, 12, seed=3)
+        pairs = np.array([(i, j) for i in range(30) for j in range(i + 1, 30)])
+        _, flows = emd_batch(volume, cost, pairs, return_plans=True)
+        plans = TransportPlans.from_flows(pairs, flows)
+        distances = np.zeros((30, 30), dtype=np.float32)
+        distances[pairs[:, 0], pairs[:, 1]] = distances[pairs[:, 1], pairs[:, 0]] = (
+            np.random.default_rng(0).random(len(pairs))
+        )
+
+        T_sum, n_pairs = expected_ingredient_match_matrix(
+            distances, plans, 12, k=4, beta=2.0, plan_topk=topk, plan_minfrac=minfrac
+        )
+        expected = self._reference(distances, plans.to_dict(), 12, 4, 2.0, topk, minfrac)
+
+        assert n_pairs == 30 * 4
+        np.testing.assert_allclose(T_sum, expected, rtol=1e-5, atol=1e-7)
+
+
 class TestMStepBlosum:
     """Test m_step_blosum function."""
 
@@ -269,6 +326,331 @@ class TestMStepBlosum:
         assert np.std(C_new[~np.eye(m, dtype=bool)]) > 0
 
 
+class TestBuildIngredientDistanceMatrix:
+    """Test the vectorized tree distance matrix against weighted_distance."""
+
+    @pytest.mark.parametrize("seed", range(3))
+    def test_matches_weighted_distance(self, seed):
+        """Every entry should equal the pairwise weighted tree distance."""
+        rng = random.Random(seed)
+        parent_map = {"root": (None, 0.0)}
+        for i in range(60):
+            parent = rng.choice(list(parent_map))
+            parent_map[str(i)] = (parent, rng.choice([0.3, 0.5, 1.0, 2.0]))
+
+        matrix, registry = build_ingredient_distance_matrix(parent_map, {})
+
+        ids = [registry.get_id(index=i) for i in range(len(registry))]
+        for u in ids[::7]:
+            for v in ids[::5]:
+                expected = 0.0 if u == v else weighted_distance(u, v, parent_map)
+                assert matrix[registry.get_index(id=u), registry.get_index(id=v)] == pytest.approx(expected)
+        np.testing.assert_array_equal(matrix, matrix.T)
+        np.testing.assert_array_equal(np.diag(matrix), 0.0)
+
+    def test_dtype_and_missing_parent(self):
+        """A parent absent from the map acts as the shared root."""
+        parent_map = {"a": ("x", 1.0), "b": ("x", 2.0), "c": ("a", 0.5)}
+
+        matrix, _ = build_ingredient_distance_matrix(parent_map, {}, dtype=np.float32)
+
+        assert matrix.dtype == np.float32
+        np.testing.assert_allclose(
+            matrix, [[0.0, 3.0, 0.5], [3.0, 0.0, 3.5], [0.5, 3.5, 0.0]]
+        )
+
+    def test_disconnected_nodes_raise(self):
+        """Nodes without a common ancestor should raise like weighted_distance."""
+        parent_map = {"a": (None, 0.0), "b": (None, 0.0)}
+
+        with pytest.raises(KeyError, match="common ancestor"):
+            build_ingredient_distance_matrix(parent_map, {})
+
+
+class TestEmdMatrixConstrained:
+    """Test constrained EMD computation across worker processes."""
+
+    def test_parallel_matches_sequential(self):
+        """Worker processes should return the same distances and plans."""
+        import scipy.sparse as sp
+
+        rng = np.random.default_rng(0)
+        n_recipes, n_ingredients = 120, 15
+        volume = np.zeros((n_recipes, n_ingredients), dtype=np.float32)
+        for r in range(n_recipes):
+            support = rng.choice(n_ingredients, size=rng.integers(3, 7), replace=False)
+            volume[r, support] = rng.random(len(support)) + 0.1
+        volume /= volume.sum(axis=1, keepdims=True)
+        cost = rng.random((n_ingredients, n_ingredients)).astype(np.float32)
+        cost = cost + cost.T
+        np.fill_diagonal(cost, 0.0)
+        candidates = {
+            i: rng.choice(n_recipes, size=8, replace=False) for i in range(n_recipes)
+        }
+
+        serial, serial_plans = emd_matrix_constrained(
+            sp.csr_matrix(volume), cost, candidates, return_plans=True, sparse=True
+        )
+        parallel, parallel_plans = emd_matrix_constrained(
+            sp.csr_matrix(volume), cost, candidates, return_plans=True, sparse=True, n_jobs=2
+        )
+
+        assert len(serial_plans) > 512
+        np.testing.assert_array_equal(parallel.to_dense(), serial.to_dense())
+        assert parallel_plans.to_dict() == serial_plans.to_dict()
+
+    def test_accepts_pair_array(self):
+        """Explicit pairs are normalized like the pairs of a candidate map."""
+        volume, cost = _random_recipes(10, 12)
+        candidates = {0: np.array([3, 5]), 4: np.array([1])}
+
+        from_map, map_plans = emd_matrix_constrained(
+            volume, cost, candidates, return_plans=True, sparse=True
+        )
+        from_pairs, pair_plans = emd_matrix_constrained(
+            volume, cost, np.array([[5, 0], [0, 3], [1, 4], [4, 1]]), return_plans=True, sparse=True
+        )
+
+        np.testing.assert_array_equal(pair_plans.pairs, [[0, 3], [0, 5], [1, 4]])
+        np.testing.assert_array_equal(from_pairs.to_dense(), from_map.to_dense())
+        assert pair_plans.to_dict() == map_plans.to_dict()
+
+
+def _random_recipes(n_recipes: int, n_ingredients: int, seed: int = 0):
+    """Random cocktail-sized recipes (3-8 ingredients) and a symmetric cost matrix."""
+    import scipy.sparse as sp
+
+    rng = np.random.default_rng(seed)
+    volume = np.zeros((n_recipes, n_ingredients), dtype=np.float32)
+    for r in range(n_recipes):
+        support = rng.choice(n_ingredients, size=rng.integers(3, 9), replace=False)
+        volume[r, support] = rng.random(len(support)) + 0.1
+    volume /= volume.sum(axis=1, keepdims=True)
+    cost = rng.random((n_ingredients, n_ingredients)).astype(np.float32)
+    cost = cost + cost.T
+    np.fill_diagonal(cost, 0.0)
+    return sp.csr_matrix(volume), cost
+
+
+def _compute_emd_pairs(volume, cost, pairs, return_plan=False):
+    """Per-pair reference path: sparse rows, support union and compute_emd."""
+    results = []
+    for i, j in pairs:
+        row_i = volume.getrow(i)
+        row_j = volume.getrow(j)
+        union_idx = np.union1d(row_i.indices, row_j.indices)
+        results.append(
+            compute_emd(row_i, row_j, cost, return_plan=return_plan, support_idx=union_idx)
+        )
+    return results
+
+
+class TestEmdBatch:
+    """Test the batched EMD solver for many small recipe pairs."""
+
+    def test_matches_compute_emd(self):
+        volume, cost = _random_recipes(40, 25)
+        pairs = np.array([(i, j) for i in range(40) for j in range(i + 1, 40, 3)])
+
+        distances, flows = emd_batch(volume, cost, pairs, return_plans=True)
+        expected = _compute_emd_pairs(volume, cost, pairs, return_plan=True)
+
+        offsets, from_idx, to_idx, amounts, flow_costs = flows
+        assert len(offsets) == len(pairs) + 1
+        for n, (distance, (plan_from, plan_to, plan_amounts, _)) in enumerate(expected):
+            assert distances[n] == pytest.approx(distance, rel=1e-5)
+            lo, hi = offsets[n], offsets[n + 1]
+            batch_plan = {
+                (f, t): a
+                for f, t, a in zip(
+                    from_idx[lo:hi], to_idx[lo:hi], amounts[lo:hi], strict=True
+                )
+            }
+            assert batch_plan.keys() == set(zip(plan_from, plan_to, strict=True))
+            for f, t, a in zip(plan_from, plan_to, plan_amounts, strict=True):
+                assert batch_plan[(f, t)] == pytest.approx(a, abs=1e-6)
+            assert flow_costs[lo:hi].sum() == pytest.approx(distance, rel=1e-5)
+
+    def test_dense_input_and_empty_recipe(self):
+        volume = np.array(
+            [[0.5, 0.5, 0.0], [0.0, 0.0, 1.0], [0.0, 0.0, 0.0]], dtype=np.float32
+        )
+        cost = np.array([[0.0, 1.0, 2.0], [1.0, 0.0, 1.0], [2.0, 1.0, 0.0]])
+
+        distances, flows = emd_batch(volume, cost, np.array([[0, 1], [1, 0], [0, 2]]))
+
+        assert flows is None
+        np.testing.assert_allclose(distances, [1.5, 1.5, 0.0])
+
+    @staticmethod
+    def _random_pairs():
+        volume, cost = _random_recipes(200, 150, seed=1)
+        rng = np.random.default_rng(2)
+        pairs = rng.integers(0, 200, size=(2000, 2))
+        return volume, cost, pairs[pairs[:, 0] != pairs[:, 1]]
+
+    def test_matches_compute_emd_on_many_pairs(self):
+        volume, cost, pairs = self._random_pairs()
+
+        distances, _ = emd_batch(volume, cost, pairs)
+
+        np.testing.assert_allclose(
+            distances, _compute_emd_pairs(volume, cost, pairs), rtol=1e-5
+        )
+
+    @pytest.mark.benchmark
+    def test_pairs_per_second_against_compute_emd(self, capsys, record_property):
+        """Microbenchmark: the batched solver should beat the per-pair path."""
+        import time
+
+        volume, cost, pairs = self._random_pairs()
+
+        start = time.perf_counter()
+        _compute_emd_pairs(volume, cost, pairs)
+        per_pair_rate = len(pairs) / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        emd_batch(volume, cost, pairs)
+        batch_rate = len(pairs) / (time.perf_counter() - start)
+
+        record_property("compute_emd_pairs_per_second", per_pair_rate)
+        record_property("emd_batch_pairs_per_second", batch_rate)
+        with capsys.disabled():
+            print(
+                f"\ncompute_emd: {per_pair_rate:.0f} pairs/s, "
+                f"emd_batch: {batch_rate:.0f} pairs/s ({batch_rate / per_pair_rate:.1f}x)"
+            )
+        assert batch_rate > per_pair_rate
+
+
+class TestManhattanCandidates:
+    """Test sparse Manhattan candidate selection against brute-force cdist."""
+
+    @staticmethod
+    def _assert_top_k(volume, candidates, k, rows):
+        from scipy.spatial.distance import cdist
+
+        dense = volume.toarray()
+        dist = cdist(dense, dense, metric="cityblock")
+        np.fill_diagonal(dist, np.inf)
+        for i in rows:
+            assert len(set(candidates[i].tolist())) == len(candidates[i]) == k
+            assert i not in candidates[i]
+            np.testing.assert_allclose(
+                np.sort(dist[i, candidates[i]]), np.sort(dist[i])[:k], atol=1e-6
+            )
+
+    @pytest.mark.parametrize("block_elements", [None, 7])
+    def test_matches_cdist_top_k(self, monkeypatch, block_elements):
+        import barcart.distance as distance_module
+
+        if block_elements is not None:
+            monkeypatch.setattr(distance_module, "_MANHATTAN_BLOCK_ELEMENTS", block_elements)
+        volume, _ = _random_recipes(60, 12, seed=4)
+
+        candidates = manhattan_candidates(volume, 7)
+
+        self._assert_top_k(volume, candidates, 7, range(60))
+
+    def test_unnormalized_and_empty_recipes(self):
+        """Recipes sharing no ingredient (or empty ones) still rank by distance."""
+        import scipy.sparse as sp
+
+        volume = sp.csr_matrix(
+            np.array(
+                [
+                    [3.0, 0.0, 0.0, 0.0],
+                    [0.0, 0.0, 0.0, 0.0],
+                    [2.5, 0.5, 0.0, 0.0],
+                    [0.0, 0.0, 0.2, 0.0],
+                    [0.0, 1.0, 0.0, 4.0],
+                ]
+            )
+        )
+
+        candidates = manhattan_candidates(volume, 2)
+
+        self._assert_top_k(volume, candidates, 2, range(5))
+        assert set(candidates[0].tolist()) == {1, 2}
+
+    def test_rows_and_dense_input(self):
+        volume, _ = _random_recipes(30, 10, seed=5)
+
+        candidates = manhattan_candidates(volume.toarray(), 40, rows=np.array([4, 17]))
+
+        assert sorted(candidates) == [4, 17]
+        self._assert_top_k(volume, candidates, 29, [4, 17])
+
+
+class TestManhattanKnnGraph:
+    """Test the sparse Manhattan kNN graph used for the cocktail-space UMAP."""
+
+    def test_matches_cdist_neighbors(self, monkeypatch):
+        from scipy.spatial.distance import cdist
+
+        import barcart.distance as distance_module
+
+        monkeypatch.setattr(distance_module, "_MANHATTAN_BLOCK_ELEMENTS", 11)
+        volume, _ = _random_recipes(40, 10, seed=6)
+        dense = volume.toarray()
+        dist = cdist(dense, dense, metric="cityblock")
+
+        graph = manhattan_knn_graph(volume, 5)
+
+        assert isinstance(graph, KnnDistanceGraph)
+        assert graph.shape == (40, 40)
+        assert (graph.graph != graph.graph.T).nnz == 0
+        for i in range(40):
+            indices, distances = graph.neighbors(i)
+            np.testing.assert_allclose(distances, dist[i, indices], atol=1e-5)
+            np.testing.assert_allclose(
+                np.sort(distances)[:5], np.sort(np.delete(dist[i], i))[:5], atol=1e-5
+            )
+
+    def test_identical_recipes_keep_zero_distance(self):
+        volume = np.array([[0.5, 0.5], [0.5, 0.5], [1.0, 0.0]])
+
+        graph = manhattan_knn_graph(volume, 1)
+
+        assert graph[0, 1] == 0.0
+        assert graph.nnz == 3 + 2 * 2  # diagonal plus two stored pairs
+
+
+class TestCostSubmatrixChange:
+    """Test the per-pair cost sub-matrix change used for EMD reuse."""
+
+    def test_only_support_entries_count(self):
+        volume = np.array(
+            [[0.5, 0.5, 0.0, 0.0], [0.0, 0.0, 1.0, 0.0], [0.0, 0.0, 0.0, 0.0]],
+            dtype=np.float32,
+        )
+        cost = np.ones((4, 4)) - np.eye(4)
+        changed = cost.copy()
+        changed[3, :] = changed[:, 3] = 5.0  # ingredient 3 is in no recipe
+        changed[1, 2] = changed[2, 1] = 1.25
+
+        change = cost_submatrix_change(
+            volume, np.array([[0, 1], [1, 0], [0, 0], [0, 2]]), changed, cost
+        )
+
+        np.testing.assert_allclose(change, [0.25, 0.25, 0.0, 0.0])
+
+    def test_unchanged_pairs_keep_their_distance(self):
+        volume, cost = _random_recipes(30, 20, seed=3)
+        changed = cost.copy()
+        changed[7, :] += 0.5
+        changed[:, 7] += 0.5
+        pairs = np.array([(i, j) for i in range(30) for j in range(i + 1, 30)])
+
+        change = cost_submatrix_change(volume, pairs, changed, cost)
+        before, _ = emd_batch(volume, cost, pairs)
+        after, _ = emd_batch(volume, changed, pairs)
+
+        unchanged = change == 0
+        assert unchanged.any() and (~unchanged).any()
+        np.testing.assert_array_equal(after[unchanged], before[unchanged])
+
+
 class TestBuildRecipeVolumeMatrix:
     """Test build_recipe_volume_matrix function."""
 
@@ -0,0 +1,221 @@
+"""Tests for condensed and sparse distance matrix storage."""
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from scipy.spatial.distance import squareform
+
+from barcart.distance import (
+    compute_umap_embedding,
+    emd_candidates,
+    emd_matrix,
+    emd_matrix_constrained,
+    expected_ingredient_match_matrix,
+    knn_matrix,
+)
+from barcart.distance_matrix import (
+    CondensedDistanceMatrix,
+    KnnDistanceGraph,
+    iter_distance_row_blocks,
+)
+from barcart.em_learner import em_fit
+
+
+def _random_symmetric(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    upper = np.triu(rng.random((n, n)).astype(np.float32), k=1)
+    return upper + upper.T
+
+
+class TestCondensedDistanceMatrix:
+    """Test CondensedDistanceMatrix storage and queries."""
+
+    def test_round_trip_matches_squareform_layout(self):
+        """from_dense/to_dense should round trip and use the scipy layout."""
+        dense = _random_symmetric(7)
+
+        condensed = CondensedDistanceMatrix.from_dense(dense)
+
+        assert condensed.shape == (7, 7)
+        assert condensed.dtype == np.float32
+        np.testing.assert_array_equal(condensed.data, squareform(dense, checks=False))
+        np.testing.assert_array_equal(condensed.to_dense(), dense)
+
+    def test_item_access_is_symmetric(self):
+        """Writes to (i, j) should be visible at (j, i); the diagonal is 0."""
+        condensed = CondensedDistanceMatrix(4, fill_value=np.inf)
+
+        condensed[3, 1] = 2.5
+
+        assert condensed[1, 3] == pytest.approx(2.5)
+        assert condensed[2, 2] == 0.0
+        assert np.isinf(condensed[0, 1])
+        with pytest.raises(ValueError):
+            condensed[1, 1] = 1.0
+        with pytest.raises(IndexError):
+            condensed[0, 4]
+
+    def test_row_blocks_cover_matrix(self):
+        """Small row blocks should reassemble the dense matrix with a filled diagonal."""
+        dense = _random_symmetric(9, seed=1)
+        condensed = CondensedDistanceMatrix.from_dense(dense)
+
+        rows = np.vstack(
+            [block for _, block in condensed.iter_row_blocks(np.inf, block_rows=2)]
+        )
+
+        expected = dense.copy()
+        np.fill_diagonal(expected, np.inf)
+        np.testing.assert_array_equal(rows, expected)
+
+    def test_knn_matches_dense_knn(self):
+        """Condensed kNN should agree with knn_matrix on the dense matrix."""
+        dense = _random_symmetric(12, seed=2)
+        dense[0, 5] = dense[5, 0] = np.inf
+        condensed = CondensedDistanceMatrix.from_dense(dense)
+
+        nn_idx, nn_dist = condensed.knn(3)
+        dense_idx, dense_dist = knn_matrix(dense, 3)
+
+        np.testing.assert_array_equal(nn_idx, dense_idx)
+        np.testing.assert_array_equal(nn_dist, dense_dist)
+        np.testing.assert_array_equal(knn_matrix(condensed, 3)[0], dense_idx)
+
+    def test_dense_row_blocks_do_not_modify_input(self):
+        """Row blocks of a dense matrix are copies, not views."""
+        dense = _random_symmetric(5, seed=3)
+        original = dense.copy()
+
+        for _, block in iter_distance_row_blocks(dense, fill_diagonal=np.inf, block_rows=2):
+            block[:] = -1.0
+
+        np.testing.assert_array_equal(dense, original)
+
+    def test_candidates_match_for_dense_and_condensed(self):
+        """emd_candidates should pick the same neighbor sets for both storages."""
+        dense = _random_symmetric(10, seed=4)
+        condensed = CondensedDistanceMatrix.from_dense(dense)
+
+        dense_candidates = emd_candidates(dense, 3)
+        condensed_candidates = emd_candidates(condensed, 3)
+
+        for i in range(10):
+            assert set(dense_candidates[i]) == set(condensed_candidates[i])
+            assert i not in set(condensed_candidates[i])
+
+
+class TestCondensedEmd:
+    """Test condensed output of the EMD matrix builders."""
+
+    def test_emd_matrix_condensed_matches_dense(self):
+        volume = np.array(
+            [[0.6, 0.4, 0.0], [0.2, 0.3, 0.5], [0.0, 0.0, 1.0]], dtype=np.float32
+        )
+        cost = np.array(
+            [[0.0, 1.0, 2.0], [1.0, 0.0, 1.0], [2.0, 1.0, 0.0]], dtype=np.float32
+        )
+
+        dense = emd_matrix(volume, cost, tqdm_cls=lambda it, **_: it)
+        condensed = emd_matrix(volume, cost, tqdm_cls=lambda it, **_: it, condensed=True)
+
+        assert isinstance(condensed, CondensedDistanceMatrix)
+        np.testing.assert_allclose(condensed.to_dense(), dense)
+
+    def test_em_fit_full_mode_returns_condensed_distances(self):
+        volume = sp.csr_matrix(
+            np.array([[0.6, 0.4], [0.2, 0.8], [1.0, 0.0]], dtype=np.float32)
+        )
+        cost = np.array([[0.0, 1.0], [1.0, 0.0]], dtype=np.float32)
+
+        dist, _cost, _log = em_fit(
+            volume, cost, n_ingredients=2, iters=1, n_jobs=1, candidate_k=None, dense=False
+        )
+
+        assert isinstance(dist, CondensedDistanceMatrix)
+        assert dist.shape == (3, 3)
+        assert dist.dtype == np.float32
+
+
+def _volume_and_cost(n_recipes: int = 8, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    volume = rng.random((n_recipes, 4)).astype(np.float32)
+    volume[volume < 0.4] = 0.0
+    volume[:, 0] += 0.1
+    volume /= volume.sum(axis=1, keepdims=True)
+    cost = np.abs(np.subtract.outer(np.arange(4), np.arange(4))).astype(np.float32)
+    return volume, cost
+
+
+class TestKnnDistanceGraph:
+    """Test the sparse kNN distance graph used by constrained EM."""
+
+    def test_from_pairs_is_symmetric_with_explicit_diagonal(self):
+        graph = KnnDistanceGraph.from_pairs(4, [0, 1], [2, 3], [1.5, 0.0])
+
+        assert graph.shape == (4, 4)
+        assert graph.nnz == 4 + 2 * 2
+        assert graph[2, 0] == pytest.approx(1.5)
+        assert graph[3, 1] == 0.0
+        assert np.isinf(graph[0, 1])
+        assert (graph.graph != graph.graph.T).nnz == 0
+        np.testing.assert_array_equal(graph.graph.diagonal(), 0.0)
+
+    def test_to_dense_uses_fill_value(self):
+        graph = KnnDistanceGraph.from_pairs(3, [0], [1], [2.0])
+        graph.fill_value = 5.0
+
+        np.testing.assert_array_equal(
+            graph.to_dense(), [[0.0, 2.0, 5.0], [2.0, 0.0, 5.0], [5.0, 5.0, 0.0]]
+        )
+
+    def test_knn_pads_missing_neighbors(self):
+        graph = KnnDistanceGraph.from_pairs(3, [0, 0], [1, 2], [2.0, 1.0])
+
+        nn_idx, nn_dist = knn_matrix(graph, 2)
+
+        np.testing.assert_array_equal(nn_idx[0], [2, 1])
+        np.testing.assert_array_equal(nn_dist[0], [1.0, 2.0])
+        np.testing.assert_array_equal(nn_idx[1], [0, -1])
+        assert np.isinf(nn_dist[1, 1])
+
+    def test_constrained_sparse_matches_dense(self):
+        volume, cost = _volume_and_cost()
+        candidates = {i: np.array([(i + 1) % 8, (i + 3) % 8]) for i in range(8)}
+
+        dense, dense_plans = emd_matrix_constrained(
+            volume, cost, candidates, return_plans=True
+        )
+        graph, graph_plans = emd_matrix_constrained(
+            volume, cost, candidates, return_plans=True, sparse=True
+        )
+
+        assert isinstance(graph, KnnDistanceGraph)
+        assert graph.nnz == 8 + 2 * len(graph_plans)
+        np.testing.assert_allclose(graph.to_dense(), dense)
+        for i in range(8):
+            assert set(emd_candidates(graph, 2)[i]) == set(emd_candidates(dense, 2)[i])
+        T_dense, _ = expected_ingredient_match_matrix(dense, dense_plans, 4, k=2, beta=1.0)
+        T_graph, _ = expected_ingredient_match_matrix(graph, graph_plans, 4, k=2, beta=1.0)
+        np.testing.assert_allclose(T_graph, T_dense, rtol=1e-6)
+
+    def test_em_fit_constrained_returns_graph(self):
+        volume, cost = _volume_and_cost()
+
+        dist, _cost, _log = em_fit(
+            sp.csr_matrix(volume), cost, n_ingredients=4, iters=2, n_jobs=1,
+            candidate_k=3, dense=False,
+        )
+
+        assert isinstance(dist, KnnDistanceGraph)
+        assert dist.nnz < 8 * 8
+        assert all(len(dist.neighbors(i)[0]) >= 3 for i in range(8))
+
+    def test_umap_accepts_graph(self):
+        volume, cost = _volume_and_cost(n_recipes=20, seed=1)
+        candidates = {i: np.array([(i + d) % 20 for d in (1, 2, 3, 4, 5)]) for i in range(20)}
+        graph = emd_matrix_constrained(volume, cost, candidates, sparse=True)
+
+        embedding = compute_umap_embedding(graph, n_neighbors=5, random_state=0)
+
+        assert embedding.shape == (20, 2)
+        assert np.isfinite(embedding).all()
@@ -1,7 +1,9 @@
 import numpy as np
 import scipy.sparse as sp
 
-from barcart.em_learner import em_fit
+from barcart.distance_matrix import KnnDistanceGraph
+from barcart.em_learner import em_fit, em_refit
+from barcart.transport_plan import TransportPlans
 
 
 def test_em_fit_accepts_sparse_volume_matrix_float32() -> None:
@@ -22,3 +24,137 @@ def test_em_fit_accepts_sparse_volume_matrix_float32() -> None:
     assert new_cost.shape == (2, 2)
     assert dist.dtype == np.float32
     assert new_cost.dtype == np.float32
+
+
+def _random_volume(n_recipes: int, n_ingredients: int, seed: int = 0) -> sp.csr_matrix:
+    rng = np.random.default_rng(seed)
+    volume = rng.random((n_recipes, n_ingredients)).astype(np.float32)
+    volume[volume < 0.6] = 0.0
+    volume[np.arange(n_recipes), rng.integers(0, n_ingredients, n_recipes)] += 0.5
+    volume /= volume.sum(axis=1, keepdims=True)
+    return sp.csr_matrix(volume)
+
+
+def test_em_refit_recomputes_only_changed_recipes() -> None:
+    n_ingredients = 6
+    volume = _random_volume(20, n_ingredients)
+    prior = np.abs(
+        np.subtract.outer(np.arange(n_ingredients), np.arange(n_ingredients))
+    ).astype(np.float32)
+    graph, cost, _log, plans = em_fit(
+        volume, prior, n_ingredients, iters=2, n_jobs=1, candidate_k=5,
+        return_plans=True, dense=False,
+    )
+
+    # Recipe 3 changes; recipe 20 is new
+    new_rows = _random_volume(2, n_ingredients, seed=1)
+    updated = sp.vstack([volume, new_rows[1]]).tolil()
+    updated[3] = new_rows[0]
+    updated = updated.tocsr()
+    graph_rows, graph_cols, graph_dist = graph.to_pairs()
+    previous = KnnDistanceGraph.from_pairs(21, graph_rows, graph_cols, graph_dist)
+
+    new_graph, new_cost, log, new_plans = em_refit(
+        updated, cost, previous, plans, np.array([3, 20]), n_ingredients,
+        candidate_k=5, n_jobs=1,
+    )
+
+    assert isinstance(new_graph, KnnDistanceGraph)
+    assert isinstance(new_plans, TransportPlans)
+    assert new_graph.shape == (21, 21)
+    assert new_cost.shape == (n_ingredients, n_ingredients)
+    assert new_cost.dtype == np.float32
+    assert log["changed"] == 2 and log["pairs_computed"][0] > 0 and len(log["delta"]) == 1
+    # Pairs not touching the changed recipes are carried over unchanged
+    rows, cols, dist = new_graph.to_pairs()
+    untouched = ~np.isin(graph_rows, [3]) & ~np.isin(graph_cols, [3])
+    kept = {(i, j): d for i, j, d in zip(rows.tolist(), cols.tolist(), dist.tolist(), strict=True)}
+    for i, j, d in zip(
+        graph_rows[untouched].tolist(),
+        graph_cols[untouched].tolist(),
+        graph_dist[untouched].tolist(),
+        strict=True,
+    ):
+        assert kept[(i, j)] == d
+    # Every pair of the new graph has a plan and the new recipe has neighbors
+    assert len(new_plans) == len(rows)
+    assert (new_plans.find(rows, cols) >= 0).all()
+    assert (20 in rows) or (20 in cols)
+
+
+def test_em_fit_reuses_cached_plans_within_tolerance() -> None:
+    n_ingredients = 8
+    volume = _random_volume(40, n_ingredients, seed=2)
+    prior = np.abs(
+        np.subtract.outer(np.arange(n_ingredients), np.arange(n_ingredients))
+    ).astype(np.float32)
+
+    graph, _cost, log = em_fit(
+        volume, prior, n_ingredients, iters=4, tolerance=0.0, n_jobs=1,
+        candidate_k=8, dense=False, reuse_tolerance=np.inf,
+    )
+
+    # With an unbounded tolerance every pair solved before is reused
+    assert log["pairs_reused"][0] == 0
+    assert all(n > 0 for n in log["pairs_reused"][1:])
+    assert log["pairs_reused"][-1] + log["pairs_computed"][-1] == len(graph.to_pairs()[0])
+    assert len(log["e_step_seconds"]) == len(log["m_step_seconds"]) == 4
+
+
+def test_em_fit_reuse_with_zero_change_matches_exact() -> None:
+    n_ingredients = 8
+    volume = _random_volume(30, n_ingredients, seed=3)
+    prior = np.abs(
+        np.subtract.outer(np.arange(n_ingredients), np.arange(n_ingredients))
+    ).astype(np.float32)
+
+    exact_graph, exact_cost, _ = em_fit(
+        volume, prior, n_ingredients, iters=3, tolerance=0.0, n_jobs=1,
+        candidate_k=6, dense=False,
+    )
+    graph, cost, _ = em_fit(
+        volume, prior, n_ingredients, iters=3, tolerance=0.0, n_jobs=1,
+        candidate_k=6, dense=False, reuse_tolerance=1e-12,
+    )
+
+    np.testing.assert_allclose(cost, exact_cost, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(graph.to_dense(), exact_graph.to_dense(), rtol=1e-5, atol=1e-6)
+
+
+def test_em_fit_stops_when_knn_sets_are_stable() -> None:
+    n_ingredients = 6
+    volume = _random_volume(25, n_ingredients, seed=4)
+    prior = np.abs(
+        np.subtract.outer(np.arange(n_ingredients), np.arange(n_ingredients))
+    ).astype(np.float32)
+
+    _graph, _cost, log = em_fit(
+        volume, prior, n_ingredients, iters=10, tolerance=0.0, n_jobs=1,
+        candidate_k=6, dense=False, knn_stability=0.0,
+    )
+
+    # The first iteration has no previous kNN sets to compare against
+    assert log["knn_jaccard"][0] is None
+    assert len(log["delta"]) == 2
+    assert 0.0 <= log["knn_jaccard"][1] <= 1.0
+
+
+def test_em_fit_skips_knn_sets_without_knn_stability(monkeypatch) -> None:
+    import barcart.em_learner as em_learner_module
+
+    def fail(*_args, **_kwargs):
+        raise AssertionError("kNN sets computed although knn_stability is None")
+
+    monkeypatch.setattr(em_learner_module, "knn_matrix", fail)
+    n_ingredients = 6
+    volume = _random_volume(25, n_ingredients, seed=4)
+    prior = np.abs(
+        np.subtract.outer(np.arange(n_ingredients), np.arange(n_ingredients))
+    ).astype(np.float32)
+
+    _graph, _cost, log = em_fit(
+        volume, prior, n_ingredients, iters=3, tolerance=0.0, n_jobs=1,
+        candidate_k=6, dense=False,
+    )
+
+    assert log["knn_jaccard"] == [None] * len(log["delta"])
@@ -0,0 +1,101 @@
+"""Tests for the compact transport plan store."""
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from barcart.distance import emd_matrix, emd_matrix_constrained
+from barcart.transport_plan import TransportPlans
+
+
+def _flows(lengths, seed=0):
+    rng = np.random.default_rng(seed)
+    n_flows = int(sum(lengths))
+    return (
+        np.concatenate([[0], np.cumsum(lengths)]),
+        rng.integers(0, 10, n_flows),
+        rng.integers(0, 10, n_flows),
+        rng.random(n_flows),
+        rng.random(n_flows),
+    )
+
+
+class TestTransportPlans:
+    """Test TransportPlans construction and lookups."""
+
+    def test_from_flows_sorts_and_orients_pairs(self):
+        pairs = np.array([[3, 1], [0, 2], [0, 1]])
+        flows = _flows([2, 1, 3])
+
+        plans = TransportPlans.from_flows(pairs, flows)
+
+        np.testing.assert_array_equal(plans.pairs, [[0, 1], [0, 2], [1, 3]])
+        np.testing.assert_array_equal(plans.offsets, [0, 3, 4, 6])
+        # (3, 1) was flipped: its flows now go from recipe 1 to recipe 3
+        from_idx, to_idx, mass, cost = plans.get(3, 1)
+        np.testing.assert_array_equal(from_idx, flows[2][:2])
+        np.testing.assert_array_equal(to_idx, flows[1][:2])
+        np.testing.assert_array_equal(mass, flows[3][:2])
+        np.testing.assert_array_equal(plans.get(0, 1)[3], flows[4][3:])
+        assert plans.n_flows == 6
+
+    def test_find_and_contains(self):
+        plans = TransportPlans.from_flows(np.array([[0, 1], [2, 5]]), _flows([1, 1]))
+
+        np.testing.assert_array_equal(plans.find([5, 1, 0], [2, 0, 3]), [1, 0, -1])
+        assert (1, 0) in plans
+        assert (1, 2) not in plans
+        assert all(len(a) == 0 for a in plans.get(1, 2))
+
+    def test_dict_round_trip(self):
+        legacy = {(0, 1): [(0, 1, 0.5, 0.1), (1, 1, 0.5, 0.0)], (1, 2): []}
+
+        plans = TransportPlans.from_dict(legacy)
+
+        assert len(plans) == 2
+        assert plans.to_dict() == legacy
+        np.testing.assert_array_equal(plans.flow_pairs(), [0, 0])
+
+    def test_duplicate_pairs_raise(self):
+        with pytest.raises(ValueError, match="duplicate"):
+            TransportPlans.from_flows(np.array([[0, 1], [1, 0]]), _flows([1, 1]))
+
+    def test_concatenate_merges_disjoint_stores(self):
+        first = TransportPlans.from_flows(np.array([[2, 3]]), _flows([2], seed=1))
+        second = TransportPlans.from_flows(np.array([[0, 1]]), _flows([1], seed=2))
+
+        merged = TransportPlans.concatenate([first, second])
+
+        np.testing.assert_array_equal(merged.pairs, [[0, 1], [2, 3]])
+        np.testing.assert_array_equal(merged.get(2, 3)[2], first.mass)
+        assert len(TransportPlans.concatenate([])) == 0
+
+
+class TestEmdPlanStore:
+    """Test that the EMD matrix builders return TransportPlans."""
+
+    def test_full_and_constrained_plans_agree(self):
+        rng = np.random.default_rng(0)
+        volume = rng.random((6, 4)).astype(np.float32)
+        volume[volume < 0.3] = 0.0
+        volume[:, 0] += 0.1
+        volume /= volume.sum(axis=1, keepdims=True)
+        cost = np.abs(np.subtract.outer(np.arange(4), np.arange(4))).astype(np.float32)
+        candidates = {i: np.array([j for j in range(6) if j != i]) for i in range(6)}
+
+        _, full_plans = emd_matrix(
+            volume, cost, return_plans=True, tqdm_cls=lambda it, **_: it
+        )
+        _, constrained_plans = emd_matrix_constrained(
+            sp.csr_matrix(volume), cost, candidates, return_plans=True
+        )
+
+        assert isinstance(full_plans, TransportPlans)
+        assert len(full_plans) == 15
+        np.testing.assert_array_equal(full_plans.pairs, constrained_plans.pairs)
+        np.testing.assert_array_equal(full_plans.offsets, constrained_plans.offsets)
+        np.testing.assert_allclose(full_plans.mass, constrained_plans.mass)
+        # Every plan moves the full unit of mass
+        np.testing.assert_allclose(
+            np.bincount(full_plans.flow_pairs(), weights=full_plans.mass), 1.0, rtol=1e-6
+        )
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for blocking vs. offloaded database access in async routes.
+
+Mounts two equivalent sets of routes on one FastAPI app:
+  /blocking/...  - calls Database methods directly inside ``async def`` (old path)
+  /offloaded/... - awaits the same methods through AsyncDatabase (new path)
+
+It then drives a mixed load of closed-loop clients issuing slow recipe searches
+and cheap count requests concurrently through an in-process ASGI client, and
+reports p50/p95/p99 latency for each request type. With the blocking path,
+cheap requests queue behind every slow search on the event loop; with the
+offloaded path they don't.
+
+Usage:
+    # Uses DB_HOST/DB_PORT/DB_NAME/DB_USER/DB_PASSWORD like the API
+    python scripts/bench_async_routes.py
+
+    # Heavier mix
+    python scripts/bench_async_routes.py --slow 8 --fast 8 --duration 30 --search-limit 1000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+import httpx
+import numpy as np
+from fastapi import Depends, FastAPI
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from db.async_database import (  # noqa: E402
+    AsyncDatabase,
+    get_async_database,
+    shutdown_db_executor,
+)
+from db.database import get_database  # noqa: E402
+from db.db_core import Database  # noqa: E402
+
+logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def build_app(search_limit: int) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/blocking/search")
+    async def blocking_search(db: Database = Depends(get_database)):
+        return len(db.search_recipes_paginated({}, limit=search_limit, offset=0))
+
+    @app.get("/blocking/count")
+    async def blocking_count(db: Database = Depends(get_database)):
+        return db.get_recipes_count()
+
+    @app.get("/offloaded/search")
+    async def offloaded_search(db: AsyncDatabase = Depends(get_async_database)):
+        return len(await db.search_recipes_paginated({}, limit=search_limit, offset=0))
+
+    @app.get("/offloaded/count")
+    async def offloaded_count(db: AsyncDatabase = Depends(get_async_database)):
+        return await db.get_recipes_count()
+
+    return app
+
+
+async def timed_get(client: httpx.AsyncClient, url: str) -> float:
+    start = time.perf_counter()
+    response = await client.get(url)
+    response.raise_for_status()
+    return (time.perf_counter() - start) * 1000
+
+
+async def client_loop(client: httpx.AsyncClient, url: str, deadline: float) -> list[float]:
+    latencies = []
+    while time.perf_counter() < deadline:
+        latencies.append(await timed_get(client, url))
+    return latencies
+
+
+async def run_mode(app: FastAPI, mode: str, n_slow: int, n_fast: int, duration: float) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        # Warm up connection pool and caches
+        await timed_get(client, f"/{mode}/search")
+        await timed_get(client, f"/{mode}/count")
+
+        deadline = time.perf_counter() + duration
+        slow = [client_loop(client, f"/{mode}/search", deadline) for _ in range(n_slow)]
+        fast = [client_loop(client, f"/{mode}/count", deadline) for _ in range(n_fast)]
+        results = await asyncio.gather(*slow, *fast)
+
+    slow_ms = np.concatenate([np.array(r) for r in results[:n_slow]])
+    fast_ms = np.concatenate([np.array(r) for r in results[n_slow:]])
+    return {"mode": mode, "slow_ms": slow_ms, "fast_ms": fast_ms}
+
+
+def summarize(label: str, values: np.ndarray) -> str:
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return f"{label:>6}: p50={p50:8.1f}ms  p95={p95:8.1f}ms  p99={p99:8.1f}ms"
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    app = build_app(args.search_limit)
+    for _ in range(args.rounds):
+        for mode in ("blocking", "offloaded"):
+            result = await run_mode(app, mode, args.slow, args.fast, args.duration)
+            print(f"[{mode}] searches={len(result['slow_ms'])} counts={len(result['fast_ms'])}")
+            print(summarize("search", result["slow_ms"]))
+            print(summarize("count", result["fast_ms"]))
+    shutdown_db_executor()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slow", type=int, default=4, help="Clients looping on slow searches")
+    parser.add_argument("--fast", type=int, default=4, help="Clients looping on cheap counts")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per mode")
+    parser.add_argument("--search-limit", type=int, default=500, help="Recipes returned per search")
+    parser.add_argument("--rounds", type=int, default=1, help="Repeat both modes this many times")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark constrained EMD scaling across worker processes.
+
+Generates a random sparse recipe volume matrix (3-8 ingredients per recipe,
+like real cocktails) and a random symmetric ingredient cost matrix, selects
+Manhattan top-k candidates once, then times
+barcart.emd_matrix_constrained(..., return_plans=True, sparse=True) for each
+worker count. Reports wall time, pairs per second and speedup over one
+worker, and checks that every run returns the same distances.
+
+Usage:
+    python scripts/bench_constrained_emd.py
+    python scripts/bench_constrained_emd.py --recipes 5000 --k 100 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "packages", "barcart"))
+
+from barcart import emd_matrix_constrained, manhattan_candidates  # noqa: E402
+
+
+def random_recipes(n_recipes: int, n_ingredients: int, seed: int) -> sp.csr_matrix:
+    """Random recipes with 3-8 ingredients each, rows summing to 1"""
+    rng = np.random.default_rng(seed)
+    rows, cols, vals = [], [], []
+    for r in range(n_recipes):
+        support = rng.choice(n_ingredients, size=rng.integers(3, 9), replace=False)
+        weights = rng.random(len(support)) + 0.1
+        rows.extend([r] * len(support))
+        cols.extend(support.tolist())
+        vals.extend((weights / weights.sum()).tolist())
+    return sp.csr_matrix((vals, (rows, cols)), shape=(n_recipes, n_ingredients), dtype=np.float32)
+
+
+def random_cost(n_ingredients: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed + 1)
+    cost = rng.random((n_ingredients, n_ingredients)).astype(np.float32)
+    cost = cost + cost.T
+    np.fill_diagonal(cost, 0.0)
+    return cost
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=2000, help="Number of recipes")
+    parser.add_argument("--ingredients", type=int, default=300, help="Number of ingredients")
+    parser.add_argument("--k", type=int, default=50, help="Candidates per recipe")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Worker counts to time")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    volume = random_recipes(args.recipes, args.ingredients, args.seed)
+    cost = random_cost(args.ingredients, args.seed)
+    candidates = manhattan_candidates(volume, args.k)
+    print(f"{args.recipes} recipes, {args.ingredients} ingredients, k={args.k}, {os.cpu_count()} CPUs")
+
+    print(f"{'workers':>7}  {'time':>9}  {'pairs/s':>10}  {'speedup':>7}")
+    baseline = None
+    reference = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        graph, plans = emd_matrix_constrained(
+            volume, cost, candidates, return_plans=True, sparse=True, n_jobs=workers
+        )
+        elapsed = time.perf_counter() - start
+        if baseline is None:
+            baseline = elapsed
+            reference = graph.data
+        elif not np.allclose(graph.data, reference):
+            raise SystemExit(f"Distances differ with {workers} workers")
+        print(
+            f"{workers:>7}  {elapsed:8.2f}s  {len(plans) / elapsed:10.0f}  {baseline / elapsed:6.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Query-plan benchmark: ingredient path prefix scans vs. the ingredient_ancestors closure table.
+
+For each hierarchy query that used to test ``ingredients.path`` prefixes, runs
+EXPLAIN (ANALYZE, BUFFERS) on the legacy form and on the closure-table form
+and prints execution time, shared buffers touched and the scan nodes used:
+
+  search-filter   recipes containing an ingredient or any descendant
+  usage-stats     hierarchical usage counts (get_ingredient_usage_stats)
+  inventory       inventory-filtered search (INGREDIENT_SUBSTITUTION_MATCH),
+                  plus the user_makeable_recipes semi-join that replaced it
+
+The inventory case inserts a temporary inventory inside a transaction that is
+rolled back, so the database is left unchanged.
+
+Usage:
+    # Uses DB_HOST/DB_PORT/DB_NAME/DB_USER/DB_PASSWORD like the API
+    python scripts/bench_ingredient_closure.py
+    python scripts/bench_ingredient_closure.py --repeat 5 --inventory-size 40 --show-plans
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+
+import psycopg2
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from db.sql_queries import (  # noqa: E402
+    INGREDIENT_SUBSTITUTION_MATCH,
+    build_refresh_makeable_recipes_sql,
+)
+
+BENCH_USER = "bench-closure-user"
+
+# The path-prefix substitution test this benchmark compares against
+LEGACY_SUBSTITUTION_MATCH = """
+    i_user.id = i_recipe.id
+    OR
+    (i_recipe.allow_substitution = TRUE AND (
+        (STARTS_WITH(i_recipe.path, i_user.path)
+         AND NOT EXISTS (
+             SELECT 1 FROM ingredients blocking
+             WHERE STARTS_WITH(i_recipe.path, blocking.path)
+             AND STARTS_WITH(blocking.path, i_user.path)
+             AND blocking.id != i_user.id
+             AND blocking.allow_substitution = FALSE
+         ))
+        OR
+        (i_recipe.parent_id = i_user.parent_id
+         AND i_recipe.parent_id IS NOT NULL
+         AND i_user.allow_substitution = TRUE)
+        OR
+        (i_user.id = i_recipe.parent_id)
+        OR
+        EXISTS (
+            SELECT 1 FROM ingredients anc
+            WHERE STARTS_WITH(i_user.path, anc.path)
+            AND STARTS_WITH(i_recipe.path, anc.path)
+            AND anc.allow_substitution = TRUE
+            AND LENGTH(anc.path) - LENGTH(REPLACE(anc.path, '/', '')) <= 6
+            AND NOT EXISTS (
+                SELECT 1 FROM ingredients blocking
+                WHERE STARTS_WITH(i_recipe.path, blocking.path)
+                AND STARTS_WITH(blocking.path, anc.path)
+                AND blocking.id != anc.id
+                AND blocking.allow_substitution = FALSE
+            )
+        )
+    ))
+"""
+
+SEARCH_FILTER = {
+    "legacy": """
+        SELECT r.id FROM recipes r
+        WHERE r.id IN (
+            SELECT DISTINCT ri2.recipe_id FROM recipe_ingredients ri2
+            JOIN ingredients i2 ON ri2.ingredient_id = i2.id
+            WHERE i2.path LIKE %(pattern)s
+        )
+    """,
+    "closure": """
+        SELECT r.id FROM recipes r
+        WHERE r.id IN (
+            SELECT DISTINCT ri2.recipe_id FROM recipe_ingredients ri2
+            JOIN ingredient_ancestors ia2 ON ri2.ingredient_id = ia2.descendant_id
+            WHERE ia2.ancestor_id = %(ingredient_id)s
+        )
+    """,
+}
+
+USAGE_STATS = {
+    "legacy": """
+        SELECT i.id, (
+            SELECT COUNT(DISTINCT ri2.recipe_id)
+            FROM recipe_ingredients ri2
+            INNER JOIN ingredients i2 ON ri2.ingredient_id = i2.id
+            WHERE STARTS_WITH(i2.path, i.path)
+        ) AS hierarchical_usage
+        FROM ingredients i
+    """,
+    "closure": """
+        SELECT i.id, (
+            SELECT COUNT(DISTINCT ri2.recipe_id)
+            FROM ingredient_ancestors ia
+            INNER JOIN recipe_ingredients ri2 ON ri2.ingredient_id = ia.descendant_id
+            WHERE ia.ancestor_id = i.id
+        ) AS hierarchical_usage
+        FROM ingredients i
+    """,
+}
+
+INVENTORY_TEMPLATE = """
+    SELECT r.id FROM recipes r
+    WHERE NOT EXISTS (
+        SELECT 1 FROM recipe_ingredients ri_missing
+        LEFT JOIN ingredients i_recipe ON ri_missing.ingredient_id = i_recipe.id
+        WHERE ri_missing.recipe_id = r.id
+        AND NOT EXISTS (
+            SELECT 1 FROM user_ingredients ui_check
+            LEFT JOIN ingredients i_user ON ui_check.ingredient_id = i_user.id
+            WHERE ui_check.cognito_user_id = %(user_id)s
+            AND ({match})
+        )
+    )
+"""
+
+INVENTORY = {
+    "legacy": INVENTORY_TEMPLATE.format(match=LEGACY_SUBSTITUTION_MATCH),
+    "closure": INVENTORY_TEMPLATE.format(match=INGREDIENT_SUBSTITUTION_MATCH),
+    "makeable": """
+        SELECT r.id FROM recipes r
+        WHERE EXISTS (
+            SELECT 1 FROM user_makeable_recipes umr
+            WHERE umr.cognito_user_id = %(user_id)s AND umr.recipe_id = r.id
+        )
+        OR NOT EXISTS (SELECT 1 FROM recipe_ingredients ri_any WHERE ri_any.recipe_id = r.id)
+    """,
+}
+
+
+def scan_nodes(plan: dict) -> set:
+    """Collect 'Node Type on relation' labels for every scan in a plan tree"""
+    nodes = set()
+    if "Scan" in plan["Node Type"] and "Relation Name" in plan:
+        nodes.add(f"{plan['Node Type']} on {plan['Relation Name']}")
+    for child in plan.get("Plans", []):
+        nodes |= scan_nodes(child)
+    return nodes
+
+
+def explain(cursor, sql: str, params: dict) -> dict:
+    cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+    return cursor.fetchone()[0][0]
+
+
+def run_case(cursor, name: str, queries: dict, params: dict, repeat: int, show_plans: bool) -> None:
+    for variant, sql in queries.items():
+        results = [explain(cursor, sql, params) for _ in range(repeat)]
+        times = sorted(result["Execution Time"] for result in results)
+        best = results[0]
+        buffers = best["Plan"].get("Shared Hit Blocks", 0) + best["Plan"].get("Shared Read Blocks", 0)
+        print(
+            f"{name:>14} {variant:>8}  median={times[len(times) // 2]:9.2f}ms  "
+            f"buffers={buffers:>8}  scans={', '.join(sorted(scan_nodes(best['Plan'])))}"
+        )
+        if show_plans:
+            print(json.dumps(best["Plan"], indent=2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="EXPLAIN ANALYZE runs per query")
+    parser.add_argument("--inventory-size", type=int, default=25, help="Ingredients in the temporary inventory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--show-plans", action="store_true", help="Print the full JSON plans")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(
+        host=os.environ.get("DB_HOST", "localhost"),
+        port=os.environ.get("DB_PORT", "5432"),
+        dbname=os.environ.get("DB_NAME", "cocktaildb"),
+        user=os.environ.get("DB_USER", "cocktaildb"),
+        password=os.environ.get("DB_PASSWORD", ""),
+    )
+    cursor = conn.cursor()
+    rng = random.Random(args.seed)
+
+    # Benchmark the ingredient with the largest subtree, where prefix scans hurt most
+    cursor.execute(
+        "SELECT ancestor_id FROM ingredient_ancestors GROUP BY ancestor_id "
+        "ORDER BY COUNT(*) DESC LIMIT 1"
+    )
+    ingredient_id = cursor.fetchone()[0]
+    run_case(
+        cursor,
+        "search-filter",
+        SEARCH_FILTER,
+        {"pattern": f"%/{ingredient_id}/%", "ingredient_id": ingredient_id},
+        args.repeat,
+        args.show_plans,
+    )
+    run_case(cursor, "usage-stats", USAGE_STATS, {}, args.repeat, args.show_plans)
+
+    cursor.execute("SELECT DISTINCT ingredient_id FROM recipe_ingredients")
+    used = [row[0] for row in cursor.fetchall()]
+    for inventory_id in rng.sample(used, min(args.inventory_size, len(used))):
+        cursor.execute(
+            "INSERT INTO user_ingredients (cognito_user_id, ingredient_id) VALUES (%s, %s) "
+            "ON CONFLICT DO NOTHING",
+            (BENCH_USER, inventory_id),
+        )
+    for sql in build_refresh_makeable_recipes_sql(by_users=True):
+        cursor.execute(sql, {"user_ids": [BENCH_USER]})
+    run_case(cursor, "inventory", INVENTORY, {"user_id": BENCH_USER}, args.repeat, args.show_plans)
+
+    conn.rollback()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark the ingredient tree distance matrix: pairwise loop vs. vectorized LCA.
+
+Generates random ingredient taxonomies (edge weights drawn from typical
+substitution levels) and times, for each size:
+
+  legacy      the former build_ingredient_distance_matrix body: a Python
+              double loop calling weighted_distance for every pair
+  vectorized  barcart.build_ingredient_distance_matrix (root distances plus
+              LCA by level-wise ancestor comparison, float32 output)
+
+and reports the largest absolute difference between the two matrices.
+The legacy loop is skipped above --legacy-max (it takes minutes at 5000).
+
+Usage:
+    python scripts/bench_ingredient_distance.py
+    python scripts/bench_ingredient_distance.py --sizes 500 2000 5000 --legacy-max 5000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "packages", "barcart"))
+
+from barcart import build_ingredient_distance_matrix, weighted_distance  # noqa: E402
+
+
+def random_parent_map(size: int, seed: int, max_depth: int = 6) -> dict:
+    """Random taxonomy under "root", at most max_depth levels deep"""
+    rng = random.Random(seed)
+    parent_map = {"root": (None, 0.0)}
+    depth = {"root": 0}
+    nodes = ["root"]
+    for i in range(size):
+        parent = rng.choice(nodes) if rng.random() < 0.85 else "root"
+        while depth[parent] >= max_depth:
+            parent = parent_map[parent][0]
+        node = str(i)
+        parent_map[node] = (parent, rng.choice([0.3, 0.5, 1.0, 1.0, 2.0]))
+        depth[node] = depth[parent] + 1
+        nodes.append(node)
+    return parent_map
+
+
+def legacy_distance_matrix(parent_map: dict, root_id: str = "root") -> np.ndarray:
+    ingredient_ids = [i for i in parent_map if i != root_id]
+    matrix = np.zeros((len(ingredient_ids), len(ingredient_ids)))
+    for i in range(len(ingredient_ids)):
+        for j in range(i + 1, len(ingredient_ids)):
+            matrix[i, j] = weighted_distance(ingredient_ids[i], ingredient_ids[j], parent_map)
+            matrix[j, i] = matrix[i, j]
+    return matrix
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 5000], help="Ingredient counts")
+    parser.add_argument("--legacy-max", type=int, default=2000, help="Largest size to run the legacy loop on")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'nodes':>6}  {'legacy':>10}  {'vectorized':>10}  {'speedup':>8}  max |diff|")
+    for size in args.sizes:
+        parent_map = random_parent_map(size, args.seed)
+
+        start = time.perf_counter()
+        matrix, _ = build_ingredient_distance_matrix(parent_map, {}, dtype=np.float32)
+        vectorized = time.perf_counter() - start
+
+        if size <= args.legacy_max:
+            start = time.perf_counter()
+            reference = legacy_distance_matrix(parent_map)
+            legacy = time.perf_counter() - start
+            diff = float(np.abs(matrix - reference).max())
+            print(f"{size:>6}  {legacy:9.2f}s  {vectorized:9.3f}s  {legacy / vectorized:7.0f}x  {diff:.2e}")
+        else:
+            print(f"{size:>6}  {'skipped':>10}  {vectorized:9.3f}s  {'':>8}  -")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark Manhattan candidate selection for constrained EM.
+
+Compares barcart.manhattan_candidates (inverted-index join on the sparse
+volume matrix) with the previous implementation (dense copy of the volume
+matrix plus a full n x n cdist(..., "cityblock")). Each method runs in its own
+process, so the reported peak RSS increase belongs to that method alone.
+Also checks that both return neighbor sets with the same Manhattan distances.
+
+Usage:
+    python scripts/bench_manhattan_candidates.py
+    python scripts/bench_manhattan_candidates.py --recipes 20000 --k 100 --skip-dense
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "packages", "barcart"))
+
+from barcart import manhattan_candidates  # noqa: E402
+
+
+def random_recipes(n_recipes: int, n_ingredients: int, seed: int) -> sp.csr_matrix:
+    """Random recipes with 3-8 ingredients each, rows summing to 1.
+
+    Ingredient popularity is skewed like real bars: a few base spirits,
+    citrus and syrups appear in a large share of the recipes.
+    """
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, n_ingredients + 1)
+    popularity /= popularity.sum()
+    rows, cols, vals = [], [], []
+    for r in range(n_recipes):
+        support = rng.choice(n_ingredients, size=rng.integers(3, 9), replace=False, p=popularity)
+        weights = rng.random(len(support)) + 0.1
+        rows.extend([r] * len(support))
+        cols.extend(support.tolist())
+        vals.extend((weights / weights.sum()).tolist())
+    return sp.csr_matrix((vals, (rows, cols)), shape=(n_recipes, n_ingredients), dtype=np.float32)
+
+
+def dense_manhattan_candidates(volume_matrix, k: int) -> dict[int, np.ndarray]:
+    """Previous implementation: dense matrix and full n x n cityblock distances."""
+    from scipy.spatial.distance import cdist
+
+    dense_matrix = volume_matrix.toarray()
+    manhattan_dist = cdist(dense_matrix, dense_matrix, metric="cityblock")
+    k = min(k, dense_matrix.shape[0] - 1)
+    np.fill_diagonal(manhattan_dist, np.inf)
+    return {i: np.argpartition(row, k)[:k] for i, row in enumerate(manhattan_dist)}
+
+
+METHODS = {"sparse": manhattan_candidates, "dense": dense_manhattan_candidates}
+
+
+def _run(method: str, volume: sp.csr_matrix, k: int, queue) -> None:
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    candidates = METHODS[method](volume, k)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((elapsed, (peak_kb - baseline_kb) / 1024.0, candidates))
+
+
+def run_isolated(method: str, volume: sp.csr_matrix, k: int):
+    """Run one method in a fresh process; returns (seconds, peak RSS increase MB, candidates)."""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_run, args=(method, volume, k, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def candidate_distances(volume: sp.csr_matrix, candidates: dict[int, np.ndarray], rows) -> np.ndarray:
+    """Sorted Manhattan distances from each sampled row to its candidates."""
+    out = []
+    for i in rows:
+        diffs = abs(volume[candidates[i]] - volume[np.full(len(candidates[i]), i)])
+        out.append(np.sort(np.asarray(diffs.sum(axis=1)).ravel()))
+    return np.array(out)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=5000, help="Number of recipes")
+    parser.add_argument("--ingredients", type=int, default=400, help="Number of ingredients")
+    parser.add_argument("--k", type=int, default=100, help="Candidates per recipe")
+    parser.add_argument("--skip-dense", action="store_true", help="Only time the sparse implementation")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    volume = random_recipes(args.recipes, args.ingredients, args.seed)
+    print(f"{args.recipes} recipes, {args.ingredients} ingredients, k={args.k}")
+    print(f"{'method':>7}  {'time':>9}  {'peak RSS':>10}")
+
+    results = {}
+    for method in ["sparse"] if args.skip_dense else ["sparse", "dense"]:
+        elapsed, peak_mb, candidates = run_isolated(method, volume, args.k)
+        results[method] = candidates
+        print(f"{method:>7}  {elapsed:8.2f}s  {peak_mb:7.1f} MB")
+
+    if "dense" in results:
+        rows = np.random.default_rng(args.seed).choice(args.recipes, size=min(200, args.recipes), replace=False)
+        sparse_dist = candidate_distances(volume, results["sparse"], rows)
+        dense_dist = candidate_distances(volume, results["dense"], rows)
+        if not np.allclose(sparse_dist, dense_dist, atol=1e-5):
+            raise SystemExit("Candidate distances differ between implementations")
+        print("Candidate distances match on", len(rows), "sampled recipes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark ingredient recommendations: SQL query vs. in-memory bitset index.
+
+Creates temporary random inventories, then times for each of them
+Database.get_ingredient_recommendations through the SQL query
+(use_index=False) and through the RecommendationIndex, plus the index-only
+"missing <= N" and greedy shopping list queries. Reports the one-off index
+build time and checks that both recommendation paths agree. The temporary
+inventories are deleted afterwards.
+
+Usage:
+    # Uses DB_HOST/DB_PORT/DB_NAME/DB_USER/DB_PASSWORD like the API
+    python scripts/bench_recommendations.py
+    python scripts/bench_recommendations.py --users 20 --inventory-size 40 --max-missing 3 --list-size 5
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from db.db_core import Database  # noqa: E402
+
+logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+logging.getLogger().setLevel(logging.WARNING)
+
+BENCH_USER_PREFIX = "bench-recommendations-"
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def summarize(label: str, timings: list) -> None:
+    print(
+        f"{label:>24}  p50={np.percentile(timings, 50):9.2f}ms  "
+        f"p95={np.percentile(timings, 95):9.2f}ms"
+    )
+
+
+def canonical(recommendations: list) -> set:
+    return {(r["id"], r["recipes_unlocked"]) for r in recommendations}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10, help="Temporary inventories to score")
+    parser.add_argument("--inventory-size", type=int, default=30, help="Ingredients per inventory")
+    parser.add_argument("--max-missing", type=int, default=2, help="N for the missing <= N query")
+    parser.add_argument("--list-size", type=int, default=5, help="Shopping list length")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    db = Database()
+    rng = random.Random(args.seed)
+    used = [
+        row["ingredient_id"]
+        for row in db.execute_query("SELECT DISTINCT ingredient_id FROM recipe_ingredients")
+    ]
+    users = [f"{BENCH_USER_PREFIX}{i}" for i in range(args.users)]
+    try:
+        for user_id in users:
+            db.add_user_ingredients_bulk(user_id, rng.sample(used, min(args.inventory_size, len(used))))
+
+        index, build_ms = timed(db._load_recommendation_index)
+        print(f"index build: {build_ms:.1f}ms for {index.n_recipes} recipes, {len(index.ingredient_ids)} ingredients")
+
+        sql_times, index_times, almost_times, list_times = [], [], [], []
+        mismatches = 0
+        for user_id in users:
+            from_sql, elapsed = timed(db.get_ingredient_recommendations, user_id, 1000, use_index=False)
+            sql_times.append(elapsed)
+            from_index, elapsed = timed(db.get_ingredient_recommendations, user_id, 1000)
+            index_times.append(elapsed)
+            mismatches += canonical(from_sql) != canonical(from_index)
+            _, elapsed = timed(db.get_almost_makeable_recipes, user_id, args.max_missing)
+            almost_times.append(elapsed)
+            _, elapsed = timed(db.get_shopping_list, user_id, args.list_size)
+            list_times.append(elapsed)
+
+        summarize("recommendations (sql)", sql_times)
+        summarize("recommendations (index)", index_times)
+        summarize(f"missing <= {args.max_missing} (index)", almost_times)
+        summarize(f"shopping list x{args.list_size}", list_times)
+        print(f"users with differing recommendations: {mismatches}")
+    finally:
+        db.execute_query(
+            "DELETE FROM user_ingredients WHERE cognito_user_id LIKE %s",
+            (BENCH_USER_PREFIX + "%",),
+        )
+        db.refresh_makeable_recipes(user_ids=users)
+
+
+if __name__ == "__main__":
+    main()
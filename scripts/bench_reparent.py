@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark re-parenting an ingredient subtree: per-descendant path updates vs.
+the set-based rewrite in Database.update_ingredient.
+
+For each requested subtree size, creates a temporary subtree (branching
+factor --fanout) under one temporary root, then moves it back and forth
+between two temporary roots --repeat times with:
+
+  legacy      one autocommitted UPDATE per descendant, as update_ingredient
+              used to do
+  set-based   Database.update_ingredient (single transaction, one UPDATE
+              for all descendant paths)
+
+and checks that both leave identical paths. The temporary ingredients are
+deleted afterwards.
+
+Usage:
+    # Uses DB_HOST/DB_PORT/DB_NAME/DB_USER/DB_PASSWORD like the API
+    python scripts/bench_reparent.py
+    python scripts/bench_reparent.py --sizes 10 100 1000 --repeat 3 --fanout 10
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from db.db_core import Database  # noqa: E402
+
+logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+logging.getLogger().setLevel(logging.WARNING)
+
+BENCH_PREFIX = "bench-reparent-"
+
+
+def legacy_reparent(db: Database, ingredient_id: int, new_parent_id: int) -> None:
+    """The statement sequence update_ingredient issued before the set-based rewrite"""
+    old_path = db.get_ingredient(ingredient_id)["path"]
+    parent_path = db.get_ingredient(new_parent_id)["path"]
+    new_path = f"{parent_path}{ingredient_id}/"
+    descendants = db.get_ingredient_descendants(ingredient_id)
+    db.execute_query(
+        "UPDATE ingredients SET parent_id = %(parent_id)s, path = %(path)s WHERE id = %(id)s",
+        {"parent_id": new_parent_id, "path": new_path, "id": ingredient_id},
+    )
+    for descendant in descendants:
+        db.execute_query(
+            "UPDATE ingredients SET path = %(path)s WHERE id = %(id)s",
+            {"path": descendant["path"].replace(old_path, new_path), "id": descendant["id"]},
+        )
+    db.refresh_makeable_recipes()
+
+
+def build_subtree(db: Database, parent_id: int, size: int, fanout: int) -> int:
+    """Create a breadth-first subtree of ``size`` nodes under parent_id; returns its root"""
+    root = db.create_ingredient({"name": f"{BENCH_PREFIX}{size}-0", "description": None, "parent_id": parent_id})
+    frontier = [root["id"]]
+    created = 1
+    while created < size:
+        next_frontier = []
+        for node in frontier:
+            for _ in range(fanout):
+                if created >= size:
+                    break
+                child = db.create_ingredient(
+                    {"name": f"{BENCH_PREFIX}{size}-{created}", "description": None, "parent_id": node}
+                )
+                next_frontier.append(child["id"])
+                created += 1
+        frontier = next_frontier
+    return root["id"]
+
+
+def subtree_paths(db: Database, root_id: int) -> dict:
+    rows = db.execute_query(
+        "SELECT i.id, i.path FROM ingredients i JOIN ingredients r ON r.id = %s WHERE i.path LIKE r.path || '%%'",
+        (root_id,),
+    )
+    return {row["id"]: row["path"] for row in rows}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Subtree sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="Moves per method and size")
+    parser.add_argument("--fanout", type=int, default=10, help="Children per node")
+    args = parser.parse_args()
+
+    db = Database()
+    try:
+        home = db.create_ingredient({"name": f"{BENCH_PREFIX}home", "description": None})["id"]
+        away = db.create_ingredient({"name": f"{BENCH_PREFIX}away", "description": None})["id"]
+        print(f"{'nodes':>6}  {'legacy p50':>12}  {'set-based p50':>14}  speedup")
+        for size in args.sizes:
+            root = build_subtree(db, home, size, args.fanout)
+            timings = {"legacy": [], "set-based": []}
+            final_paths = {}
+            for method in timings:
+                for move in range(2 * args.repeat):
+                    target = away if move % 2 == 0 else home
+                    start = time.perf_counter()
+                    if method == "legacy":
+                        legacy_reparent(db, root, target)
+                    else:
+                        db.update_ingredient(root, {"parent_id": target})
+                    timings[method].append((time.perf_counter() - start) * 1000)
+                final_paths[method] = subtree_paths(db, root)
+            assert final_paths["legacy"] == final_paths["set-based"], "methods disagree on paths"
+
+            legacy = np.percentile(timings["legacy"], 50)
+            set_based = np.percentile(timings["set-based"], 50)
+            print(f"{size:>6}  {legacy:10.1f}ms  {set_based:12.1f}ms  {legacy / set_based:6.1f}x")
+    finally:
+        db.execute_query("DELETE FROM ingredients WHERE name LIKE %s", (BENCH_PREFIX + "%",))
+        db.refresh_makeable_recipes()
+
+
+if __name__ == "__main__":
+    main()
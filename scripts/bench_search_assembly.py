@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark recipe search result assembly: server-side JSON vs. row fan-out.
+
+The legacy search query returns one row per (recipe, ingredient) pair, which
+Python regroups before issuing a second query for ancestor ingredient names.
+The JSON path returns one row per recipe with ingredients, ancestor names and
+tags aggregated by PostgreSQL. This script times both through
+Database.search_recipes_paginated and reports latency and rows transferred.
+
+Usage:
+    # Uses DB_HOST/DB_PORT/DB_NAME/DB_USER/DB_PASSWORD like the API
+    python scripts/bench_search_assembly.py
+
+    python scripts/bench_search_assembly.py --limits 20 100 1000 --repeat 30 --keyset
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from db.db_core import Database  # noqa: E402
+
+logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+logging.getLogger().setLevel(logging.WARNING)
+
+
+class RowCountingDatabase(Database):
+    """Database that records how many rows each search round trip returned"""
+
+    def __init__(self):
+        super().__init__()
+        self.rows_returned = 0
+        self.queries = 0
+
+    def execute_query(self, sql, params=None):
+        result = super().execute_query(sql, params)
+        self.queries += 1
+        if isinstance(result, list):
+            self.rows_returned += len(result)
+        return result
+
+
+def time_search(db: RowCountingDatabase, limit: int, repeat: int, assemble_in_db: bool, keyset: bool) -> dict:
+    kwargs = {
+        "search_params": {},
+        "limit": limit,
+        "offset": 0,
+        "return_pagination": keyset,
+        "assemble_in_db": assemble_in_db,
+    }
+    # Warm up plan cache and connection
+    db.search_recipes_paginated(**kwargs)
+
+    timings = []
+    db.rows_returned = 0
+    db.queries = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        db.search_recipes_paginated(**kwargs)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "p50": float(np.percentile(timings, 50)),
+        "p95": float(np.percentile(timings, 95)),
+        "rows": db.rows_returned // repeat,
+        "queries": db.queries // repeat,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limits", type=int, nargs="+", default=[20, 100, 1000], help="Page sizes to benchmark")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed searches per configuration")
+    parser.add_argument("--keyset", action="store_true", help="Use cursor pagination instead of offset")
+    args = parser.parse_args()
+
+    db = RowCountingDatabase()
+    print(f"{'limit':>6} {'path':>7} {'p50 ms':>9} {'p95 ms':>9} {'rows':>7} {'queries':>8}")
+    for limit in args.limits:
+        for label, assemble_in_db in (("legacy", False), ("json", True)):
+            stats = time_search(db, limit, args.repeat, assemble_in_db, args.keyset)
+            print(
+                f"{limit:>6} {label:>7} {stats['p50']:>9.1f} {stats['p95']:>9.1f} "
+                f"{stats['rows']:>7} {stats['queries']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -49,6 +49,16 @@ def test_get_analytics_not_found(tmp_path):
     assert result is None
 
 
+def test_has_analytics(tmp_path):
+    """has_analytics reports whether an artifact has been stored"""
+    storage = AnalyticsStorage(str(tmp_path))
+    assert not storage.has_analytics("ingredient-tree")
+
+    storage.put_analytics("ingredient-tree", {"id": "root"})
+
+    assert storage.has_analytics("ingredient-tree")
+
+
 def test_put_analytics_success(tmp_path):
     """Test storing analytics data in local storage"""
     storage = AnalyticsStorage(str(tmp_path))
@@ -1,5 +1,6 @@
 import os
 import sys
+from contextlib import contextmanager
 
 import numpy as np
 import pandas as pd
@@ -7,17 +8,29 @@ import pytest
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
 
+from api.db import db_analytics
 from api.db.db_analytics import AnalyticsQueries
 import barcart
+from barcart.transport_plan import TransportPlans
+
+
+class _EmptyDB:
+    """Database stand-in with no rows; the loaders are monkeypatched per test"""
+
+    def execute_query(self, _sql, _params=None):
+        return []
+
+    def stream_query(self, _sql, _params=None, chunk_size=50000):
+        return iter(())
+
+    @contextmanager
+    def read_snapshot(self):
+        yield self
 
 
 def test_compute_cocktail_space_umap_em_handles_sparse_volume(
     monkeypatch,
 ) -> None:
-    class DummyDB:
-        def execute_query(self, _sql, _params=None):
-            return []
-
     ingredients_df = pd.DataFrame(
         [
             {
@@ -75,7 +88,7 @@ def test_compute_cocktail_space_umap_em_handles_sparse_volume(
     monkeypatch.setattr(barcart, "em_fit", fake_em_fit)
     monkeypatch.setattr(barcart, "compute_umap_embedding", fake_umap_embedding)
 
-    analytics_queries = AnalyticsQueries(DummyDB())
+    analytics_queries = AnalyticsQueries(_EmptyDB())
     monkeypatch.setattr(
         analytics_queries, "get_ingredients_for_tree", lambda: ingredients_df
     )
@@ -92,10 +105,6 @@ def test_compute_cocktail_space_umap_em_handles_sparse_volume(
 def test_compute_cocktail_space_umap_em_replaces_infinite_distances(
     monkeypatch,
 ) -> None:
-    class DummyDB:
-        def execute_query(self, _sql, _params=None):
-            return []
-
     ingredients_df = pd.DataFrame(
         [
             {
@@ -157,7 +166,7 @@ def test_compute_cocktail_space_umap_em_replaces_infinite_distances(
     monkeypatch.setattr(barcart, "em_fit", fake_em_fit)
     monkeypatch.setattr(barcart, "compute_umap_embedding", fake_umap_embedding)
 
-    analytics_queries = AnalyticsQueries(DummyDB())
+    analytics_queries = AnalyticsQueries(_EmptyDB())
     monkeypatch.setattr(
         analytics_queries, "get_ingredients_for_tree", lambda: ingredients_df
     )
@@ -173,10 +182,6 @@ def test_compute_cocktail_space_umap_em_replaces_infinite_distances(
 def test_compute_cocktail_space_umap_em_uses_em_plans_for_similarity(
     monkeypatch,
 ) -> None:
-    class DummyDB:
-        def execute_query(self, _sql, _params=None):
-            return []
-
     ingredients_df = pd.DataFrame(
         [
             {
@@ -226,7 +231,7 @@ def test_compute_cocktail_space_umap_em_uses_em_plans_for_similarity(
 
     def fake_em_fit(volume_matrix, cost_matrix, n_ingredients, iters=1, **_kwargs):
         dist = np.array([[0.0, 1.2], [1.2, 0.0]], dtype=np.float32)
-        plans = {(0, 1): [(0, 1, 0.5, 0.1)]}
+        plans = TransportPlans.from_dict({(0, 1): [(0, 1, 0.5, 0.1)]})
         return dist, cost_matrix, {"delta": [0.0]}, plans
 
     def fake_umap_embedding(distance_matrix, **_kwargs):
@@ -247,7 +252,7 @@ def test_compute_cocktail_space_umap_em_uses_em_plans_for_similarity(
     monkeypatch.setattr(barcart, "emd_matrix", fake_emd_matrix)
     monkeypatch.setattr(barcart.reporting, "build_recipe_similarity", fake_build_recipe_similarity)
 
-    analytics_queries = AnalyticsQueries(DummyDB())
+    analytics_queries = AnalyticsQueries(_EmptyDB())
     monkeypatch.setattr(
         analytics_queries, "get_ingredients_for_tree", lambda: ingredients_df
     )
@@ -260,3 +265,159 @@ def test_compute_cocktail_space_umap_em_uses_em_plans_for_similarity(
     )
 
     assert similarity == expected_similarity
+
+
+def test_compute_cocktail_space_umap_em_passes_knn_graph_to_umap(
+    monkeypatch, tmp_path
+) -> None:
+    from barcart.distance_matrix import KnnDistanceGraph
+
+    ingredients_df = pd.DataFrame(
+        [
+            {
+                "ingredient_id": 1,
+                "ingredient_name": "Base",
+                "ingredient_path": "/1/",
+                "substitution_level": 1.0,
+                "allow_substitution": 1,
+            },
+            {
+                "ingredient_id": 2,
+                "ingredient_name": "Mixer",
+                "ingredient_path": "/2/",
+                "substitution_level": 1.0,
+                "allow_substitution": 1,
+            },
+        ]
+    )
+    recipes_df = pd.DataFrame(
+        [
+            {"recipe_id": rid, "recipe_name": name, "ingredient_id": ing, "volume_fraction": vol}
+            for rid, name, ing, vol in [
+                (10, "A", 1, 0.6),
+                (10, "A", 2, 0.4),
+                (11, "B", 1, 0.5),
+                (11, "B", 2, 0.5),
+                (12, "C", 1, 1.0),
+            ]
+        ]
+    )
+    graph = KnnDistanceGraph.from_pairs(3, [0], [1], [0.4])
+
+    def fake_em_fit(volume_matrix, cost_matrix, n_ingredients, iters=1, **kwargs):
+        assert kwargs["dense"] is False
+        return graph, cost_matrix, {"delta": [0.0]}
+
+    def fake_umap_embedding(distance_matrix, **_kwargs):
+        assert distance_matrix is graph
+        return np.zeros((distance_matrix.shape[0], 2), dtype=np.float32)
+
+    monkeypatch.setattr(barcart, "em_fit", fake_em_fit)
+    monkeypatch.setattr(barcart, "compute_umap_embedding", fake_umap_embedding)
+    monkeypatch.setenv("ANALYTICS_PATH", str(tmp_path))
+
+    analytics_queries = AnalyticsQueries(_EmptyDB())
+    monkeypatch.setattr(
+        analytics_queries, "get_ingredients_for_tree", lambda: ingredients_df
+    )
+    monkeypatch.setattr(
+        analytics_queries, "get_recipes_for_distance_calc", lambda: recipes_df
+    )
+
+    result = analytics_queries.compute_cocktail_space_umap_em()
+
+    assert len(result) == 3
+    from api.utils.analytics_files import get_em_distance_matrix_path
+
+    saved = np.load(get_em_distance_matrix_path(str(tmp_path)))
+    assert saved[0, 1] == pytest.approx(0.4)
+    # Pairs outside the kNN graph are written as twice the largest distance
+    assert saved[0, 2] == pytest.approx(0.8)
+
+
+def test_compute_cocktail_space_umap_em_refits_incrementally(
+    monkeypatch, tmp_path
+) -> None:
+    ingredients_df = pd.DataFrame(
+        [
+            {
+                "ingredient_id": ing,
+                "ingredient_name": name,
+                "ingredient_path": f"/{ing}/",
+                "substitution_level": 1.0,
+                "allow_substitution": 0,
+            }
+            for ing, name in [(1, "Gin"), (2, "Vermouth"), (3, "Bitters")]
+        ]
+    )
+    rng = np.random.default_rng(0)
+
+    def make_recipes(n_recipes):
+        rows = []
+        for rid in range(100, 100 + n_recipes):
+            volumes = rng.random(3) + 0.1
+            for ing, vol in zip((1, 2, 3), volumes / volumes.sum()):
+                rows.append(
+                    {
+                        "recipe_id": rid,
+                        "recipe_name": f"R{rid}",
+                        "ingredient_id": ing,
+                        "volume_fraction": vol,
+                    }
+                )
+        return pd.DataFrame(rows)
+
+    recipes_df = make_recipes(40)
+    refits = []
+    em_refit = barcart.em_refit
+
+    def recording_em_refit(*args, **kwargs):
+        refits.append(args[4])
+        return em_refit(*args, **kwargs)
+
+    def fake_umap_embedding(distance_matrix, **_kwargs):
+        return np.zeros((distance_matrix.shape[0], 2), dtype=np.float32)
+
+    monkeypatch.setattr(barcart, "em_refit", recording_em_refit)
+    monkeypatch.setattr(barcart, "compute_umap_embedding", fake_umap_embedding)
+    monkeypatch.setenv("ANALYTICS_PATH", str(tmp_path))
+
+    analytics_queries = AnalyticsQueries(_EmptyDB())
+    monkeypatch.setattr(
+        analytics_queries, "get_ingredients_for_tree", lambda: ingredients_df
+    )
+    monkeypatch.setattr(
+        analytics_queries, "get_recipes_for_distance_calc", lambda: recipes_df
+    )
+
+    analytics_queries.compute_cocktail_space_umap_em(candidate_k=5, incremental=True)
+    from api.utils.analytics_files import load_em_state
+
+    state = load_em_state(str(tmp_path))
+    assert int(state["incremental_refits"]) == 0
+    full_log = analytics_queries.last_em_log
+    assert full_log["mode"] == "full"
+    assert 1 <= len(full_log["delta"]) <= db_analytics.EM_MAX_ITERS
+    assert len(full_log["e_step_seconds"]) == len(full_log["delta"])
+    assert full_log["knn_jaccard"][0] is None
+    assert len(state["recipe_ids"]) == 40
+    assert refits == []
+
+    # One new recipe: refit only that recipe, warm-started from the saved state
+    recipes_df = pd.concat([recipes_df, make_recipes(41).tail(3)], ignore_index=True)
+    result = analytics_queries.compute_cocktail_space_umap_em(
+        candidate_k=5, incremental=True
+    )
+
+    assert len(result) == 41
+    assert len(refits) == 1
+    np.testing.assert_array_equal(refits[0], [40])
+    assert analytics_queries.last_em_log["mode"] == "incremental"
+    assert analytics_queries.last_em_log["changed"] == 1
+    state = load_em_state(str(tmp_path))
+    assert int(state["incremental_refits"]) == 1
+    assert 140 in state["recipe_ids"]
+
+    # Without incremental mode the state is left alone and em_fit runs
+    analytics_queries.compute_cocktail_space_umap_em(candidate_k=5)
+    assert len(refits) == 1
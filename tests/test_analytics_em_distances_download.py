@@ -15,6 +15,22 @@ def test_save_em_distance_matrix_writes_file(tmp_path):
     assert np.allclose(loaded, matrix)
 
 
+def test_save_em_distance_matrix_expands_condensed_matrix(tmp_path):
+    from api.utils import analytics_files
+    from barcart.distance_matrix import CondensedDistanceMatrix
+
+    matrix = np.array(
+        [[0.0, 1.0, 2.0], [1.0, 0.0, 3.0], [2.0, 3.0, 0.0]], dtype=np.float32
+    )
+    output_path = analytics_files.save_em_distance_matrix(
+        str(tmp_path), CondensedDistanceMatrix.from_dense(matrix)
+    )
+
+    loaded = np.load(output_path)
+    assert loaded.dtype == np.float32
+    assert np.array_equal(loaded, matrix)
+
+
 def test_save_em_ingredient_distance_matrix_writes_file(tmp_path):
     from api.utils import analytics_files
 
@@ -28,6 +44,27 @@ def test_save_em_ingredient_distance_matrix_writes_file(tmp_path):
     assert np.allclose(loaded, matrix)
 
 
+def test_em_state_round_trip(tmp_path):
+    from api.utils import analytics_files
+
+    assert analytics_files.load_em_state(str(tmp_path)) is None
+
+    state = {
+        "recipe_ids": np.array([10, 11], dtype=np.int64),
+        "ingredient_ids": np.array(["1", "2"]),
+        "prior_fingerprint": np.array("abc"),
+        "cost_matrix": np.eye(2, dtype=np.float32),
+    }
+    output_path = analytics_files.save_em_state(str(tmp_path), state)
+
+    assert output_path.name == "em-state.npz"
+    loaded = analytics_files.load_em_state(str(tmp_path))
+    assert set(loaded) == set(state)
+    assert str(loaded["prior_fingerprint"]) == "abc"
+    np.testing.assert_array_equal(loaded["ingredient_ids"], state["ingredient_ids"])
+    assert loaded["cost_matrix"].dtype == np.float32
+
+
 @pytest.mark.asyncio
 async def test_download_em_distance_matrix(tmp_path, monkeypatch):
     matrix = np.array([[0.0, 2.0], [2.0, 0.0]], dtype=np.float32)
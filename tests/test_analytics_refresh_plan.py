@@ -0,0 +1,114 @@
+"""Tests for planning the incremental analytics refresh"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from analytics.analytics_refresh import (
+    ANALYTICS_STAGES,
+    STAGE_ARTIFACTS,
+    STAGE_INPUT_TABLES,
+    plan_refresh,
+)
+
+
+VERSIONS = {"recipes": 5, "ingredients": 3, "recipe_ingredients": 7, "units": 1}
+ALL_STORED = list(STAGE_ARTIFACTS.values())
+
+
+def _built_at(versions):
+    return {
+        name: {table: versions[table] for table in tables}
+        for name, tables in STAGE_INPUT_TABLES.items()
+    }
+
+
+def test_every_artifact_stage_is_tracked():
+    artifact_stages = {stage.name for stage in ANALYTICS_STAGES} - {"dataset"}
+    assert set(STAGE_INPUT_TABLES) == artifact_stages
+    assert set(STAGE_ARTIFACTS) == artifact_stages
+
+
+def test_first_run_rebuilds_everything():
+    assert plan_refresh(VERSIONS, {}, []) == [
+        stage.name for stage in ANALYTICS_STAGES if stage.name != "dataset"
+    ]
+
+
+def test_nothing_stale_when_versions_match():
+    assert plan_refresh(VERSIONS, _built_at(VERSIONS), ALL_STORED) == []
+
+
+def test_recipe_rename_skips_ingredient_only_artifacts():
+    state = _built_at(VERSIONS)
+    current = {**VERSIONS, "recipes": 6}
+
+    assert plan_refresh(current, state, ALL_STORED) == ["cocktail_space_em", "cocktail_space"]
+
+
+def test_ingredient_change_skips_recipe_complexity():
+    state = _built_at(VERSIONS)
+    current = {**VERSIONS, "ingredients": 4}
+
+    assert set(plan_refresh(current, state, ALL_STORED)) == {
+        "cocktail_space_em",
+        "cocktail_space",
+        "ingredient_usage",
+        "ingredient_tree",
+    }
+
+
+def test_missing_artifact_file_is_rebuilt():
+    stored = [name for name in ALL_STORED if name != "ingredient-tree"]
+
+    assert plan_refresh(VERSIONS, _built_at(VERSIONS), stored) == ["ingredient_tree"]
+
+
+def test_full_refresh_rebuilds_everything():
+    assert plan_refresh(VERSIONS, _built_at(VERSIONS), ALL_STORED, full=True) == list(
+        plan_refresh(VERSIONS, {}, [])
+    )
+
+
+class _TrackedDB:
+    """Serves the change tracking tables; loading a snapshot is an error"""
+
+    def __init__(self, versions, artifact_state):
+        self.versions = versions
+        self.artifact_state = artifact_state
+
+    def execute_query(self, sql, parameters=None):
+        if "FROM analytics_table_versions" in sql:
+            return [{"table_name": t, "version": v} for t, v in self.versions.items()]
+        if "FROM analytics_artifact_state" in sql:
+            return [
+                {"artifact": name, "input_versions": versions}
+                for name, versions in self.artifact_state.items()
+            ]
+        raise AssertionError(f"Unexpected query: {sql}")
+
+    def read_snapshot(self):
+        raise AssertionError("Snapshot loaded although nothing is stale")
+
+
+def test_regenerate_skips_when_nothing_is_stale(monkeypatch, tmp_path):
+    from analytics import analytics_refresh
+    from utils.analytics_cache import AnalyticsStorage
+
+    storage = AnalyticsStorage(str(tmp_path))
+    for name in ALL_STORED:
+        storage.put_analytics(name, {})
+    monkeypatch.setenv("ANALYTICS_PATH", str(tmp_path))
+    monkeypatch.delenv("ANALYTICS_FULL_REFRESH", raising=False)
+    monkeypatch.setattr(
+        analytics_refresh,
+        "get_database",
+        lambda: _TrackedDB(VERSIONS, _built_at(VERSIONS)),
+    )
+
+    result = analytics_refresh.regenerate_analytics()
+
+    assert result["rebuilt"] == []
+    assert set(result["skipped"]) == set(STAGE_INPUT_TABLES)
+    assert result["stages"] == {}
+    assert result["cocktail_space_em_count"] is None
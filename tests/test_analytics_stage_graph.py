@@ -0,0 +1,98 @@
+"""Tests for the DAG scheduler behind the analytics refresh"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from analytics.stage_graph import Stage, run_stages
+
+
+calls = []
+
+
+def _source():
+    calls.append("source")
+    return {"x": 2}
+
+
+def _double(x):
+    calls.append("double")
+    return {"y": 2 * x}
+
+
+def _add(x, y):
+    calls.append("add")
+    return {"z": x + y}
+
+
+def test_runs_stages_in_dependency_order():
+    calls.clear()
+    stages = [
+        Stage("add", _add, inputs=("x", "y"), outputs=("z",)),
+        Stage("double", _double, inputs=("x",), outputs=("y",)),
+        Stage("source", _source, outputs=("x",)),
+    ]
+
+    values, reports = run_stages(stages, max_workers=0)
+
+    assert calls == ["source", "double", "add"]
+    assert values == {"x": 2, "y": 4, "z": 6}
+    assert set(reports) == {"source", "double", "add"}
+    for report in reports.values():
+        assert report["wall_seconds"] >= 0
+        assert report["peak_rss_mb"] > 0
+        assert report["worker"] is False
+
+
+def test_worker_stages_run_in_separate_processes():
+    # dict() is picklable, so it can stand in for a worker stage function
+    stages = [
+        Stage("source", _source, outputs=("x",)),
+        Stage("first", dict, inputs=("x",), worker=True, memory_mb=10),
+        Stage("second", dict, inputs=("x",), worker=True, memory_mb=10),
+    ]
+
+    values, reports = run_stages(stages, max_workers=2, memory_budget_mb=15)
+
+    assert values == {"x": 2}
+    assert reports["first"]["worker"] and reports["second"]["worker"]
+    assert not reports["source"]["worker"]
+
+
+def test_rejects_cycles_and_missing_producers():
+    with pytest.raises(ValueError, match="cycle"):
+        run_stages(
+            [
+                Stage("a", _double, inputs=("x",), outputs=("y",)),
+                Stage("b", _double, inputs=("y",), outputs=("x",)),
+            ],
+            max_workers=0,
+        )
+    with pytest.raises(ValueError, match="no producer"):
+        run_stages([Stage("a", _double, inputs=("x",), outputs=("y",))], max_workers=0)
+
+
+def test_rejects_missing_outputs():
+    with pytest.raises(ValueError, match="did not produce"):
+        run_stages([Stage("source", _source, outputs=("x", "w"))], max_workers=0)
+
+
+def test_analytics_stages_cover_the_refresh_summary():
+    from analytics.analytics_refresh import ANALYTICS_STAGES
+
+    outputs = {name for stage in ANALYTICS_STAGES for name in stage.outputs}
+
+    assert {
+        "dataset",
+        "ingredient_stats_count",
+        "complexity_stats_count",
+        "cocktail_space_count",
+        "cocktail_space_em_count",
+        "ingredient_tree_nodes",
+        "em_fit",
+    } == outputs
+    assert all(
+        set(stage.inputs) <= outputs for stage in ANALYTICS_STAGES
+    )
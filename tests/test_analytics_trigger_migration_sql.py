@@ -7,3 +7,40 @@ def test_analytics_refresh_migration_contains_expected_sql():
     assert "analytics_refresh_state" in sql
     assert "mark_analytics_dirty" in sql
     assert "CREATE TRIGGER" in sql
+
+
+def test_ingredient_ancestors_migration_contains_expected_sql():
+    sql = Path("migrations/14_migration_add_ingredient_ancestors.sql").read_text()
+    assert "CREATE TABLE IF NOT EXISTS ingredient_ancestors" in sql
+    assert "sync_ingredient_ancestors" in sql
+    assert "CREATE TRIGGER ingredient_ancestors_update" in sql
+    # Existing hierarchies are backfilled
+    assert "INSERT INTO ingredient_ancestors" in sql
+
+
+def test_user_makeable_recipes_migration_contains_expected_sql():
+    sql = Path("migrations/15_migration_add_user_makeable_recipes.sql").read_text()
+    assert "CREATE TABLE IF NOT EXISTS user_makeable_recipes" in sql
+    assert "INSERT INTO user_makeable_recipes" in sql
+    # Backfill applies the same substitution rules as the API
+    assert "ingredient_ancestors user_anc" in sql
+
+
+def test_ingredient_satisfies_migration_contains_expected_sql():
+    sql = Path("migrations/16_migration_add_ingredient_satisfies.sql").read_text()
+    assert "CREATE TABLE IF NOT EXISTS ingredient_satisfies" in sql
+    assert "CREATE OR REPLACE FUNCTION refresh_ingredient_satisfies" in sql
+    assert "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows" in sql
+    # Existing ingredients are backfilled
+    assert "SELECT refresh_ingredient_satisfies(ARRAY(SELECT id FROM ingredients))" in sql
+
+
+def test_analytics_change_tracking_migration_contains_expected_sql():
+    sql = Path("migrations/17_migration_add_analytics_change_tracking.sql").read_text()
+    assert "CREATE TABLE IF NOT EXISTS analytics_table_versions" in sql
+    assert "CREATE TABLE IF NOT EXISTS analytics_artifact_state" in sql
+    assert "bump_analytics_table_version(TG_TABLE_NAME)" in sql
+    assert "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows" in sql
+    # Ratings and tags no longer mark analytics dirty
+    assert "DROP TRIGGER IF EXISTS analytics_ratings_dirty ON ratings;" in sql
+    assert "ON ratings\nFOR EACH STATEMENT" not in sql
@@ -0,0 +1,91 @@
+"""Tests for the AsyncDatabase executor offload layer"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from api.db.async_database import AsyncDatabase
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeDatabase:
+    """Minimal stand-in exposing blocking methods like Database does"""
+
+    def __init__(self):
+        self.conn_params = {"host": "localhost"}
+        self.call_threads = []
+
+    def get_recipe(self, recipe_id, user_id=None):
+        self.call_threads.append(threading.current_thread().name)
+        return {"id": recipe_id, "user_id": user_id}
+
+    def slow_query(self, seconds):
+        time.sleep(seconds)
+        return seconds
+
+    def failing_query(self):
+        raise ValueError("boom")
+
+
+class TestAsyncDatabase:
+    """Test that blocking Database calls are offloaded from the event loop"""
+
+    async def test_methods_run_on_executor_threads(self):
+        """Methods should execute on the database executor, not the loop thread"""
+        fake = FakeDatabase()
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="db") as executor:
+            db = AsyncDatabase(fake, executor)
+            result = await db.get_recipe(5, user_id="user-1")
+
+        assert result == {"id": 5, "user_id": "user-1"}
+        assert fake.call_threads[0].startswith("db")
+        assert fake.call_threads[0] != threading.current_thread().name
+
+    async def test_attributes_pass_through(self):
+        """Non-callable attributes should be returned unchanged"""
+        db = AsyncDatabase(FakeDatabase())
+        assert db.conn_params == {"host": "localhost"}
+
+    async def test_exceptions_propagate(self):
+        """Exceptions raised in the worker should surface to the awaiting route"""
+        db = AsyncDatabase(FakeDatabase())
+        with pytest.raises(ValueError, match="boom"):
+            await db.failing_query()
+
+    async def test_event_loop_not_blocked(self):
+        """A slow query should not delay other coroutines on the loop"""
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            db = AsyncDatabase(FakeDatabase(), executor)
+            slow = asyncio.create_task(db.slow_query(0.3))
+
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            elapsed = time.perf_counter() - start
+
+            assert elapsed < 0.2
+            assert await slow == 0.3
+
+    async def test_concurrency_bounded_by_executor(self):
+        """No more calls than executor workers should run at once"""
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def tracked():
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.05)
+            with lock:
+                active -= 1
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            db = AsyncDatabase(FakeDatabase(), executor)
+            await asyncio.gather(*(db.run(tracked) for _ in range(10)))
+
+        assert peak <= 3
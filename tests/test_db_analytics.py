@@ -2,6 +2,7 @@
 import pytest
 import sys
 import os
+from contextlib import contextmanager
 
 # Add api directory to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api'))
@@ -65,3 +66,218 @@ def test_get_recipe_complexity_distribution(db_instance_with_data):
     # Verify counts are positive
     assert first_item["ingredient_count"] > 0
     assert first_item["recipe_count"] > 0
+
+
+class _StreamingDB:
+    """Serves a small catalog through read_snapshot, streaming recipe ingredients in chunks
+
+    Recipe ingredient rows are (recipe_id, ingredient_id, amount, unit_id), with
+    unit_id -1 for rows without a unit.
+    """
+
+    def __init__(self, ingredient_rows, chunk_size=2):
+        self.ingredient_rows = ingredient_rows
+        self.chunk_size = chunk_size
+        self.snapshots = 0
+
+    @contextmanager
+    def read_snapshot(self):
+        self.snapshots += 1
+        yield self
+
+    def stream_query(self, sql, parameters=None, chunk_size=50000):
+        for start in range(0, len(self.ingredient_rows), self.chunk_size):
+            yield self.ingredient_rows[start:start + self.chunk_size]
+
+    def execute_query(self, sql, parameters=None):
+        if "FROM analytics_table_versions" in sql:
+            return [{"table_name": "recipes", "version": 3}, {"table_name": "units", "version": 1}]
+        if "FROM units" in sql:
+            return [
+                {"id": 1, "name": "ml", "conversion_to_ml": 1.0},
+                {"id": 2, "name": "oz", "conversion_to_ml": 30.0},
+                {"id": 3, "name": "each", "conversion_to_ml": None},
+                {"id": 4, "name": "to top", "conversion_to_ml": None},
+            ]
+        if "FROM recipes" in sql:
+            return [{"id": 10, "name": "A"}, {"id": 11, "name": "B"}, {"id": 12, "name": "C"}]
+        return [
+            {"ingredient_id": 1, "ingredient_name": "Gin", "path": "/1/", "parent_id": None,
+             "allow_substitution": False, "direct_usage": 2, "hierarchical_usage": 2,
+             "has_children": False},
+            {"ingredient_id": 2, "ingredient_name": "Tonic", "path": "/2/", "parent_id": None,
+             "allow_substitution": False, "direct_usage": 1, "hierarchical_usage": 1,
+             "has_children": False},
+            {"ingredient_id": 3, "ingredient_name": "Lime", "path": "/3/", "parent_id": None,
+             "allow_substitution": False, "direct_usage": 2, "hierarchical_usage": 2,
+             "has_children": False},
+        ]
+
+
+def test_get_recipes_for_distance_calc_streams_into_fractions():
+    """Streamed chunks are normalized per recipe and joined to names"""
+    analytics = AnalyticsQueries(
+        _StreamingDB([(10, 1, 2.0, 2), (10, 2, 120.0, 1), (10, 3, 20.0, 1), (11, 1, 50.0, 1), (11, 3, 50.0, 1)])
+    )
+    df = analytics.get_recipes_for_distance_calc()
+
+    assert list(df.columns) == [
+        "recipe_id", "recipe_name", "ingredient_id",
+        "ingredient_name", "ingredient_path", "volume_fraction",
+    ]
+    assert df["recipe_id"].tolist() == [10, 10, 10, 11, 11]
+    assert df["recipe_name"].tolist() == ["A", "A", "A", "B", "B"]
+    assert df["ingredient_name"].tolist() == ["Gin", "Tonic", "Lime", "Gin", "Lime"]
+    assert df["ingredient_path"].tolist() == ["/1/", "/2/", "/3/", "/1/", "/3/"]
+    assert df["volume_fraction"].tolist() == pytest.approx([0.3, 0.6, 0.1, 0.5, 0.5])
+
+
+def test_get_recipe_ingredient_matrix_builds_normalized_csr():
+    """The matrix is CSR, drops empty recipes and unused ingredients"""
+    import scipy.sparse as sp
+
+    analytics = AnalyticsQueries(
+        _StreamingDB([(10, 1, 30.0, 1), (10, 3, 10.0, 1), (11, 2, 0.0, 1), (12, 1, 5.0, -1)])
+    )
+    recipe_id_map, matrix, recipe_names = analytics.get_recipe_ingredient_matrix()
+
+    assert sp.issparse(matrix) and matrix.format == "csr"
+    assert recipe_id_map == {0: 10, 1: 12}
+    assert recipe_names == ["A", "C"]
+    assert matrix.toarray().ravel().tolist() == pytest.approx([0.75, 0.25, 1.0, 0.0])
+
+
+def test_recipe_loaders_handle_no_rows():
+    """An empty recipe_ingredients table gives empty results"""
+    analytics = AnalyticsQueries(_StreamingDB([]))
+
+    assert analytics.get_recipes_for_distance_calc().empty
+    recipe_id_map, matrix, recipe_names = analytics.get_recipe_ingredient_matrix()
+    assert recipe_id_map == {} and matrix.shape[0] == 0 and recipe_names == []
+
+
+def test_compute_cocktail_space_umap_embeds_sparse_knn_graph(monkeypatch):
+    """The Manhattan UMAP gets a kNN graph instead of a dense distance matrix"""
+    import numpy as np
+    import barcart
+    from barcart import KnnDistanceGraph
+
+    seen = {}
+
+    def fake_umap_embedding(distance_matrix, **_kwargs):
+        seen["input"] = distance_matrix
+        return np.zeros((distance_matrix.shape[0], 2), dtype=np.float32)
+
+    monkeypatch.setattr(barcart, "compute_umap_embedding", fake_umap_embedding)
+    analytics = AnalyticsQueries(
+        _StreamingDB([(10, 1, 30.0, 1), (10, 3, 10.0, 1), (11, 2, 20.0, 1), (12, 1, 5.0, 1)])
+    )
+    result = analytics.compute_cocktail_space_umap()
+
+    assert isinstance(seen["input"], KnnDistanceGraph)
+    assert seen["input"].shape == (3, 3)
+    assert [item["recipe_id"] for item in result] == [10, 11, 12]
+    assert result[0]["ingredients"] == ["Gin", "Lime"]
+
+
+def test_dataset_volume_rules_and_complexity():
+    """Special units, conversions and missing amounts follow the SQL volume rules"""
+    analytics = AnalyticsQueries(
+        _StreamingDB(
+            [
+                (10, 1, 2.0, 2),     # 2 oz -> 60 ml
+                (10, 2, None, 4),    # to top -> 90 ml
+                (10, 3, 1.0, 3),     # each
+                (11, 1, None, -1),   # no amount, no unit
+                (11, 3, 15.0, -1),   # raw amount
+            ]
+        )
+    )
+    dataset = analytics.load_dataset()
+
+    assert dataset.volume_ml().tolist() == [60.0, 90.0, 1.0, 1.0, 15.0]
+    assert dataset.volume_ml(special_units=False).tolist() == [60.0, 1.0, 1.0, 1.0, 15.0]
+    assert dataset.n_recipes == 2
+    assert dataset.recipe_complexity() == [
+        {"ingredient_count": 2, "recipe_count": 1},
+        {"ingredient_count": 3, "recipe_count": 1},
+    ]
+    # 'each' sorts last, a missing amount counts as 0 ml
+    assert dataset.ingredient_lists() == {10: ["Tonic", "Gin", "Lime"], 11: ["Lime", "Gin"]}
+
+
+def test_loaders_share_one_snapshot():
+    """Every loader reads the dataset loaded by the first one"""
+    db = _StreamingDB([(10, 1, 30.0, 1), (10, 3, 10.0, 1), (11, 2, 20.0, 1)])
+    analytics = AnalyticsQueries(db)
+
+    analytics.get_recipes_for_distance_calc()
+    analytics.get_recipe_ingredient_matrix()
+    analytics.get_ingredients_for_tree()
+
+    assert db.snapshots == 1
+
+
+def test_load_dataset_reads_table_versions():
+    """The snapshot records the input table versions it was read at"""
+    dataset = AnalyticsQueries(_StreamingDB([(10, 1, 30.0, 1)])).load_dataset()
+
+    assert dataset.table_versions == {"recipes": 3, "units": 1}
+
+
+def test_load_dataset_matches_live_queries(db_instance_with_data):
+    """The snapshot agrees with the per-query analytics on the same data"""
+    analytics = AnalyticsQueries(db_instance_with_data)
+    dataset = analytics.load_dataset()
+
+    assert dataset.recipe_complexity() == analytics.get_recipe_complexity_distribution()
+    assert sorted(row["ingredient_id"] for row in dataset.ingredient_stats) == sorted(
+        row["ingredient_id"]
+        for row in analytics.get_ingredient_usage_stats(all_ingredients=True)
+    )
+
+
+def test_read_snapshot_ignores_concurrent_writes(db_instance_with_data):
+    """Rows committed after the snapshot started are not visible inside it"""
+    db = db_instance_with_data
+    with db.read_snapshot() as snapshot:
+        before = snapshot.execute_query("SELECT COUNT(*) AS n FROM recipes")[0]["n"]
+        db.execute_query(
+            "INSERT INTO recipes (name, instructions) VALUES (%s, %s)",
+            ("Snapshot Sour", "Shake"),
+        )
+        after = snapshot.execute_query("SELECT COUNT(*) AS n FROM recipes")[0]["n"]
+
+    assert after == before
+    assert db.execute_query("SELECT COUNT(*) AS n FROM recipes")[0]["n"] == before + 1
+
+
+def test_table_versions_only_track_analytics_inputs(db_instance_with_data):
+    """Rating updates leave the versions alone, composition changes bump them"""
+    db = db_instance_with_data
+    analytics = AnalyticsQueries(db)
+    recipe_id = db.execute_query("SELECT id FROM recipes ORDER BY id LIMIT 1")[0]["id"]
+    before = analytics.get_table_versions()
+
+    db.execute_query(
+        "UPDATE recipes SET avg_rating = 4.5, rating_count = 2 WHERE id = %s", (recipe_id,)
+    )
+    assert analytics.get_table_versions() == before
+
+    db.execute_query(
+        "UPDATE recipe_ingredients SET amount = amount + 1 WHERE recipe_id = %s", (recipe_id,)
+    )
+    after = analytics.get_table_versions()
+    assert after["recipe_ingredients"] == before["recipe_ingredients"] + 1
+    assert after["recipes"] == before["recipes"]
+
+
+def test_record_artifact_build_round_trip(db_instance_with_data):
+    analytics = AnalyticsQueries(db_instance_with_data)
+
+    analytics.record_artifact_build("ingredient_tree", {"ingredients": 1, "recipe_ingredients": 2})
+    analytics.record_artifact_build("ingredient_tree", {"ingredients": 3, "recipe_ingredients": 2})
+
+    assert analytics.get_artifact_state() == {
+        "ingredient_tree": {"ingredients": 3, "recipe_ingredients": 2}
+    }
@@ -359,6 +359,55 @@ class TestIngredientUpdate:
         result = db.update_ingredient(999, {"name": "New Name"})
         assert result is None
 
+    def test_update_ingredient_reparent_deep_subtree(self, db_instance):
+        """Test that every level of a moved subtree gets the new path prefix"""
+        db = db_instance
+
+        spirits = db.create_ingredient(
+                {"name": "Spirits", "description": None, "parent_id": None}
+        )
+        rum = db.create_ingredient(
+                {"name": "Rum", "description": None, "parent_id": None}
+        )
+        chain = [rum]
+        for level in range(4):
+            chain.append(
+                db.create_ingredient(
+                    {
+                        "name": f"Rum Level {level}",
+                        "description": None,
+                        "parent_id": chain[-1]["id"],
+                    }
+                )
+            )
+
+        db.update_ingredient(rum["id"], {"parent_id": spirits["id"]})
+
+        expected = f"/{spirits['id']}/"
+        for ingredient in chain:
+            expected += f"{ingredient['id']}/"
+            assert db.get_ingredient(ingredient["id"])["path"] == expected
+        ancestors = db.execute_query(
+            "SELECT ancestor_id FROM ingredient_ancestors WHERE descendant_id = %s",
+            (chain[-1]["id"],),
+        )
+        assert spirits["id"] in {row["ancestor_id"] for row in ancestors}
+
+    def test_update_ingredient_failed_reparent_changes_nothing(self, db_instance):
+        """Test that a rejected re-parent leaves the other fields untouched"""
+        db = db_instance
+
+        gin = db.create_ingredient(
+                {"name": "Gin", "description": "Gin", "parent_id": None}
+        )
+
+        with pytest.raises(ValueError):
+                db.update_ingredient(gin["id"], {"name": "Renamed", "parent_id": 999})
+
+        unchanged = db.get_ingredient(gin["id"])
+        assert unchanged["name"] == "Gin"
+        assert unchanged["path"] == f"/{gin['id']}/"
+
 
 class TestIngredientDeletion:
     """Test ingredient deletion operations"""
@@ -0,0 +1,122 @@
+"""Tests for the blocking, instrumented connection pool"""
+
+import threading
+import time
+
+import pytest
+from psycopg2 import extensions
+
+from api.db.db_pool import ConnectionPool, PoolTimeout
+
+
+@pytest.fixture
+def make_pool(pg_db_with_schema):
+    """Factory for pools against the test database, closed after the test"""
+    pools = []
+
+    def _make(**kwargs):
+        options = {"minconn": 0, "maxconn": 2, "acquire_timeout": 2.0}
+        options.update(kwargs)
+        connection_pool = ConnectionPool(**options, **pg_db_with_schema)
+        pools.append(connection_pool)
+        return connection_pool
+
+    yield _make
+    for connection_pool in pools:
+        connection_pool.closeall()
+
+
+class TestConnectionPool:
+    """Test waiting, recycling and stats reporting"""
+
+    def test_reuses_returned_connection(self, make_pool):
+        """A returned connection should be handed out again"""
+        connection_pool = make_pool()
+        conn = connection_pool.getconn()
+        connection_pool.putconn(conn)
+
+        assert connection_pool.getconn() is conn
+        assert connection_pool.stats()["connections_opened"] == 1
+
+    def test_waits_for_connection_instead_of_failing(self, make_pool):
+        """An exhausted pool should block until a connection is returned"""
+        connection_pool = make_pool(maxconn=1)
+        conn = connection_pool.getconn()
+
+        def release_later():
+            time.sleep(0.2)
+            connection_pool.putconn(conn)
+
+        releaser = threading.Thread(target=release_later)
+        releaser.start()
+        start = time.monotonic()
+        second = connection_pool.getconn()
+        waited = time.monotonic() - start
+        releaser.join()
+
+        assert second is conn
+        assert waited >= 0.15
+        assert connection_pool.stats()["acquire_wait"]["max_ms"] >= 150
+
+    def test_times_out_when_exhausted(self, make_pool):
+        """Callers should get PoolTimeout once the deadline passes"""
+        connection_pool = make_pool(maxconn=1)
+        connection_pool.getconn()
+
+        with pytest.raises(PoolTimeout):
+            connection_pool.getconn(timeout=0.1)
+        assert connection_pool.stats()["timeouts"] == 1
+
+    def test_stats_report_in_use_and_waiters(self, make_pool):
+        """Stats should reflect checked out connections and blocked callers"""
+        connection_pool = make_pool(maxconn=1)
+        conn = connection_pool.getconn()
+
+        waiter = threading.Thread(target=lambda: connection_pool.putconn(connection_pool.getconn()))
+        waiter.start()
+        time.sleep(0.1)
+        stats = connection_pool.stats()
+        connection_pool.putconn(conn)
+        waiter.join()
+
+        assert stats["in_use"] == 1
+        assert stats["waiters"] == 1
+        assert connection_pool.stats()["in_use"] == 0
+
+    def test_recycles_connections_past_max_lifetime(self, make_pool):
+        """Connections older than max_lifetime should be closed on return"""
+        connection_pool = make_pool(max_lifetime=0.05)
+        conn = connection_pool.getconn()
+        time.sleep(0.1)
+        connection_pool.putconn(conn)
+
+        assert conn.closed
+        assert connection_pool.getconn() is not conn
+        assert connection_pool.stats()["connections_recycled"] == 1
+
+    def test_reaps_idle_connections_above_minimum(self, make_pool):
+        """Idle connections beyond minconn should be closed after max_idle"""
+        connection_pool = make_pool(minconn=1, max_idle=0.05)
+        first = connection_pool.getconn()
+        second = connection_pool.getconn()
+        connection_pool.putconn(first)
+        time.sleep(0.1)
+        connection_pool.putconn(second)
+
+        stats = connection_pool.stats()
+        assert stats["size"] == 1
+        assert first.closed
+
+    def test_rolls_back_open_transaction_on_return(self, make_pool):
+        """Returning a connection mid-transaction should roll it back"""
+        connection_pool = make_pool(maxconn=1)
+        conn = connection_pool.getconn()
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+
+        connection_pool.putconn(conn)
+
+        assert (
+            connection_pool.getconn().info.transaction_status
+            == extensions.TRANSACTION_STATUS_IDLE
+        )
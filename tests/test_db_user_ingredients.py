@@ -270,6 +270,28 @@ class TestDatabaseUserIngredients:
         assert len(result["errors"]) == 1
         assert "999999" in result["errors"][0]
 
+    def test_add_user_ingredients_bulk_uses_one_connection(self, db_instance):
+        """Bulk add checks every ingredient on the connection it already holds"""
+        db_instance.execute_query(
+            "INSERT INTO ingredients (name, description) VALUES (%s, %s)",
+            ("Test Ingredient", "Test Description"),
+        )
+        ingredient_id = db_instance.execute_query(
+            "SELECT id FROM ingredients WHERE name = %s", ("Test Ingredient",)
+        )[0]["id"]
+
+        with patch.object(
+            Database, "_get_connection", autospec=True, side_effect=Database._get_connection
+        ) as get_connection:
+            result = db_instance.add_user_ingredients_bulk(
+                "test-user-123", [ingredient_id, ingredient_id, 999999]
+            )
+
+        assert get_connection.call_count == 1
+        assert result["added_count"] == 1
+        assert result["already_exists_count"] == 1  # repeated in the request
+        assert result["failed_count"] == 1
+
     def test_remove_user_ingredients_bulk_success(self, db_instance):
         """Test successfully removing multiple ingredients from user's inventory"""
         # Insert test ingredients
@@ -358,6 +380,45 @@ class TestDatabaseUserIngredients:
         assert result["removed_count"] == 1  # ingredient1 removed
         assert result["not_found_count"] == 2  # ingredient2 and nonexistent not found
 
+    def test_remove_user_ingredients_bulk_parent_with_kept_child_fails(self, db_instance):
+        """Test that a parent whose child stays in the inventory blocks the whole removal"""
+        rum = db_instance.create_ingredient({"name": "Rum", "description": None})
+        aged = db_instance.create_ingredient(
+            {"name": "Aged Rum", "description": None, "parent_id": rum["id"]}
+        )
+        lime = db_instance.create_ingredient({"name": "Lime", "description": None})
+        user_id = "test-user-123"
+        db_instance.add_user_ingredient(user_id, aged["id"])  # Adds Rum as well
+        db_instance.add_user_ingredient(user_id, lime["id"])
+
+        with pytest.raises(ValueError, match="Cannot remove ingredient 'Rum'.*Aged Rum"):
+            db_instance.remove_user_ingredients_bulk(user_id, [lime["id"], rum["id"]])
+
+        held = {row["ingredient_id"] for row in db_instance.get_user_ingredients(user_id)}
+        assert held == {rum["id"], aged["id"], lime["id"]}
+
+    def test_remove_user_ingredients_bulk_parent_with_child(self, db_instance):
+        """Test removing a parent together with its children, listed parent first"""
+        rum = db_instance.create_ingredient({"name": "Rum", "description": None})
+        aged = db_instance.create_ingredient(
+            {"name": "Aged Rum", "description": None, "parent_id": rum["id"]}
+        )
+        user_id = "test-user-123"
+        db_instance.add_user_ingredient(user_id, aged["id"])
+
+        result = db_instance.remove_user_ingredients_bulk(
+            user_id, [rum["id"], aged["id"], aged["id"]]
+        )
+
+        assert result == {"removed_count": 2, "not_found_count": 0}
+        assert db_instance.get_user_ingredients(user_id) == []
+
+    def test_remove_user_ingredients_bulk_none_held(self, db_instance):
+        """Test that removing only unknown ingredients counts every one as not found"""
+        result = db_instance.remove_user_ingredients_bulk("test-user-123", [999998, 999999])
+
+        assert result == {"removed_count": 0, "not_found_count": 2}
+
     def test_user_ingredients_isolation(self, db_instance):
         """Test that user ingredients are properly isolated between users"""
         # Insert test ingredient
@@ -9,7 +9,11 @@ import os
 from typing import Dict, Any, List
 from unittest.mock import patch
 
-from api.db.db_utils import extract_all_ingredient_ids, assemble_ingredient_full_names
+from api.db.db_utils import (
+    extract_all_ingredient_ids,
+    assemble_ingredient_full_names,
+    assemble_ingredient_full_names_from_ancestors,
+)
 
 
 class TestExtractAllIngredientIds:
@@ -509,6 +513,48 @@ class TestAssembleIngredientFullNames:
         assert ingredients_list[0]["full_name"] == "St-Germain's \"Premium\" & Elderflower [Liqueurs & Cordials]"
 
 
+class TestAssembleIngredientFullNamesFromAncestors:
+    """Test assemble_ingredient_full_names_from_ancestors function"""
+
+    def test_root_ingredient_without_ancestors(self):
+        """Root ingredients (ancestor_names null in JSON) use their own name"""
+        ingredients_list = [
+            {"ingredient_id": 5, "ingredient_name": "Gin", "ancestor_names": None}
+        ]
+
+        assemble_ingredient_full_names_from_ancestors(ingredients_list)
+
+        assert ingredients_list[0]["full_name"] == "Gin"
+        assert ingredients_list[0]["hierarchy"] == ["Gin"]
+        assert "ancestor_names" not in ingredients_list[0]
+
+    def test_nested_ingredient_matches_map_based_assembly(self):
+        """Ancestor names from the database should give the same result as the ID map"""
+        from_ancestors = [
+            {
+                "ingredient_id": 20,
+                "ingredient_name": "Plymouth Gin",
+                "ingredient_path": "/5/10/20/",
+                "ancestor_names": ["Spirits", "Gin"],
+            }
+        ]
+        from_map = [
+            {
+                "ingredient_id": 20,
+                "ingredient_name": "Plymouth Gin",
+                "ingredient_path": "/5/10/20/",
+            }
+        ]
+
+        assemble_ingredient_full_names_from_ancestors(from_ancestors)
+        assemble_ingredient_full_names(
+            from_map, {5: "Spirits", 10: "Gin", 20: "Plymouth Gin"}
+        )
+
+        assert from_ancestors == from_map
+        assert from_ancestors[0]["full_name"] == "Plymouth Gin [Gin;Spirits]"
+
+
 class TestUtilsIntegration:
     """Test integration between utility functions"""
 
@@ -0,0 +1,115 @@
+"""Tests for the ingredient_ancestors closure table"""
+
+import random
+
+import psycopg2
+
+
+def _closure(db):
+    rows = db.execute_query(
+        "SELECT ancestor_id, descendant_id, depth FROM ingredient_ancestors"
+    )
+    return {(r["ancestor_id"], r["descendant_id"], r["depth"]) for r in rows}
+
+
+def _closure_from_paths(db):
+    expected = set()
+    for ingredient in db.get_ingredients():
+        ids = [int(part) for part in ingredient["path"].strip("/").split("/")]
+        for position, ancestor_id in enumerate(ids):
+            expected.add((ancestor_id, ingredient["id"], len(ids) - 1 - position))
+    return expected
+
+
+class TestIngredientAncestors:
+    """Test that the closure table tracks ingredient paths"""
+
+    def test_create_adds_self_and_ancestor_rows(self, db_instance):
+        """A new ingredient should be linked to itself and every ancestor"""
+        db = db_instance
+        spirits = db.create_ingredient({"name": "Spirits", "description": None})
+        rum = db.create_ingredient(
+            {"name": "Rum", "description": None, "parent_id": spirits["id"]}
+        )
+        jamaican = db.create_ingredient(
+            {"name": "Jamaican Rum", "description": None, "parent_id": rum["id"]}
+        )
+
+        assert _closure(db) == {
+            (spirits["id"], spirits["id"], 0),
+            (rum["id"], rum["id"], 0),
+            (spirits["id"], rum["id"], 1),
+            (jamaican["id"], jamaican["id"], 0),
+            (rum["id"], jamaican["id"], 1),
+            (spirits["id"], jamaican["id"], 2),
+        }
+
+    def test_reparent_moves_whole_subtree(self, db_instance):
+        """Re-parenting should rewrite closure rows for the ingredient and its descendants"""
+        db = db_instance
+        spirits = db.create_ingredient({"name": "Spirits", "description": None})
+        liqueurs = db.create_ingredient({"name": "Liqueurs", "description": None})
+        orange = db.create_ingredient(
+            {"name": "Orange Liqueur", "description": None, "parent_id": spirits["id"]}
+        )
+        db.create_ingredient(
+            {"name": "Triple Sec", "description": None, "parent_id": orange["id"]}
+        )
+
+        db.update_ingredient(orange["id"], {"parent_id": liqueurs["id"]})
+
+        assert _closure(db) == _closure_from_paths(db)
+        ancestors = db.execute_query(
+            "SELECT ancestor_id FROM ingredient_ancestors WHERE descendant_id = %s",
+            (orange["id"],),
+        )
+        assert spirits["id"] not in {row["ancestor_id"] for row in ancestors}
+
+    def test_delete_removes_rows(self, db_instance):
+        """Deleting an ingredient should cascade to its closure rows"""
+        db = db_instance
+        spirits = db.create_ingredient({"name": "Spirits", "description": None})
+        gin = db.create_ingredient(
+            {"name": "Gin", "description": None, "parent_id": spirits["id"]}
+        )
+
+        db.delete_ingredient(gin["id"])
+
+        assert _closure(db) == {(spirits["id"], spirits["id"], 0)}
+
+    def test_matches_paths_after_random_edits(self, db_instance):
+        """Closure rows should always equal what the paths imply"""
+        db = db_instance
+        rng = random.Random(7)
+        ids = []
+        for index in range(30):
+            parent_id = rng.choice(ids) if ids and rng.random() < 0.8 else None
+            ingredient = db.create_ingredient(
+                {"name": f"Random {index}", "description": None, "parent_id": parent_id}
+            )
+            ids.append(ingredient["id"])
+
+        for _ in range(15):
+            ingredient_id = rng.choice(ids)
+            new_parent = rng.choice(ids + [None])
+            try:
+                db.update_ingredient(ingredient_id, {"parent_id": new_parent})
+            except ValueError:
+                pass  # circular or self-parenting moves are rejected
+
+        assert _closure(db) == _closure_from_paths(db)
+
+    def test_raw_inserts_are_tracked(self, pg_db_with_schema):
+        """Rows written outside Database (restores, fixtures) are tracked too"""
+        conn = psycopg2.connect(**pg_db_with_schema)
+        conn.autocommit = True
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO ingredients (id, name, path) VALUES (1, 'A', '/1/'), (2, 'B', '/1/2/')"
+        )
+        cursor.execute("SELECT ancestor_id, descendant_id, depth FROM ingredient_ancestors")
+        rows = set(cursor.fetchall())
+        cursor.close()
+        conn.close()
+
+        assert rows == {(1, 1, 0), (2, 2, 0), (1, 2, 1)}
@@ -0,0 +1,131 @@
+"""Property tests: ingredient_satisfies matches INGREDIENT_SUBSTITUTION_MATCH"""
+
+import random
+
+import pytest
+
+from api.db.sql_queries import INGREDIENT_SUBSTITUTION_MATCH
+
+
+def _materialized(db):
+    rows = db.execute_query(
+        "SELECT user_ingredient_id, recipe_ingredient_id FROM ingredient_satisfies"
+    )
+    return {(r["user_ingredient_id"], r["recipe_ingredient_id"]) for r in rows}
+
+
+def _reference(db):
+    rows = db.execute_query(
+        f"""
+        SELECT i_user.id AS user_ingredient_id, i_recipe.id AS recipe_ingredient_id
+        FROM ingredients i_user
+        JOIN ingredients i_recipe ON ({INGREDIENT_SUBSTITUTION_MATCH})
+        """
+    )
+    return {(r["user_ingredient_id"], r["recipe_ingredient_id"]) for r in rows}
+
+
+def _random_hierarchy(db, rng, size):
+    ids = []
+    for index in range(size):
+        parent_id = rng.choice(ids) if ids and rng.random() < 0.75 else None
+        ingredient = db.create_ingredient(
+            {
+                "name": f"Ingredient {index}",
+                "description": None,
+                "parent_id": parent_id,
+                "allow_substitution": rng.random() < 0.6,
+            }
+        )
+        ids.append(ingredient["id"])
+    return ids
+
+
+class TestIngredientSatisfies:
+    """Test that the materialized substitution graph tracks the SQL rules"""
+
+    def test_matches_reference_on_test_data(self, db_instance_with_data):
+        """The fixture database should produce identical pairs"""
+        db = db_instance_with_data
+        assert _materialized(db) == _reference(db)
+        assert _materialized(db)
+
+    def test_parent_satisfies_child_until_blocked(self, db_instance):
+        """A blocking intermediate ingredient should remove the ancestor match"""
+        db = db_instance
+        rum = db.create_ingredient(
+            {"name": "Rum", "description": None, "allow_substitution": True}
+        )
+        aged = db.create_ingredient(
+            {
+                "name": "Aged Rum",
+                "description": None,
+                "parent_id": rum["id"],
+                "allow_substitution": True,
+            }
+        )
+        brand = db.create_ingredient(
+            {
+                "name": "Brand Aged Rum",
+                "description": None,
+                "parent_id": aged["id"],
+                "allow_substitution": True,
+            }
+        )
+        assert (rum["id"], brand["id"]) in _materialized(db)
+
+        db.update_ingredient(aged["id"], {"allow_substitution": False})
+
+        assert (rum["id"], brand["id"]) not in _materialized(db)
+        assert _materialized(db) == _reference(db)
+
+    @pytest.mark.parametrize("seed", range(6))
+    def test_matches_reference_after_random_edits(self, db_instance, seed):
+        """Flag changes, re-parenting, raw writes and deletes keep the graph exact"""
+        db = db_instance
+        rng = random.Random(seed)
+        ids = _random_hierarchy(db, rng, 14)
+        assert _materialized(db) == _reference(db)
+
+        for step in range(25):
+            action = rng.random()
+            ingredient_id = rng.choice(ids)
+            if action < 0.4:
+                db.update_ingredient(
+                    ingredient_id, {"allow_substitution": rng.random() < 0.5}
+                )
+            elif action < 0.7:
+                new_parent = rng.choice([None] + ids)
+                try:
+                    db.update_ingredient(ingredient_id, {"parent_id": new_parent})
+                except ValueError:
+                    pass  # Circular hierarchy rejected
+            elif action < 0.85:
+                # Writes that bypass Database, e.g. restores and fixtures
+                db.execute_query(
+                    "UPDATE ingredients SET allow_substitution = NOT allow_substitution WHERE id = %s",
+                    (ingredient_id,),
+                )
+            else:
+                try:
+                    if db.delete_ingredient(ingredient_id):
+                        ids.remove(ingredient_id)
+                except ValueError:
+                    pass  # Ingredient still has children
+            assert _materialized(db) == _reference(db), f"seed {seed}, step {step}"
+
+    def test_bulk_raw_insert(self, db_instance):
+        """A multi-row INSERT should be handled by the statement-level trigger"""
+        db = db_instance
+        db.execute_query(
+            """
+            INSERT INTO ingredients (id, name, parent_id, path, allow_substitution) VALUES
+            (101, 'Whiskey', NULL, '/101/', TRUE),
+            (102, 'Bourbon', 101, '/101/102/', TRUE),
+            (103, 'Rye', 101, '/101/103/', TRUE)
+            """
+        )
+
+        pairs = _materialized(db)
+        assert pairs == _reference(db)
+        assert {(101, 102), (102, 103), (103, 102)} <= pairs
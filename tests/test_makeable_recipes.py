@@ -0,0 +1,175 @@
+"""Tests for the materialized user_makeable_recipes table"""
+
+import random
+
+USER = "makeable-user"
+
+
+def _makeable(db, user_id=USER):
+    rows = db.execute_query(
+        "SELECT recipe_id FROM user_makeable_recipes WHERE cognito_user_id = %s",
+        (user_id,),
+    )
+    return {row["recipe_id"] for row in rows}
+
+
+def _all_rows(db):
+    rows = db.execute_query("SELECT cognito_user_id, recipe_id FROM user_makeable_recipes")
+    return {(row["cognito_user_id"], row["recipe_id"]) for row in rows}
+
+
+def _inventory_search(db, user_id=USER):
+    results = db.search_recipes_paginated(
+        {"inventory": True}, limit=100, offset=0, user_id=user_id
+    )
+    return {recipe["id"] for recipe in results}
+
+
+def _recipe(db, name, *ingredient_ids):
+    return db.create_recipe(
+        {
+            "name": name,
+            "instructions": "Stir",
+            "ingredients": [{"ingredient_id": i, "amount": 1.0} for i in ingredient_ids],
+        }
+    )
+
+
+class TestMakeableRecipes:
+    """Test that write paths keep user_makeable_recipes in sync"""
+
+    def test_inventory_changes_update_makeable_recipes(self, db_instance):
+        """Adding and removing inventory should add and drop makeable recipes"""
+        db = db_instance
+        gin = db.create_ingredient({"name": "Gin", "description": None})
+        vermouth = db.create_ingredient({"name": "Dry Vermouth", "description": None})
+        martini = _recipe(db, "Martini", gin["id"], vermouth["id"])
+
+        db.add_user_ingredient(USER, gin["id"])
+        assert _makeable(db) == set()
+
+        db.add_user_ingredient(USER, vermouth["id"])
+        assert _makeable(db) == {martini["id"]}
+        assert martini["id"] in _inventory_search(db)
+
+        db.remove_user_ingredient(USER, vermouth["id"])
+        assert _makeable(db) == set()
+        assert martini["id"] not in _inventory_search(db)
+
+    def test_bulk_inventory_changes(self, db_instance):
+        """Bulk add and remove should refresh the user's rows once"""
+        db = db_instance
+        gin = db.create_ingredient({"name": "Gin", "description": None})
+        campari = db.create_ingredient({"name": "Campari", "description": None})
+        negroni = _recipe(db, "Negroni-ish", gin["id"], campari["id"])
+
+        db.add_user_ingredients_bulk(USER, [gin["id"], campari["id"]])
+        assert _makeable(db) == {negroni["id"]}
+
+        db.remove_user_ingredients_bulk(USER, [campari["id"]])
+        assert _makeable(db) == set()
+
+    def test_recipe_changes_update_makeable_recipes(self, db_instance):
+        """Created, updated and deleted recipes should be reflected for every user"""
+        db = db_instance
+        rum = db.create_ingredient({"name": "Rum", "description": None})
+        lime = db.create_ingredient({"name": "Lime Juice", "description": None})
+        db.add_user_ingredient(USER, rum["id"])
+        db.add_user_ingredient("other-user", lime["id"])
+
+        neat = _recipe(db, "Rum Neat", rum["id"])
+        assert _makeable(db) == {neat["id"]}
+
+        db.update_recipe(
+            neat["id"],
+            {"ingredients": [{"ingredient_id": rum["id"]}, {"ingredient_id": lime["id"]}]},
+        )
+        assert _makeable(db) == set()
+
+        db.update_recipe(neat["id"], {"ingredients": [{"ingredient_id": lime["id"]}]})
+        assert _makeable(db, "other-user") == {neat["id"]}
+
+        db.delete_recipe(neat["id"])
+        assert _all_rows(db) == set()
+
+    def test_substitution_flag_changes(self, db_instance):
+        """Toggling allow_substitution should change what a parent ingredient satisfies"""
+        db = db_instance
+        rum = db.create_ingredient(
+            {"name": "Rum", "description": None, "allow_substitution": True}
+        )
+        jamaican = db.create_ingredient(
+            {
+                "name": "Jamaican Rum",
+                "description": None,
+                "parent_id": rum["id"],
+                "allow_substitution": True,
+            }
+        )
+        daiquiri = _recipe(db, "Jamaican Daiquiri", jamaican["id"])
+        db.add_user_ingredient(USER, rum["id"])
+        assert _makeable(db) == {daiquiri["id"]}
+
+        db.update_ingredient(jamaican["id"], {"allow_substitution": False})
+        assert _makeable(db) == set()
+
+        db.update_ingredient(jamaican["id"], {"allow_substitution": True})
+        assert _makeable(db) == {daiquiri["id"]}
+
+    def test_ingredientless_recipes_match_inventory_search(self, db_instance):
+        """Recipes without ingredients are trivially makeable, even with no inventory"""
+        db = db_instance
+        empty = db.create_recipe({"name": "Glass Of Ice", "instructions": "Add ice"})
+
+        assert _inventory_search(db) == {empty["id"]}
+
+    def test_incremental_matches_full_rebuild(self, db_instance):
+        """After random edits the table should equal a from-scratch rebuild"""
+        db = db_instance
+        rng = random.Random(7)
+        ingredients = []
+        for index in range(12):
+            parent = rng.choice(ingredients) if ingredients and rng.random() < 0.7 else None
+            ingredients.append(
+                db.create_ingredient(
+                    {
+                        "name": f"Ingredient {index}",
+                        "description": None,
+                        "parent_id": parent["id"] if parent else None,
+                        "allow_substitution": rng.random() < 0.6,
+                    }
+                )
+            )
+        ids = [ingredient["id"] for ingredient in ingredients]
+        for index in range(10):
+            _recipe(db, f"Recipe {index}", *rng.sample(ids, rng.randint(1, 3)))
+
+        users = ["user-a", "user-b", "user-c"]
+        for _ in range(60):
+            user = rng.choice(users)
+            action = rng.random()
+            if action < 0.5:
+                db.add_user_ingredients_bulk(user, rng.sample(ids, 2))
+            elif action < 0.75:
+                held = [row["ingredient_id"] for row in db.get_user_ingredients(user)]
+                if held:
+                    try:
+                        db.remove_user_ingredient(user, rng.choice(held))
+                    except ValueError:
+                        pass  # Parent with children still in inventory
+            elif action < 0.9:
+                db.update_ingredient(
+                    rng.choice(ids), {"allow_substitution": rng.random() < 0.5}
+                )
+            else:
+                try:
+                    db.update_ingredient(
+                        rng.choice(ids), {"parent_id": rng.choice([None] + ids)}
+                    )
+                except ValueError:
+                    pass  # Circular hierarchy rejected
+
+        incremental = _all_rows(db)
+        db.refresh_makeable_recipes()
+        assert incremental == _all_rows(db)
+        assert incremental
@@ -0,0 +1,124 @@
+"""Tests for the ingredient/tag name resolution cache"""
+
+import time
+
+from api.db.name_cache import NameCache
+
+
+class TestNameCache:
+    """Test TTL expiry, batch lookup and invalidation of NameCache"""
+
+    def test_get_many_splits_hits_and_misses(self):
+        """Cached names are returned, others reported missing once"""
+        cache = NameCache(ttl=60)
+        cache.put_many({"Gin": {"id": 1}}, cache.generation)
+
+        found, missing = cache.get_many(["Gin", "Rum", "Rum"])
+
+        assert found == {"Gin": {"id": 1}}
+        assert missing == ["Rum"]
+
+    def test_normalize_makes_lookup_case_insensitive(self):
+        """A lowercasing normalizer should match names regardless of case"""
+        cache = NameCache(ttl=60, normalize=str.lower)
+        cache.put_many({"Lime Juice": {"id": 7}}, cache.generation)
+
+        found, missing = cache.get_many(["LIME JUICE"])
+
+        assert found == {"lime juice": {"id": 7}}
+        assert missing == []
+
+    def test_entries_expire_after_ttl(self):
+        """Entries older than the TTL should be treated as misses"""
+        cache = NameCache(ttl=0.05)
+        cache.put_many({"Gin": {"id": 1}}, cache.generation)
+        time.sleep(0.1)
+
+        found, missing = cache.get_many(["Gin"])
+
+        assert found == {}
+        assert missing == ["Gin"]
+
+    def test_invalidate_drops_entries(self):
+        """invalidate() should clear everything cached so far"""
+        cache = NameCache(ttl=60)
+        cache.put_many({"Gin": {"id": 1}}, cache.generation)
+
+        cache.invalidate()
+
+        assert cache.get_many(["Gin"]) == ({}, ["Gin"])
+
+    def test_put_after_invalidation_is_ignored(self):
+        """Rows read before an invalidation must not be cached after it"""
+        cache = NameCache(ttl=60)
+        generation = cache.generation
+        cache.invalidate()
+
+        cache.put_many({"Gin": {"id": 1}}, generation)
+
+        assert cache.stats()["size"] == 0
+
+    def test_zero_ttl_disables_caching(self):
+        """With ttl=0 nothing is stored"""
+        cache = NameCache(ttl=0)
+        cache.put_many({"Gin": {"id": 1}}, cache.generation)
+
+        assert cache.get_many(["Gin"]) == ({}, ["Gin"])
+
+
+class TestDatabaseNameResolution:
+    """Test Database name resolution against PostgreSQL"""
+
+    def test_resolve_ingredient_names_batches_and_caches(self, db_instance):
+        """Names should resolve case-insensitively, then be served from cache"""
+        db = db_instance
+        gin = db.create_ingredient({"name": "Cache Gin", "description": None})
+        lime = db.create_ingredient({"name": "Cache Lime", "description": None})
+        queries = []
+        original = db.execute_query
+        db.execute_query = lambda *args: queries.append(args) or original(*args)
+
+        first = db.resolve_ingredient_names(["cache gin", "Cache Lime", "Missing"])
+        second = db.resolve_ingredient_names(["CACHE GIN", "cache lime"])
+
+        assert first["cache gin"]["id"] == gin["id"]
+        assert first["cache lime"]["path"] == lime["path"]
+        assert "missing" not in first
+        assert second.keys() == {"cache gin", "cache lime"}
+        assert len(queries) == 1
+
+    def test_ingredient_update_invalidates_cached_path(self, db_instance):
+        """Re-parenting an ingredient should not leave a stale cached path"""
+        db = db_instance
+        spirit = db.create_ingredient({"name": "Cache Spirit", "description": None})
+        gin = db.create_ingredient({"name": "Cache Gin", "description": None})
+        assert db.resolve_ingredient_names(["Cache Gin"])["cache gin"]["path"] == gin["path"]
+
+        db.update_ingredient(gin["id"], {"parent_id": spirit["id"]})
+
+        resolved = db.resolve_ingredient_names(["Cache Gin"])
+        assert resolved["cache gin"]["path"] == f"{spirit['path']}{gin['id']}/"
+
+    def test_public_tag_delete_invalidates_cache(self, db_instance):
+        """A deleted public tag should stop resolving"""
+        db = db_instance
+        tag = db.create_public_tag("CacheTag")
+        assert db.resolve_public_tag_names(["CacheTag"])["CacheTag"]["id"] == tag["id"]
+
+        db.delete_public_tag(tag["id"])
+
+        assert db.resolve_public_tag_names(["CacheTag"]) == {}
+
+    def test_search_after_tag_recreated(self, db_instance):
+        """Search filters should see tags created after a failed lookup"""
+        db = db_instance
+        recipe = db.create_recipe(
+            {"name": "Cache Tag Recipe", "instructions": "Stir", "ingredients": []}
+        )
+        assert db.search_recipes_paginated({"tags": ["CacheLater"]}) == []
+
+        tag = db.create_public_tag("CacheLater")
+        db.add_public_tag_to_recipe(recipe["id"], tag["id"])
+
+        results = db.search_recipes_paginated({"tags": ["CacheLater"]})
+        assert [r["id"] for r in results] == [recipe["id"]]
@@ -0,0 +1,196 @@
+"""Tests for the in-memory bitset recommendation engine"""
+
+import random
+
+from api.db.recommendation_engine import RecommendationIndex, RecommendationIndexCache
+
+# Gin(1) Vermouth(2) Campari(3) Lime(4) Rum(5) Jamaican Rum(6) Syrup(7)
+INGREDIENTS = [
+    {"id": 1, "name": "Gin"},
+    {"id": 2, "name": "Vermouth"},
+    {"id": 3, "name": "Campari"},
+    {"id": 4, "name": "Lime"},
+    {"id": 5, "name": "Rum"},
+    {"id": 6, "name": "Jamaican Rum"},
+    {"id": 7, "name": "Syrup"},
+]
+RECIPES = [
+    (10, "Martini"),
+    (11, "Negroni"),
+    (12, "Gimlet"),
+    (13, "Daiquiri"),
+    (14, "Jamaican Daiquiri"),
+    (15, "Glass Of Ice"),
+]
+REQUIREMENTS = [
+    (10, 1), (10, 2),
+    (11, 1), (11, 2), (11, 3),
+    (12, 1), (12, 4), (12, 7),
+    (13, 5), (13, 4), (13, 7),
+    (14, 6), (14, 4), (14, 7),
+]
+# Every ingredient satisfies itself; Rum also stands in for Jamaican Rum
+SATISFIES = [(i["id"], i["id"]) for i in INGREDIENTS] + [(5, 6)]
+
+
+def _index():
+    return RecommendationIndex(INGREDIENTS, RECIPES, REQUIREMENTS, SATISFIES)
+
+
+class TestRecommendationIndex:
+    """Test scoring an inventory against the packed recipe bitsets"""
+
+    def test_makeable_uses_substitution(self):
+        """Rum should satisfy a recipe asking for Jamaican Rum"""
+        index = _index()
+
+        assert index.makeable_recipe_ids([5, 4, 7]) == [13, 14, 15]
+        assert index.makeable_recipe_ids([6, 4, 7]) == [14, 15]
+
+    def test_recommend_counts_recipes_missing_one_ingredient(self):
+        """Each recommendation completes recipes that lack only that ingredient (ties by name)"""
+        index = _index()
+
+        recommendations = index.recommend([1, 4])
+
+        assert [(r["id"], r["recipes_unlocked"], r["recipe_names"]) for r in recommendations] == [
+            (7, 1, ["Gimlet"]),
+            (2, 1, ["Martini"]),
+        ]
+
+    def test_recommend_respects_limit(self):
+        index = _index()
+
+        assert len(index.recommend([1, 4], limit=1)) == 1
+        assert index.recommend([], limit=5) == []
+
+    def test_almost_makeable_up_to_n_missing(self):
+        """Recipes missing up to N ingredients are listed with what they lack"""
+        index = _index()
+
+        almost = index.almost_makeable([1], max_missing=2)
+
+        assert almost == [
+            {"recipe_id": 10, "recipe_name": "Martini", "missing_ingredient_ids": [2]},
+            {"recipe_id": 12, "recipe_name": "Gimlet", "missing_ingredient_ids": [4, 7]},
+            {"recipe_id": 11, "recipe_name": "Negroni", "missing_ingredient_ids": [2, 3]},
+        ]
+
+    def test_shopping_list_is_greedy(self):
+        """Each pick should unlock the most recipes given earlier picks"""
+        index = _index()
+
+        picks = index.shopping_list([4, 7], size=3)
+
+        # Rum completes Daiquiri and (by substitution) Jamaican Daiquiri
+        assert picks[0]["id"] == 5
+        assert picks[0]["recipe_names"] == ["Daiquiri", "Jamaican Daiquiri"]
+        assert picks[1]["id"] == 1
+        assert picks[1]["recipe_names"] == ["Gimlet"]
+        assert picks[2]["id"] == 2
+        assert picks[2]["recipe_names"] == ["Martini"]
+
+    def test_shopping_list_plans_multi_ingredient_recipes(self):
+        """With no single-ingredient unlock, picks should still build toward recipes"""
+        index = _index()
+
+        picks = index.shopping_list([], size=2)
+
+        assert [pick["id"] for pick in picks] == [1, 2]
+        assert picks[0]["recipes_unlocked"] == 0
+        assert picks[1]["recipe_names"] == ["Martini"]
+
+
+class TestRecommendationIndexCache:
+    """Test reuse, invalidation and stats of the index cache"""
+
+    def test_reuses_index_until_invalidated(self):
+        cache = RecommendationIndexCache(ttl=60)
+        builds = []
+
+        def build():
+            builds.append(1)
+            return _index()
+
+        first = cache.get(build)
+        assert cache.get(build) is first
+        cache.invalidate()
+        assert cache.get(build) is not first
+        assert len(builds) == 2
+        assert cache.stats()["builds"] == 2
+        assert cache.stats()["recipes"] == len(RECIPES)
+
+    def test_build_racing_invalidation_is_not_kept(self):
+        """An index built across an invalidation must not be cached"""
+        cache = RecommendationIndexCache(ttl=60)
+
+        def build():
+            cache.invalidate()
+            return _index()
+
+        cache.get(build)
+        assert cache.stats()["loaded"] is False
+
+
+def _canonical(recommendations):
+    return {(r["id"], r["recipes_unlocked"], tuple(sorted(r["recipe_names"]))) for r in recommendations}
+
+
+class TestRecommendationParity:
+    """Test that the index gives the same recommendations as the SQL query"""
+
+    def test_matches_sql_on_random_catalog(self, db_instance):
+        db = db_instance
+        rng = random.Random(3)
+        ids = []
+        for index in range(15):
+            parent_id = rng.choice(ids) if ids and rng.random() < 0.7 else None
+            ids.append(
+                db.create_ingredient(
+                    {
+                        "name": f"Ingredient {index}",
+                        "description": None,
+                        "parent_id": parent_id,
+                        "allow_substitution": rng.random() < 0.6,
+                    }
+                )["id"]
+            )
+        for index in range(40):
+            db.create_recipe(
+                {
+                    "name": f"Recipe {index}",
+                    "instructions": "Mix",
+                    "ingredients": [
+                        {"ingredient_id": i} for i in rng.sample(ids, rng.randint(1, 4))
+                    ],
+                }
+            )
+
+        for user in range(8):
+            user_id = f"user-{user}"
+            db.add_user_ingredients_bulk(user_id, rng.sample(ids, rng.randint(0, 6)))
+            from_index = db.get_ingredient_recommendations(user_id, limit=100)
+            from_sql = db.get_ingredient_recommendations(user_id, limit=100, use_index=False)
+            assert _canonical(from_index) == _canonical(from_sql)
+
+    def test_recipe_writes_invalidate_index(self, db_instance):
+        """A new recipe should show up in recommendations without waiting for the TTL"""
+        db = db_instance
+        gin = db.create_ingredient({"name": "Gin", "description": None})
+        tonic = db.create_ingredient({"name": "Tonic", "description": None})
+        db.add_user_ingredient("user", gin["id"])
+        assert db.get_ingredient_recommendations("user") == []
+
+        db.create_recipe(
+            {
+                "name": "Gin And Tonic",
+                "instructions": "Build",
+                "ingredients": [{"ingredient_id": gin["id"]}, {"ingredient_id": tonic["id"]}],
+            }
+        )
+
+        recommendations = db.get_ingredient_recommendations("user")
+        assert [r["name"] for r in recommendations] == ["Tonic"]
+        assert recommendations[0]["recipe_names"] == ["Gin And Tonic"]
+        assert db.get_shopping_list("user", size=1)[0]["id"] == tonic["id"]
+        assert db.get_almost_makeable_recipes("user")[0]["missing_ingredient_ids"] == [tonic["id"]]
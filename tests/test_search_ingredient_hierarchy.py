@@ -381,3 +381,106 @@ class TestSearchIngredientHierarchy:
         assert ingredient["full_name"] == "TestVodka009"
         assert "hierarchy" in ingredient
         assert ingredient["hierarchy"] == ["TestVodka009"]
+
+
+def _without_duplicate_tags(recipes):
+    """The legacy query repeats each tag once per ingredient row; collapse those"""
+    for recipe in recipes:
+        unique = []
+        for tag in recipe["tags"]:
+            if tag not in unique:
+                unique.append(tag)
+        recipe["tags"] = unique
+    return recipes
+
+
+class TestSearchJsonAssembly:
+    """Test that server-side JSON assembly matches the legacy row fan-out path"""
+
+    def _build_recipes(self, db):
+        spirits = db.create_ingredient(
+            {"name": "TestSpirits010", "description": "Spirits", "parent_id": None}
+        )
+        gin = db.create_ingredient(
+            {"name": "TestGin010", "description": "Gin", "parent_id": spirits["id"]}
+        )
+        lime = db.create_ingredient(
+            {"name": "TestLime010", "description": "Lime", "parent_id": None}
+        )
+        first = db.create_recipe(
+            {
+                "name": "Test Json Gimlet 010",
+                "instructions": "Shake",
+                "ingredients": [
+                    {"ingredient_id": lime["id"], "amount": 0.75},
+                    {"ingredient_id": gin["id"], "amount": 2.0},
+                ],
+            }
+        )
+        db.create_recipe(
+            {"name": "Test Json Empty 010", "instructions": "Nothing", "ingredients": []}
+        )
+        public_tag = db.create_public_tag("TestJsonPublic010")
+        private_tag = db.create_private_tag("TestJsonPrivate010", "json-user-010")
+        db.add_public_tag_to_recipe(first["id"], public_tag["id"])
+        db.add_private_tag_to_recipe(first["id"], private_tag["id"])
+
+    @pytest.mark.parametrize("sort_by", ["name", "avg_rating", "created_at"])
+    def test_json_assembly_matches_legacy(self, db_instance, sort_by):
+        """Both assembly paths should return identical recipes, ingredients and tags"""
+        db = db_instance
+        self._build_recipes(db)
+
+        kwargs = dict(
+            search_params={"q": "Test Json"},
+            limit=10,
+            offset=0,
+            sort_by=sort_by,
+            user_id="json-user-010",
+        )
+        json_results = db.search_recipes_paginated(**kwargs)
+        legacy_results = db.search_recipes_paginated(**kwargs, assemble_in_db=False)
+
+        assert json_results == _without_duplicate_tags(legacy_results)
+        gimlet = next(r for r in json_results if r["name"] == "Test Json Gimlet 010")
+        assert gimlet["tags"] == [
+            {"id": gimlet["tags"][0]["id"], "name": "TestJsonPublic010", "type": "public"},
+            {"id": gimlet["tags"][1]["id"], "name": "TestJsonPrivate010", "type": "private"},
+        ]
+        assert [i["full_name"] for i in gimlet["ingredients"]] == [
+            "TestLime010",
+            "TestGin010 [TestSpirits010]",
+        ]
+
+    def test_json_assembly_matches_legacy_with_cursor(self, db_instance):
+        """Keyset pages and cursors should be identical on both paths"""
+        db = db_instance
+        self._build_recipes(db)
+
+        kwargs = dict(
+            search_params={"q": "Test Json"}, limit=1, return_pagination=True
+        )
+        json_page = db.search_recipes_paginated(**kwargs)
+        legacy_page = db.search_recipes_paginated(**kwargs, assemble_in_db=False)
+
+        _without_duplicate_tags(legacy_page["recipes"])
+        assert json_page == legacy_page
+        assert json_page["has_next"] is True
+
+        next_json = db.search_recipes_paginated(**kwargs, cursor=json_page["next_cursor"])
+        next_legacy = db.search_recipes_paginated(
+            **kwargs, cursor=json_page["next_cursor"], assemble_in_db=False
+        )
+        _without_duplicate_tags(next_legacy["recipes"])
+        assert next_json == next_legacy
+
+    def test_json_assembly_hides_other_users_private_tags(self, db_instance):
+        """Private tags should only be returned to their owner"""
+        db = db_instance
+        self._build_recipes(db)
+
+        results = db.search_recipes_paginated(
+            search_params={"q": "Test Json Gimlet"}, user_id="someone-else"
+        )
+
+        assert [tag["name"] for tag in results[0]["tags"]] == ["TestJsonPublic010"]